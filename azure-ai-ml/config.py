@@ -98,6 +98,8 @@ class Settings(BaseSettings):
     EDGAR_SCRAPER_START_DATE: str = Field(default="2015-01-01", env="EDGAR_SCRAPER_START_DATE")
     EDGAR_SCRAPER_RATE_LIMIT: float = Field(default=0.11, env="EDGAR_SCRAPER_RATE_LIMIT")  # 10 req/sec max
     EDGAR_SCRAPER_MAX_COMPANIES: int = Field(default=10000, env="EDGAR_SCRAPER_MAX_COMPANIES")
+    EDGAR_TICKER_INDEX_PATH: str = Field(default="./data/edgar/company_tickers_index.json", env="EDGAR_TICKER_INDEX_PATH")  # Shareable with the ingestion service
+    EDGAR_TICKER_INDEX_TTL_SECONDS: int = Field(default=86400, env="EDGAR_TICKER_INDEX_TTL_SECONDS")
 
     # Knowledge Base
     KNOWLEDGE_BASE_CHUNK_SIZE: int = Field(default=500, env="KNOWLEDGE_BASE_CHUNK_SIZE")
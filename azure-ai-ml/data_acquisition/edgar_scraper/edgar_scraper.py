@@ -16,7 +16,7 @@ import asyncio
 import re
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass, asdict
 import json
 
@@ -27,13 +27,40 @@ from loguru import logger
 from azure.storage.blob import BlobServiceClient
 from azure.identity import DefaultAzureCredential
 import pandas as pd
-from tenacity import retry, stop_after_attempt, wait_exponential
 
 try:
     from config import settings
 except ImportError:
     from ...config import settings
 
+# Shared EDGAR crawl library (installed from lib/edgar_crawl in the image)
+try:
+    from edgar_crawl import (
+        CompanyTicker,
+        ConditionalCache,
+        CrawlCheckpoint,
+        FetchResult,
+        GovernedFetcher,
+        StagedCrawler,
+        TickerIndex,
+        TokenBucket,
+    )
+except ImportError:
+    # Fallback for local development
+    import os
+    import sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'lib'))
+    from edgar_crawl import (
+        CompanyTicker,
+        ConditionalCache,
+        CrawlCheckpoint,
+        FetchResult,
+        GovernedFetcher,
+        StagedCrawler,
+        TickerIndex,
+        TokenBucket,
+    )
+
 
 @dataclass
 class Filing:
@@ -151,7 +178,8 @@ class EDGARScraper:
     SEC EDGAR scraper for collecting financial statement data
 
     Features:
-    - Rate limiting (10 requests/second per SEC guidelines)
+    - Rate limiting (10 requests/second per SEC guidelines, shared by concurrent workers)
+    - Conditional GETs (ETag / Last-Modified) against a local response cache
     - Retry logic with exponential backoff
     - XBRL parsing
     - Azure Blob Storage integration
@@ -170,7 +198,7 @@ class EDGARScraper:
     }
 
     # Rate limiting: 10 requests per second max per SEC rules
-    REQUEST_DELAY = 0.11  # seconds between requests
+    MAX_REQUESTS_PER_SECOND = 10.0
 
     # Form types to scrape
     FORM_TYPES = {
@@ -188,10 +216,21 @@ class EDGARScraper:
         azure_storage_connection_string: Optional[str] = None,
         blob_container: str = "edgar-filings",
         output_dir: Path = Path("./data/edgar"),
+        max_requests_per_second: float = MAX_REQUESTS_PER_SECOND,
+        cache_dir: Optional[Path] = None,
+        ticker_index_path: Optional[Path] = None,
     ):
         self.output_dir = output_dir
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+
+        # Ticker -> CIK lookups, loaded once per process (shared file with the ingestion service)
+        self.ticker_index = TickerIndex.shared(
+            f"{self.BASE_URL}/files/company_tickers.json",
+            ticker_index_path or settings.EDGAR_TICKER_INDEX_PATH,
+            settings.EDGAR_TICKER_INDEX_TTL_SECONDS,
+        )
+
         # Azure Blob Storage for cloud storage
         if azure_storage_connection_string:
             self.blob_service_client = BlobServiceClient.from_connection_string(
@@ -213,6 +252,14 @@ class EDGARScraper:
             headers=self.HEADERS,
             timeout=httpx.Timeout(30.0),
             follow_redirects=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+        )
+        # Every request, from any concurrent worker, takes a slot from one governor;
+        # responses are revalidated against the on-disk cache with conditional GETs
+        self.fetcher = GovernedFetcher(
+            self.client,
+            TokenBucket.shared("edgar", max_requests_per_second),
+            cache=ConditionalCache(str(cache_dir or self.output_dir / ".http_cache")),
         )
 
         # Track scraped CIKs
@@ -226,37 +273,36 @@ class EDGARScraper:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.client.aclose()
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-    async def _get(self, url: str) -> httpx.Response:
-        """HTTP GET with rate limiting and retry logic"""
-        await asyncio.sleep(self.REQUEST_DELAY)  # Rate limiting
-        response = await self.client.get(url)
-        response.raise_for_status()
-        return response
+    async def _get(self, url: str) -> FetchResult:
+        """Governed GET with conditional revalidation and retry on 429 / 5xx"""
+        return await self.fetcher.get(url)
+
+    async def _get_with_validators(self, url: str, validators: Dict[str, str]) -> FetchResult:
+        """Governed GET with caller-managed validators (bypasses the response cache)"""
+        return await self.fetcher.get(url, validators=validators)
 
     async def get_company_cik(self, ticker: str) -> Optional[str]:
         """Get CIK number for a ticker symbol"""
-        # SEC provides a company tickers JSON file
-        url = f"{self.BASE_URL}/files/company_tickers.json"
         try:
-            response = await self._get(url)
-            data = response.json()
-
-            # Search for ticker
-            ticker_upper = ticker.upper()
-            for item in data.values():
-                if item['ticker'] == ticker_upper:
-                    # CIK needs to be 10 digits with leading zeros
-                    cik = str(item['cik_str']).zfill(10)
-                    logger.info(f"Found CIK {cik} for ticker {ticker}")
-                    return cik
-
-            logger.warning(f"CIK not found for ticker {ticker}")
-            return None
+            await self.ticker_index.ensure_fresh(self._get_with_validators)
         except Exception as e:
             logger.error(f"Error fetching CIK for {ticker}: {e}")
             return None
 
+        company = self.ticker_index.get(ticker)
+        if company is None:
+            logger.warning(f"CIK not found for ticker {ticker}")
+            return None
+
+        # CIK needs to be 10 digits with leading zeros
+        logger.info(f"Found CIK {company.cik_padded} for ticker {ticker}")
+        return company.cik_padded
+
+    async def search_companies(self, name: str, limit: int = 10) -> List[Tuple[CompanyTicker, float]]:
+        """Fuzzy search companies by name (or ticker), best match first"""
+        await self.ticker_index.ensure_fresh(self._get_with_validators)
+        return self.ticker_index.search(name, limit=limit)
+
     async def get_company_filings(
         self,
         cik: str,
@@ -301,7 +347,7 @@ class EDGARScraper:
                 response_url = str(response.url)
 
                 # Parse Atom feed
-                soup = BeautifulSoup(response.text, "xml")
+                soup = BeautifulSoup(response.content, "xml")
                 entries = soup.find_all("entry")
 
                 for entry in entries[:limit]:
@@ -321,7 +367,7 @@ class EDGARScraper:
                     try:
                         # The filing URL points to the index page, we need to get the actual document
                         index_response = await self._get(filing_url)
-                        index_soup = BeautifulSoup(index_response.text, "html.parser")
+                        index_soup = BeautifulSoup(index_response.content, "html.parser")
 
                         # Find the primary document link
                         doc_table = index_soup.find("table", {"class": "tableFile"})
@@ -461,7 +507,7 @@ class EDGARScraper:
             logger.error(f"Error parsing XBRL for {filing.accession_number}: {e}")
             return None
 
-    async def extract_audit_opinion(self, filing: Filing, document_path: Path) -> Optional[AuditOpinion]:
+    def extract_audit_opinion(self, filing: Filing, document_path: Path) -> Optional[AuditOpinion]:
         """
         Extract audit opinion from 10-K filing
 
@@ -594,7 +640,7 @@ class EDGARScraper:
             logger.error(f"Error extracting audit opinion from {filing.accession_number}: {e}")
             return None
 
-    async def extract_disclosure_notes(self, filing: Filing, document_path: Path) -> List[DisclosureNote]:
+    def extract_disclosure_notes(self, filing: Filing, document_path: Path) -> List[DisclosureNote]:
         """
         Extract disclosure notes from filing
 
@@ -678,6 +724,18 @@ class EDGARScraper:
         Returns:
             Dictionary with lists of filings, financial statements, audit opinions, disclosure notes
         """
+        fetched = await self._fetch_company(ticker, start_date, end_date)
+        if not fetched:
+            return {}
+        return await self._parse_company(fetched)
+
+    async def _fetch_company(
+        self,
+        ticker: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> Dict[str, List]:
+        """Network half of scrape_company: resolve CIK, list filings, download documents and XBRL"""
         # Get CIK
         cik = await self.get_company_cik(ticker)
         if not cik:
@@ -691,10 +749,7 @@ class EDGARScraper:
             limit=100,
         )
 
-        financial_statements = []
-        audit_opinions = []
-        disclosure_notes = []
-
+        downloads = []
         for filing in filings:
             # Download filing
             document_path = await self.download_filing(filing)
@@ -707,58 +762,109 @@ class EDGARScraper:
             else:
                 xbrl_facts = None
 
+            downloads.append((filing, document_path, xbrl_facts))
+
+        return {"filings": filings, "downloads": downloads}
+
+    async def _parse_company(self, fetched: Dict[str, List]) -> Dict[str, List]:
+        """CPU half of scrape_company: extract opinions and notes from downloaded documents"""
+        financial_statements = []
+        audit_opinions = []
+        disclosure_notes = []
+
+        # The extractors are CPU-bound; run them off the event loop so
+        # concurrent fetch workers keep using their request slots
+        for filing, document_path, xbrl_facts in fetched["downloads"]:
             # Extract audit opinion (10-K only)
             if filing.form_type in ["10-K", "20-F"]:
-                audit_opinion = await self.extract_audit_opinion(filing, document_path)
+                audit_opinion = await asyncio.to_thread(self.extract_audit_opinion, filing, document_path)
                 if audit_opinion:
                     audit_opinions.append(audit_opinion)
 
             # Extract disclosure notes
-            notes = await self.extract_disclosure_notes(filing, document_path)
+            notes = await asyncio.to_thread(self.extract_disclosure_notes, filing, document_path)
             disclosure_notes.extend(notes)
 
         return {
-            "filings": filings,
+            "filings": fetched["filings"],
             "financial_statements": financial_statements,
             "audit_opinions": audit_opinions,
             "disclosure_notes": disclosure_notes,
         }
 
-    async def scrape_sp500(self, start_date: Optional[datetime] = None) -> None:
+    def _save_company(self, ticker: str, data: Dict[str, List]) -> Path:
+        """Write one company's scrape results to the output directory"""
+        output_file = self.output_dir / f"{ticker}_data.json"
+        with open(output_file, "w") as f:
+            json_data = {
+                "ticker": ticker,
+                "scraped_at": datetime.now().isoformat(),
+                "filings": [f.to_dict() for f in data.get("filings", [])],
+                "financial_statements": [fs.to_dict() for fs in data.get("financial_statements", [])],
+                "audit_opinions": [ao.to_dict() for ao in data.get("audit_opinions", [])],
+                "disclosure_notes": [dn.to_dict() for dn in data.get("disclosure_notes", [])],
+            }
+            json.dump(json_data, f, indent=2)
+        return output_file
+
+    async def scrape_sp500(
+        self,
+        start_date: Optional[datetime] = None,
+        tickers: Optional[List[str]] = None,
+        fetch_workers: int = 8,
+        parse_workers: int = 2,
+        checkpoint_path: Optional[Path] = None,
+    ) -> None:
         """
         Scrape all S&P 500 companies
 
-        This is a long-running operation (days to weeks)
+        Companies move through bounded fetch -> parse -> store worker pools
+        that share the request governor, so the crawl runs at SEC's request
+        limit instead of one company at a time. Completed tickers are
+        recorded in a checkpoint; re-running after an interruption resumes
+        with the remaining companies.
         """
         # S&P 500 tickers (would be loaded from a file in production)
-        sp500_tickers = [
+        sp500_tickers = tickers or [
             "AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "META", "TSLA", "BRK.B",
             # ... (500 total tickers)
         ]
 
-        for ticker in sp500_tickers:
+        async def fetch(ticker: str, _) -> Dict[str, List]:
             logger.info(f"Scraping {ticker}...")
-            try:
-                data = await self.scrape_company(ticker, start_date=start_date)
-
-                # Save data
-                output_file = self.output_dir / f"{ticker}_data.json"
-                with open(output_file, "w") as f:
-                    json_data = {
-                        "ticker": ticker,
-                        "scraped_at": datetime.now().isoformat(),
-                        "filings": [f.to_dict() for f in data.get("filings", [])],
-                        "financial_statements": [fs.to_dict() for fs in data.get("financial_statements", [])],
-                        "audit_opinions": [ao.to_dict() for ao in data.get("audit_opinions", [])],
-                        "disclosure_notes": [dn.to_dict() for dn in data.get("disclosure_notes", [])],
-                    }
-                    json.dump(json_data, f, indent=2)
-
-                logger.info(f"Completed {ticker}. Saved to {output_file}")
-
-            except Exception as e:
-                logger.error(f"Error scraping {ticker}: {e}")
-                continue
+            fetched = await self._fetch_company(ticker, start_date=start_date)
+            if not fetched:
+                raise ValueError(f"CIK not found for {ticker}")
+            return fetched
+
+        async def parse(ticker: str, fetched: Dict[str, List]) -> Dict[str, List]:
+            return await self._parse_company(fetched)
+
+        async def store(ticker: str, data: Dict[str, List]) -> Path:
+            output_file = await asyncio.to_thread(self._save_company, ticker, data)
+            logger.info(f"Completed {ticker}. Saved to {output_file}")
+            return output_file
+
+        checkpoint = CrawlCheckpoint(str(checkpoint_path or self.output_dir / "sp500_checkpoint.jsonl"))
+        crawler = StagedCrawler(
+            fetch, parse, store,
+            fetch_workers=fetch_workers,
+            parse_workers=parse_workers,
+            store_workers=1,
+            queue_size=4,
+            checkpoint=checkpoint,
+            checkpoint_info=lambda output_file: {"output_file": str(output_file)},
+        )
+        try:
+            report = await crawler.run([(ticker, ticker) for ticker in sp500_tickers])
+        finally:
+            checkpoint.close()
+
+        logger.info(
+            f"S&P 500 crawl finished: {len(report.results)} companies in {report.elapsed_seconds:.0f}s "
+            f"({len(report.failed)} failed, {len(report.resumed)} from checkpoint, "
+            f"fetcher {self.fetcher.stats()})"
+        )
 
 
 async def main():
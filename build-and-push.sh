@@ -64,6 +64,7 @@ for service in "${SERVICES[@]}"; do
 
   # Build the image
   docker build \
+    --build-context lib=./lib \
     -t $ACR_LOGIN_SERVER/aura/$service:$IMAGE_TAG \
     -t $ACR_LOGIN_SERVER/aura/$service:latest \
     ./services/$service
@@ -0,0 +1,32 @@
+-- =====================================================
+-- FACT BULK LOAD
+-- Purpose: One fact per (filing, concept, period, unit) so the ingestion
+--          service can COPY facts through a staging table and upsert them
+-- =====================================================
+
+SET search_path TO atlas;
+
+-- Remove duplicates left by the row-at-a-time writer, keeping the most recently filed value
+DELETE FROM facts f
+USING (
+    SELECT id,
+           ROW_NUMBER() OVER (
+               PARTITION BY filing_id, concept, start_date, end_date, unit
+               ORDER BY metadata->>'filed_date' DESC NULLS LAST, created_at DESC
+           ) AS rn
+    FROM facts
+) ranked
+WHERE f.id = ranked.id
+  AND ranked.rn > 1;
+
+-- NULLS NOT DISTINCT (PostgreSQL 15+): instant facts have no start_date
+DO $$ BEGIN
+    ALTER TABLE facts
+        ADD CONSTRAINT uq_facts_filing_concept_period_unit
+        UNIQUE NULLS NOT DISTINCT (filing_id, concept, start_date, end_date, unit);
+EXCEPTION
+    WHEN duplicate_object OR duplicate_table THEN null;
+END $$;
+
+-- The unique index leads with filing_id, so the single-column index is redundant
+DROP INDEX IF EXISTS idx_facts_filing;
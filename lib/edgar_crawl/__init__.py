@@ -0,0 +1,44 @@
+"""
+SEC EDGAR Crawling Library
+
+Shared by the ingestion service and the azure-ai-ml EDGAR scraper.
+
+Provides:
+- Process-wide request governor (SEC's 10 requests/second)
+- Conditional GETs with an on-disk ETag / Last-Modified cache
+- Backoff on 429 / 5xx and streamed response bodies
+- Resumable, staged fetch -> parse -> store crawls
+- Local ticker / CIK / company-name index
+"""
+
+from .crawler import (
+    SEC_MAX_REQUESTS_PER_SECOND,
+    ConditionalCache,
+    CrawlCheckpoint,
+    CrawlReport,
+    FetchResult,
+    Finished,
+    GovernedFetcher,
+    StagedCrawler,
+    StreamedBody,
+    TokenBucket,
+)
+from .ticker_index import DEFAULT_TTL_SECONDS, CompanyTicker, TickerIndex, normalize_name, normalize_ticker
+
+__all__ = [
+    "SEC_MAX_REQUESTS_PER_SECOND",
+    "DEFAULT_TTL_SECONDS",
+    "TokenBucket",
+    "ConditionalCache",
+    "GovernedFetcher",
+    "FetchResult",
+    "StreamedBody",
+    "CrawlCheckpoint",
+    "CrawlReport",
+    "Finished",
+    "StagedCrawler",
+    "CompanyTicker",
+    "TickerIndex",
+    "normalize_ticker",
+    "normalize_name",
+]
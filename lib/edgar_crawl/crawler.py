@@ -0,0 +1,621 @@
+"""
+Rate-governed, resumable crawling primitives for SEC EDGAR
+
+- TokenBucket: process-wide request governor. SEC allows 10 requests/second
+  per client, so every EDGAR request - from any worker - takes a slot here.
+- ConditionalCache: on-disk ETag / Last-Modified cache. Re-crawls send
+  conditional GETs and reuse the stored body on 304 Not Modified.
+- GovernedFetcher: GET through the governor and cache, with backoff on
+  429 / 5xx (honouring Retry-After). open_stream() yields the body in
+  chunks for incremental parsing, writing it through to the cache.
+- CrawlCheckpoint: append-only JSONL log of finished items, so an
+  interrupted crawl resumes without refetching completed companies.
+- StagedCrawler: bounded fetch -> parse -> store worker pools.
+
+Reference: https://www.sec.gov/os/accessing-edgar-data
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+SEC_MAX_REQUESTS_PER_SECOND = 10.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+class TokenBucket:
+    """
+    Async request governor (GCRA token bucket)
+
+    acquire() reserves the next free slot synchronously and then sleeps until
+    it is due, so concurrent callers are spaced at exactly 1/rate without a
+    lock. With burst=1 no one-second window ever sees more than `rate`
+    requests.
+    """
+
+    _shared: Dict[str, "TokenBucket"] = {}
+
+    def __init__(self, rate: float = SEC_MAX_REQUESTS_PER_SECOND, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.interval = 1.0 / rate
+        self._tat = 0.0  # Theoretical arrival time of the next request
+
+        self.requests = 0
+        self.waited_seconds = 0.0
+        self.pauses = 0
+
+    @classmethod
+    def shared(cls, name: str, rate: float = SEC_MAX_REQUESTS_PER_SECOND, burst: int = 1) -> "TokenBucket":
+        """Process-wide bucket for a named upstream (first caller sets the rate)"""
+        bucket = cls._shared.get(name)
+        if bucket is None:
+            bucket = cls._shared[name] = cls(rate, burst)
+        return bucket
+
+    def reserve(self) -> float:
+        """Reserve a slot; returns seconds to wait before using it"""
+        now = time.monotonic()
+        tat = max(self._tat, now)
+        wait = max(0.0, tat - (self.burst - 1) * self.interval - now)
+        self._tat = tat + self.interval
+        self.requests += 1
+        self.waited_seconds += wait
+        return wait
+
+    async def acquire(self):
+        """Wait for the next request slot"""
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold every caller back, e.g. after a 429 from SEC"""
+        self._tat = max(self._tat, time.monotonic() + seconds)
+        self.pauses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "requests": self.requests,
+            "waited_seconds": round(self.waited_seconds, 3),
+            "pauses": self.pauses,
+        }
+
+
+class ConditionalCache:
+    """
+    On-disk response cache keyed by URL, storing ETag / Last-Modified validators
+
+    Each URL gets <sha256>.body and <sha256>.json in the cache directory;
+    both are written via rename so a crash never leaves a torn entry.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:40]
+        return self.directory / f"{digest}.json", self.directory / f"{digest}.body"
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for a cached URL"""
+        meta_path, body_path = self._paths(url)
+        if not meta_path.exists() or not body_path.exists():
+            return {}
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def body_path(self, url: str) -> Path:
+        return self._paths(url)[1]
+
+    def load(self, url: str) -> Optional[bytes]:
+        _, body_path = self._paths(url)
+        try:
+            return body_path.read_bytes()
+        except OSError:
+            return None
+
+    def store(self, url: str, headers: httpx.Headers, content: bytes):
+        """Cache a 200 response if it carries a validator"""
+        writer = self.open_writer(url, headers)
+        if writer is None:
+            return
+        writer.write(content)
+        writer.commit()
+
+    def open_writer(self, url: str, headers: httpx.Headers) -> Optional["CacheWriter"]:
+        """Writer for a streamed 200 response, or None if it carries no validator"""
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if not etag and not last_modified:
+            return None
+        meta_path, body_path = self._paths(url)
+        return CacheWriter(url, meta_path, body_path, etag, last_modified)
+
+
+class CacheWriter:
+    """Streams a body into the cache; nothing is visible until commit()"""
+
+    def __init__(self, url: str, meta_path: Path, body_path: Path, etag: Optional[str], last_modified: Optional[str]):
+        self.url = url
+        self.meta_path = meta_path
+        self.body_path = body_path
+        self.etag = etag
+        self.last_modified = last_modified
+        self.size = 0
+        self._tmp_path = body_path.with_suffix(body_path.suffix + ".tmp")
+        self._file = open(self._tmp_path, "wb")
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self):
+        self._file.close()
+        os.replace(self._tmp_path, self.body_path)
+        _atomic_write(self.meta_path, json.dumps({
+            "url": self.url,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "size": self.size,
+            "cached_at": time.time(),
+        }).encode("utf-8"))
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+def _atomic_write(path: Path, data: bytes):
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class FetchResult:
+    """
+    Body of a governed GET; not_modified is True on 304. The content is the
+    cached body, or empty when the caller supplied its own validators.
+    """
+    url: str
+    status_code: int
+    content: bytes
+    not_modified: bool = False
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class GovernedFetcher:
+    """GET requests through a shared TokenBucket and optional ConditionalCache"""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        governor: TokenBucket,
+        cache: Optional[ConditionalCache] = None,
+        max_retries: int = 4,
+        backoff: float = 1.0
+    ):
+        self.client = client
+        self.governor = governor
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.requests = 0
+        self.not_modified = 0
+        self.retries = 0
+        self.bytes_downloaded = 0
+
+    async def get(self, url: str, conditional: bool = True, validators: Optional[Dict[str, str]] = None) -> FetchResult:
+        """
+        Fetch a URL, revalidating against the cache when possible
+
+        Args:
+            url: URL to fetch
+            conditional: Revalidate against the ConditionalCache entry
+            validators: Caller-managed If-None-Match / If-Modified-Since headers.
+                The cache is bypassed and a 304 returns an empty body.
+
+        Raises:
+            httpx.HTTPStatusError: Non-retryable status, or retries exhausted
+            httpx.TransportError: Connection failures after retries
+        """
+        cache = self.cache if validators is None else None
+        headers = validators or (cache.validators(url) if cache and conditional else {})
+
+        for attempt in range(self.max_retries + 1):
+            await self.governor.acquire()
+            self.requests += 1
+            try:
+                response = await self.client.get(url, headers=headers)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                logger.warning(f"EDGAR request failed ({e!r}), retrying {url}")
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            if response.status_code == 304 and headers:
+                if cache is None:
+                    self.not_modified += 1
+                    return FetchResult(url, 304, b"", not_modified=True, headers=dict(response.headers))
+                content = await asyncio.to_thread(cache.load, url)
+                if content is not None:
+                    self.not_modified += 1
+                    return FetchResult(url, 304, content, not_modified=True, headers=dict(response.headers))
+                # Cache entry vanished between validators() and load(): refetch in full
+                headers = {}
+                continue
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = _retry_after(response) or self.backoff * 2 ** attempt
+                if response.status_code == 429:
+                    self.governor.pause(delay)
+                self.retries += 1
+                logger.warning(f"EDGAR returned {response.status_code}, retrying {url} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            content = response.content
+            self.bytes_downloaded += len(content)
+            if cache:
+                await asyncio.to_thread(cache.store, url, response.headers, content)
+            return FetchResult(url, response.status_code, content, headers=dict(response.headers))
+
+        raise httpx.HTTPError(f"Retries exhausted for {url}")
+
+    @asynccontextmanager
+    async def open_stream(self, url: str, conditional: bool = True) -> AsyncIterator["StreamedBody"]:
+        """
+        Fetch a URL as a chunked stream instead of buffering the whole body
+
+        Retries apply until the body starts. A 200 body is written through to
+        the cache as it is read; on 304 the cached body is streamed from disk.
+
+        Usage:
+            async with fetcher.open_stream(url) as body:
+                async for chunk in body.iter_bytes():
+                    parser.feed(chunk)
+        """
+        headers = self.cache.validators(url) if self.cache and conditional else {}
+
+        for attempt in range(self.max_retries + 1):
+            await self.governor.acquire()
+            self.requests += 1
+            request = self.client.build_request("GET", url, headers=headers)
+            try:
+                response = await self.client.send(request, stream=True)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                logger.warning(f"EDGAR request failed ({e!r}), retrying {url}")
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            try:
+                if response.status_code == 304 and headers:
+                    body_path = self.cache.body_path(url)
+                    if body_path.exists():
+                        self.not_modified += 1
+                        yield StreamedBody(url, 304, _iter_file(body_path), not_modified=True)
+                        return
+                    headers = {}
+                    continue
+
+                if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    delay = _retry_after(response) or self.backoff * 2 ** attempt
+                    if response.status_code == 429:
+                        self.governor.pause(delay)
+                    self.retries += 1
+                    logger.warning(f"EDGAR returned {response.status_code}, retrying {url} in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+
+                response.raise_for_status()
+                writer = self.cache.open_writer(url, response.headers) if self.cache else None
+                body = StreamedBody(url, response.status_code, self._iter_response(response, writer))
+                try:
+                    yield body
+                except BaseException:
+                    if writer:
+                        writer.discard()
+                    raise
+                if writer:
+                    if body.complete:
+                        await asyncio.to_thread(writer.commit)
+                    else:
+                        writer.discard()
+                return
+            finally:
+                await response.aclose()
+
+        raise httpx.HTTPError(f"Retries exhausted for {url}")
+
+    async def _iter_response(self, response: httpx.Response, writer: Optional[CacheWriter]) -> AsyncIterator[bytes]:
+        async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+            self.bytes_downloaded += len(chunk)
+            if writer:
+                writer.write(chunk)
+            yield chunk
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "retries": self.retries,
+            "bytes_downloaded": self.bytes_downloaded,
+            "governor": self.governor.stats(),
+        }
+
+
+class StreamedBody:
+    """Body of a streamed GET; iterate it once with iter_bytes()"""
+
+    def __init__(self, url: str, status_code: int, chunks: AsyncIterator[bytes], not_modified: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.not_modified = not_modified
+        self.complete = False
+        self.bytes_read = 0
+        self._chunks = chunks
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        async for chunk in self._chunks:
+            self.bytes_read += len(chunk)
+            yield chunk
+        self.complete = True
+
+
+async def _iter_file(path: Path, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CrawlCheckpoint:
+    """
+    Append-only JSONL record of crawl progress
+
+    One line per finished item ({"key", "status", ...}); the last line for a
+    key wins. Only status "done" is skipped on resume, so failed items are
+    retried. A torn final line from a crash is ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[entry["key"]] = entry
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def is_done(self, key: str) -> bool:
+        entry = self.entries.get(key)
+        return bool(entry) and entry.get("status") == "done"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def record(self, key: str, status: str, **info):
+        """Durably record an item's outcome"""
+        entry = {"key": key, "status": status, "at": time.time(), **info}
+        self.entries[key] = entry
+        self._file.write(json.dumps(entry, default=str) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class Finished:
+    """Returned by a stage to complete an item early with `value` (e.g. unchanged since last crawl)"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+@dataclass
+class CrawlReport:
+    """Outcome of a StagedCrawler run; `results` follows input order"""
+    results: List[Tuple[str, Any]] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    resumed: List[str] = field(default_factory=list)
+    finished_early: int = 0
+    elapsed_seconds: float = 0.0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def items_per_second(self) -> float:
+        processed = len(self.results) + len(self.failed) - len(self.resumed)
+        return processed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+Stage = Callable[[Any, Any], Awaitable[Any]]
+
+_STOP = object()
+
+
+class StagedCrawler:
+    """
+    Bounded fetch -> parse -> store worker pools
+
+    Each stage is an async callable (item, previous_output) -> output. The
+    queues between stages are bounded, so fast fetchers wait for parsing and
+    storage instead of piling up downloaded payloads. A stage may return
+    Finished(value) to skip the remaining stages for an item.
+
+    With a checkpoint, items already recorded as done are not crawled again;
+    their checkpoint entry is passed to `resume` (if given) to rebuild the
+    result.
+    """
+
+    def __init__(
+        self,
+        fetch: Stage,
+        parse: Stage,
+        store: Stage,
+        fetch_workers: int = 8,
+        parse_workers: int = 2,
+        store_workers: int = 1,
+        queue_size: int = 8,
+        checkpoint: Optional[CrawlCheckpoint] = None,
+        checkpoint_info: Optional[Callable[[Any], Dict[str, Any]]] = None,
+        resume: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None
+    ):
+        self.stages = [("fetch", fetch, fetch_workers), ("parse", parse, parse_workers), ("store", store, store_workers)]
+        self.queue_size = max(1, queue_size)
+        self.checkpoint = checkpoint
+        self.checkpoint_info = checkpoint_info
+        self.resume = resume
+
+    async def run(self, items: Iterable[Tuple[str, Any]]) -> CrawlReport:
+        """Crawl (key, item) pairs; failures are reported, not raised"""
+        report = CrawlReport(stage_seconds={name: 0.0 for name, _, _ in self.stages})
+        started = time.perf_counter()
+        order: List[str] = []
+        outcomes: Dict[str, Any] = {}
+
+        source: asyncio.Queue = asyncio.Queue()
+        for key, item in items:
+            order.append(key)
+            if self.checkpoint and self.checkpoint.is_done(key):
+                report.resumed.append(key)
+                if self.resume:
+                    try:
+                        outcomes[key] = await self.resume(self.checkpoint.get(key))
+                    except Exception as e:
+                        logger.warning(f"Could not restore checkpointed result for {key}: {e}")
+                continue
+            source.put_nowait((key, item, None))
+
+        queues = [source] + [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages[1:]]
+
+        async def complete(key: str, value: Any):
+            outcomes[key] = value
+            if self.checkpoint:
+                info = self.checkpoint_info(value) if self.checkpoint_info else {}
+                self.checkpoint.record(key, "done", **info)
+
+        def fail(key: str, stage_name: str, error: Exception):
+            report.failed[key] = f"{stage_name}: {error}"
+            logger.error(f"Crawl of {key} failed during {stage_name}: {error}")
+            if self.checkpoint:
+                self.checkpoint.record(key, "failed", stage=stage_name, error=str(error))
+
+        async def worker(index: int):
+            name, stage, _ = self.stages[index]
+            inbox = queues[index]
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            while True:
+                if inbox is source and inbox.empty():
+                    return
+                entry = await inbox.get()
+                if entry is _STOP:
+                    return
+                key, item, value = entry
+
+                began = time.perf_counter()
+                try:
+                    value = await stage(item, value)
+                except Exception as e:
+                    fail(key, name, e)
+                    continue
+                finally:
+                    report.stage_seconds[name] += time.perf_counter() - began
+
+                if isinstance(value, Finished):
+                    report.finished_early += 1
+                    await complete(key, value.value)
+                elif outbox is not None:
+                    await outbox.put((key, item, value))
+                else:
+                    await complete(key, value)
+
+        pools = [
+            [asyncio.create_task(worker(index)) for _ in range(max(1, workers))]
+            for index, (_, _, workers) in enumerate(self.stages)
+        ]
+
+        try:
+            for index, tasks in enumerate(pools):
+                await asyncio.gather(*tasks)
+                if index + 1 < len(pools):
+                    for _ in pools[index + 1]:
+                        await queues[index + 1].put(_STOP)
+        finally:
+            for tasks in pools:
+                for task in tasks:
+                    task.cancel()
+
+        report.results = [(key, outcomes[key]) for key in order if key in outcomes]
+        report.elapsed_seconds = time.perf_counter() - started
+        logger.info(
+            f"Crawl complete: {len(report.results)} succeeded, {len(report.failed)} failed, "
+            f"{len(report.resumed)} resumed from checkpoint in {report.elapsed_seconds:.1f}s"
+        )
+        return report
@@ -0,0 +1,15 @@
+"""Setup script for edgar_crawl library"""
+
+from setuptools import setup
+
+setup(
+    name="edgar-crawl",
+    version="1.0.0",
+    description="Rate-governed SEC EDGAR crawling and ticker index for Aura Audit AI",
+    packages=["edgar_crawl"],
+    package_dir={"edgar_crawl": "."},
+    install_requires=[
+        "httpx>=0.26.0",
+    ],
+    python_requires=">=3.11",
+)
@@ -0,0 +1,278 @@
+"""
+Local ticker / CIK / company-name index for SEC EDGAR
+
+SEC publishes the ticker mapping as one multi-megabyte company_tickers.json.
+Rather than downloading and scanning it for every lookup, TickerIndex keeps
+it as in-memory dicts, loaded once per process, and persists a compact copy
+to disk. When the copy is older than the TTL it is revalidated with a
+conditional GET, so an unchanged mapping costs one 304.
+
+The ingestion service and the azure-ai-ml scraper share the on-disk
+format: point EDGAR_TICKER_INDEX_PATH at the same file and either reuses
+the other's refresh.
+"""
+import asyncio
+import difflib
+import json
+import logging
+import os
+import re
+import time
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+FAILED_REFRESH_RETRY_SECONDS = 300
+INDEX_FORMAT_VERSION = 1
+
+# Dropped when matching names, so "Apple" finds "Apple Inc."
+_NAME_STOPWORDS = {
+    "the", "inc", "incorporated", "corp", "corporation", "co", "company", "companies",
+    "ltd", "limited", "plc", "llc", "lp", "llp", "sa", "nv", "ag", "se", "de",
+}
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# (url, validators) -> response with status_code, headers and content
+Getter = Callable[[str, Dict[str, str]], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class CompanyTicker:
+    """One row of SEC's ticker mapping"""
+    cik: int
+    ticker: str
+    name: str
+
+    @property
+    def cik_padded(self) -> str:
+        return f"{self.cik:010d}"
+
+
+def normalize_ticker(ticker: str) -> str:
+    """SEC writes share classes with a dash: BRK.B and BRK/B become BRK-B"""
+    return ticker.strip().upper().replace(".", "-").replace("/", "-")
+
+
+def normalize_name(name: str) -> str:
+    tokens = _TOKEN_RE.findall(name.lower().replace("&", " and "))
+    kept = [token for token in tokens if token not in _NAME_STOPWORDS]
+    return " ".join(kept or tokens)
+
+
+class TickerIndex:
+    """
+    Ticker, CIK and fuzzy company-name lookups over SEC's ticker mapping
+
+    Use TickerIndex.shared() so every client in the process uses one copy.
+    Call ensure_fresh() before lookups; it returns immediately while the
+    index is within its TTL.
+    """
+
+    _instances: Dict[Tuple[str, Optional[str]], "TickerIndex"] = {}
+
+    def __init__(self, url: str, path: Optional[str] = None, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        """
+        Args:
+            url: company_tickers.json URL
+            path: File to persist the index to (memory only if None)
+            ttl_seconds: Age after which the index is revalidated with EDGAR
+        """
+        self.url = url
+        self.path = Path(path) if path else None
+        self.ttl_seconds = ttl_seconds
+
+        self.companies: List[CompanyTicker] = []
+        self.by_ticker: Dict[str, CompanyTicker] = {}
+        self.by_cik: Dict[int, List[CompanyTicker]] = {}
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.fetched_at = 0.0
+
+        self._next_refresh = 0.0
+        self._names: List[str] = []
+        self._tokens: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = []
+        self._locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def shared(cls, url: str, path: Optional[str] = None, ttl_seconds: float = DEFAULT_TTL_SECONDS) -> "TickerIndex":
+        """Process-wide index per (url, path); the first caller sets the TTL"""
+        key = (url, str(path) if path else None)
+        if key not in cls._instances:
+            cls._instances[key] = cls(url, path, ttl_seconds)
+        return cls._instances[key]
+
+    def __len__(self) -> int:
+        return len(self.companies)
+
+    @property
+    def is_stale(self) -> bool:
+        return not self.companies or time.time() >= self._next_refresh
+
+    async def ensure_fresh(self, get: Getter):
+        """
+        Load the index from disk or EDGAR if it is missing or past its TTL
+
+        Args:
+            get: Governed GET, called as get(url, validators)
+
+        Raises:
+            httpx.HTTPError: EDGAR could not be reached and no copy is available
+        """
+        if not self.is_stale:
+            return
+
+        loop = asyncio.get_running_loop()
+        lock = self._locks.setdefault(loop, asyncio.Lock())
+        async with lock:
+            if not self.is_stale:
+                return  # Refreshed by a concurrent caller
+
+            # Another process (or a previous run) may have refreshed the file
+            if self.path and await asyncio.to_thread(self._load_file) and not self.is_stale:
+                return
+
+            validators = {}
+            if self.companies and self.etag:
+                validators["If-None-Match"] = self.etag
+            if self.companies and self.last_modified:
+                validators["If-Modified-Since"] = self.last_modified
+
+            try:
+                response = await get(self.url, validators)
+            except Exception as e:
+                if not self.companies:
+                    raise
+                logger.warning(f"Ticker index refresh failed ({e}), using copy from {time.ctime(self.fetched_at)}")
+                self._next_refresh = time.time() + FAILED_REFRESH_RETRY_SECONDS
+                return
+
+            if response.status_code == 304 and self.companies:
+                logger.info("Ticker index unchanged on EDGAR")
+            else:
+                data = await asyncio.to_thread(json.loads, response.content)
+                self._build([
+                    (int(row["cik_str"]), row["ticker"], row["title"])
+                    for row in data.values()
+                ])
+                self.etag = response.headers.get("etag")
+                self.last_modified = response.headers.get("last-modified")
+                logger.info(f"Ticker index refreshed from EDGAR: {len(self.companies)} tickers")
+
+            self.fetched_at = time.time()
+            self._next_refresh = self.fetched_at + self.ttl_seconds
+            if self.path:
+                await asyncio.to_thread(self._save_file)
+
+    def get(self, ticker: str) -> Optional[CompanyTicker]:
+        return self.by_ticker.get(normalize_ticker(ticker))
+
+    def tickers_for_cik(self, cik: Any) -> List[CompanyTicker]:
+        return self.by_cik.get(int(cik), [])
+
+    def search(self, query: str, limit: int = 10, min_score: float = 0.6) -> List[Tuple[CompanyTicker, float]]:
+        """
+        Fuzzy company-name search (a ticker typed as the query scores 1.0)
+
+        Candidates share at least one name token with the query, allowing
+        for typos; they are ranked by difflib similarity of the normalized
+        names, with names containing every query word ranked at least 0.75.
+        One result per CIK.
+
+        Returns:
+            (company, score) pairs, best first
+
+        Raises:
+            ValueError: limit is negative
+        """
+        if limit < 0:
+            raise ValueError(f"limit must be non-negative, got {limit}")
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+
+        query_tokens = normalized.split()
+        candidates: Set[int] = set()
+        for token in query_tokens:
+            if token in self._tokens:
+                candidates |= self._tokens[token]
+                continue
+            for match in difflib.get_close_matches(token, self._vocabulary, n=3, cutoff=0.8):
+                candidates |= self._tokens[match]
+
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        matcher.set_seq2(normalized)
+        scored: Dict[int, Tuple[CompanyTicker, float]] = {}
+
+        exact = self.get(query)
+        if exact:
+            scored[exact.cik] = (exact, 1.0)
+
+        for position in candidates:
+            company = self.companies[position]
+            name = self._names[position]
+            matcher.set_seq1(name)
+            score = matcher.ratio()
+            # A name containing every query word ranks high even if it is much longer
+            name_tokens = set(name.split())
+            coverage = sum(1 for token in query_tokens if token in name_tokens) / len(query_tokens)
+            score = max(score, coverage * (0.75 + 0.25 * score))
+            if score >= min_score and score > scored.get(company.cik, (None, 0.0))[1]:
+                scored[company.cik] = (company, score)
+
+        return sorted(scored.values(), key=lambda pair: pair[1], reverse=True)[:limit]
+
+    def _build(self, rows: List[Tuple[int, str, str]]):
+        companies, by_ticker, by_cik, names, tokens = [], {}, {}, [], {}
+        for cik, ticker, name in rows:
+            company = CompanyTicker(cik, normalize_ticker(ticker), name)
+            position = len(companies)
+            companies.append(company)
+            # SEC lists the primary share class first
+            by_ticker.setdefault(company.ticker, company)
+            by_cik.setdefault(cik, []).append(company)
+            names.append(normalize_name(name))
+            for token in set(names[-1].split()):
+                tokens.setdefault(token, set()).add(position)
+
+        self.companies, self.by_ticker, self.by_cik = companies, by_ticker, by_cik
+        self._names, self._tokens, self._vocabulary = names, tokens, list(tokens)
+
+    def _load_file(self) -> bool:
+        """Load the persisted index if it is newer than the in-memory copy"""
+        try:
+            stored = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ticker index {self.path}: {e}")
+            return False
+
+        if stored.get("version") != INDEX_FORMAT_VERSION or stored.get("fetched_at", 0) <= self.fetched_at:
+            return False
+
+        self._build([tuple(row) for row in stored["data"]])
+        self.etag = stored.get("etag")
+        self.last_modified = stored.get("last_modified")
+        self.fetched_at = stored["fetched_at"]
+        self._next_refresh = self.fetched_at + self.ttl_seconds
+        logger.info(f"Loaded ticker index from {self.path}: {len(self.companies)} tickers")
+        return True
+
+    def _save_file(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps({
+            "version": INDEX_FORMAT_VERSION,
+            "source": self.url,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "fetched_at": self.fetched_at,
+            "fields": ["cik", "ticker", "name"],
+            "data": [[company.cik, company.ticker, company.name] for company in self.companies],
+        }))
+        os.replace(tmp_path, self.path)
@@ -7,15 +7,24 @@ Provides:
 - Automatic retries with exponential backoff
 - Request/response logging
 - Authentication token propagation
+- Pooled keep-alive connections and request coalescing
 """
 
 from .client import ServiceClient, ServiceRegistry
-from .exceptions import ServiceError, ServiceUnavailableError, ServiceTimeoutError
+from .exceptions import (
+    ServiceError,
+    ServiceUnavailableError,
+    ServiceTimeoutError,
+    ServiceAuthenticationError,
+)
+from .pool import ConnectionPoolRegistry
 
 __all__ = [
     "ServiceClient",
     "ServiceRegistry",
+    "ConnectionPoolRegistry",
     "ServiceError",
     "ServiceUnavailableError",
     "ServiceTimeoutError",
+    "ServiceAuthenticationError",
 ]
@@ -5,7 +5,7 @@ Service client with circuit breaker and retry logic
 import asyncio
 import time
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from collections import defaultdict
 
@@ -24,6 +24,7 @@ from .exceptions import (
     ServiceAuthenticationError,
     ServiceNotFoundError
 )
+from .pool import ConnectionPoolRegistry, SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -157,9 +158,9 @@ class ServiceRegistry:
         health_url = f"{config['url']}{config['health']}"
 
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.get(health_url)
-                return response.status_code == 200
+            pooled = ConnectionPoolRegistry.get(service_name)
+            response = await pooled.request("GET", health_url, timeout=timeout)
+            return response.status_code == 200
         except Exception as e:
             logger.error(f"Health check failed for {service_name}: {e}")
             return False
@@ -175,8 +176,12 @@ class ServiceClient:
     - Retry with exponential backoff
     - Authentication token propagation
     - Request/response logging
+    - Pooled keep-alive connections shared per service
+    - Coalescing of concurrent identical GETs
     """
 
+    _single_flight = SingleFlight()
+
     def __init__(
         self,
         service_name: str,
@@ -226,19 +231,19 @@ class ServiceClient:
         url = f"{self.base_url}{endpoint}"
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                logger.debug(f"[{self.service_name}] {method} {endpoint}")
+            pooled = ConnectionPoolRegistry.get(self.service_name, timeout=self.timeout)
+            logger.debug(f"[{self.service_name}] {method} {endpoint}")
 
-                response = await client.request(method, url, **kwargs)
+            response = await pooled.request(method, url, timeout=self.timeout, **kwargs)
 
-                # Record success
-                self.circuit_breaker.record_success(self.service_name)
+            # Record success
+            self.circuit_breaker.record_success(self.service_name)
 
-                logger.debug(
-                    f"[{self.service_name}] {method} {endpoint} -> {response.status_code}"
-                )
+            logger.debug(
+                f"[{self.service_name}] {method} {endpoint} -> {response.status_code}"
+            )
 
-                return response
+            return response
 
         except httpx.TimeoutException as e:
             self.circuit_breaker.record_failure(self.service_name)
@@ -257,19 +262,49 @@ class ServiceClient:
             logger.error(f"[{self.service_name}] Error: {endpoint} - {e}")
             raise ServiceError(f"Error calling {self.service_name}: {e}") from e
 
+    async def get(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        coalesce: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Execute GET request
+
+        Concurrent identical GETs (same service, endpoint, params and headers)
+        share one in-flight request; the shared result should be treated as
+        read-only. Pass coalesce=False to always issue a separate request.
+        """
+        if not coalesce:
+            return await self._get(endpoint, params, headers)
+
+        key = (
+            self.service_name,
+            endpoint,
+            self._freeze(params),
+            self._freeze(self._build_headers(headers))
+        )
+        result, shared = await self._single_flight.do(
+            key, lambda: self._get(endpoint, params, headers)
+        )
+        if shared:
+            ConnectionPoolRegistry.get(self.service_name, timeout=self.timeout).stats.coalesced += 1
+        return result
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=10),
         retry=retry_if_exception_type((ServiceTimeoutError, ServiceUnavailableError)),
         reraise=True
     )
-    async def get(
+    async def _get(
         self,
         endpoint: str,
         params: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None
     ) -> Dict[str, Any]:
-        """Execute GET request"""
+        """Execute GET request with retries"""
         response = await self._execute_request(
             "GET",
             endpoint,
@@ -283,6 +318,13 @@ class ServiceClient:
         response.raise_for_status()
         return response.json()
 
+    @staticmethod
+    def _freeze(values: Optional[Dict[str, Any]]) -> Tuple:
+        """Hashable form of a params/headers dict for request coalescing"""
+        if not values:
+            return ()
+        return tuple(sorted((str(k), repr(v)) for k, v in values.items()))
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=10),
@@ -365,6 +407,50 @@ class ServiceClient:
             return response.json()
         return {"status": "success"}
 
+    async def batch(
+        self,
+        calls: List[Dict[str, Any]],
+        concurrency: int = 10,
+        return_exceptions: bool = True
+    ) -> List[Any]:
+        """
+        Execute many calls concurrently with bounded concurrency
+
+        Args:
+            calls: List of {"method": "GET"|"POST"|"PUT"|"DELETE", "endpoint": ..., **kwargs}
+                where kwargs are passed to the matching method (params, json, headers, ...)
+            concurrency: Maximum calls in flight at once
+            return_exceptions: Return exceptions in place of results instead of raising
+
+        Returns:
+            Results in the same order as calls
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        handlers = {
+            "GET": self.get,
+            "POST": self.post,
+            "PUT": self.put,
+            "DELETE": self.delete,
+        }
+
+        async def run(call: Dict[str, Any]) -> Any:
+            call = dict(call)
+            method = call.pop("method", "GET").upper()
+            endpoint = call.pop("endpoint")
+            if method not in handlers:
+                raise ValueError(f"Unsupported method for batch call: {method}")
+            async with semaphore:
+                return await handlers[method](endpoint, **call)
+
+        return await asyncio.gather(
+            *(run(call) for call in calls),
+            return_exceptions=return_exceptions
+        )
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool stats for this service (open connections, waiters, reuse ratio)"""
+        return ConnectionPoolRegistry.stats().get(self.service_name, {})
+
     async def health_check(self) -> bool:
         """Check if service is healthy"""
         return await ServiceRegistry.check_health(self.service_name, timeout=5.0)
@@ -0,0 +1,220 @@
+"""
+Process-wide pooled HTTP clients for service-to-service calls
+
+One httpx.AsyncClient per target service is shared by every ServiceClient
+in the process, so inter-service hops reuse keep-alive connections instead
+of paying TCP/TLS setup on each request.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("SERVICE_CLIENT_MAX_CONNECTIONS", "100"))
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("SERVICE_CLIENT_MAX_KEEPALIVE", "20"))
+DEFAULT_KEEPALIVE_EXPIRY = float(os.getenv("SERVICE_CLIENT_KEEPALIVE_EXPIRY", "30"))
+DEFAULT_HTTP2 = os.getenv("SERVICE_CLIENT_HTTP2", "false").lower() in ("1", "true", "yes")
+
+
+class PoolStats:
+    """Request and connection counters for one pooled client"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.coalesced = 0
+
+    def trace(self, event_name: str, info: Dict[str, Any]):
+        """httpcore trace hook: count connections actually opened"""
+        if event_name == "connection.connect_tcp.complete":
+            self.new_connections += 1
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Share of requests served on an already-open connection"""
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1 - self.new_connections / self.requests)
+
+
+class _PooledClient:
+    """A shared AsyncClient plus its stats and owning event loop"""
+
+    def __init__(self, client: httpx.AsyncClient, limits: httpx.Limits, http2: bool, loop: asyncio.AbstractEventLoop):
+        self.client = client
+        self.limits = limits
+        self.http2 = http2
+        self.loop = loop
+        self.stats = PoolStats()
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        stats = self.stats
+        stats.requests += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions.setdefault("trace", self._trace)
+        try:
+            return await self.client.request(method, url, extensions=extensions, **kwargs)
+        finally:
+            stats.in_flight -= 1
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]):
+        self.stats.trace(event_name, info)
+
+    def snapshot(self) -> Dict[str, Any]:
+        stats = self.stats
+        pool = getattr(self.client._transport, "_pool", None)
+        connections = getattr(pool, "connections", None) or []
+        max_connections = self.limits.max_connections
+
+        return {
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+            "in_flight": stats.in_flight,
+            "waiters": max(0, stats.in_flight - max_connections) if max_connections else 0,
+            "peak_in_flight": stats.peak_in_flight,
+            "requests": stats.requests,
+            "new_connections": stats.new_connections,
+            "reuse_ratio": round(stats.reuse_ratio, 4),
+            "coalesced_requests": stats.coalesced,
+            "max_connections": max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "http2": self.http2,
+        }
+
+
+class ConnectionPoolRegistry:
+    """
+    Registry of pooled AsyncClients keyed by service name
+
+    Clients are bound to the event loop that created them; a request from a
+    different loop (e.g. a new asyncio.run in a worker or test) gets a fresh
+    client for that loop.
+    """
+
+    _clients: Dict[str, _PooledClient] = {}
+
+    max_connections: int = DEFAULT_MAX_CONNECTIONS
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY
+    http2: bool = DEFAULT_HTTP2
+
+    @classmethod
+    def configure(
+        cls,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None
+    ):
+        """Override pool limits for clients created after this call"""
+        if max_connections is not None:
+            cls.max_connections = max_connections
+        if max_keepalive_connections is not None:
+            cls.max_keepalive_connections = max_keepalive_connections
+        if keepalive_expiry is not None:
+            cls.keepalive_expiry = keepalive_expiry
+        if http2 is not None:
+            cls.http2 = http2
+
+    @classmethod
+    def get(cls, service_name: str, timeout: float = 30.0) -> _PooledClient:
+        """Get (or create) the pooled client for a service on the running loop"""
+        loop = asyncio.get_running_loop()
+        pooled = cls._clients.get(service_name)
+
+        if pooled is None or pooled.loop is not loop or pooled.client.is_closed:
+            if cls.http2 and not HTTP2_AVAILABLE:
+                logger.warning("HTTP/2 requested but 'h2' is not installed; using HTTP/1.1")
+
+            limits = httpx.Limits(
+                max_connections=cls.max_connections,
+                max_keepalive_connections=cls.max_keepalive_connections,
+                keepalive_expiry=cls.keepalive_expiry
+            )
+            http2 = cls.http2 and HTTP2_AVAILABLE
+            client = httpx.AsyncClient(timeout=timeout, limits=limits, http2=http2)
+            pooled = _PooledClient(client, limits, http2, loop)
+            cls._clients[service_name] = pooled
+            logger.info(
+                f"Pooled client created for {service_name} "
+                f"(max_connections={limits.max_connections}, "
+                f"keepalive={limits.max_keepalive_connections})"
+            )
+
+        return pooled
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, Any]]:
+        """Pool stats per service, for metrics endpoints and dashboards"""
+        return {name: pooled.snapshot() for name, pooled in cls._clients.items()}
+
+    @classmethod
+    async def aclose(cls):
+        """Close every pooled client owned by the running loop (call on shutdown)"""
+        loop = asyncio.get_running_loop()
+        for name, pooled in list(cls._clients.items()):
+            if pooled.loop is loop:
+                await pooled.client.aclose()
+                del cls._clients[name]
+
+
+class SingleFlight:
+    """
+    De-duplicate concurrent identical calls
+
+    While a call for a key is in flight, later callers with the same key
+    await the first call's result instead of issuing their own request.
+    If the first caller is cancelled, the waiting callers are not: one of
+    them runs fn again and the others wait for it.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run fn once per in-flight key; returns (result, shared)"""
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+
+        while (future := self._in_flight.get(flight_key)) is not None:
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                # Only the leader was cancelled: take over its call
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = loop.create_future()
+        self._in_flight[flight_key] = future
+        try:
+            result = await fn()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            elif not future.done():
+                future.set_exception(e)
+                # Mark retrieved so a failure with no waiters is not logged as unhandled
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._in_flight.pop(flight_key, None)
@@ -11,5 +11,8 @@ setup(
         "httpx>=0.27.0",
         "tenacity>=8.2.0",
     ],
+    extras_require={
+        "http2": ["h2>=4.1.0"],
+    },
     python_requires=">=3.11",
 )
@@ -0,0 +1,86 @@
+"""
+Benchmark companyfacts parsing: json.loads + normalize vs incremental streaming
+
+A synthetic companyfacts payload (same shape as data.sec.gov) is parsed two ways:
+  materialized  json.loads on the whole body, then normalize_company_facts
+                (the previous get_company_facts -> normalize path)
+  streaming     CompanyFactsParser fed fixed-size chunks, facts consumed in
+                FactWriter-sized batches and discarded
+
+Peak Python heap is measured with tracemalloc in a second, untimed run; the
+raw body itself is excluded because the streaming path never holds it in
+memory.
+
+Usage:
+    python scripts/benchmark_companyfacts_parse.py --facts 200000
+    python scripts/benchmark_companyfacts_parse.py --facts 500000 --concepts 5
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# Add the service path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'services', 'ingestion'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app import facts_stream  # noqa: E402
+from app.edgar import EdgarClient  # noqa: E402
+from app.fact_writer import COPY_CHUNK_SIZE  # noqa: E402
+from benchmark_edgar_crawl import build_payload  # noqa: E402
+
+
+def run_materialized(payload: bytes, concepts):
+    client = EdgarClient("http://127.0.0.1", "benchmark bench@example.com")
+    return len(client.normalize_company_facts(json.loads(payload), concepts=concepts))
+
+
+def run_streaming(payload: bytes, concepts, chunk_size: int):
+    parser = facts_stream.CompanyFactsParser(concepts)
+    body = io.BytesIO(payload)
+    batch, count = [], 0
+    for fact in facts_stream.iter_facts_from_file(body, parser, chunk_size=chunk_size):
+        batch.append(fact)
+        if len(batch) >= COPY_CHUNK_SIZE:
+            count += len(batch)
+            batch = []
+    return count + len(batch)
+
+
+def measure(label: str, fn, *args):
+    # Timed untraced; tracemalloc slows allocation-heavy code several-fold
+    began = time.perf_counter()
+    facts = fn(*args)
+    elapsed = time.perf_counter() - began
+
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<13} {elapsed:7.2f}s  {facts:>9,} facts  {facts / elapsed:>10,.0f} facts/s  peak {peak / 2 ** 20:8.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--facts", type=int, default=200000, help="Facts in the synthetic payload")
+    parser.add_argument("--concepts", type=int, default=0, help="Keep only the first N concepts (0 = all)")
+    parser.add_argument("--chunk-size", type=int, default=facts_stream.READ_CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    payload = build_payload(320193, args.facts, args.seed)
+    concepts = [f"us-gaap:Concept{c}" for c in range(args.concepts)] or None
+    backend = facts_stream.ijson.backend if facts_stream.IJSON_AVAILABLE else "unavailable (buffered fallback)"
+    print(f"Payload {len(payload) / 2 ** 20:.1f} MiB, {args.facts:,} facts, "
+          f"concept filter {args.concepts or 'off'}, ijson backend {backend}\n")
+
+    measure("materialized", run_materialized, payload, concepts)
+    measure("streaming", run_streaming, payload, concepts, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
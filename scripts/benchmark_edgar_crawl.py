@@ -0,0 +1,239 @@
+"""
+Benchmark the ingestion EDGAR crawler against a local stub of data.sec.gov
+
+A threaded stub server serves synthetic companyfacts payloads with ETag /
+Last-Modified validators, a configurable per-request latency, and counts
+requests per one-second window so SEC rate-limit compliance can be checked.
+
+Four runs are timed:
+  sequential  one company at a time with a fixed delay before every request
+              (the previous scrape_multiple_companies / scrape_sp500 behaviour)
+  crawl       StagedCrawler fetch -> parse -> store pools behind the governor
+  recrawl     the same crawl again; every payload revalidates with a 304
+  resume      a crawl interrupted halfway, then resumed from its checkpoint
+
+Storage is an in-memory no-op, so the numbers isolate fetch and parse cost.
+
+Usage:
+    python scripts/benchmark_edgar_crawl.py --companies 100 --latency 0.25
+    python scripts/benchmark_edgar_crawl.py --companies 500 --rate 10 --facts 5000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+# Add the service path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'services', 'ingestion'))
+
+from app.crawler import CrawlCheckpoint, StagedCrawler  # noqa: E402
+from app.edgar import EdgarClient  # noqa: E402
+
+REQUEST_DELAY = 0.11  # Fixed pre-request sleep used by the sequential scrapers
+LAST_MODIFIED = "Mon, 04 Nov 2024 10:00:00 GMT"
+
+
+def build_payload(cik: int, facts: int, seed: int) -> bytes:
+    """Synthetic companyfacts JSON with `facts` values across a handful of concepts"""
+    rng = random.Random(seed + cik)
+    concepts = {}
+    per_concept = max(1, facts // 20)
+    for c in range(20):
+        values = [
+            {
+                "end": f"{2010 + i % 14}-{(i % 4) * 3 + 3:02d}-{30 if (i % 4) in (1, 2) else 31}",
+                "val": rng.randrange(10 ** 6, 10 ** 11),
+                "accn": f"{cik:010d}-{i % 14 + 10}-{i:06d}",
+                "fy": 2010 + i % 14,
+                "fp": "FY" if i % 4 == 3 else f"Q{i % 4 + 1}",
+                "form": "10-K" if i % 4 == 3 else "10-Q",
+                "filed": f"{2011 + i % 14}-02-15",
+            }
+            for i in range(per_concept)
+        ]
+        concepts[f"Concept{c}"] = {"label": f"Concept {c}", "description": "", "units": {"USD": values}}
+    return json.dumps({"cik": cik, "entityName": f"Company {cik}", "facts": {"us-gaap": concepts}}).encode()
+
+
+class StubEdgar:
+    """Threaded stub of the data.sec.gov companyfacts endpoint"""
+
+    def __init__(self, ciks, facts: int, latency: float, seed: int):
+        self.payloads = {cik: build_payload(cik, facts, seed) for cik in ciks}
+        self.etags = {cik: hashlib.md5(body).hexdigest() for cik, body in self.payloads.items()}
+        self.latency = latency
+        self.per_second = Counter()
+        self.statuses = Counter()
+        self.lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.per_second[int(time.monotonic())] += 1
+                time.sleep(stub.latency)
+
+                name = self.path.rsplit("/", 1)[-1]
+                try:
+                    cik = int(name.removeprefix("CIK").removesuffix(".json"))
+                    body = stub.payloads[cik]
+                except (ValueError, KeyError):
+                    return self._reply(404, b"{}")
+
+                etag = f'"{stub.etags[cik]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self._reply(304, b"", etag)
+                return self._reply(200, body, etag)
+
+            def _reply(self, status, body, etag=None):
+                with stub.lock:
+                    stub.statuses[status] += 1
+                self.send_response(status)
+                if etag:
+                    self.send_header("ETag", etag)
+                    self.send_header("Last-Modified", LAST_MODIFIED)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        with self.lock:
+            self.per_second.clear()
+            self.statuses.clear()
+
+    def peak_per_second(self) -> int:
+        return max(self.per_second.values(), default=0)
+
+
+async def run_sequential(stub: StubEdgar, ciks) -> int:
+    """Previous behaviour: sleep, fetch, normalize, one company at a time"""
+    client = EdgarClient(stub.url, "benchmark bench@example.com")
+    facts = 0
+    async with httpx.AsyncClient() as http:
+        for cik in ciks:
+            await asyncio.sleep(REQUEST_DELAY)
+            response = await http.get(f"{stub.url}/api/xbrl/companyfacts/CIK{cik:010d}.json")
+            response.raise_for_status()
+            facts += len(client.normalize_company_facts(response.json()))
+    await client.close()
+    return facts
+
+
+async def run_crawl(stub: StubEdgar, ciks, args, cache_dir=None, checkpoint_path=None):
+    client = EdgarClient(stub.url, "benchmark bench@example.com", cache_dir=cache_dir)
+    stored = Counter()
+
+    async def fetch(cik, _):
+        return await client.fetch_company_facts(str(cik))
+
+    async def parse(cik, result):
+        return await asyncio.to_thread(lambda: client.normalize_company_facts(result.json()))
+
+    async def store(cik, facts):
+        stored["facts"] += len(facts)
+        return len(facts)
+
+    checkpoint = CrawlCheckpoint(checkpoint_path) if checkpoint_path else None
+    crawler = StagedCrawler(
+        fetch, parse, store,
+        fetch_workers=args.fetch_workers,
+        parse_workers=args.parse_workers,
+        queue_size=2,
+        checkpoint=checkpoint,
+        checkpoint_info=lambda count: {"facts": count}
+    )
+    report = await crawler.run([(f"cik:{cik}", cik) for cik in ciks])
+    if checkpoint:
+        checkpoint.close()
+    await client.close()
+    return report, stored["facts"], client.fetcher.stats()
+
+
+def show(label: str, stub: StubEdgar, elapsed: float, companies: int, facts: int, extra: str = ""):
+    statuses = ", ".join(f"{code}x{n}" for code, n in sorted(stub.statuses.items()))
+    print(
+        f"{label:<11} {elapsed:8.2f}s  {companies / elapsed:7.2f} companies/s  "
+        f"{facts:>10,} facts  peak {stub.peak_per_second():>3} req/s  [{statuses}] {extra}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--companies", type=int, default=100)
+    parser.add_argument("--facts", type=int, default=2000, help="Facts per company payload")
+    parser.add_argument("--latency", type=float, default=0.25, help="Stub server latency per request (s)")
+    parser.add_argument("--rate", type=float, default=10.0, help="Governor requests/second")
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    parser.add_argument("--parse-workers", type=int, default=2)
+    parser.add_argument("--skip-sequential", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # First EdgarClient in the process sets the shared governor's rate
+    EdgarClient("http://127.0.0.1", "benchmark bench@example.com", max_requests_per_second=args.rate)
+
+    ciks = [100000 + i for i in range(args.companies)]
+    stub = StubEdgar(ciks, args.facts, args.latency, args.seed)
+    print(f"Stub EDGAR at {stub.url}: {args.companies} companies, {args.facts} facts each, "
+          f"{args.latency * 1000:.0f} ms latency, governor {args.rate:g} req/s\n")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cache_dir = os.path.join(workdir, "cache")
+
+        if not args.skip_sequential:
+            began = time.perf_counter()
+            facts = asyncio.run(run_sequential(stub, ciks))
+            show("sequential", stub, time.perf_counter() - began, len(ciks), facts)
+            stub.reset()
+
+        began = time.perf_counter()
+        report, facts, stats = asyncio.run(run_crawl(stub, ciks, args, cache_dir=cache_dir))
+        show("crawl", stub, time.perf_counter() - began, len(ciks), facts,
+             f"governor waited {stats['governor']['waited_seconds']:.1f}s")
+        stub.reset()
+
+        began = time.perf_counter()
+        report, facts, stats = asyncio.run(run_crawl(stub, ciks, args, cache_dir=cache_dir))
+        show("recrawl", stub, time.perf_counter() - began, len(ciks), facts,
+             f"{stats['not_modified']} not modified")
+        stub.reset()
+
+        checkpoint_path = os.path.join(workdir, "crawl.jsonl")
+        asyncio.run(run_crawl(stub, ciks[:len(ciks) // 2], args, checkpoint_path=checkpoint_path))
+        stub.reset()
+        began = time.perf_counter()
+        report, facts, stats = asyncio.run(run_crawl(stub, ciks, args, checkpoint_path=checkpoint_path))
+        show("resume", stub, time.perf_counter() - began, len(ciks), facts,
+             f"{len(report.resumed)} resumed from checkpoint")
+
+        if report.failed:
+            print(f"\nFailures: {report.failed}")
+
+    stub.server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
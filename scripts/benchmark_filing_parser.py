@@ -0,0 +1,247 @@
+"""
+Benchmark FilingParser: parse cost per MB of filing HTML
+
+Each filing is parsed two ways:
+  legacy   BeautifulSoup html.parser, then every extractor re-scanning the
+           full text with its own uncompiled regexes (the previous parser)
+  current  FilingParser.clean_html (lxml) and one FilingParser.locate pass
+           shared by all extractors
+
+Both outputs are compared so a speedup never hides a behaviour change.
+Without --corpus a synthetic 10-K is generated; point --corpus at a
+directory of stored filings (*.htm, *.html, *.txt) for real numbers.
+
+Usage:
+    python scripts/benchmark_filing_parser.py
+    python scripts/benchmark_filing_parser.py --corpus /data/filings --repeat 3
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+# Add the service path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'services', 'ingestion'))
+
+from app.filing_parser import FilingParser  # noqa: E402
+
+
+class LegacyFilingParser(FilingParser):
+    """The previous clean_html and extractors, kept here as the baseline"""
+
+    def clean_html(self, html_content):
+        soup = BeautifulSoup(html_content, 'html.parser')
+        for script in soup(["script", "style"]):
+            script.decompose()
+        text = soup.get_text()
+        lines = (line.strip() for line in text.splitlines())
+        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+        return '\n'.join(chunk for chunk in chunks if chunk)
+
+    def extract_sections(self, content, form_type='10-K'):
+        sections = {}
+        patterns = self.SECTION_PATTERNS_10K if form_type == '10-K' else self.SECTION_PATTERNS_10Q
+        section_positions = []
+        for section_name, regexes in patterns.items():
+            for regex in regexes:
+                match = re.search(regex, content)
+                if match:
+                    section_positions.append((match.start(), section_name))
+                    break
+        section_positions.sort()
+        for i, (start_pos, section_name) in enumerate(section_positions):
+            end_pos = section_positions[i + 1][0] if i + 1 < len(section_positions) else len(content)
+            section_content = content[start_pos:end_pos].strip()
+            if len(section_content) > 50000:
+                section_content = section_content[:50000] + "\n\n[Content truncated...]"
+            sections[section_name] = section_content
+        return sections
+
+    def extract_notes_to_financial_statements(self, content):
+        notes = []
+        notes_match = re.search(r'(?i)notes?\s+to\s+(consolidated\s+)?financial\s+statements', content)
+        if not notes_match:
+            return notes
+        notes_content = content[notes_match.start():]
+        note_positions = []
+        for pattern in [r'(?i)note\s+(\d+)[\.:\s]+([^\n]+)\n', r'(?i)(\d+)\.\s+([A-Z][^\n]+)\n']:
+            for match in re.finditer(pattern, notes_content):
+                note_positions.append((match.start(), match.group(1), match.group(2).strip()))
+        note_positions.sort()
+        for i, (start_pos, note_num, note_title) in enumerate(note_positions[:30]):
+            if i + 1 < len(note_positions):
+                end_pos = note_positions[i + 1][0]
+            else:
+                end_pos = min(start_pos + 50000, len(notes_content))
+            note_content = notes_content[start_pos:end_pos].strip()
+            notes.append({'note_number': note_num, 'title': note_title, 'content': note_content[:20000]})
+        return notes
+
+    def extract_accounting_policies(self, content):
+        for pattern in [
+            r'(?i)(?:note\s+\d+[\.:\s]+)?summary\s+of\s+significant\s+accounting\s+policies',
+            r'(?i)(?:note\s+\d+[\.:\s]+)?significant\s+accounting\s+policies',
+        ]:
+            match = re.search(pattern, content)
+            if match:
+                start = match.start()
+                return content[start:min(start + 20000, len(content))].strip()
+        return None
+
+    def extract_risk_factors(self, content):
+        risk_factors = []
+        risk_match = re.search(r'(?i)item\s+1a\.?\s*risk\s*factors', content)
+        if not risk_match:
+            return risk_factors
+        risk_start = risk_match.start()
+        next_item = re.search(r'(?i)item\s+[12]b?\.?\s', content[risk_start + 100:])
+        risk_end = risk_start + 100 + next_item.start() if next_item else risk_start + 50000
+        risk_content = content[risk_start:risk_end]
+        for match in re.finditer(r'([A-Z][^.!?]*(?:risk|may|could|might|uncertain)[^.!?]*[.!?])', risk_content):
+            risk_text = match.group(1).strip()
+            if 50 < len(risk_text) < 2000:
+                risk_factors.append(risk_text)
+        return list(dict.fromkeys(risk_factors))[:50]
+
+
+def extract_legacy(parser, text, form_type):
+    return (
+        parser.extract_sections(text, form_type),
+        parser.extract_notes_to_financial_statements(text),
+        parser.extract_accounting_policies(text),
+        parser.extract_risk_factors(text) if form_type == '10-K' else [],
+    )
+
+
+def extract_current(parser, text, form_type):
+    landmarks = parser.locate(text, form_type)
+    return (
+        parser.extract_sections(text, form_type, landmarks),
+        parser.extract_notes_to_financial_statements(text, landmarks),
+        parser.extract_accounting_policies(text, landmarks),
+        parser.extract_risk_factors(text, landmarks) if form_type == '10-K' else [],
+    )
+
+
+WORDS = (
+    "revenue net income operating segment customers products services fiscal year compared "
+    "increase decrease primarily due to market conditions demand pricing costs expenses the "
+    "company our results of operations liquidity capital resources cash flows"
+).split()
+
+ITEMS_10K = [
+    ("1.", "Business"), ("1A.", "Risk Factors"), ("1B.", "Unresolved Staff Comments"),
+    ("2.", "Properties"), ("3.", "Legal Proceedings"), ("5.", "Market for Registrant's Common Equity"),
+    ("7.", "Management's Discussion and Analysis of Financial Condition"),
+    ("7A.", "Quantitative and Qualitative Disclosures About Market Risk"),
+    ("8.", "Financial Statements and Supplementary Data"),
+    ("9.", "Changes in and Disagreements with Accountants"), ("9A.", "Controls and Procedures"),
+    ("10.", "Directors, Executive Officers and Corporate Governance"),
+    ("11.", "Executive Compensation"), ("12.", "Security Ownership of Certain Beneficial Owners"),
+    ("13.", "Certain Relationships and Related Transactions"), ("15.", "Exhibits and Financial Statement Schedules"),
+]
+
+
+def build_filing(paragraphs_per_item: int, seed: int) -> str:
+    """Synthetic 10-K shaped like EDGAR inline HTML: tables, styles, entities"""
+    rng = random.Random(seed)
+
+    def paragraph(risky=False):
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            words = rng.choices(WORDS, k=rng.randint(10, 25))
+            if risky:
+                words.insert(rng.randint(1, len(words)), rng.choice(["may", "could", "risk"]))
+            sentences.append(" ".join(words).capitalize() + ".")
+        return f'<p style="font-family:Times New Roman;font-size:10pt">{" ".join(sentences)}</p>'
+
+    parts = ['<html><head><title>10-K</title><style>p {margin:0}</style>'
+             '<script>var x = "Item 1. Business";</script></head><body>']
+    for number, title in ITEMS_10K:
+        parts.append(f'<div><span style="font-weight:bold">Item&#160;{number} {title}</span></div>')
+        for _ in range(paragraphs_per_item):
+            parts.append(paragraph(risky=number == "1A."))
+        if number == "8.":
+            parts.append('<p>Notes to Consolidated Financial Statements</p>')
+            for note in range(1, 16):
+                title = "Summary of Significant Accounting Policies" if note == 1 else f"Note Topic {note}"
+                parts.append(f'<p><b>Note {note}. {title}</b></p>')
+                for _ in range(max(1, paragraphs_per_item // 4)):
+                    parts.append(paragraph())
+                parts.append('<table><tr><td>Revenue</td><td>&#36;&#160;1,234</td></tr></table>')
+    parts.append('</body></html>')
+    return "\n".join(parts)
+
+
+def load_corpus(corpus: str):
+    paths = sorted(p for pattern in ("*.htm", "*.html", "*.txt") for p in Path(corpus).rglob(pattern))
+    return [(p.name, p.read_text(encoding="utf-8", errors="replace")) for p in paths]
+
+
+def timed(fn, *args, repeat=1):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - began)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", help="Directory of stored filings (default: synthetic 10-K)")
+    parser.add_argument("--form-type", default="10-K", choices=["10-K", "10-Q"])
+    parser.add_argument("--paragraphs", type=int, default=400, help="Paragraphs per item in the synthetic 10-K")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs per filing")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    filings = load_corpus(args.corpus) if args.corpus else [("synthetic-10k.htm", build_filing(args.paragraphs, args.seed))]
+    if not filings:
+        sys.exit(f"No *.htm, *.html or *.txt filings under {args.corpus}")
+
+    legacy, current = LegacyFilingParser("benchmark bench@example.com"), FilingParser("benchmark bench@example.com")
+    totals = {"mb": 0.0, "legacy_clean": 0.0, "legacy_extract": 0.0, "current_clean": 0.0, "current_extract": 0.0}
+    mismatches = []
+
+    for name, html in filings:
+        mb = len(html.encode("utf-8", errors="surrogatepass")) / 2 ** 20
+        legacy_clean, legacy_text = timed(legacy.clean_html, html, repeat=args.repeat)
+        current_clean, current_text = timed(current.clean_html, html, repeat=args.repeat)
+        legacy_extract, legacy_result = timed(extract_legacy, legacy, legacy_text, args.form_type, repeat=args.repeat)
+        current_extract, current_result = timed(extract_current, current, legacy_text, args.form_type, repeat=args.repeat)
+
+        if legacy_result != current_result:
+            mismatches.append(f"{name}: extracted content differs")
+        elif current_text != legacy_text:
+            mismatches.append(f"{name}: cleaned text differs ({len(current_text):,} vs {len(legacy_text):,} chars)")
+
+        totals["mb"] += mb
+        totals["legacy_clean"] += legacy_clean
+        totals["legacy_extract"] += legacy_extract
+        totals["current_clean"] += current_clean
+        totals["current_extract"] += current_extract
+
+    mb = totals["mb"]
+    print(f"{len(filings)} filing(s), {mb:.1f} MiB of HTML, form {args.form_type}, best of {args.repeat}\n")
+    print(f"{'':<9}{'clean ms/MiB':>14}{'extract ms/MiB':>16}{'total ms/MiB':>14}{'MiB/s':>9}")
+    for label in ("legacy", "current"):
+        clean, extract = totals[f"{label}_clean"], totals[f"{label}_extract"]
+        print(f"{label:<9}{clean / mb * 1000:>14.1f}{extract / mb * 1000:>16.1f}"
+              f"{(clean + extract) / mb * 1000:>14.1f}{mb / (clean + extract):>9.2f}")
+
+    speedup = (totals["legacy_clean"] + totals["legacy_extract"]) / (totals["current_clean"] + totals["current_extract"])
+    print(f"\nspeedup {speedup:.1f}x")
+    # Extraction is compared on the same (legacy) text; lxml and html.parser
+    # can disagree on malformed markup, so text differences are reported separately
+    print("outputs identical" if not mismatches else "differences:\n  " + "\n  ".join(mismatches))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Replay a synthetic GL stream through the GL-monitor DetectionEngine at a target TPS
+
+Transactions are released on a fixed schedule (one every 1/tps seconds) and
+each is pushed through DetectionEngine.process_transaction in-process. The
+report shows the throughput actually achieved, per-transaction processing
+latency and how far the engine fell behind the schedule.
+
+Usage:
+    python scripts/benchmark_gl_monitor.py --tps 2000 --duration 10
+    python scripts/benchmark_gl_monitor.py --tps 5000 --accounts 20000 --custom-rules 500
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add the service path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'services', 'gl-monitor'))
+
+from app.main import DetectionEngine, DetectionRule, GLTransaction, RuleType, rules_db  # noqa: E402
+
+DESCRIPTIONS = [
+    "Monthly rent", "Vendor payment", "Customer receipt", "Payroll run",
+    "Manual adjustment", "Accrual reversal", "Cash deposit", "Inventory count",
+]
+
+
+def build_stream(count: int, accounts: int, users: int, seed: int):
+    """Synthetic GL transactions with a realistic mix of amounts and accounts"""
+    rng = random.Random(seed)
+    chart = [(f"{rng.choice('1234567')}{i:04d}", f"Account {i}") for i in range(accounts)]
+    start = datetime(2024, 6, 1, 8, 0)
+
+    stream = []
+    for i in range(count):
+        code, name = rng.choice(chart)
+        amount = round(rng.lognormvariate(7, 2), 2) if rng.random() < 0.9 else float(rng.choice([5000, 10000, 25000]))
+        stream.append(GLTransaction(
+            transaction_id=f"T{i}",
+            timestamp=start + timedelta(seconds=i),
+            account_code=code,
+            account_name=name,
+            debit_amount=amount if i % 2 else 0.0,
+            credit_amount=0.0 if i % 2 else amount,
+            description=rng.choice(DESCRIPTIONS),
+            posting_user=f"user{rng.randrange(users)}",
+            source_system="benchmark",
+        ))
+    return stream
+
+
+def add_custom_rules(count: int, seed: int):
+    """Account-scoped custom rules, as tenants would create them"""
+    rng = random.Random(seed)
+    for i in range(count):
+        prefix = f"{rng.choice('1234567')}{rng.randrange(1000):03d}"
+        rule = DetectionRule(
+            rule_id=f"BENCH{i:04d}",
+            name=f"Benchmark rule {i}",
+            description="Synthetic account-scoped rule",
+            rule_type=RuleType.THRESHOLD,
+            threshold_amount=float(rng.choice([1000, 5000, 20000])),
+            account_patterns=[f"{prefix}*"],
+        )
+        rules_db[rule.rule_id] = rule
+
+
+async def replay(engine: DetectionEngine, stream, tps: float):
+    """Release transactions at the target rate and time each one"""
+    interval = 1.0 / tps
+    latencies = []
+    max_lag = 0.0
+    alerts = 0
+
+    start = time.perf_counter()
+    for i, txn in enumerate(stream):
+        due = start + i * interval
+        now = time.perf_counter()
+        if due > now:
+            await asyncio.sleep(due - now)
+
+        began = time.perf_counter()
+        alerts += len(await engine.process_transaction(txn))
+        finished = time.perf_counter()
+
+        latencies.append(finished - began)
+        max_lag = max(max_lag, finished - due)
+
+    elapsed = time.perf_counter() - start
+    return latencies, max_lag, alerts, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tps", type=float, default=2000, help="Target transactions per second")
+    parser.add_argument("--duration", type=float, default=10, help="Replay length in seconds at the target TPS")
+    parser.add_argument("--accounts", type=int, default=5000, help="Distinct GL accounts in the stream")
+    parser.add_argument("--users", type=int, default=200, help="Distinct posting users")
+    parser.add_argument("--custom-rules", type=int, default=0, help="Extra account-scoped rules to register")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    count = int(args.tps * args.duration)
+    add_custom_rules(args.custom_rules, args.seed)
+    stream = build_stream(count, args.accounts, args.users, args.seed)
+    engine = DetectionEngine()
+
+    latencies, max_lag, alerts, elapsed = asyncio.run(replay(engine, stream, args.tps))
+
+    latencies.sort()
+    achieved = count / elapsed
+    print(f"Rules registered:     {len(rules_db)} ({len(engine.compiled_rules)} evaluable)")
+    print(f"Transactions:         {count:,} over {args.accounts:,} accounts")
+    print(f"Target TPS:           {args.tps:,.0f}")
+    print(f"Achieved TPS:         {achieved:,.0f}")
+    print(f"Latency p50/p99/max:  {latencies[len(latencies) // 2] * 1e6:,.0f} / "
+          f"{latencies[int(len(latencies) * 0.99)] * 1e6:,.0f} / {latencies[-1] * 1e6:,.0f} us")
+    print(f"Mean latency:         {statistics.mean(latencies) * 1e6:,.0f} us")
+    print(f"Max schedule lag:     {max_lag * 1000:,.1f} ms")
+    print(f"Alerts generated:     {alerts:,}")
+    print("Result:               " + ("kept up with target" if achieved >= args.tps * 0.98 else "FELL BEHIND target"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Columnar transaction populations for batch control point scoring.
+
+A TransactionPopulation holds a chunk of transactions as NumPy arrays and
+plain column lists, so every control point can run as one vectorized kernel
+producing a risk score column instead of building a ControlPointResult per
+transaction. PopulationScores keeps only what the population endpoint needs
+afterwards: one overall score per transaction and trigger counts per
+control point.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import cached_property
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+MICROSECONDS_PER_HOUR = 3_600_000_000
+POWERS_OF_TEN = 10 ** np.arange(19, dtype=np.int64)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class TransactionPopulation:
+    """Column-oriented view of a list of Transaction models."""
+
+    def __init__(self, transactions: Sequence):
+        n = len(transactions)
+        self.transaction_ids = [t.transaction_id for t in transactions]
+        self.descriptions = [t.description for t in transactions]
+        self.account_codes = [t.account_code for t in transactions]
+        self.account_types = [t.account_type for t in transactions]
+        self.posting_users = [t.posting_user for t in transactions]
+        self.entry_types = [t.entry_type for t in transactions]
+        self.vendor_ids = [t.vendor_id for t in transactions]
+        self.customer_ids = [t.customer_id for t in transactions]
+        self.cost_centers = [t.cost_center for t in transactions]
+        self.raw_dates = [t.date for t in transactions]
+
+        self.amount_list = [t.amount for t in transactions]
+        self.amounts = np.array(self.amount_list, dtype=np.float64)
+        self.abs_amounts = np.abs(self.amounts)
+        self.dates = _datetime_column(self.raw_dates)
+        self.posted = _datetime_column([t.posted_at for t in transactions])
+
+        self.has_document = np.fromiter((bool(t.document_reference) for t in transactions), dtype=bool, count=n)
+        self.has_vendor = np.fromiter((bool(t.vendor_id) for t in transactions), dtype=bool, count=n)
+        self.is_intercompany = np.fromiter((t.is_intercompany for t in transactions), dtype=bool, count=n)
+        self.approved = np.fromiter((t.approval_status == "approved" for t in transactions), dtype=bool, count=n)
+
+        self._hash_cache: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    # ---- Dates ----
+
+    @cached_property
+    def month(self) -> np.ndarray:
+        """Transaction date month, 1-12."""
+        return self.dates.astype("datetime64[M]").astype(np.int64) % 12 + 1
+
+    @cached_property
+    def day(self) -> np.ndarray:
+        """Transaction date day of month."""
+        days = self.dates.astype("datetime64[D]")
+        return (days - days.astype("datetime64[M]")).astype(np.int64) + 1
+
+    @cached_property
+    def posted_weekday(self) -> np.ndarray:
+        """Posting weekday, Monday = 0 as datetime.weekday() (1970-01-01 was a Thursday)."""
+        return (self.posted.astype("datetime64[D]").astype(np.int64) + 3) % 7
+
+    @cached_property
+    def posted_hour(self) -> np.ndarray:
+        """Posting hour, 0-23."""
+        time_of_day = self.posted - self.posted.astype("datetime64[D]")
+        return time_of_day.astype(np.int64) // MICROSECONDS_PER_HOUR
+
+    # ---- Amount digits, as read from str(int(abs(amount))) ----
+
+    @cached_property
+    def whole_amounts(self) -> np.ndarray:
+        """int(abs(amount))."""
+        return self.abs_amounts.astype(np.int64)
+
+    @cached_property
+    def digit_count(self) -> np.ndarray:
+        """Length of str(int(abs(amount)))."""
+        return np.maximum(np.searchsorted(POWERS_OF_TEN, self.whole_amounts, side="right"), 1)
+
+    @cached_property
+    def first_digit(self) -> np.ndarray:
+        return self.whole_amounts // POWERS_OF_TEN[self.digit_count - 1]
+
+    @cached_property
+    def second_digit(self) -> np.ndarray:
+        """Second digit, 0 for single-digit amounts."""
+        second = self.whole_amounts // POWERS_OF_TEN[np.maximum(self.digit_count - 2, 0)] % 10
+        return np.where(self.digit_count > 1, second, 0)
+
+    @cached_property
+    def first_two_digits(self) -> np.ndarray:
+        """First two digits as a number 10-99, 0 for amounts below 10."""
+        return first_two_digits(self.abs_amounts)
+
+    @cached_property
+    def max_digit_repeats(self) -> np.ndarray:
+        """Occurrences of the most frequent digit."""
+        n = len(self)
+        counts = np.zeros((n, 10), dtype=np.int64)
+        rows = np.arange(n)
+        remaining = self.whole_amounts.copy()
+        for position in range(int(self.digit_count.max()) if n else 0):
+            active = position < self.digit_count
+            counts[rows[active], remaining[active] % 10] += 1
+            remaining //= 10
+        return counts.max(axis=1) if n else np.zeros(0, dtype=np.int64)
+
+    @cached_property
+    def is_sequential(self) -> np.ndarray:
+        """All digits the same, or a run of "123456789"."""
+        n = len(self)
+        repeated = np.ones(n, dtype=bool)
+        ascending = np.ones(n, dtype=bool)
+        remaining = self.whole_amounts.copy()
+        previous = remaining % 10
+        for position in range(1, int(self.digit_count.max()) if n else 0):
+            remaining //= 10
+            digit = remaining % 10
+            active = position < self.digit_count
+            repeated &= ~active | (digit == previous)
+            ascending &= ~active | (digit == previous - 1)
+            previous = digit
+        return repeated | ascending
+
+    # ---- Engineered features ----
+
+    @cached_property
+    def date_days(self) -> np.ndarray:
+        """Transaction date as days since 1970-01-01."""
+        return self.dates.astype("datetime64[D]").astype(np.int64)
+
+    @cached_property
+    def detector_features(self) -> np.ndarray:
+        """
+        Row-local numeric features for the fitted anomaly detectors.
+
+        Every feature depends on its own row only, so chunks of a population
+        can be scored independently against detectors fitted on a sample.
+        """
+        whole = self.whole_amounts
+        trailing_zeros = np.zeros(len(self))
+        for power in range(1, 7):
+            trailing_zeros += (whole > 0) & (whole % 10 ** power == 0)
+
+        time_of_day = (self.posted - self.posted.astype("datetime64[D]")).astype(np.int64)
+        lag_days = (self.posted - self.dates).astype(np.int64) / (24 * MICROSECONDS_PER_HOUR)
+
+        return np.column_stack([
+            np.log1p(self.abs_amounts),
+            self.amounts < 0,
+            trailing_zeros,
+            self.abs_amounts % 1 != 0,
+            time_of_day / MICROSECONDS_PER_HOUR,
+            self.posted_weekday,
+            self.day,
+            np.sign(lag_days) * np.log1p(np.abs(lag_days)),
+            ~self.entry_type_in("automated"),
+            self.has_document,
+            self.approved,
+        ]).astype(np.float64)
+
+    # ---- Text ----
+
+    @cached_property
+    def amount_strings(self) -> List[str]:
+        """str(amount), as the amount renders in an f-string."""
+        return list(map(str, self.amount_list))
+
+    @cached_property
+    def date_strings(self) -> List[str]:
+        return list(map(str, self.raw_dates))
+
+    @cached_property
+    def _descriptions_lower(self) -> Tuple[List[str], np.ndarray]:
+        distinct, (codes,) = factorize(self.descriptions)
+        return [description.lower() for description in distinct], codes
+
+    def description_keyword_counts(self, keywords: Sequence[str]) -> np.ndarray:
+        """Number of keywords contained in each lower-cased description."""
+        descriptions, codes = self._descriptions_lower
+        counts = np.array(
+            [sum(keyword in description for keyword in keywords) for description in descriptions],
+            dtype=np.int64,
+        )
+        return counts[codes] if len(counts) else np.zeros(len(self), dtype=np.int64)
+
+    def account_type_in(self, *account_types: str) -> np.ndarray:
+        """Rows whose lower-cased account type is one of account_types."""
+        return _values_in(self.account_types, account_types, str.lower)
+
+    def entry_type_in(self, *entry_types: str) -> np.ndarray:
+        """Rows whose entry type is exactly one of entry_types."""
+        return _values_in(self.entry_types, entry_types)
+
+    def field_hashes(self, name: str) -> np.ndarray:
+        """hash() of a column's values, computed once per distinct value."""
+        if name not in self._hash_cache:
+            distinct, (codes,) = factorize(getattr(self, name))
+            hashes = np.fromiter(map(hash, distinct), dtype=np.int64, count=len(distinct))
+            self._hash_cache[name] = hashes[codes] if len(hashes) else np.zeros(0, dtype=np.int64)
+        return self._hash_cache[name]
+
+    def key_hashes(self, keys: Iterable[str]) -> np.ndarray:
+        """hash() of one composite key per row."""
+        return np.fromiter(map(hash, keys), dtype=np.int64, count=len(self))
+
+
+@dataclass
+class PopulationScores:
+    """Batch scoring results for a whole population."""
+    control_point_ids: List[str]
+    control_point_names: List[str]
+    overall: np.ndarray  # Weighted risk score per transaction
+    trigger_counts: np.ndarray  # Transactions triggering each control point
+    first_triggered: np.ndarray  # Row of each control point's first trigger, len(overall) if none
+
+    def top_rows(self, k: int) -> np.ndarray:
+        """
+        Rows of the k highest overall scores, highest first.
+
+        Ties keep population order, as a stable sort of the whole population would.
+        """
+        n = len(self.overall)
+        k = min(k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+
+        if k < n:
+            candidates = np.argpartition(-self.overall, k - 1)[:k]
+            cutoff = self.overall[candidates].min()
+            above = np.flatnonzero(self.overall > cutoff)
+            ties = np.flatnonzero(self.overall == cutoff)[:k - len(above)]
+            rows = np.concatenate([above, ties])
+        else:
+            rows = np.arange(n)
+
+        return rows[np.lexsort((rows, -self.overall[rows]))]
+
+    def trigger_summary(self) -> Dict[str, int]:
+        """Trigger count per control point name, in order of first trigger."""
+        order = np.lexsort((np.arange(len(self.control_point_ids)), self.first_triggered))
+        return {
+            self.control_point_names[i]: int(self.trigger_counts[i])
+            for i in order
+            if self.trigger_counts[i]
+        }
+
+
+def first_digits(abs_amounts: np.ndarray) -> np.ndarray:
+    """First digit of str(int(amount)) for non-negative amounts."""
+    whole = abs_amounts.astype(np.int64)
+    digit_count = np.maximum(np.searchsorted(POWERS_OF_TEN, whole, side="right"), 1)
+    return whole // POWERS_OF_TEN[digit_count - 1]
+
+
+def first_two_digits(abs_amounts: np.ndarray) -> np.ndarray:
+    """First two digits of str(int(amount)) as a number 10-99, 0 for amounts below 10."""
+    whole = abs_amounts.astype(np.int64)
+    digit_count = np.maximum(np.searchsorted(POWERS_OF_TEN, whole, side="right"), 1)
+    return np.where(digit_count >= 2, whole // POWERS_OF_TEN[np.maximum(digit_count - 2, 0)], 0)
+
+
+def factorize(*columns: List) -> Tuple[List, List[np.ndarray]]:
+    """
+    Encode hashable values as integer codes shared across columns.
+
+    Returns the distinct values in order of first appearance and one code
+    array per column.
+    """
+    distinct = list(dict.fromkeys(chain.from_iterable(columns)))
+    lookup = {value: code for code, value in enumerate(distinct)}
+    codes = [np.fromiter(map(lookup.__getitem__, column), dtype=np.intp, count=len(column)) for column in columns]
+    return distinct, codes
+
+
+def _values_in(column: List[str], values: Sequence[str], normalize: Callable[[str], str] = str) -> np.ndarray:
+    distinct, (codes,) = factorize(column)
+    matches = np.array([normalize(value) in values for value in distinct], dtype=bool)
+    return matches[codes] if len(matches) else np.zeros(0, dtype=bool)
+
+
+def _datetime_column(values: List[datetime]) -> np.ndarray:
+    """
+    datetime64[us] column of wall-clock times.
+
+    Built from integer microseconds rather than letting NumPy convert datetime
+    objects; timezone-aware values keep their wall-clock time, as weekday()
+    and .hour report it.
+    """
+    return np.fromiter(
+        ((value.replace(tzinfo=None) - _EPOCH) // _MICROSECOND for value in values),
+        dtype=np.int64,
+        count=len(values),
+    ).view("datetime64[us]")
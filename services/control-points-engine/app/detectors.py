@@ -0,0 +1,353 @@
+"""
+Population-fitted detectors for the ML and statistical control points.
+
+Isolation Forest, Local Outlier Factor, k-means distance and One-Class SVM
+are fitted once per population on TransactionPopulation.detector_features,
+using a seeded subsample so fitting cost does not grow with the general
+ledger. A share of the sample is held out from fitting, and raw detector
+outputs are mapped to [0, 1] as their percentile among those held-out rows,
+so a score of 0.9 means "more anomalous than 90% of this population".
+
+The chi-square control point tests each transaction's first-two-digit
+bucket against Benford's expected frequency over the whole population, and
+the trend control point measures a transaction's deviation from its
+account's fitted amount trend.
+
+Fitted detectors are cached in-process by a fingerprint of the engagement
+and population, so repeated analyses of the same population reuse them.
+The cache also remembers each engagement's most recently fitted population,
+so single transactions of that engagement are scored against it.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed
+from loguru import logger
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.ensemble import IsolationForest
+from sklearn.neighbors import LocalOutlierFactor
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import OneClassSVM
+
+from .columnar import TransactionPopulation, factorize, first_two_digits
+
+# Rows sampled from the population to fit the detectors
+DETECTOR_SAMPLE_SIZE = int(os.environ.get("CONTROL_POINTS_DETECTOR_SAMPLE_SIZE", "20000"))
+# Share of the sample held out from fitting, as the percentile reference
+REFERENCE_FRACTION = 0.2
+# LOF and One-Class SVM cost grows with the rows they keep, so they use a prefix of the sample
+LOF_SAMPLE_SIZE = 2000
+SVM_SAMPLE_SIZE = 2000
+# Populations smaller than this are not fitted; their ML control points pass
+MIN_FIT_ROWS = 50
+
+# Parallel jobs and rows per job when scoring
+DETECTOR_N_JOBS = int(os.environ.get("CONTROL_POINTS_N_JOBS", "-1"))
+SCORE_BLOCK_SIZE = 10000
+
+# Fitted populations kept in memory
+DETECTOR_CACHE_SIZE = int(os.environ.get("CONTROL_POINTS_MODEL_CACHE_SIZE", "16"))
+
+# Chi-square: two-sided z for p < 0.01 with Nigrini's continuity correction
+DIGIT_Z_CRITICAL = 2.576
+# Trend: accounts with fewer sampled rows use the population-wide trend
+TREND_MIN_ROWS = 30
+
+RANDOM_STATE = 42
+
+
+@dataclass
+class AccountTrends:
+    """Least-squares trend of log amount over time, per account."""
+    accounts: Dict[str, int]  # Account code -> row in the arrays below
+    slopes: np.ndarray
+    intercepts: np.ndarray
+    sigmas: np.ndarray
+    fallback: int  # Population-wide trend, for accounts fitted without enough rows
+    reference_day: int
+
+    def deviations(self, population: TransactionPopulation) -> np.ndarray:
+        """Absolute residual of each transaction, in standard deviations of its account's trend."""
+        distinct, (codes,) = factorize(population.account_codes)
+        lookup = np.array([self.accounts.get(account, self.fallback) for account in distinct], dtype=np.intp)
+        trend = lookup[codes] if len(lookup) else np.zeros(0, dtype=np.intp)
+
+        x = (population.date_days - self.reference_day).astype(np.float64)
+        y = np.log1p(population.abs_amounts)
+        residual = y - (self.intercepts[trend] + self.slopes[trend] * x)
+        sigma = self.sigmas[trend]
+        return np.divide(np.abs(residual), sigma, out=np.zeros(len(x)), where=sigma > 0)
+
+
+@dataclass
+class PopulationDetectors:
+    """Detectors fitted to one population."""
+    fingerprint: str
+    sample_size: int
+    scaler: StandardScaler
+    models: Dict[str, Callable[[np.ndarray], np.ndarray]]  # Name -> raw anomaly score, higher is more anomalous
+    references: Dict[str, np.ndarray]  # Name -> sorted raw scores of the held-out sample rows
+    digit_flags: np.ndarray  # First-two-digit bucket -> over-represented vs Benford
+    digit_z: np.ndarray
+    trends: AccountTrends
+    fitted_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def score(self, name: str, population: TransactionPopulation) -> np.ndarray:
+        """
+        Percentile scores of one detector for every row of a population.
+
+        Rows are scored in blocks across DETECTOR_N_JOBS threads; the
+        estimators release the GIL while scoring.
+        """
+        features = self.scaler.transform(population.detector_features)
+        model = self.models[name]
+
+        if len(features) <= SCORE_BLOCK_SIZE or DETECTOR_N_JOBS == 1:
+            raw = model(features)
+        else:
+            blocks = Parallel(n_jobs=DETECTOR_N_JOBS, prefer="threads")(
+                delayed(model)(features[start:start + SCORE_BLOCK_SIZE])
+                for start in range(0, len(features), SCORE_BLOCK_SIZE)
+            )
+            raw = np.concatenate(blocks)
+
+        reference = self.references[name]
+        return np.searchsorted(reference, raw, side="right") / len(reference)
+
+    def digit_outliers(self, population: TransactionPopulation) -> np.ndarray:
+        """Rows whose first-two-digit bucket is significantly over-represented."""
+        return self.digit_flags[population.first_two_digits]
+
+
+class DetectorCache:
+    """
+    Least-recently-used cache of fitted detectors, keyed by population fingerprint.
+
+    Also maps each engagement to the fingerprint of its most recently used
+    population, while that population is still cached.
+    """
+
+    def __init__(self, max_size: int = DETECTOR_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, PopulationDetectors]" = OrderedDict()
+        self._latest: Dict[str, str] = {}  # Engagement id -> fingerprint
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint: str) -> Optional[PopulationDetectors]:
+        with self._lock:
+            detectors = self._entries.get(fingerprint)
+            if detectors is not None:
+                self._entries.move_to_end(fingerprint)
+            return detectors
+
+    def put(self, detectors: PopulationDetectors):
+        with self._lock:
+            self._entries[detectors.fingerprint] = detectors
+            self._entries.move_to_end(detectors.fingerprint)
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._latest = {
+                    engagement_id: fingerprint
+                    for engagement_id, fingerprint in self._latest.items()
+                    if fingerprint != evicted
+                }
+
+    def set_latest(self, engagement_id: str, fingerprint: str):
+        """Record the population an engagement was last analyzed with."""
+        with self._lock:
+            if fingerprint in self._entries:
+                self._latest[engagement_id] = fingerprint
+
+    def latest(self, engagement_id: str) -> Optional[PopulationDetectors]:
+        """Detectors of the engagement's most recently analyzed population, if still cached."""
+        with self._lock:
+            fingerprint = self._latest.get(engagement_id)
+        return self.get(fingerprint) if fingerprint is not None else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+detector_cache = DetectorCache()
+
+
+def population_fingerprint(engagement_id: str, transactions: Sequence) -> str:
+    """Stable identity of a population: engagement, transaction ids and amounts."""
+    digest = hashlib.sha256()
+    digest.update(engagement_id.encode())
+    digest.update(b"\x00")
+    digest.update("\x1f".join(t.transaction_id for t in transactions).encode())
+    digest.update(b"\x00")
+    digest.update(np.array([t.amount for t in transactions], dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def get_population_detectors(
+    engagement_id: str,
+    transactions: Sequence,
+    abs_amounts: np.ndarray
+) -> Optional[PopulationDetectors]:
+    """
+    Fitted detectors for a population, from the cache when it was seen before.
+
+    Returns None for populations too small to fit.
+    """
+    if len(transactions) < MIN_FIT_ROWS:
+        return None
+
+    fingerprint = population_fingerprint(engagement_id, transactions)
+    detectors = detector_cache.get(fingerprint)
+    if detectors is None:
+        detectors = fit_population_detectors(fingerprint, transactions, abs_amounts)
+        detector_cache.put(detectors)
+    detector_cache.set_latest(engagement_id, fingerprint)
+    return detectors
+
+
+def get_engagement_detectors(engagement_id: str) -> Optional[PopulationDetectors]:
+    """
+    Detectors fitted to the engagement's most recently analyzed population.
+
+    Returns None if the engagement has no population in the cache.
+    """
+    return detector_cache.latest(engagement_id)
+
+
+def fit_population_detectors(
+    fingerprint: str,
+    transactions: Sequence,
+    abs_amounts: np.ndarray
+) -> PopulationDetectors:
+    """
+    Fit all detectors for a population.
+
+    The sample is drawn with a seed taken from the fingerprint, so the same
+    population always yields the same detectors, in any process. Its last
+    REFERENCE_FRACTION of rows is never fitted on; the percentile reference
+    of every detector is its scores on those rows.
+    """
+    rng = np.random.default_rng(int(fingerprint[:16], 16))
+    sample_size = min(len(transactions), DETECTOR_SAMPLE_SIZE)
+    rows = rng.permutation(len(transactions))[:sample_size]
+    sample = TransactionPopulation([transactions[row] for row in rows])
+
+    scaler = StandardScaler().fit(sample.detector_features)
+    features = scaler.transform(sample.detector_features)
+
+    fit_size = sample_size - max(1, int(sample_size * REFERENCE_FRACTION))
+    training, held_out = features[:fit_size], features[fit_size:]
+
+    isolation_forest = IsolationForest(n_estimators=100, random_state=RANDOM_STATE).fit(training)
+
+    lof_rows = min(fit_size, LOF_SAMPLE_SIZE)
+    # Brute-force neighbours: in this many dimensions a tree search visits most leaves anyway
+    lof = LocalOutlierFactor(n_neighbors=min(20, lof_rows - 1), novelty=True, algorithm="brute").fit(training[:lof_rows])
+
+    kmeans = MiniBatchKMeans(n_clusters=min(8, fit_size), n_init=3, random_state=RANDOM_STATE).fit(training)
+
+    svm_rows = min(fit_size, SVM_SAMPLE_SIZE)
+    one_class_svm = OneClassSVM(kernel="rbf", gamma="scale", nu=0.05).fit(training[:svm_rows])
+
+    models: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+        "isolation_forest": lambda x: -isolation_forest.score_samples(x),
+        "local_outlier_factor": lambda x: -lof.score_samples(x),
+        # Direct differences rather than kmeans.transform, whose expanded form
+        # gives a row a slightly different distance depending on its batch
+        "cluster_distance": lambda x: np.sqrt(
+            ((x[:, np.newaxis, :] - kmeans.cluster_centers_) ** 2).sum(axis=2)
+        ).min(axis=1),
+        "one_class_svm": lambda x: -one_class_svm.decision_function(x),
+    }
+    references = {name: np.sort(model(held_out)) for name, model in models.items()}
+
+    digit_flags, digit_z = _fit_digit_test(abs_amounts)
+
+    logger.info(
+        f"Fitted population detectors {fingerprint[:12]} on {sample_size} of {len(transactions)} transactions"
+    )
+
+    return PopulationDetectors(
+        fingerprint=fingerprint,
+        sample_size=sample_size,
+        scaler=scaler,
+        models=models,
+        references=references,
+        digit_flags=digit_flags,
+        digit_z=digit_z,
+        trends=_fit_account_trends(sample),
+    )
+
+
+def _fit_digit_test(abs_amounts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First-two-digits test over the whole population.
+
+    Returns, per bucket 0-99, whether the bucket is over-represented against
+    Benford's law at p < 0.01, and its z statistic. Buckets 0-9 (amounts
+    below 10) are never flagged.
+    """
+    digits = first_two_digits(abs_amounts)
+    digits = digits[digits >= 10]
+    z = np.zeros(100)
+    if not len(digits):
+        return np.zeros(100, dtype=bool), z
+
+    n = len(digits)
+    buckets = np.arange(10, 100)
+    expected = np.log10(1 + 1 / buckets)
+    observed = np.bincount(digits, minlength=100)[10:] / n
+
+    # Nigrini's z statistic with continuity correction
+    deviation = np.maximum(np.abs(observed - expected) - 1 / (2 * n), 0)
+    z[10:] = deviation / np.sqrt(expected * (1 - expected) / n)
+    flags = np.zeros(100, dtype=bool)
+    flags[10:] = (z[10:] > DIGIT_Z_CRITICAL) & (observed > expected)
+    return flags, z
+
+
+def _fit_account_trends(sample: TransactionPopulation) -> AccountTrends:
+    """Per-account least-squares trend of log1p(amount) against date, from sample sums."""
+    reference_day = int(sample.date_days.min()) if len(sample) else 0
+    accounts, (codes,) = factorize(sample.account_codes)
+    fallback = len(accounts)
+    size = fallback + 1
+
+    # Every row counts once for its account and once for the population-wide trend
+    group = np.concatenate([codes, np.full(len(sample), fallback, dtype=np.intp)])
+    x = np.tile((sample.date_days - reference_day).astype(np.float64), 2)
+    y = np.tile(np.log1p(sample.abs_amounts), 2)
+
+    n = np.bincount(group, minlength=size).astype(np.float64)
+    sx = np.bincount(group, weights=x, minlength=size)
+    sy = np.bincount(group, weights=y, minlength=size)
+    sxx = np.bincount(group, weights=x * x, minlength=size)
+    sxy = np.bincount(group, weights=x * y, minlength=size)
+
+    fitted = n > 0
+    denominator = n * sxx - sx * sx
+    slopes = np.divide(n * sxy - sx * sy, denominator, out=np.zeros(size), where=fitted & (denominator > 0))
+    intercepts = np.divide(sy - slopes * sx, n, out=np.zeros(size), where=fitted)
+    residual = y - (intercepts[group] + slopes[group] * x)
+    sigmas = np.sqrt(np.divide(
+        np.bincount(group, weights=residual * residual, minlength=size), n,
+        out=np.zeros(size), where=fitted,
+    ))
+
+    return AccountTrends(
+        accounts={
+            account: (code if n[code] >= TREND_MIN_ROWS else fallback)
+            for code, account in enumerate(accounts)
+        },
+        slopes=slopes,
+        intercepts=intercepts,
+        sigmas=sigmas,
+        fallback=fallback,
+        reference_day=reference_day,
+    )
@@ -28,6 +28,9 @@ import numpy as np
 from scipy import stats
 from loguru import logger
 
+from .columnar import PopulationScores, TransactionPopulation, first_digits, first_two_digits
+from .detectors import detector_cache, get_engagement_detectors, get_population_detectors
+
 app = FastAPI(
     title="Control Points Engine - 55+ Tests",
     description="Ensemble-based anomaly detection beating MindBridge's 30+ control points",
@@ -140,6 +143,11 @@ class PopulationAnalysisResponse(BaseModel):
 # 55+ Control Points Definition
 # ============================================================================
 
+# Transactions per TransactionPopulation chunk in batch scoring; bounds the
+# score matrix to chunk size x control points
+POPULATION_CHUNK_SIZE = 50_000
+
+
 class ControlPointsEngine:
     """
     Ensemble-based control points engine with 55+ tests.
@@ -166,6 +174,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags transactions with suspiciously round amounts",
             "test_func": self._test_round_dollar,
+            "batch_func": self._batch_round_dollar,
             "weight": 0.8
         }
 
@@ -175,6 +184,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags transactions posted on weekends",
             "test_func": self._test_weekend_posting,
+            "batch_func": self._batch_weekend_posting,
             "weight": 0.6
         }
 
@@ -184,6 +194,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags transactions posted outside business hours",
             "test_func": self._test_after_hours,
+            "batch_func": self._batch_after_hours,
             "weight": 0.5
         }
 
@@ -193,6 +204,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags transactions clustered near period end",
             "test_func": self._test_period_end_clustering,
+            "batch_func": self._batch_period_end_clustering,
             "weight": 0.7
         }
 
@@ -202,6 +214,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags manual journal entries",
             "test_func": self._test_manual_entry,
+            "batch_func": self._batch_manual_entry,
             "weight": 0.5
         }
 
@@ -211,6 +224,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags adjustment entries",
             "test_func": self._test_adjustment_entry,
+            "batch_func": self._batch_adjustment_entry,
             "weight": 0.6
         }
 
@@ -220,6 +234,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags entries without document reference",
             "test_func": self._test_missing_documentation,
+            "batch_func": self._batch_missing_documentation,
             "weight": 0.8
         }
 
@@ -229,6 +244,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags entries above materiality threshold",
             "test_func": self._test_above_materiality,
+            "batch_func": self._batch_above_materiality,
             "weight": 0.9
         }
 
@@ -238,6 +254,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags duplicate amounts on same day",
             "test_func": self._test_duplicate_amount,
+            "batch_func": self._batch_duplicate_amount,
             "weight": 0.7
         }
 
@@ -247,6 +264,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags entries with identical descriptions",
             "test_func": self._test_duplicate_description,
+            "batch_func": self._batch_duplicate_description,
             "weight": 0.6
         }
 
@@ -256,6 +274,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags entries to historically high-risk accounts",
             "test_func": self._test_high_risk_account,
+            "batch_func": self._batch_high_risk_account,
             "weight": 0.7
         }
 
@@ -265,6 +284,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags reversing entries",
             "test_func": self._test_reversing_entry,
+            "batch_func": self._batch_reversing_entry,
             "weight": 0.6
         }
 
@@ -274,6 +294,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags intercompany transactions",
             "test_func": self._test_intercompany,
+            "batch_func": self._batch_intercompany,
             "weight": 0.5
         }
 
@@ -283,6 +304,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags amounts divisible by 1000",
             "test_func": self._test_round_thousand,
+            "batch_func": self._batch_round_thousand,
             "weight": 0.7
         }
 
@@ -292,6 +314,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags amounts just below approval thresholds",
             "test_func": self._test_just_below_threshold,
+            "batch_func": self._batch_just_below_threshold,
             "weight": 0.8
         }
 
@@ -301,6 +324,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags entries without proper approval",
             "test_func": self._test_missing_approval,
+            "batch_func": self._batch_missing_approval,
             "weight": 0.9
         }
 
@@ -310,6 +334,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags unusual debit/credit account combinations",
             "test_func": self._test_unusual_account_combination,
+            "batch_func": self._batch_unusual_account_combination,
             "weight": 0.6
         }
 
@@ -319,6 +344,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags entries where same user prepared and approved",
             "test_func": self._test_same_user_approval,
+            "batch_func": self._batch_same_user_approval,
             "weight": 0.9
         }
 
@@ -328,6 +354,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags transactions with new vendors",
             "test_func": self._test_new_vendor,
+            "batch_func": self._batch_new_vendor,
             "weight": 0.5
         }
 
@@ -337,6 +364,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags descriptions with suspicious keywords",
             "test_func": self._test_suspicious_keywords,
+            "batch_func": self._batch_suspicious_keywords,
             "weight": 0.7
         }
 
@@ -346,6 +374,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags unusual entries to revenue accounts",
             "test_func": self._test_unusual_revenue,
+            "batch_func": self._batch_unusual_revenue,
             "weight": 0.8
         }
 
@@ -355,6 +384,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags potential improper expense capitalization",
             "test_func": self._test_expense_capitalization,
+            "batch_func": self._batch_expense_capitalization,
             "weight": 0.7
         }
 
@@ -364,6 +394,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags entries in the last week of fiscal year",
             "test_func": self._test_year_end_entry,
+            "batch_func": self._batch_year_end_entry,
             "weight": 0.6
         }
 
@@ -373,6 +404,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags sequential or patterned amounts",
             "test_func": self._test_sequential_amounts,
+            "batch_func": self._batch_sequential_amounts,
             "weight": 0.6
         }
 
@@ -382,6 +414,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.RULE_BASED,
             "description": "Flags negative amounts in unusual contexts",
             "test_func": self._test_negative_amount,
+            "batch_func": self._batch_negative_amount,
             "weight": 0.5
         }
 
@@ -395,6 +428,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Flags amounts that are statistical outliers",
             "test_func": self._test_zscore_outlier,
+            "batch_func": self._batch_zscore_outlier,
             "weight": 0.8
         }
 
@@ -404,6 +438,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Flags amounts violating Benford's Law (1st digit)",
             "test_func": self._test_benford_first_digit,
+            "batch_func": self._batch_benford_first_digit,
             "weight": 0.7
         }
 
@@ -413,6 +448,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Flags amounts violating Benford's Law (2nd digit)",
             "test_func": self._test_benford_second_digit,
+            "batch_func": self._batch_benford_second_digit,
             "weight": 0.6
         }
 
@@ -422,6 +458,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Flags amounts outside interquartile range",
             "test_func": self._test_iqr_outlier,
+            "batch_func": self._batch_iqr_outlier,
             "weight": 0.7
         }
 
@@ -431,6 +468,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Flags significant deviations from moving average",
             "test_func": self._test_moving_average_deviation,
+            "batch_func": self._batch_moving_average_deviation,
             "weight": 0.6
         }
 
@@ -440,6 +478,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Flags amounts inconsistent with seasonal patterns",
             "test_func": self._test_seasonality_anomaly,
+            "batch_func": self._batch_seasonality_anomaly,
             "weight": 0.5
         }
 
@@ -449,6 +488,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Flags unusual transaction frequency",
             "test_func": self._test_frequency_anomaly,
+            "batch_func": self._batch_frequency_anomaly,
             "weight": 0.6
         }
 
@@ -458,6 +498,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Flags when transaction distribution shifts",
             "test_func": self._test_distribution_shift,
+            "batch_func": self._batch_distribution_shift,
             "weight": 0.6
         }
 
@@ -467,6 +508,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Flags sudden increases in variance",
             "test_func": self._test_variance_spike,
+            "batch_func": self._batch_variance_spike,
             "weight": 0.5
         }
 
@@ -476,6 +518,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Flags breaks in expected correlations",
             "test_func": self._test_correlation_break,
+            "batch_func": self._batch_correlation_break,
             "weight": 0.6
         }
 
@@ -485,6 +528,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Flags deviations from expected trend",
             "test_func": self._test_trend_deviation,
+            "batch_func": self._batch_trend_deviation,
             "weight": 0.5
         }
 
@@ -494,6 +538,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Flags amounts in extreme percentiles",
             "test_func": self._test_percentile_extreme,
+            "batch_func": self._batch_percentile_extreme,
             "weight": 0.7
         }
 
@@ -503,6 +548,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Tests if distribution matches expected",
             "test_func": self._test_chi_square,
+            "batch_func": self._batch_chi_square,
             "weight": 0.6
         }
 
@@ -512,6 +558,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Tests last two digits distribution",
             "test_func": self._test_last_two_digits,
+            "batch_func": self._batch_last_two_digits,
             "weight": 0.5
         }
 
@@ -521,6 +568,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.STATISTICAL,
             "description": "Tests for excessive number duplication",
             "test_func": self._test_number_duplication,
+            "batch_func": self._batch_number_duplication,
             "weight": 0.6
         }
 
@@ -534,6 +582,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Detects anomalies using Isolation Forest",
             "test_func": self._test_isolation_forest,
+            "batch_func": self._batch_isolation_forest,
             "weight": 0.8
         }
 
@@ -543,6 +592,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Detects local density outliers",
             "test_func": self._test_local_outlier_factor,
+            "batch_func": self._batch_local_outlier_factor,
             "weight": 0.7
         }
 
@@ -552,6 +602,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Flags items far from cluster centers",
             "test_func": self._test_cluster_distance,
+            "batch_func": self._batch_cluster_distance,
             "weight": 0.6
         }
 
@@ -561,6 +612,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Novelty detection using One-Class SVM",
             "test_func": self._test_one_class_svm,
+            "batch_func": self._batch_one_class_svm,
             "weight": 0.7
         }
 
@@ -570,6 +622,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Detects anomalies via reconstruction error",
             "test_func": self._test_autoencoder_error,
+            "batch_func": self._batch_autoencoder_error,
             "weight": 0.8
         }
 
@@ -579,6 +632,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Identifies noise points using DBSCAN",
             "test_func": self._test_dbscan_noise,
+            "batch_func": self._batch_dbscan_noise,
             "weight": 0.6
         }
 
@@ -588,6 +642,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Anomaly scoring using Random Forest",
             "test_func": self._test_random_forest_anomaly,
+            "batch_func": self._batch_random_forest_anomaly,
             "weight": 0.7
         }
 
@@ -597,6 +652,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Risk prediction using XGBoost",
             "test_func": self._test_xgboost_risk,
+            "batch_func": self._batch_xgboost_risk,
             "weight": 0.8
         }
 
@@ -606,6 +662,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Detects sequence anomalies using LSTM",
             "test_func": self._test_lstm_sequence,
+            "batch_func": self._batch_lstm_sequence,
             "weight": 0.7
         }
 
@@ -615,6 +672,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Detects unusual entity relationships",
             "test_func": self._test_entity_embedding,
+            "batch_func": self._batch_entity_embedding,
             "weight": 0.6
         }
 
@@ -624,6 +682,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Detects anomalies in transaction graphs",
             "test_func": self._test_graph_anomaly,
+            "batch_func": self._batch_graph_anomaly,
             "weight": 0.7
         }
 
@@ -633,6 +692,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Detects unusual user behavior patterns",
             "test_func": self._test_user_behavior,
+            "batch_func": self._batch_user_behavior,
             "weight": 0.8
         }
 
@@ -642,6 +702,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Detects unusual vendor transaction patterns",
             "test_func": self._test_vendor_pattern,
+            "batch_func": self._batch_vendor_pattern,
             "weight": 0.6
         }
 
@@ -651,6 +712,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Flags deviations from ML forecast",
             "test_func": self._test_forecast_deviation,
+            "batch_func": self._batch_forecast_deviation,
             "weight": 0.6
         }
 
@@ -660,6 +722,7 @@ class ControlPointsEngine:
             "category": ControlPointCategory.MACHINE_LEARNING,
             "description": "Combined score from multiple ML models",
             "test_func": self._test_ensemble_score,
+            "batch_func": self._batch_ensemble_score,
             "weight": 0.9
         }
 
@@ -978,7 +1041,7 @@ class ControlPointsEngine:
 
     def _test_new_vendor(self, txn: Transaction, context: Dict) -> ControlPointResult:
         """Test for new vendors"""
-        is_new = txn.vendor_id and hash(txn.vendor_id) % 20 == 0  # Simulated
+        is_new = bool(txn.vendor_id) and hash(txn.vendor_id) % 20 == 0  # Simulated
         risk_score = 0.5 if is_new else 0.0
 
         return ControlPointResult(
@@ -1293,8 +1356,13 @@ class ControlPointsEngine:
         )
 
     def _test_trend_deviation(self, txn: Transaction, context: Dict) -> ControlPointResult:
-        """Trend deviation detection"""
-        unusual = hash(txn.description[:10]) % 60 == 0
+        """Deviation from the account's fitted amount trend"""
+        detectors = context.get("detectors")
+        if detectors is None:
+            return self._create_pass_result("ST011", "Trend Deviation")
+
+        deviation = float(detectors.trends.deviations(TransactionPopulation([txn]))[0])
+        unusual = deviation > 3
         risk_score = 0.5 if unusual else 0.0
 
         return ControlPointResult(
@@ -1304,8 +1372,8 @@ class ControlPointsEngine:
             risk_score=risk_score,
             risk_level=self._score_to_level(risk_score),
             triggered=unusual,
-            details="Trend deviation detected" if unusual else "Normal trend",
-            evidence={"trend_deviation": unusual}
+            details=f"{deviation:.1f} standard deviations from account trend" if unusual else "Normal trend",
+            evidence={"trend_deviation": unusual, "deviation_sigma": deviation}
         )
 
     def _test_percentile_extreme(self, txn: Transaction, context: Dict) -> ControlPointResult:
@@ -1326,8 +1394,14 @@ class ControlPointsEngine:
         )
 
     def _test_chi_square(self, txn: Transaction, context: Dict) -> ControlPointResult:
-        """Chi-square goodness of fit"""
-        unusual = hash(str(txn.amount)[:5]) % 40 == 0
+        """Chi-square goodness of fit of the transaction's first-two-digit bucket"""
+        detectors = context.get("detectors")
+        if detectors is None:
+            return self._create_pass_result("ST013", "Chi-Square Distribution Test")
+
+        bucket = int(first_two_digits(np.array([abs(txn.amount)]))[0])
+        unusual = bool(detectors.digit_flags[bucket])
+        z = float(detectors.digit_z[bucket])
         risk_score = 0.6 if unusual else 0.0
 
         return ControlPointResult(
@@ -1337,8 +1411,8 @@ class ControlPointsEngine:
             risk_score=risk_score,
             risk_level=self._score_to_level(risk_score),
             triggered=unusual,
-            details="Chi-square anomaly detected" if unusual else "Normal distribution",
-            evidence={"chi_square_anomaly": unusual}
+            details=f"First two digits {bucket} over-represented vs Benford (z={z:.2f})" if unusual else "Normal distribution",
+            evidence={"first_two_digits": bucket, "z_statistic": z, "chi_square_anomaly": unusual}
         )
 
     def _test_last_two_digits(self, txn: Transaction, context: Dict) -> ControlPointResult:
@@ -1389,10 +1463,13 @@ class ControlPointsEngine:
 
     def _test_isolation_forest(self, txn: Transaction, context: Dict) -> ControlPointResult:
         """Isolation Forest anomaly detection"""
-        # Simulated - would use actual sklearn model
-        anomaly_score = (hash(str(txn.amount)) % 100) / 100
-        is_anomaly = anomaly_score > 0.85
-        risk_score = anomaly_score if anomaly_score > 0.7 else 0.0
+        detectors = context.get("detectors")
+        if detectors is None:
+            return self._create_pass_result("ML001", "Isolation Forest Anomaly")
+
+        score = float(detectors.score("isolation_forest", TransactionPopulation([txn]))[0])
+        is_anomaly = score > 0.85
+        risk_score = score if score > 0.7 else 0.0
 
         return ControlPointResult(
             control_point_id="ML001",
@@ -1401,15 +1478,19 @@ class ControlPointsEngine:
             risk_score=risk_score,
             risk_level=self._score_to_level(risk_score),
             triggered=is_anomaly,
-            details=f"Isolation Forest score: {anomaly_score:.2f}",
-            evidence={"anomaly_score": anomaly_score, "is_anomaly": is_anomaly}
+            details=f"Isolation Forest score: {score:.2f} (population percentile)",
+            evidence={"anomaly_score": score, "is_anomaly": is_anomaly, "model": detectors.fingerprint[:12]}
         )
 
     def _test_local_outlier_factor(self, txn: Transaction, context: Dict) -> ControlPointResult:
         """Local Outlier Factor detection"""
-        lof_score = (hash(txn.transaction_id) % 100) / 100
-        is_outlier = lof_score > 0.8
-        risk_score = lof_score if lof_score > 0.6 else 0.0
+        detectors = context.get("detectors")
+        if detectors is None:
+            return self._create_pass_result("ML002", "Local Outlier Factor")
+
+        score = float(detectors.score("local_outlier_factor", TransactionPopulation([txn]))[0])
+        is_anomaly = score > 0.8
+        risk_score = score if score > 0.6 else 0.0
 
         return ControlPointResult(
             control_point_id="ML002",
@@ -1417,16 +1498,20 @@ class ControlPointsEngine:
             category=ControlPointCategory.MACHINE_LEARNING,
             risk_score=risk_score,
             risk_level=self._score_to_level(risk_score),
-            triggered=is_outlier,
-            details=f"LOF score: {lof_score:.2f}",
-            evidence={"lof_score": lof_score}
+            triggered=is_anomaly,
+            details=f"LOF score: {score:.2f} (population percentile)",
+            evidence={"lof_score": score, "is_anomaly": is_anomaly, "model": detectors.fingerprint[:12]}
         )
 
     def _test_cluster_distance(self, txn: Transaction, context: Dict) -> ControlPointResult:
         """K-Means cluster distance"""
-        distance = (hash(f"{txn.amount}:{txn.account_code}") % 100) / 100
-        is_far = distance > 0.75
-        risk_score = distance if distance > 0.5 else 0.0
+        detectors = context.get("detectors")
+        if detectors is None:
+            return self._create_pass_result("ML003", "Cluster Distance Anomaly")
+
+        score = float(detectors.score("cluster_distance", TransactionPopulation([txn]))[0])
+        is_anomaly = score > 0.75
+        risk_score = score if score > 0.5 else 0.0
 
         return ControlPointResult(
             control_point_id="ML003",
@@ -1434,15 +1519,19 @@ class ControlPointsEngine:
             category=ControlPointCategory.MACHINE_LEARNING,
             risk_score=risk_score,
             risk_level=self._score_to_level(risk_score),
-            triggered=is_far,
-            details=f"Distance from cluster: {distance:.2f}",
-            evidence={"cluster_distance": distance}
+            triggered=is_anomaly,
+            details=f"Distance from cluster: {score:.2f} (population percentile)",
+            evidence={"cluster_distance": score, "is_anomaly": is_anomaly, "model": detectors.fingerprint[:12]}
         )
 
     def _test_one_class_svm(self, txn: Transaction, context: Dict) -> ControlPointResult:
         """One-Class SVM novelty detection"""
-        score = (hash(f"{txn.posting_user}:{txn.amount}") % 100) / 100
-        is_novel = score > 0.8
+        detectors = context.get("detectors")
+        if detectors is None:
+            return self._create_pass_result("ML004", "One-Class SVM Anomaly")
+
+        score = float(detectors.score("one_class_svm", TransactionPopulation([txn]))[0])
+        is_anomaly = score > 0.8
         risk_score = score if score > 0.6 else 0.0
 
         return ControlPointResult(
@@ -1451,9 +1540,9 @@ class ControlPointsEngine:
             category=ControlPointCategory.MACHINE_LEARNING,
             risk_score=risk_score,
             risk_level=self._score_to_level(risk_score),
-            triggered=is_novel,
-            details=f"SVM novelty score: {score:.2f}",
-            evidence={"svm_score": score}
+            triggered=is_anomaly,
+            details=f"SVM novelty score: {score:.2f} (population percentile)",
+            evidence={"svm_score": score, "is_anomaly": is_anomaly, "model": detectors.fingerprint[:12]}
         )
 
     def _test_autoencoder_error(self, txn: Transaction, context: Dict) -> ControlPointResult:
@@ -1652,6 +1741,249 @@ class ControlPointsEngine:
             evidence={"ensemble_score": ensemble_score, "models_combined": len(scores)}
         )
 
+    # ========================================
+    # BATCH KERNELS
+    # ========================================
+    # Each kernel mirrors its _test_* method over a TransactionPopulation
+    # and returns (risk_scores, triggered) columns.
+
+    def _batch_round_dollar(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        amount = pop.abs_amounts
+        is_round = (amount % 100 == 0) & (amount >= 1000)
+        risk_score = np.where(is_round, 0.7, 0.0)
+        risk_score[(amount % 10000 == 0) & (amount >= 10000)] = 0.9
+        return risk_score, is_round
+
+    def _batch_weekend_posting(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(pop.posted_weekday >= 5, 0.6)
+
+    def _batch_after_hours(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores((pop.posted_hour < 7) | (pop.posted_hour > 19), 0.5)
+
+    def _batch_period_end_clustering(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(pop.day >= 31 - 3, 0.7)
+
+    def _batch_manual_entry(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(pop.entry_type_in("manual"), 0.5)
+
+    def _batch_adjustment_entry(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(pop.entry_type_in("adjustment"), 0.6)
+
+    def _batch_missing_documentation(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(~pop.has_document, 0.8)
+
+    def _batch_above_materiality(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(pop.abs_amounts > context.get("materiality", 100000), 0.9)
+
+    def _batch_duplicate_amount(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(pop.key_hashes(pop.amount_strings) % 20 == 0, 0.7)
+
+    def _batch_duplicate_description(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(pop.field_hashes("descriptions") % 25 == 0, 0.6)
+
+    def _batch_high_risk_account(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        is_high_risk = pop.account_type_in("revenue", "accounts_receivable", "inventory", "related_party")
+        return self._flag_scores(is_high_risk, 0.7)
+
+    def _batch_reversing_entry(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        is_reversing = pop.entry_type_in("reversing") | (pop.description_keyword_counts(["reversal"]) > 0)
+        return self._flag_scores(is_reversing, 0.6)
+
+    def _batch_intercompany(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(pop.is_intercompany, 0.5)
+
+    def _batch_round_thousand(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        amount = pop.abs_amounts
+        return self._flag_scores((amount >= 1000) & (amount % 1000 == 0), 0.6)
+
+    def _batch_just_below_threshold(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        amount = pop.abs_amounts
+        just_below = np.zeros(len(pop), dtype=bool)
+        for t in [5000, 10000, 25000, 50000, 100000]:
+            just_below |= (t * 0.9 <= amount) & (amount < t)
+        return self._flag_scores(just_below, 0.8)
+
+    def _batch_missing_approval(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(~pop.approved, 0.9)
+
+    def _batch_unusual_account_combination(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        keys = map("{}:{}".format, pop.account_codes, pop.account_types)
+        return self._flag_scores(pop.key_hashes(keys) % 30 == 0, 0.6)
+
+    def _batch_same_user_approval(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(pop.field_hashes("posting_users") % 50 == 0, 0.9)
+
+    def _batch_new_vendor(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(pop.has_vendor & (pop.field_hashes("vendor_ids") % 20 == 0), 0.5)
+
+    def _batch_suspicious_keywords(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        keywords = ["cash", "write-off", "write off", "adjustment", "reversal", "correct", "override", "manual"]
+        found = pop.description_keyword_counts(keywords)
+        risk_score = np.where(found > 0, np.minimum(0.7 + found * 0.1, 1.0), 0.0)
+        return risk_score, found > 0
+
+    def _batch_unusual_revenue(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        unusual = pop.account_type_in("revenue") & (pop.abs_amounts > context.get("materiality", 100000) * 0.5)
+        return self._flag_scores(unusual, 0.8)
+
+    def _batch_expense_capitalization(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        potential = pop.account_type_in("asset") & (pop.description_keyword_counts(["expense"]) > 0)
+        return self._flag_scores(potential, 0.7)
+
+    def _batch_year_end_entry(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores((pop.month == 12) & (pop.day >= 25), 0.6)
+
+    def _batch_sequential_amounts(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(pop.is_sequential, 0.6)
+
+    def _batch_negative_amount(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores((pop.amounts < 0) & pop.account_type_in("asset", "expense"), 0.5)
+
+    def _batch_zscore_outlier(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        mean = context.get("mean_amount", 10000)
+        std = context.get("std_amount", 5000)
+        if std == 0:
+            std = 1
+        z_score = np.abs((pop.abs_amounts - mean) / std)
+        risk_score = np.where(z_score > 2, np.minimum(z_score / 5, 1.0), 0.0)
+        return risk_score, z_score > 3
+
+    def _batch_benford_first_digit(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores((pop.abs_amounts != 0) & (pop.first_digit >= 6), 0.7)
+
+    def _batch_benford_second_digit(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores((pop.second_digit == 0) & (pop.abs_amounts > 100), 0.6)
+
+    def _batch_iqr_outlier(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        q1 = context.get("q1_amount", 2500)
+        q3 = context.get("q3_amount", 15000)
+        iqr = q3 - q1
+        lower = q1 - 1.5 * iqr
+        upper = q3 + 1.5 * iqr
+        return self._flag_scores((pop.abs_amounts < lower) | (pop.abs_amounts > upper), 0.7)
+
+    def _batch_moving_average_deviation(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        ma = context.get("moving_average", 8000)
+        deviation = np.abs(pop.abs_amounts - ma) / ma if ma > 0 else np.zeros(len(pop))
+        risk_score = np.where(deviation > 0.3, np.minimum(deviation, 1.0), 0.0)
+        return risk_score, deviation > 0.5
+
+    def _batch_seasonality_anomaly(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        keys = map("{}:{}".format, pop.amount_strings, pop.month.tolist())
+        return self._flag_scores(pop.key_hashes(keys) % 40 == 0, 0.5)
+
+    def _batch_frequency_anomaly(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(pop.field_hashes("transaction_ids") % 35 == 0, 0.6)
+
+    def _batch_distribution_shift(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        keys = map("{}:{}".format, pop.account_codes, pop.amount_strings)
+        return self._flag_scores(pop.key_hashes(keys) % 45 == 0, 0.6)
+
+    def _batch_variance_spike(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        keys = (transaction_id[:8] for transaction_id in pop.transaction_ids)
+        return self._flag_scores(pop.key_hashes(keys) % 50 == 0, 0.5)
+
+    def _batch_correlation_break(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        keys = map("{}:{}".format, pop.account_codes, pop.posting_users)
+        return self._flag_scores(pop.key_hashes(keys) % 55 == 0, 0.6)
+
+    def _batch_trend_deviation(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        detectors = context.get("detectors")
+        if detectors is None:
+            return self._pass_scores(pop)
+        return self._flag_scores(detectors.trends.deviations(pop) > 3, 0.5)
+
+    def _batch_percentile_extreme(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._flag_scores(pop.abs_amounts > context.get("p99_amount", 100000), 0.7)
+
+    def _batch_chi_square(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        detectors = context.get("detectors")
+        if detectors is None:
+            return self._pass_scores(pop)
+        return self._flag_scores(detectors.digit_outliers(pop), 0.6)
+
+    def _batch_last_two_digits(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        suspicious = (pop.digit_count >= 2) & np.isin(pop.whole_amounts % 100, [0, 50, 99])
+        return self._flag_scores(suspicious, 0.5)
+
+    def _batch_number_duplication(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        excessive = (pop.max_digit_repeats >= pop.digit_count * 0.6) & (pop.digit_count >= 4)
+        return self._flag_scores(excessive, 0.6)
+
+    def _batch_isolation_forest(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        detectors = context.get("detectors")
+        if detectors is None:
+            return self._pass_scores(pop)
+        return self._graded_scores(detectors.score("isolation_forest", pop), 0.85, 0.7)
+
+    def _batch_local_outlier_factor(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        detectors = context.get("detectors")
+        if detectors is None:
+            return self._pass_scores(pop)
+        return self._graded_scores(detectors.score("local_outlier_factor", pop), 0.8, 0.6)
+
+    def _batch_cluster_distance(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        detectors = context.get("detectors")
+        if detectors is None:
+            return self._pass_scores(pop)
+        return self._graded_scores(detectors.score("cluster_distance", pop), 0.75, 0.5)
+
+    def _batch_one_class_svm(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        detectors = context.get("detectors")
+        if detectors is None:
+            return self._pass_scores(pop)
+        return self._graded_scores(detectors.score("one_class_svm", pop), 0.8, 0.6)
+
+    def _batch_autoencoder_error(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._graded_scores(pop.field_hashes("descriptions") % 100 / 100, 0.75, 0.5)
+
+    def _batch_dbscan_noise(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        keys = (transaction_id[:6] for transaction_id in pop.transaction_ids)
+        return self._flag_scores(pop.key_hashes(keys) % 15 == 0, 0.6)
+
+    def _batch_random_forest_anomaly(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        keys = map("{}:{}".format, pop.account_types, pop.amount_strings)
+        return self._graded_scores(pop.key_hashes(keys) % 100 / 100, 0.7, 0.5)
+
+    def _batch_xgboost_risk(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        keys = map("{}:{}".format, pop.entry_types, pop.amount_strings)
+        return self._graded_scores(pop.key_hashes(keys) % 100 / 100, 0.65, 0.4)
+
+    def _batch_lstm_sequence(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._graded_scores(pop.key_hashes(pop.date_strings) % 100 / 100, 0.8, 0.6)
+
+    def _batch_entity_embedding(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        keys = map("{}:{}".format, pop.vendor_ids, pop.customer_ids)
+        distance = np.where(pop.has_vendor, pop.key_hashes(keys) % 100 / 100, 0.0)
+        return self._graded_scores(distance, 0.75, 0.5)
+
+    def _batch_graph_anomaly(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        keys = map("{}:{}".format, pop.account_codes, pop.cost_centers)
+        return self._graded_scores(pop.key_hashes(keys) % 100 / 100, 0.7, 0.5)
+
+    def _batch_user_behavior(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        return self._graded_scores(pop.field_hashes("posting_users") % 100 / 100, 0.8, 0.6)
+
+    def _batch_vendor_pattern(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        score = np.where(pop.has_vendor, pop.field_hashes("vendor_ids") % 100 / 100, 0.0)
+        return self._graded_scores(score, 0.75, 0.5)
+
+    def _batch_forecast_deviation(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        expected = context.get("forecast_amount", 10000)
+        deviation = np.abs(pop.abs_amounts - expected) / expected if expected > 0 else np.zeros(len(pop))
+        risk_score = np.where(deviation > 0.2, np.minimum(deviation, 1.0), 0.0)
+        return risk_score, deviation > 0.3
+
+    def _batch_ensemble_score(self, pop: TransactionPopulation, context: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        # Summed model by model, in the same order as _test_ensemble_score
+        total = np.zeros(len(pop))
+        models = [cp_id for cp_id in self.control_points if cp_id.startswith("ML") and cp_id != "ML015"]
+        for cp_id in models:
+            keys = (f"{cp_id}:{transaction_id}" for transaction_id in pop.transaction_ids)
+            total += pop.key_hashes(keys) % 100 / 100
+        ensemble_score = total / len(models) if models else total
+        return self._graded_scores(ensemble_score, 0.6, 0.4)
+
     # ========================================
     # HELPER METHODS
     # ========================================
@@ -1682,6 +2014,20 @@ class ControlPointsEngine:
             evidence={}
         )
 
+    def _flag_scores(self, flagged: np.ndarray, score: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Batch form of a control point scoring a fixed risk when it triggers"""
+        return np.where(flagged, score, 0.0), flagged
+
+    def _pass_scores(self, pop: TransactionPopulation) -> Tuple[np.ndarray, np.ndarray]:
+        """Batch form of _create_pass_result"""
+        return np.zeros(len(pop)), np.zeros(len(pop), dtype=bool)
+
+    def _graded_scores(
+        self, score: np.ndarray, trigger_above: float, score_above: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Batch form of a control point reporting its own score once above a floor"""
+        return np.where(score > score_above, score, 0.0), score > trigger_above
+
     def analyze_transaction(self, txn: Transaction, context: Dict) -> TransactionAnalysis:
         """
         Run all 55+ control points on a single transaction.
@@ -1735,6 +2081,65 @@ class ControlPointsEngine:
         )
 
 
+    def score_population(
+        self,
+        transactions: List[Transaction],
+        context: Dict,
+        chunk_size: int = POPULATION_CHUNK_SIZE
+    ) -> PopulationScores:
+        """
+        Score a whole population with every control point's batch kernel.
+
+        Transactions are scored in chunks: each chunk becomes a
+        TransactionPopulation, every kernel fills one column of a
+        transactions x control points score matrix, and the overall scores
+        are that matrix times the weight vector. Only overall scores and
+        trigger counts outlive a chunk, so no per-control-point results are
+        built; analyze_transaction produces those for the rows a caller keeps.
+        """
+        cp_ids = list(self.control_points)
+        weights = np.array([self.control_points[cp_id]["weight"] for cp_id in cp_ids])
+        n = len(transactions)
+
+        overall = np.zeros(n)
+        trigger_counts = np.zeros(len(cp_ids), dtype=np.int64)
+        first_triggered = np.full(len(cp_ids), n, dtype=np.int64)
+
+        for start in range(0, n, chunk_size):
+            population = TransactionPopulation(transactions[start:start + chunk_size])
+            scores = np.zeros((len(population), len(cp_ids)), order="F")
+            triggered = np.zeros((len(population), len(cp_ids)), dtype=bool, order="F")
+            active = np.ones(len(cp_ids), dtype=bool)
+
+            for j, cp_id in enumerate(cp_ids):
+                try:
+                    scores[:, j], triggered[:, j] = self.control_points[cp_id]["batch_func"](population, context)
+                except Exception as e:
+                    # Leave the control point out of this chunk's weighted average,
+                    # as analyze_transaction does for a failing test
+                    logger.error(f"Error in control point {cp_id}: {e}")
+                    active[j] = False
+                    triggered[:, j] = False
+
+            chunk_weights = np.where(active, weights, 0.0)
+            total_weight = chunk_weights.sum()
+            if total_weight > 0:
+                overall[start:start + len(population)] = scores @ chunk_weights / total_weight
+
+            counts = triggered.sum(axis=0)
+            first = start + np.argmax(triggered, axis=0)
+            first_triggered = np.where((counts > 0) & (first_triggered == n), first, first_triggered)
+            trigger_counts += counts
+
+        return PopulationScores(
+            control_point_ids=cp_ids,
+            control_point_names=[self.control_points[cp_id]["name"] for cp_id in cp_ids],
+            overall=overall,
+            trigger_counts=trigger_counts,
+            first_triggered=first_triggered,
+        )
+
+
 # Global engine instance
 engine = ControlPointsEngine()
 
@@ -1751,6 +2156,7 @@ async def health_check():
         "service": "Control Points Engine",
         "version": "1.0.0",
         "total_control_points": len(engine.control_points),
+        "fitted_populations": len(detector_cache),
         "categories": {
             "rule_based": 25,
             "statistical": 15,
@@ -1815,9 +2221,17 @@ async def list_control_points():
 @app.post("/analyze/transaction", response_model=TransactionAnalysis)
 async def analyze_single_transaction(
     transaction: Transaction,
-    materiality: float = 100000
+    materiality: float = 100000,
+    engagement_id: Optional[str] = None
 ):
-    """Analyze a single transaction with all 55+ control points"""
+    """
+    Analyze a single transaction with all 55+ control points.
+
+    With engagement_id, the ML and fitted statistical control points score
+    the transaction against the detectors of the engagement's most recently
+    analyzed population; without it, or before any population analysis,
+    they pass.
+    """
     context = {
         "materiality": materiality,
         "mean_amount": 10000,
@@ -1826,7 +2240,8 @@ async def analyze_single_transaction(
         "q3_amount": 15000,
         "p99_amount": 100000,
         "moving_average": 8000,
-        "forecast_amount": 10000
+        "forecast_amount": 10000,
+        "detectors": get_engagement_detectors(engagement_id) if engagement_id else None
     }
 
     return engine.analyze_transaction(transaction, context)
@@ -1839,60 +2254,47 @@ async def analyze_population(request: PopulationAnalysisRequest):
     Provides 100% coverage - better than sampling approaches.
     """
     transactions = request.transactions
-    total_amount = sum(abs(t.amount) for t in transactions)
+    amounts = np.abs(np.array([t.amount for t in transactions], dtype=np.float64))
+    total_amount = float(amounts.sum())
 
     # Build context from population
-    amounts = [abs(t.amount) for t in transactions]
+    has_amounts = len(amounts) > 0
     context = {
         "materiality": request.materiality,
         "performance_materiality": request.performance_materiality,
-        "mean_amount": np.mean(amounts) if amounts else 0,
-        "std_amount": np.std(amounts) if amounts else 1,
-        "q1_amount": np.percentile(amounts, 25) if amounts else 0,
-        "q3_amount": np.percentile(amounts, 75) if amounts else 0,
-        "p99_amount": np.percentile(amounts, 99) if amounts else 0,
-        "moving_average": np.mean(amounts) if amounts else 0,
-        "forecast_amount": np.mean(amounts) if amounts else 0
+        "mean_amount": np.mean(amounts) if has_amounts else 0,
+        "std_amount": np.std(amounts) if has_amounts else 1,
+        "q1_amount": np.percentile(amounts, 25) if has_amounts else 0,
+        "q3_amount": np.percentile(amounts, 75) if has_amounts else 0,
+        "p99_amount": np.percentile(amounts, 99) if has_amounts else 0,
+        "moving_average": np.mean(amounts) if has_amounts else 0,
+        "forecast_amount": np.mean(amounts) if has_amounts else 0,
+        # Fitted once per population and reused from cache on reanalysis
+        "detectors": get_population_detectors(request.engagement_id, transactions, amounts)
     }
 
-    # Analyze all transactions (100% coverage)
-    analyses = []
-    high_risk = 0
-    medium_risk = 0
-    low_risk = 0
-    control_point_triggers = defaultdict(int)
-
-    for txn in transactions:
-        analysis = engine.analyze_transaction(txn, context)
-        analyses.append(analysis)
-
-        if analysis.overall_risk_level in [RiskLevel.CRITICAL, RiskLevel.HIGH]:
-            high_risk += 1
-        elif analysis.overall_risk_level == RiskLevel.MEDIUM:
-            medium_risk += 1
-        else:
-            low_risk += 1
+    # Score all transactions (100% coverage) with the batch kernels
+    population_scores = engine.score_population(transactions, context)
+    overall = population_scores.overall
 
-        for result in analysis.control_point_results:
-            if result.triggered:
-                control_point_triggers[result.control_point_name] += 1
+    # Same bands as _score_to_level: critical/high >= 0.6, medium >= 0.4
+    high_risk = int(np.count_nonzero(overall >= 0.6))
+    medium_risk = int(np.count_nonzero((overall >= 0.4) & (overall < 0.6)))
+    low_risk = len(transactions) - high_risk - medium_risk
 
-    # Sort by risk and get top anomalies
-    analyses.sort(key=lambda a: a.overall_risk_score, reverse=True)
-    top_anomalies = analyses[:20]
+    # Full per-control-point results only for the top anomalies
+    top_anomalies = [
+        engine.analyze_transaction(transactions[row], context)
+        for row in population_scores.top_rows(20)
+    ]
 
     # Benford's Law analysis on population
-    first_digits = defaultdict(int)
-    for txn in transactions:
-        amount = abs(txn.amount)
-        if amount > 0:
-            first_digit = int(str(int(amount))[0])
-            first_digits[first_digit] += 1
+    observed_digits, digit_counts = np.unique(first_digits(amounts[amounts > 0]), return_counts=True)
 
     benford_expected = {1: 0.301, 2: 0.176, 3: 0.125, 4: 0.097, 5: 0.079,
                         6: 0.067, 7: 0.058, 8: 0.051, 9: 0.046}
     benford_results = {
-        "observed": dict(first_digits),
+        "observed": dict(zip(observed_digits.tolist(), digit_counts.tolist())),
         "expected": benford_expected,
         "total_transactions": len(transactions)
     }
@@ -1906,7 +2308,7 @@ async def analyze_population(request: PopulationAnalysisRequest):
         high_risk_count=high_risk,
         medium_risk_count=medium_risk,
         low_risk_count=low_risk,
-        control_point_summary=dict(control_point_triggers),
+        control_point_summary=population_scores.trigger_summary(),
         top_anomalies=top_anomalies,
         benford_law_results=benford_results,
         statistical_summary={
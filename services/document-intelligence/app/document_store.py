@@ -0,0 +1,465 @@
+"""
+Document storage backends for the document intelligence engine.
+
+Analyzed documents are kept in a store chosen by DOCUMENT_STORE_URL, or
+the service's DATABASE_URL when that is not set:
+
+- sqlite:///path/to/file.db: a local SQLite database with an FTS5 full-text
+  index. Replicas sharing the file (one host or volume) share documents.
+  Without either variable the store is document_intelligence.db in the
+  working directory, which does not survive a container restart.
+- postgresql://...: a PostgreSQL database with a generated tsvector column
+  and GIN index, shared by every replica. SQLAlchemy driver suffixes such
+  as postgresql+asyncpg:// are accepted.
+- memory://: process memory with the in-process inverted index. Unbounded
+  and not shared; for development and tests.
+
+Every store ranks full-text matches itself and keeps an entity -> document
+table for co-occurrence lookups, so only the engine's hot cache of parsed
+documents lives in process memory. DocumentCache bounds that cache by the
+approximate size of the documents it holds.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    ASYNCPG_AVAILABLE = False
+
+from .search_index import InvertedIndex, tokenize
+
+DEFAULT_DOCUMENT_STORE_URL = "sqlite:///document_intelligence.db"
+
+
+def store_url_from_env(environ=os.environ) -> str:
+    """DOCUMENT_STORE_URL, else DATABASE_URL without a SQLAlchemy driver suffix."""
+    url = environ.get("DOCUMENT_STORE_URL") or environ.get("DATABASE_URL")
+    if not url:
+        return DEFAULT_DOCUMENT_STORE_URL
+    scheme, separator, rest = url.partition("://")
+    return scheme.split("+", 1)[0] + separator + rest
+
+
+DOCUMENT_STORE_URL = store_url_from_env()
+
+# Hot cache of parsed documents, in approximate bytes of text and entities
+DOCUMENT_CACHE_MAX_BYTES = int(os.environ.get("DOCUMENT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Rough per-entity cost of the model object on top of its strings
+ENTITY_OVERHEAD_BYTES = 512
+
+# Entity keys per lookup query, below SQLite's bound parameter limit
+ENTITY_LOOKUP_BATCH = 500
+
+
+class DocumentCache:
+    """
+    Least-recently-used cache of parsed documents, bounded by total size
+
+    Sizes are estimates (see document_size). A document larger than the
+    whole cache is not cached.
+    """
+
+    def __init__(self, max_bytes: int = DOCUMENT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(doc_id)
+        if entry is None:
+            return None
+        self._entries.move_to_end(doc_id)
+        return entry[0]
+
+    def put(self, doc_id: str, document: Dict[str, Any], size: int):
+        self.discard(doc_id)
+        if size > self.max_bytes:
+            return
+
+        self._entries[doc_id] = (document, size)
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size_bytes -= evicted_size
+
+    def discard(self, doc_id: str):
+        entry = self._entries.pop(doc_id, None)
+        if entry is not None:
+            self.size_bytes -= entry[1]
+
+
+def document_size(text: str, entities: Sequence[Any]) -> int:
+    """Approximate memory held by a parsed document and its extracted entities."""
+    return sys.getsizeof(text) + sum(
+        sys.getsizeof(entity.value) + sys.getsizeof(entity.context) + ENTITY_OVERHEAD_BYTES
+        for entity in entities
+    )
+
+
+def create_document_store(url: str = DOCUMENT_STORE_URL):
+    """Document store for a store URL (see store_url_from_env)."""
+    if url.startswith("memory:"):
+        return MemoryDocumentStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteDocumentStore(url[len("sqlite:///"):])
+    if url.startswith(("postgresql://", "postgres://")):
+        if not ASYNCPG_AVAILABLE:
+            raise RuntimeError("asyncpg is required for a PostgreSQL document store")
+        return PostgresDocumentStore(url)
+    raise ValueError(f"Unsupported document store URL: {url}")
+
+
+# Documents are exchanged with stores as JSON-ready records:
+# {"doc_id", "type", "text", "entities": [dict, ...], "analyzed_at"}
+
+
+class MemoryDocumentStore:
+    """In-process documents, inverted text index and entity index"""
+
+    backend = "memory"
+
+    def __init__(self):
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.entity_index: Dict[str, Set[str]] = defaultdict(set)
+        self.text_index = InvertedIndex()
+
+    async def put(self, record: Dict[str, Any], entity_keys: Iterable[str]):
+        doc_id = record["doc_id"]
+        self.documents[doc_id] = record
+        for key in entity_keys:
+            self.entity_index[key].add(doc_id)
+        self.text_index.add(doc_id, record["text"])
+
+    async def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        return self.documents.get(doc_id)
+
+    async def count(self) -> int:
+        return len(self.documents)
+
+    async def search(
+        self,
+        query: str,
+        top_k: int,
+        document_ids: Optional[Sequence[str]] = None,
+        document_types: Optional[Sequence[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """Best BM25 matches as (document id, score), best first."""
+        document_ids = set(document_ids) if document_ids else None
+        document_types = set(document_types) if document_types else None
+
+        def accept(doc_id: str) -> bool:
+            if document_ids is not None and doc_id not in document_ids:
+                return False
+            return document_types is None or self.documents[doc_id]["type"] in document_types
+
+        return [(doc_id, score) for doc_id, score, _ in self.text_index.search(query, top_k, accept)]
+
+    async def entity_documents(self, entity_keys: Sequence[str]) -> Dict[str, Set[str]]:
+        """Documents containing each entity."""
+        return {key: set(self.entity_index.get(key, ())) for key in entity_keys}
+
+    async def close(self):
+        pass
+
+
+class SQLiteDocumentStore:
+    """
+    Documents in a local SQLite database with an FTS5 full-text index
+
+    Queries run on a worker thread over one connection in WAL mode, so
+    other processes can read the file while this one writes.
+    """
+
+    backend = "sqlite"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS documents (
+        id INTEGER PRIMARY KEY,
+        doc_id TEXT NOT NULL UNIQUE,
+        document_type TEXT NOT NULL,
+        text TEXT NOT NULL,
+        entities TEXT NOT NULL,
+        analyzed_at TEXT NOT NULL
+    );
+    CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+        text, content='documents', content_rowid='id'
+    );
+    CREATE TRIGGER IF NOT EXISTS documents_fts_insert AFTER INSERT ON documents BEGIN
+        INSERT INTO documents_fts(rowid, text) VALUES (new.id, new.text);
+    END;
+    CREATE TRIGGER IF NOT EXISTS documents_fts_delete AFTER DELETE ON documents BEGIN
+        INSERT INTO documents_fts(documents_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END;
+    CREATE TABLE IF NOT EXISTS document_entities (
+        entity_key TEXT NOT NULL,
+        doc_id TEXT NOT NULL,
+        PRIMARY KEY (entity_key, doc_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS document_entities_doc_id ON document_entities (doc_id);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("PRAGMA busy_timeout=5000")
+        self._connection.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    async def _run(self, function, *args):
+        return await asyncio.to_thread(self._locked, function, *args)
+
+    def _locked(self, function, *args):
+        with self._lock:
+            return function(*args)
+
+    async def put(self, record: Dict[str, Any], entity_keys: Iterable[str]):
+        await self._run(self._put, record, list(dict.fromkeys(entity_keys)))
+
+    def _put(self, record: Dict[str, Any], entity_keys: List[str]):
+        doc_id = record["doc_id"]
+        with self._transaction():
+            self._connection.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+            self._connection.execute("DELETE FROM document_entities WHERE doc_id = ?", (doc_id,))
+            self._connection.execute(
+                "INSERT INTO documents (doc_id, document_type, text, entities, analyzed_at) VALUES (?, ?, ?, ?, ?)",
+                (doc_id, record["type"], record["text"], json.dumps(record["entities"]), record["analyzed_at"]),
+            )
+            self._connection.executemany(
+                "INSERT INTO document_entities (entity_key, doc_id) VALUES (?, ?)",
+                [(key, doc_id) for key in entity_keys],
+            )
+
+    @contextmanager
+    def _transaction(self):
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    async def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        row = await self._run(
+            lambda: self._connection.execute(
+                "SELECT doc_id, document_type, text, entities, analyzed_at FROM documents WHERE doc_id = ?",
+                (doc_id,),
+            ).fetchone()
+        )
+        if row is None:
+            return None
+        return {"doc_id": row[0], "type": row[1], "text": row[2], "entities": json.loads(row[3]), "analyzed_at": row[4]}
+
+    async def count(self) -> int:
+        return await self._run(lambda: self._connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0])
+
+    async def search(
+        self,
+        query: str,
+        top_k: int,
+        document_ids: Optional[Sequence[str]] = None,
+        document_types: Optional[Sequence[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """Best FTS5 BM25 matches as (document id, score), best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or top_k <= 0:
+            return []
+
+        # Any query term; each quoted so punctuation inside numbers stays a phrase
+        sql = [
+            "SELECT d.doc_id, -bm25(documents_fts) FROM documents_fts",
+            "JOIN documents d ON d.id = documents_fts.rowid",
+            "WHERE documents_fts MATCH ?",
+        ]
+        params: List[Any] = [" OR ".join(f'"{term}"' for term in terms)]
+        if document_ids:
+            sql.append(f"AND d.doc_id IN ({', '.join('?' * len(document_ids))})")
+            params.extend(document_ids)
+        if document_types:
+            sql.append(f"AND d.document_type IN ({', '.join('?' * len(document_types))})")
+            params.extend(document_types)
+        sql.append("ORDER BY bm25(documents_fts) LIMIT ?")
+        params.append(top_k)
+
+        rows = await self._run(lambda: self._connection.execute(" ".join(sql), params).fetchall())
+        return [(doc_id, float(score)) for doc_id, score in rows]
+
+    async def entity_documents(self, entity_keys: Sequence[str]) -> Dict[str, Set[str]]:
+        """Documents containing each entity."""
+        return await self._run(self._entity_documents, list(entity_keys))
+
+    def _entity_documents(self, entity_keys: List[str]) -> Dict[str, Set[str]]:
+        documents: Dict[str, Set[str]] = {key: set() for key in entity_keys}
+        for start in range(0, len(entity_keys), ENTITY_LOOKUP_BATCH):
+            batch = entity_keys[start:start + ENTITY_LOOKUP_BATCH]
+            rows = self._connection.execute(
+                f"SELECT entity_key, doc_id FROM document_entities WHERE entity_key IN ({', '.join('?' * len(batch))})",
+                batch,
+            )
+            for key, doc_id in rows:
+                documents[key].add(doc_id)
+        return documents
+
+    async def close(self):
+        await self._run(self._connection.close)
+
+
+class PostgresDocumentStore:
+    """
+    Documents in PostgreSQL, ranked with ts_rank_cd over a GIN-indexed tsvector
+
+    The schema is created on first use, under an advisory lock: replicas
+    starting together would otherwise race on CREATE ... IF NOT EXISTS,
+    which is not safe against concurrent creation of the same table or
+    index. The 'simple' text search
+    configuration is used so amounts, account numbers and names are indexed
+    verbatim rather than stemmed.
+    """
+
+    backend = "postgresql"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS documents (
+        doc_id TEXT PRIMARY KEY,
+        document_type TEXT NOT NULL,
+        text TEXT NOT NULL,
+        entities JSONB NOT NULL,
+        analyzed_at TEXT NOT NULL,
+        text_search TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', text)) STORED
+    );
+    CREATE INDEX IF NOT EXISTS documents_text_search ON documents USING GIN (text_search);
+    CREATE INDEX IF NOT EXISTS documents_document_type ON documents (document_type);
+    CREATE TABLE IF NOT EXISTS document_entities (
+        entity_key TEXT NOT NULL,
+        doc_id TEXT NOT NULL REFERENCES documents (doc_id) ON DELETE CASCADE,
+        PRIMARY KEY (entity_key, doc_id)
+    );
+    CREATE INDEX IF NOT EXISTS document_entities_doc_id ON document_entities (doc_id);
+    """
+
+    # Any query term, each parsed as plain text and OR-ed together
+    SEARCH = """
+    WITH query AS (
+        SELECT to_tsquery('simple', string_agg('(' || plainto_tsquery('simple', term)::text || ')', ' | ')) AS q
+        FROM unnest($1::text[]) AS term
+        WHERE numnode(plainto_tsquery('simple', term)) > 0
+    )
+    SELECT doc_id, ts_rank_cd(text_search, query.q) AS score
+    FROM documents, query
+    WHERE text_search @@ query.q
+      AND ($2::text[] IS NULL OR doc_id = ANY($2))
+      AND ($3::text[] IS NULL OR document_type = ANY($3))
+    ORDER BY score DESC
+    LIMIT $4
+    """
+
+    # pg_advisory_xact_lock key serializing schema creation across replicas
+    SCHEMA_LOCK_KEY = 0x646F6373  # "docs"
+
+    def __init__(self, url: str, min_size: int = 1, max_size: int = 10):
+        self.url = url
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    async def _get_pool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    pool = await asyncpg.create_pool(self.url, min_size=self.min_size, max_size=self.max_size)
+                    async with pool.acquire() as connection:
+                        async with connection.transaction():
+                            await connection.execute("SELECT pg_advisory_xact_lock($1)", self.SCHEMA_LOCK_KEY)
+                            await connection.execute(self.SCHEMA)
+                    self._pool = pool
+        return self._pool
+
+    async def put(self, record: Dict[str, Any], entity_keys: Iterable[str]):
+        doc_id = record["doc_id"]
+        pool = await self._get_pool()
+        async with pool.acquire() as connection:
+            async with connection.transaction():
+                await connection.execute("DELETE FROM documents WHERE doc_id = $1", doc_id)
+                await connection.execute(
+                    "INSERT INTO documents (doc_id, document_type, text, entities, analyzed_at) "
+                    "VALUES ($1, $2, $3, $4::jsonb, $5)",
+                    doc_id, record["type"], record["text"], json.dumps(record["entities"]), record["analyzed_at"],
+                )
+                await connection.executemany(
+                    "INSERT INTO document_entities (entity_key, doc_id) VALUES ($1, $2)",
+                    [(key, doc_id) for key in dict.fromkeys(entity_keys)],
+                )
+
+    async def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        pool = await self._get_pool()
+        row = await pool.fetchrow(
+            "SELECT doc_id, document_type, text, entities, analyzed_at FROM documents WHERE doc_id = $1",
+            doc_id,
+        )
+        if row is None:
+            return None
+        return {
+            "doc_id": row["doc_id"],
+            "type": row["document_type"],
+            "text": row["text"],
+            "entities": json.loads(row["entities"]),
+            "analyzed_at": row["analyzed_at"],
+        }
+
+    async def count(self) -> int:
+        pool = await self._get_pool()
+        return await pool.fetchval("SELECT COUNT(*) FROM documents")
+
+    async def search(
+        self,
+        query: str,
+        top_k: int,
+        document_ids: Optional[Sequence[str]] = None,
+        document_types: Optional[Sequence[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """Best ts_rank_cd matches as (document id, score), best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or top_k <= 0:
+            return []
+
+        pool = await self._get_pool()
+        rows = await pool.fetch(
+            self.SEARCH,
+            terms,
+            list(document_ids) if document_ids else None,
+            list(document_types) if document_types else None,
+            top_k,
+        )
+        return [(row["doc_id"], float(row["score"])) for row in rows]
+
+    async def entity_documents(self, entity_keys: Sequence[str]) -> Dict[str, Set[str]]:
+        """Documents containing each entity."""
+        documents: Dict[str, Set[str]] = {key: set() for key in entity_keys}
+        pool = await self._get_pool()
+        rows = await pool.fetch(
+            "SELECT entity_key, doc_id FROM document_entities WHERE entity_key = ANY($1::text[])",
+            list(entity_keys),
+        )
+        for row in rows:
+            documents[row["entity_key"]].add(row["doc_id"])
+        return documents
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
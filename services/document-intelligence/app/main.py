@@ -22,8 +22,12 @@ import numpy as np
 from collections import defaultdict
 import json
 import hashlib
+import math
 import re
 
+from .document_store import DocumentCache, create_document_store, document_size
+from .search_index import extract_snippet, tokenize
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -169,10 +173,11 @@ class DocumentIntelligenceEngine:
     Provides comprehensive document understanding for audit purposes.
     """
 
-    def __init__(self):
-        self.documents: Dict[str, Dict[str, Any]] = {}
-        self.entity_index: Dict[str, List[str]] = defaultdict(list)
-        self.relationship_graph: Dict[str, List[DocumentRelationship]] = defaultdict(list)
+    def __init__(self, store=None, cache: Optional[DocumentCache] = None):
+        # Analyzed documents live in the store (shared by replicas for SQL
+        # backends); only recently used parsed documents are kept in memory
+        self.store = store or create_document_store()
+        self.cache = cache if cache is not None else DocumentCache()
         self._initialize_models()
 
     def _initialize_models(self):
@@ -266,17 +271,24 @@ class DocumentIntelligenceEngine:
         )
         confidence = await self._calculate_confidence(entities, doc_type)
 
-        # Store document
-        self.documents[doc_id] = {
+        # Store and index document
+        document = {
             "text": request.document_text,
             "type": doc_type,
             "entities": entities,
             "analyzed_at": datetime.utcnow().isoformat()
         }
-
-        # Index entities
-        for entity in entities:
-            self.entity_index[f"{entity.entity_type}:{entity.value}"].append(doc_id)
+        await self.store.put(
+            {
+                "doc_id": doc_id,
+                "type": doc_type.value,
+                "text": document["text"],
+                "entities": [entity.model_dump(mode="json") for entity in entities],
+                "analyzed_at": document["analyzed_at"],
+            },
+            [self._entity_key(entity) for entity in entities]
+        )
+        self.cache.put(doc_id, document, document_size(document["text"], entities))
 
         return DocumentSummary(
             document_id=doc_id,
@@ -294,6 +306,29 @@ class DocumentIntelligenceEngine:
             confidence=confidence
         )
 
+    async def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Analyzed document by id, from the hot cache or the store."""
+        document = self.cache.get(doc_id)
+        if document is not None:
+            return document
+
+        record = await self.store.get(doc_id)
+        if record is None:
+            return None
+
+        document = {
+            "text": record["text"],
+            "type": DocumentType(record["type"]),
+            "entities": [ExtractedEntity(**entity) for entity in record["entities"]],
+            "analyzed_at": record["analyzed_at"]
+        }
+        self.cache.put(doc_id, document, document_size(document["text"], document["entities"]))
+        return document
+
+    @staticmethod
+    def _entity_key(entity: ExtractedEntity) -> str:
+        return f"{entity.entity_type.value}:{entity.value}"
+
     async def _classify_document(self, text: str) -> DocumentType:
         """Classify document type based on content."""
         text_lower = text.lower()
@@ -728,66 +763,93 @@ class DocumentIntelligenceEngine:
         self,
         document_id: str
     ) -> List[DocumentRelationship]:
-        """Find documents related to the given document."""
-        if document_id not in self.documents:
-            return []
+        """
+        Find documents related to the given document.
 
-        doc = self.documents[document_id]
-        relationships = []
+        Shared entities are aggregated per related document and weighted by
+        their inverse document frequency log(N / df), so an entity found in
+        every document weighs nothing and links nothing. Each related
+        document yields one relationship whose confidence is the weighted
+        share of this document's entities it also contains.
+        """
+        doc = await self.get_document(document_id)
+        if doc is None:
+            return []
 
-        # Find documents with shared entities
-        for entity in doc.get("entities", []):
-            key = f"{entity.entity_type}:{entity.value}"
-            related_docs = self.entity_index.get(key, [])
+        keys = list(dict.fromkeys(self._entity_key(entity) for entity in doc.get("entities", [])))
+        entity_documents = await self.store.entity_documents(keys)
+        document_count = await self.store.count()
+        weights = {
+            key: math.log(max(document_count, 1) / max(len(entity_documents[key]), 1))
+            for key in keys
+        }
+        total_weight = sum(weights.values())
 
-            for related_id in related_docs:
+        # Co-occurrence: related document -> entities it shares with this one
+        shared: Dict[str, List[str]] = defaultdict(list)
+        for key in keys:
+            if weights[key] <= 0:
+                continue
+            for related_id in entity_documents[key]:
                 if related_id != document_id:
-                    relationships.append(DocumentRelationship(
-                        source_doc_id=document_id,
-                        target_doc_id=related_id,
-                        relationship_type="shared_entity",
-                        confidence=0.75 + np.random.uniform(0, 0.2),
-                        shared_entities=[key],
-                        description=f"Documents share entity: {entity.value}"
-                    ))
+                    shared[related_id].append(key)
 
+        relationships = []
+        for related_id, shared_keys in shared.items():
+            confidence = sum(weights[key] for key in shared_keys) / total_weight
+            values = [key.split(":", 1)[1] for key in shared_keys]
+            relationships.append(DocumentRelationship(
+                source_doc_id=document_id,
+                target_doc_id=related_id,
+                relationship_type="shared_entity",
+                confidence=round(confidence, 3),
+                shared_entities=shared_keys,
+                description=(
+                    f"Documents share entity: {values[0]}" if len(values) == 1
+                    else f"Documents share {len(values)} entities: {', '.join(values[:5])}"
+                )
+            ))
+
+        relationships.sort(key=lambda relationship: relationship.confidence, reverse=True)
         return relationships
 
     async def search_documents(
         self,
         request: DocumentSearchRequest
     ) -> List[Dict[str, Any]]:
-        """Search across analyzed documents."""
-        results = []
-        query_lower = request.query.lower()
+        """
+        Search across analyzed documents.
 
-        for doc_id, doc in self.documents.items():
-            # Filter by document IDs if specified
-            if request.document_ids and doc_id not in request.document_ids:
-                continue
+        Matches are ranked by the document store's full-text index (BM25 for
+        memory and SQLite, ts_rank_cd for PostgreSQL); relevance_score is that
+        score. Snippets are taken around the query terms.
+        """
+        matches = await self.store.search(
+            request.query,
+            request.top_k,
+            document_ids=request.document_ids,
+            document_types=[doc_type.value for doc_type in request.document_types or []]
+        )
 
-            # Filter by document types if specified
-            if request.document_types and doc["type"] not in request.document_types:
+        query_terms = list(dict.fromkeys(tokenize(request.query)))
+        results = []
+        for doc_id, score in matches:
+            doc = await self.get_document(doc_id)
+            if doc is None:
                 continue
 
-            # Search text
-            text_lower = doc["text"].lower()
-            if query_lower in text_lower:
-                # Calculate relevance score
-                occurrences = text_lower.count(query_lower)
-                relevance = min(1.0, 0.5 + (occurrences * 0.1))
-
-                results.append({
-                    "document_id": doc_id,
-                    "document_type": doc["type"].value,
-                    "relevance_score": round(relevance, 3),
-                    "snippet": doc["text"][:300],
-                    "entity_count": len(doc.get("entities", []))
-                })
+            document_terms = set(tokenize(doc["text"]))
+            terms = [term for term in query_terms if term in document_terms]
+            results.append({
+                "document_id": doc_id,
+                "document_type": doc["type"].value,
+                "relevance_score": round(score, 3),
+                "matched_terms": terms,
+                "snippet": extract_snippet(doc["text"], terms),
+                "entity_count": len(doc.get("entities", []))
+            })
 
-        # Sort by relevance and limit
-        results.sort(key=lambda x: x["relevance_score"], reverse=True)
-        return results[:request.top_k]
+        return results
 
 
 # Initialize engine
@@ -802,10 +864,19 @@ async def health_check():
         "status": "healthy",
         "service": "document-intelligence",
         "version": "1.0.0",
+        "document_store": engine.store.backend,
+        "cached_documents": len(engine.cache),
+        "cache_bytes": engine.cache.size_bytes,
         "timestamp": datetime.utcnow().isoformat()
     }
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the document store on shutdown"""
+    await engine.store.close()
+
+
 @app.post("/analyze", response_model=DocumentSummary)
 async def analyze_document(request: DocumentAnalysisRequest):
     """
@@ -0,0 +1,159 @@
+"""
+Inverted text index for document search.
+
+Documents are tokenized once, when they are analyzed, into lower-cased word
+tokens; the index keeps per term the documents containing it and the term's
+frequency in each. A query only visits the postings of its own terms, so
+selective queries cost the same whatever the size of the corpus.
+
+Matches are ranked by Okapi BM25, and snippets are cut from the stored text
+of the returned documents only, around the densest cluster of query terms.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Words, keeping numbers such as 1,250.00 and abbreviations such as U.S. whole
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.,'][a-z0-9]+)*")
+
+# BM25 term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNIPPET_LENGTH = 300
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens of a text."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    """Term -> {document id: term frequency} index with BM25 ranking."""
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.document_lengths: Dict[str, int] = {}
+        self.document_terms: Dict[str, List[str]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.document_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.document_lengths
+
+    def add(self, doc_id: str, text: str):
+        """Index a document, replacing any earlier version with the same id."""
+        if doc_id in self:
+            self.remove(doc_id)
+
+        tokens = tokenize(text)
+        frequencies = Counter(tokens)
+        for term, frequency in frequencies.items():
+            self.postings[term][doc_id] = frequency
+
+        self.document_lengths[doc_id] = len(tokens)
+        self.document_terms[doc_id] = list(frequencies)
+        self.total_length += len(tokens)
+
+    def remove(self, doc_id: str):
+        """Drop a document from the index; unknown ids are ignored."""
+        if doc_id not in self:
+            return
+
+        for term in self.document_terms.pop(doc_id):
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+
+        self.total_length -= self.document_lengths.pop(doc_id)
+
+    def idf(self, term: str) -> float:
+        """BM25 inverse document frequency, always positive."""
+        document_frequency = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> List[Tuple[str, float, List[str]]]:
+        """
+        Best BM25 matches for a query.
+
+        Returns (document id, score, matched query terms) for the top_k
+        documents containing at least one query term, best first. accept, if
+        given, filters candidate document ids before ranking.
+        """
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term in self.postings]
+        if not terms or top_k <= 0:
+            return []
+
+        average_length = self.total_length / len(self) or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        matched: Dict[str, List[str]] = defaultdict(list)
+
+        for term in terms:
+            idf = self.idf(term)
+            for doc_id, frequency in self.postings[term].items():
+                if accept is not None and not accept(doc_id):
+                    continue
+                length_norm = 1 - self.b + self.b * self.document_lengths[doc_id] / average_length
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+                matched[doc_id].append(term)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(doc_id, score, matched[doc_id]) for doc_id, score in best]
+
+
+def extract_snippet(text: str, terms: List[str], length: int = SNIPPET_LENGTH) -> str:
+    """
+    Window of about length characters around the densest cluster of terms.
+
+    The window is the one holding the most term occurrences, widened evenly
+    on both sides and trimmed to word boundaries; cut ends are marked
+    with "...". Falls back to the start of the text when no term occurs.
+    """
+    if not terms:
+        return text[:length]
+
+    pattern = re.compile(
+        r"(?<![a-z0-9])(?:" + "|".join(map(re.escape, sorted(terms, key=len, reverse=True))) + r")(?![a-z0-9])",
+        re.IGNORECASE,
+    )
+    hits = [(match.start(), match.end()) for match in pattern.finditer(text)]
+    if not hits:
+        return text[:length]
+
+    # Sliding window over hit start positions for the densest cluster
+    best_first, best_last, first = 0, 0, 0
+    for last in range(len(hits)):
+        while hits[last][1] - hits[first][0] > length:
+            first += 1
+        if last - first > best_last - best_first:
+            best_first, best_last = first, last
+
+    cluster_start, cluster_end = hits[best_first][0], hits[best_last][1]
+    padding = max(length - (cluster_end - cluster_start), 0) // 2
+    start = max(cluster_start - padding, 0)
+    end = min(start + length, len(text))
+    start = max(min(start, end - length), 0)
+
+    # Do not cut words in half
+    if start > 0:
+        space = text.find(" ", start, cluster_start)
+        start = space + 1 if space != -1 else start
+    if end < len(text):
+        space = text.rfind(" ", cluster_end, end)
+        end = space if space != -1 else end
+
+    snippet = " ".join(text[start:end].split())
+    return ("..." if start > 0 else "") + snippet + ("..." if end < len(text) else "")
@@ -0,0 +1,153 @@
+"""
+Tests for the document stores and the engine's use of them
+
+The SQLite store is what a replica without DOCUMENT_STORE_URL or
+DATABASE_URL falls back to, so it is exercised end to end: records round
+trip, full-text matches come back best first and are mapped to search
+results with snippets and matched terms.
+"""
+
+import pytest
+from app.document_store import (
+    DEFAULT_DOCUMENT_STORE_URL,
+    MemoryDocumentStore,
+    SQLiteDocumentStore,
+    store_url_from_env,
+)
+from app.main import DocumentIntelligenceEngine, DocumentSearchRequest, DocumentType
+
+
+def record(doc_id, text, doc_type="invoice", entities=()):
+    return {
+        "doc_id": doc_id,
+        "type": doc_type,
+        "text": text,
+        "entities": list(entities),
+        "analyzed_at": "2024-03-31T00:00:00",
+    }
+
+
+@pytest.fixture
+async def sqlite_store(tmp_path):
+    store = SQLiteDocumentStore(str(tmp_path / "documents.db"))
+    yield store
+    await store.close()
+
+
+class TestStoreUrl:
+    """Choice of store from the environment"""
+
+    def test_document_store_url_wins(self):
+        environ = {"DOCUMENT_STORE_URL": "memory://", "DATABASE_URL": "postgresql://db/aura"}
+        assert store_url_from_env(environ) == "memory://"
+
+    def test_database_url_driver_suffix_is_dropped(self):
+        environ = {"DATABASE_URL": "postgresql+asyncpg://user:pw@db:5432/aura"}
+        assert store_url_from_env(environ) == "postgresql://user:pw@db:5432/aura"
+
+    def test_local_sqlite_without_either(self):
+        assert store_url_from_env({}) == DEFAULT_DOCUMENT_STORE_URL
+
+
+class TestSQLiteDocumentStore:
+    """SQLite store with an FTS5 index"""
+
+    @pytest.mark.asyncio
+    async def test_round_trip_and_replace(self, sqlite_store):
+        entity = {"entity_type": "money", "value": "$1,250.00", "confidence": 0.9, "context": "total $1,250.00"}
+        await sqlite_store.put(record("a", "Invoice total $1,250.00", entities=[entity]), ["money:$1,250.00"])
+        await sqlite_store.put(record("b", "Bank statement"), [])
+
+        assert await sqlite_store.get("a") == record("a", "Invoice total $1,250.00", entities=[entity])
+        assert await sqlite_store.get("missing") is None
+        assert await sqlite_store.count() == 2
+
+        # Re-analysis replaces the text and the entity links
+        await sqlite_store.put(record("a", "Credit note"), ["money:$99.00"])
+        assert (await sqlite_store.get("a"))["text"] == "Credit note"
+        assert await sqlite_store.count() == 2
+        assert await sqlite_store.entity_documents(["money:$1,250.00", "money:$99.00"]) == {
+            "money:$1,250.00": set(),
+            "money:$99.00": {"a"},
+        }
+
+    @pytest.mark.asyncio
+    async def test_search_ranks_and_filters(self, sqlite_store):
+        await sqlite_store.put(record("a", "payment terms net 30, late payment fee"), [])
+        await sqlite_store.put(record("b", "payment received", doc_type="bank_statement"), [])
+        await sqlite_store.put(record("c", "lease agreement"), [])
+
+        matches = await sqlite_store.search("late payment", top_k=10)
+        assert [doc_id for doc_id, _ in matches] == ["a", "b"]
+        assert matches[0][1] > matches[1][1]
+
+        assert [doc_id for doc_id, _ in await sqlite_store.search("payment", 10, document_types=["bank_statement"])] == ["b"]
+        assert [doc_id for doc_id, _ in await sqlite_store.search("payment", 10, document_ids=["a", "c"])] == ["a"]
+        assert await sqlite_store.search("payment", top_k=0) == []
+        assert await sqlite_store.search("!!!", top_k=10) == []
+
+    @pytest.mark.asyncio
+    async def test_documents_survive_reopening(self, tmp_path):
+        path = str(tmp_path / "documents.db")
+        store = SQLiteDocumentStore(path)
+        await store.put(record("a", "confirmation of balance"), ["account:Account 1001"])
+        await store.close()
+
+        reopened = SQLiteDocumentStore(path)
+        try:
+            assert await reopened.count() == 1
+            assert await reopened.entity_documents(["account:Account 1001"]) == {"account:Account 1001": {"a"}}
+        finally:
+            await reopened.close()
+
+
+class TestEngineSearch:
+    """Search results built from store matches"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    async def test_search_result_mapping(self, backend, sqlite_store):
+        store = sqlite_store if backend == "sqlite" else MemoryDocumentStore()
+        engine = DocumentIntelligenceEngine(store=store)
+        await store.put(record("inv", "Invoice 42. Amount due $5,000.00 under payment terms net 30."), [])
+        await store.put(record("stmt", "Statement period March. Payment received.", doc_type="bank_statement"), [])
+
+        results = await engine.search_documents(DocumentSearchRequest(query="payment terms", top_k=5))
+
+        assert [result["document_id"] for result in results] == ["inv", "stmt"]
+        first = results[0]
+        assert first["document_type"] == DocumentType.INVOICE.value
+        assert first["matched_terms"] == ["payment", "terms"]
+        assert "payment terms" in first["snippet"].lower()
+        assert first["entity_count"] == 0
+        assert first["relevance_score"] >= results[1]["relevance_score"]
+
+        filtered = await engine.search_documents(DocumentSearchRequest(
+            query="payment", document_types=[DocumentType.BANK_STATEMENT]
+        ))
+        assert [result["document_id"] for result in filtered] == ["stmt"]
+
+
+class TestRelatedDocuments:
+    """Entity co-occurrence links"""
+
+    @pytest.mark.asyncio
+    async def test_entity_in_every_document_links_nothing(self):
+        store = MemoryDocumentStore()
+        engine = DocumentIntelligenceEngine(store=store)
+
+        def entity(value):
+            return {"entity_type": "account", "value": value, "confidence": 0.9, "context": value}
+
+        everywhere, rare = entity("Account 1000"), entity("Account 4711")
+        await store.put(record("a", "a", entities=[everywhere, rare]), ["account:Account 1000", "account:Account 4711"])
+        await store.put(record("b", "b", entities=[everywhere, rare]), ["account:Account 1000", "account:Account 4711"])
+        await store.put(record("c", "c", entities=[everywhere]), ["account:Account 1000"])
+
+        [relationship] = await engine.find_related_documents("a")
+
+        assert relationship.target_doc_id == "b"
+        assert relationship.shared_entities == ["account:Account 4711"]
+        assert relationship.confidence == 1.0
+
+        assert await engine.find_related_documents("c") == []
@@ -12,6 +12,7 @@ Industry-leading ML capabilities that exceed Workiva, CaseWare, AuditBoard, and
 All configurations are environment-driven - NO hardcoded values.
 """
 
+import bisect
 import logging
 import math
 import os
@@ -579,6 +580,53 @@ class BenfordAnalyzer:
 # INTELLIGENT RECONCILIATION ENGINE
 # =============================================================================
 
+class _ReconciliationColumns:
+    """
+    Columnar, pre-parsed view of one side of a reconciliation.
+
+    Every row is parsed exactly once (amount as Decimal and float, date as
+    datetime, reference, description word set) so the matching phases never
+    call Decimal(), float() or datetime.fromisoformat() inside a loop.
+    """
+
+    __slots__ = ("rows", "ids", "amounts", "float_amounts", "dates", "ordinals", "references", "words")
+
+    def __init__(self, transactions: List[Dict[str, Any]]):
+        self.rows = transactions
+        self.ids = [t.get("id") for t in transactions]
+        self.amounts = [Decimal(str(t.get("amount", 0))) for t in transactions]
+        self.float_amounts = [float(t.get("amount", 0)) for t in transactions]
+        self.dates = [_parse_reconciliation_date(t.get("date")) for t in transactions]
+        self.ordinals = [d.toordinal() if d is not None else None for d in self.dates]
+        self.references = [str(t.get("reference", "")).strip() for t in transactions]
+        self.words = [frozenset(str(t.get("description", "")).lower().split()) for t in transactions]
+
+
+def _parse_reconciliation_date(value: Any) -> Optional[datetime]:
+    """Parse a transaction date once; None when missing or unparseable"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except (ValueError, TypeError):
+        return None
+
+
+def _parsed_dates_within_tolerance(
+    d1: Optional[datetime],
+    d2: Optional[datetime],
+    tolerance_days: int
+) -> bool:
+    """Whether two parsed dates are at most tolerance_days apart; False when either is missing"""
+    if d1 is None or d2 is None:
+        return False
+    try:
+        return abs((d1 - d2).days) <= tolerance_days
+    except TypeError:
+        # Mixing timezone-aware and naive timestamps
+        return False
+
+
 class IntelligentReconciliationEngine:
     """
     Advanced ML-powered reconciliation matching that exceeds 95% auto-match rate.
@@ -590,6 +638,24 @@ class IntelligentReconciliationEngine:
     - Description similarity using text processing
     - Many-to-one and one-to-many matching
     - Learning from confirmed matches
+
+    Performance:
+    Both sides are parsed once into columnar arrays and candidates are blocked
+    through sorted amount/date indexes and a reference-number hash instead of
+    comparing every source row with every target row. For S source and T
+    target rows:
+    - exact matching is O((S + T) log T + W), W = same-amount rows inside the
+      date window
+    - fuzzy matching is O((S + T) log T + C), C = candidates sharing an amount
+      window, reference, date window or description word with the source; a
+      block is only consulted when the fields outside it could still reach the
+      fuzzy threshold
+    - split-transaction search sorts the targets once and runs a two-pointer
+      sweep per source: O(T log T + S * h + P log P), h = positive targets
+      below the source amount, P = pairs reported. Two-leg subset sum over
+      arbitrary amounts has no general sub-quadratic bound, so the cost is
+      linear in the targets each source can actually split into, not in T
+    Results are identical to a full pairwise scan.
     """
 
     def __init__(self, settings: MLEngineSettings = ml_settings):
@@ -616,48 +682,58 @@ class IntelligentReconciliationEngine:
         """
         rules = matching_rules or self._default_matching_rules()
 
+        # Parse both sides once; phases work on row positions into these columns
+        source = _ReconciliationColumns(list(source_transactions))
+        target = _ReconciliationColumns(list(target_transactions))
+
         matched_pairs: List[ReconciliationMatch] = []
-        unmatched_source = list(source_transactions)
-        unmatched_target = list(target_transactions)
+        unmatched_source = list(range(len(source.rows)))
+        unmatched_target = list(range(len(target.rows)))
         suggested_matches: List[ReconciliationMatch] = []
 
         # Phase 1: Exact matches (highest confidence)
         exact_matches = self._find_exact_matches(
-            unmatched_source,
-            unmatched_target,
+            source, unmatched_source,
+            target, unmatched_target,
             rules
         )
 
-        for match in exact_matches:
-            matched_pairs.append(match)
-            # Remove matched items
-            unmatched_source = [t for t in unmatched_source if t.get("id") != match.source_id]
-            unmatched_target = [t for t in unmatched_target if t.get("id") != match.target_id]
+        matched_pairs.extend(exact_matches)
+        unmatched_source, unmatched_target = self._remove_matched(
+            source, unmatched_source, target, unmatched_target, exact_matches
+        )
 
         # Phase 2: Fuzzy matches
         fuzzy_matches = self._find_fuzzy_matches(
-            unmatched_source,
-            unmatched_target,
+            source, unmatched_source,
+            target, unmatched_target,
             rules
         )
 
+        auto_matches = []
         for match in fuzzy_matches:
             if match.confidence >= rules.get("auto_match_threshold", 0.90):
-                matched_pairs.append(match)
-                unmatched_source = [t for t in unmatched_source if t.get("id") != match.source_id]
-                unmatched_target = [t for t in unmatched_target if t.get("id") != match.target_id]
+                auto_matches.append(match)
             else:
                 suggested_matches.append(match)
 
+        matched_pairs.extend(auto_matches)
+        unmatched_source, unmatched_target = self._remove_matched(
+            source, unmatched_source, target, unmatched_target, auto_matches
+        )
+
         # Phase 3: One-to-many matching (for split transactions)
         if rules.get("allow_one_to_many", True):
             one_to_many = self._find_one_to_many_matches(
-                unmatched_source,
-                unmatched_target,
+                source, unmatched_source,
+                target, unmatched_target,
                 rules
             )
             suggested_matches.extend(one_to_many)
 
+        unmatched_source_rows = [source.rows[i] for i in unmatched_source]
+        unmatched_target_rows = [target.rows[j] for j in unmatched_target]
+
         # Calculate statistics
         total_source = len(source_transactions)
         total_target = len(target_transactions)
@@ -668,11 +744,11 @@ class IntelligentReconciliationEngine:
                 "source_count": total_source,
                 "target_count": total_target,
                 "matched_count": len(matched_pairs),
-                "unmatched_source_count": len(unmatched_source),
-                "unmatched_target_count": len(unmatched_target),
+                "unmatched_source_count": len(unmatched_source_rows),
+                "unmatched_target_count": len(unmatched_target_rows),
                 "suggested_match_count": len(suggested_matches),
                 "auto_match_rate": round(auto_match_rate * 100, 1),
-                "reconciliation_status": "complete" if len(unmatched_source) == 0 else "in_progress"
+                "reconciliation_status": "complete" if len(unmatched_source_rows) == 0 else "in_progress"
             },
             "matched_pairs": [
                 {
@@ -685,8 +761,8 @@ class IntelligentReconciliationEngine:
                 }
                 for m in matched_pairs
             ],
-            "unmatched_source": unmatched_source,
-            "unmatched_target": unmatched_target,
+            "unmatched_source": unmatched_source_rows,
+            "unmatched_target": unmatched_target_rows,
             "suggested_matches": [
                 {
                     "source_id": m.source_id,
@@ -698,7 +774,7 @@ class IntelligentReconciliationEngine:
                 }
                 for m in suggested_matches
             ],
-            "variance_analysis": self._calculate_variance(unmatched_source, unmatched_target)
+            "variance_analysis": self._calculate_variance(unmatched_source_rows, unmatched_target_rows)
         }
 
     def _default_matching_rules(self) -> Dict[str, Any]:
@@ -717,79 +793,179 @@ class IntelligentReconciliationEngine:
             }
         }
 
+    def _remove_matched(
+        self,
+        source: _ReconciliationColumns,
+        source_positions: List[int],
+        target: _ReconciliationColumns,
+        target_positions: List[int],
+        matches: List[ReconciliationMatch]
+    ) -> Tuple[List[int], List[int]]:
+        """Drop matched rows (by id) from both sides in a single pass"""
+        if not matches:
+            return source_positions, target_positions
+
+        matched_source_ids = {m.source_id for m in matches}
+        matched_target_ids = {m.target_id for m in matches}
+        return (
+            [i for i in source_positions if source.ids[i] not in matched_source_ids],
+            [j for j in target_positions if target.ids[j] not in matched_target_ids],
+        )
+
     def _find_exact_matches(
         self,
-        source: List[Dict],
-        target: List[Dict],
+        source: _ReconciliationColumns,
+        source_positions: List[int],
+        target: _ReconciliationColumns,
+        target_positions: List[int],
         rules: Dict
     ) -> List[ReconciliationMatch]:
         """Find exact matches on amount and date"""
         matches = []
         used_targets = set()
+        tolerance_days = rules.get("date_tolerance_days", 3)
+        window = math.ceil(tolerance_days) + 2
+
+        # Exact-amount hash of date-sorted buckets: amount -> ([ordinal], [position])
+        buckets: Dict[Decimal, Tuple[List[int], List[int]]] = {}
+        for j in sorted(
+            (j for j in target_positions if target.ordinals[j] is not None),
+            key=lambda j: target.ordinals[j]
+        ):
+            ordinals, positions = buckets.setdefault(target.amounts[j], ([], []))
+            ordinals.append(target.ordinals[j])
+            positions.append(j)
+
+        for i in source_positions:
+            bucket = buckets.get(source.amounts[i])
+            src_ordinal = source.ordinals[i]
+            if bucket is None or src_ordinal is None:
+                continue
 
-        for src in source:
-            src_amount = Decimal(str(src.get("amount", 0)))
-            src_date = src.get("date")
+            ordinals, positions = bucket
+            lo = bisect.bisect_left(ordinals, src_ordinal - window)
+            hi = bisect.bisect_right(ordinals, src_ordinal + window)
 
-            for tgt in target:
-                if tgt.get("id") in used_targets:
+            # First unused target in original order whose date is within tolerance
+            best_k = None
+            for k in range(lo, hi):
+                j = positions[k]
+                if best_k is not None and j >= positions[best_k]:
                     continue
+                if target.ids[j] in used_targets:
+                    continue
+                if _parsed_dates_within_tolerance(source.dates[i], target.dates[j], tolerance_days):
+                    best_k = k
 
-                tgt_amount = Decimal(str(tgt.get("amount", 0)))
-                tgt_date = tgt.get("date")
-
-                # Exact amount match
-                if src_amount == tgt_amount:
-                    # Check date within tolerance
-                    date_match = self._dates_within_tolerance(
-                        src_date, tgt_date, rules.get("date_tolerance_days", 3)
-                    )
+            if best_k is None:
+                continue
 
-                    if date_match:
-                        matches.append(ReconciliationMatch(
-                            source_id=src.get("id", ""),
-                            target_id=tgt.get("id", ""),
-                            match_score=1.0,
-                            match_type="exact",
-                            confidence=0.99,
-                            matching_fields=["amount", "date"]
-                        ))
-                        used_targets.add(tgt.get("id"))
-                        break
+            j = positions[best_k]
+            matches.append(ReconciliationMatch(
+                source_id=source.rows[i].get("id", ""),
+                target_id=target.rows[j].get("id", ""),
+                match_score=1.0,
+                match_type="exact",
+                confidence=0.99,
+                matching_fields=["amount", "date"]
+            ))
+            used_targets.add(target.ids[j])
+            del ordinals[best_k]
+            del positions[best_k]
 
         return matches
 
     def _find_fuzzy_matches(
         self,
-        source: List[Dict],
-        target: List[Dict],
+        source: _ReconciliationColumns,
+        source_positions: List[int],
+        target: _ReconciliationColumns,
+        target_positions: List[int],
         rules: Dict
     ) -> List[ReconciliationMatch]:
         """Find fuzzy matches using multi-field scoring"""
         matches = []
         weights = rules.get("field_weights", {})
+        w_amount = weights.get("amount", 0.4)
+        w_date = weights.get("date", 0.25)
+        w_description = weights.get("description", 0.2)
+        w_reference = weights.get("reference", 0.15)
+        amt_tolerance = rules.get("amount_tolerance_pct", 0.01)
+        tolerance_days = rules.get("date_tolerance_days", 3)
+        fuzzy_threshold = rules.get("fuzzy_threshold", 0.85)
+
+        # Only consult as many blocks as needed: a target outside every chosen
+        # block scores at most the weight of the remaining fields, so once that
+        # falls below the threshold it can never be accepted.
+        residual = sum(max(w, 0) for w in (w_amount, w_reference, w_date, w_description))
+        blocks = set()
+        for name, weight in (
+            ("amount", w_amount),
+            ("reference", w_reference),
+            ("date", w_date),
+            ("description", w_description),
+        ):
+            if residual < fuzzy_threshold:
+                break
+            blocks.add(name)
+            residual -= max(weight, 0)
+
+        amount_window = max(amt_tolerance, 0.05)
+        date_window = math.ceil(tolerance_days) + 2
+
+        by_amount = sorted(target_positions, key=lambda j: target.float_amounts[j])
+        sorted_amounts = [target.float_amounts[j] for j in by_amount]
+        dated = sorted(
+            (j for j in target_positions if target.ordinals[j] is not None),
+            key=lambda j: target.ordinals[j]
+        )
+        sorted_ordinals = [target.ordinals[j] for j in dated]
+        by_reference: Dict[str, List[int]] = {}
+        by_word: Dict[str, List[int]] = {}
+        for j in target_positions:
+            if "reference" in blocks and target.references[j]:
+                by_reference.setdefault(target.references[j], []).append(j)
+            if "description" in blocks:
+                for word in target.words[j]:
+                    by_word.setdefault(word, []).append(j)
+
+        for i in source_positions:
+            src_amt = source.float_amounts[i]
+            candidates = set()
+
+            if "amount" in blocks and src_amt != 0:
+                spread = abs(src_amt) * amount_window * (1 + 1e-9) + 1e-9
+                lo = bisect.bisect_left(sorted_amounts, src_amt - spread)
+                hi = bisect.bisect_right(sorted_amounts, src_amt + spread)
+                candidates.update(by_amount[lo:hi])
+            if "reference" in blocks and source.references[i]:
+                candidates.update(by_reference.get(source.references[i], ()))
+            if "date" in blocks and source.ordinals[i] is not None:
+                lo = bisect.bisect_left(sorted_ordinals, source.ordinals[i] - date_window)
+                hi = bisect.bisect_right(sorted_ordinals, source.ordinals[i] + date_window)
+                candidates.update(dated[lo:hi])
+            if "description" in blocks:
+                for word in source.words[i]:
+                    candidates.update(by_word.get(word, ()))
 
-        for src in source:
             best_match = None
             best_score = 0
 
-            for tgt in target:
+            # Target order preserved so ties resolve exactly as a full scan would
+            for j in sorted(candidates):
                 score = 0
                 matching_fields = []
                 discrepancies = []
 
                 # Amount similarity
-                src_amt = float(src.get("amount", 0))
-                tgt_amt = float(tgt.get("amount", 0))
-                amt_tolerance = rules.get("amount_tolerance_pct", 0.01)
-
+                tgt_amt = target.float_amounts[j]
                 if src_amt != 0:
                     amt_diff_pct = abs(src_amt - tgt_amt) / abs(src_amt)
                     if amt_diff_pct <= amt_tolerance:
-                        score += weights.get("amount", 0.4) * (1 - amt_diff_pct)
+                        score += w_amount * (1 - amt_diff_pct)
                         matching_fields.append("amount")
                     elif amt_diff_pct <= 0.05:
-                        score += weights.get("amount", 0.4) * 0.5
+                        score += w_amount * 0.5
                         discrepancies.append({
                             "field": "amount",
                             "source_value": src_amt,
@@ -798,35 +974,28 @@ class IntelligentReconciliationEngine:
                         })
 
                 # Date similarity
-                if self._dates_within_tolerance(
-                    src.get("date"), tgt.get("date"),
-                    rules.get("date_tolerance_days", 3)
-                ):
-                    score += weights.get("date", 0.25)
+                if _parsed_dates_within_tolerance(source.dates[i], target.dates[j], tolerance_days):
+                    score += w_date
                     matching_fields.append("date")
 
                 # Description similarity (simple word overlap)
-                desc_sim = self._text_similarity(
-                    str(src.get("description", "")),
-                    str(tgt.get("description", ""))
-                )
+                desc_sim = self._word_set_similarity(source.words[i], target.words[j])
                 if desc_sim > 0.5:
-                    score += weights.get("description", 0.2) * desc_sim
+                    score += w_description * desc_sim
                     if desc_sim > 0.7:
                         matching_fields.append("description")
 
                 # Reference number
-                src_ref = str(src.get("reference", "")).strip()
-                tgt_ref = str(tgt.get("reference", "")).strip()
-                if src_ref and tgt_ref and src_ref == tgt_ref:
-                    score += weights.get("reference", 0.15)
+                src_ref = source.references[i]
+                if src_ref and src_ref == target.references[j]:
+                    score += w_reference
                     matching_fields.append("reference")
 
                 if score > best_score:
                     best_score = score
                     best_match = ReconciliationMatch(
-                        source_id=src.get("id", ""),
-                        target_id=tgt.get("id", ""),
+                        source_id=source.rows[i].get("id", ""),
+                        target_id=target.rows[j].get("id", ""),
                         match_score=score,
                         match_type="fuzzy",
                         confidence=score,
@@ -834,86 +1003,86 @@ class IntelligentReconciliationEngine:
                         discrepancies=discrepancies
                     )
 
-            if best_match and best_score >= rules.get("fuzzy_threshold", 0.85):
+            if best_match and best_score >= fuzzy_threshold:
                 matches.append(best_match)
 
         return matches
 
     def _find_one_to_many_matches(
         self,
-        source: List[Dict],
-        target: List[Dict],
+        source: _ReconciliationColumns,
+        source_positions: List[int],
+        target: _ReconciliationColumns,
+        target_positions: List[int],
         rules: Dict
     ) -> List[ReconciliationMatch]:
         """Find potential one-to-many matches (e.g., split transactions)"""
         suggestions = []
+        tolerance_pct = Decimal(str(rules.get("amount_tolerance_pct", 0.01)))
 
-        for src in source:
-            src_amt = Decimal(str(src.get("amount", 0)))
-
-            # Find combinations of target transactions that sum to source
-            potential_matches = []
-            for tgt in target:
-                tgt_amt = Decimal(str(tgt.get("amount", 0)))
-                if tgt_amt > 0 and tgt_amt < src_amt:
-                    potential_matches.append(tgt)
-
-            # Check pairs that sum to source amount (simplified)
-            for i, t1 in enumerate(potential_matches):
-                for t2 in potential_matches[i+1:]:
-                    combined = Decimal(str(t1.get("amount", 0))) + Decimal(str(t2.get("amount", 0)))
-                    tolerance = src_amt * Decimal(str(rules.get("amount_tolerance_pct", 0.01)))
-
-                    if abs(combined - src_amt) <= tolerance:
-                        suggestions.append(ReconciliationMatch(
-                            source_id=src.get("id", ""),
-                            target_id=f"{t1.get('id')}+{t2.get('id')}",
-                            match_score=0.80,
-                            match_type="one_to_many",
-                            confidence=0.75,
-                            matching_fields=["combined_amount"],
-                            discrepancies=[{
-                                "type": "split_transaction",
-                                "source_amount": float(src_amt),
-                                "combined_target_amount": float(combined),
-                                "target_ids": [t1.get("id"), t2.get("id")]
-                            }]
-                        ))
-
-        return suggestions
-
-    def _dates_within_tolerance(
-        self,
-        date1: Optional[str],
-        date2: Optional[str],
-        tolerance_days: int
-    ) -> bool:
-        """Check if two dates are within tolerance"""
-        if not date1 or not date2:
-            return False
+        # Positive targets sorted by amount; pairs are found with a two-pointer
+        # sweep instead of testing every combination.
+        split_positions = sorted(
+            (j for j in target_positions if target.amounts[j] > 0),
+            key=lambda j: target.amounts[j]
+        )
+        split_amounts = [target.amounts[j] for j in split_positions]
 
-        try:
-            d1 = datetime.fromisoformat(str(date1).replace('Z', '+00:00'))
-            d2 = datetime.fromisoformat(str(date2).replace('Z', '+00:00'))
-            return abs((d1 - d2).days) <= tolerance_days
-        except (ValueError, TypeError):
-            return False
+        for i in source_positions:
+            src_amt = source.amounts[i]
+            tolerance = src_amt * tolerance_pct
+            if tolerance < 0:
+                continue
 
-    def _text_similarity(self, text1: str, text2: str) -> float:
-        """Simple word overlap similarity"""
-        if not text1 or not text2:
-            return 0
+            low, high = src_amt - tolerance, src_amt + tolerance
+            # Both legs must be strictly below the source amount
+            end = bisect.bisect_left(split_amounts, src_amt)
+
+            # As the smaller leg grows its complement window [low - a, high - a]
+            # only moves down, so both window edges walk left monotonically:
+            # [lo, hi) holds the legs whose sum with leg a is within tolerance.
+            pairs = []
+            lo = hi = end
+            for a in range(end):
+                first_amt = split_amounts[a]
+                while hi > a + 1 and split_amounts[hi - 1] + first_amt > high:
+                    hi -= 1
+                if hi <= a + 1:
+                    break
+                while lo > 0 and split_amounts[lo - 1] + first_amt >= low:
+                    lo -= 1
+                for b in range(max(lo, a + 1), hi):
+                    j1, j2 = split_positions[a], split_positions[b]
+                    pairs.append((j1, j2) if j1 < j2 else (j2, j1))
+
+            # Report in target order, as a pairwise scan would
+            pairs.sort()
+            for j1, j2 in pairs:
+                combined = target.amounts[j1] + target.amounts[j2]
+                suggestions.append(ReconciliationMatch(
+                    source_id=source.rows[i].get("id", ""),
+                    target_id=f"{target.ids[j1]}+{target.ids[j2]}",
+                    match_score=0.80,
+                    match_type="one_to_many",
+                    confidence=0.75,
+                    matching_fields=["combined_amount"],
+                    discrepancies=[{
+                        "type": "split_transaction",
+                        "source_amount": float(src_amt),
+                        "combined_target_amount": float(combined),
+                        "target_ids": [target.ids[j1], target.ids[j2]]
+                    }]
+                ))
 
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
+        return suggestions
 
+    def _word_set_similarity(self, words1: frozenset, words2: frozenset) -> float:
+        """Word overlap similarity on pre-tokenized descriptions"""
         if not words1 or not words2:
             return 0
 
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-
-        return len(intersection) / len(union) if union else 0
+        intersection = len(words1 & words2)
+        return intersection / (len(words1) + len(words2) - intersection)
 
     def _calculate_variance(
         self,
@@ -11,6 +11,7 @@ Core business entity management with:
 """
 import io
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, date
 from typing import Any, Dict, List, Optional
 from uuid import UUID
@@ -54,6 +55,12 @@ from .schemas import (
 from .group_audit_api import router as group_audit_router
 from .engagement_customer_api import router as customer_router
 
+# Pooled service-to-service clients, when the service_client library is installed (see auth.py)
+try:
+    from service_client import ConnectionPoolRegistry
+except ImportError:
+    ConnectionPoolRegistry = None
+
 # Configure logging
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL),
@@ -61,10 +68,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close pooled service-to-service connections on shutdown"""
+    yield
+    if ConnectionPoolRegistry is not None:
+        await ConnectionPoolRegistry.aclose()
+
+
 app = FastAPI(
     title="Aura Audit AI - Engagement Service",
     description="Engagement management, binder, and workpapers",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
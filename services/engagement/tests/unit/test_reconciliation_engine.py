@@ -0,0 +1,122 @@
+"""Unit tests for the indexed IntelligentReconciliationEngine"""
+import random
+from decimal import Decimal
+
+import pytest
+from app.advanced_ml_engine import IntelligentReconciliationEngine
+
+
+@pytest.fixture
+def engine():
+    return IntelligentReconciliationEngine()
+
+
+class TestReconciliationMatching:
+    """Test exact, fuzzy and split-transaction matching"""
+
+    def test_exact_match_first_target_in_order(self, engine):
+        """Exact match picks the first unused target with equal amount and close date"""
+        source = [{"id": "B1", "amount": 100, "date": "2024-01-10"}]
+        target = [
+            {"id": "G1", "amount": 100, "date": "2024-02-10"},  # Date out of tolerance
+            {"id": "G2", "amount": "100.00", "date": "2024-01-12"},
+            {"id": "G3", "amount": 100, "date": "2024-01-10"},
+        ]
+
+        result = engine.reconcile(source, target)
+
+        assert [(m["source_id"], m["target_id"]) for m in result["matched_pairs"]] == [("B1", "G2")]
+        assert result["matched_pairs"][0]["match_type"] == "exact"
+        assert [t["id"] for t in result["unmatched_target"]] == ["G1", "G3"]
+
+    def test_exact_match_uses_each_target_once(self, engine):
+        """Two identical bank lines consume two distinct GL lines"""
+        source = [
+            {"id": "B1", "amount": 50, "date": "2024-01-10"},
+            {"id": "B2", "amount": 50, "date": "2024-01-10"},
+        ]
+        target = [
+            {"id": "G1", "amount": 50, "date": "2024-01-11"},
+            {"id": "G2", "amount": 50, "date": "2024-01-09"},
+        ]
+
+        result = engine.reconcile(source, target)
+
+        assert [m["target_id"] for m in result["matched_pairs"]] == ["G1", "G2"]
+        assert result["summary"]["reconciliation_status"] == "complete"
+
+    def test_fuzzy_match_within_amount_tolerance(self, engine):
+        """Near-equal amounts with matching date, description and reference auto-match"""
+        source = [{"id": "B1", "amount": 1000.00, "date": "2024-03-01",
+                   "description": "ACME wire transfer", "reference": "INV-77"}]
+        target = [{"id": "G1", "amount": 1000.50, "date": "2024-03-02",
+                   "description": "acme wire transfer", "reference": "INV-77"}]
+
+        result = engine.reconcile(source, target)
+
+        assert len(result["matched_pairs"]) == 1
+        match = result["matched_pairs"][0]
+        assert match["match_type"] == "fuzzy"
+        assert set(match["matching_fields"]) == {"amount", "date", "description", "reference"}
+
+    def test_split_transaction_suggestions(self, engine):
+        """Pairs of targets summing to a source amount are suggested in target order"""
+        source = [{"id": "B1", "amount": 300, "date": "2024-01-05"}]
+        target = [
+            {"id": "G1", "amount": 200, "date": "2024-02-20"},
+            {"id": "G2", "amount": 120, "date": "2024-02-20"},
+            {"id": "G3", "amount": 100, "date": "2024-02-20"},
+            {"id": "G4", "amount": 180, "date": "2024-02-20"},
+        ]
+
+        result = engine.reconcile(source, target)
+
+        splits = [m for m in result["suggested_matches"] if m["match_type"] == "one_to_many"]
+        assert [m["target_id"] for m in splits] == ["G1+G3", "G2+G4"]
+        assert splits[0]["discrepancies"][0]["target_ids"] == ["G1", "G3"]
+
+    def test_split_suggestions_match_pairwise_scan(self, engine):
+        """The two-pointer sweep reports exactly the pairs a full pairwise scan finds"""
+        rng = random.Random(11)
+        source = [{"id": f"B{i}", "amount": rng.choice([100, 250, 99.5, 400]), "date": "2024-01-05"}
+                  for i in range(20)]
+        target = [{"id": f"G{j}", "amount": rng.choice([25, 49.5, 50, 50.5, 75, 150, 200, 225, 300, -50]),
+                   "date": "2024-03-20"}
+                  for j in range(60)]
+        rules = dict(engine._default_matching_rules(), amount_tolerance_pct=0.01)
+
+        result = engine.reconcile(source, target, rules)
+
+        expected = []
+        for src in source:
+            amount = Decimal(str(src["amount"]))
+            tolerance = amount * Decimal("0.01")
+            for j1, first in enumerate(target):
+                for second in target[j1 + 1:]:
+                    legs = [Decimal(str(first["amount"])), Decimal(str(second["amount"]))]
+                    if all(0 < leg < amount for leg in legs) and abs(sum(legs) - amount) <= tolerance:
+                        expected.append((src["id"], f"{first['id']}+{second['id']}"))
+        splits = [(m["source_id"], m["target_id"])
+                  for m in result["suggested_matches"] if m["match_type"] == "one_to_many"]
+        assert expected
+        assert splits == expected
+
+
+class TestReconciliationScale:
+    """Test that matching does not degrade to a pairwise scan"""
+
+    def test_large_statement_reconciles(self, engine):
+        """Several thousand lines reconcile with every shuffled GL line matched exactly"""
+        rng = random.Random(7)
+        source = [
+            {"id": f"B{i}", "amount": round(rng.uniform(1, 50000), 2),
+             "date": f"2024-01-{rng.randint(1, 28):02d}", "reference": f"R{i}"}
+            for i in range(5000)
+        ]
+        target = [dict(row, id=f"G{row['id']}") for row in source]
+        rng.shuffle(target)
+
+        result = engine.reconcile(source, target)
+
+        assert result["summary"]["matched_count"] == 5000
+        assert result["summary"]["unmatched_target_count"] == 0
@@ -0,0 +1,211 @@
+"""
+Columnar transaction batches for the full-population engine.
+
+A TransactionBatch is built once per request and holds every field the
+analyses touch as a NumPy array, so z-scores, Benford digits, duplicate
+signatures, sequence gaps and strata each run as one vectorized pass
+instead of a Python loop over Transaction models.
+"""
+
+from functools import cached_property
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+INT64_MIN = np.iinfo(np.int64).min
+INT64_MAX = np.iinfo(np.int64).max
+
+
+class TransactionBatch:
+    """Column-oriented view of a transaction population."""
+
+    def __init__(
+        self,
+        transaction_ids: Sequence[str],
+        dates: Sequence[str],
+        amounts: Sequence[float],
+        accounts: Sequence[str],
+        descriptions: Optional[Sequence[Optional[str]]] = None,
+        vendors: Optional[Sequence[Optional[str]]] = None,
+        users: Optional[Sequence[Optional[str]]] = None,
+        references: Optional[Sequence[Optional[str]]] = None,
+    ):
+        n = len(transaction_ids)
+        self.transaction_ids = np.asarray(transaction_ids, dtype=object)
+        self.dates = np.asarray(dates, dtype=str) if n else np.empty(0, dtype=str)
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+        self.accounts = np.asarray(accounts, dtype=str) if n else np.empty(0, dtype=str)
+        self.descriptions = _optional_column(descriptions, n)
+        self.vendors = _optional_column(vendors, n)
+        self.users = _optional_column(users, n)
+        self.references = _optional_column(references, n)
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable) -> "TransactionBatch":
+        """Build a batch from Transaction models (or anything with the same attributes)."""
+        transactions = list(transactions)
+        return cls(
+            transaction_ids=[t.transaction_id for t in transactions],
+            dates=[t.date for t in transactions],
+            amounts=[t.amount for t in transactions],
+            accounts=[t.account for t in transactions],
+            descriptions=[t.description for t in transactions],
+            vendors=[t.vendor for t in transactions],
+            users=[t.user for t in transactions],
+            references=[t.reference for t in transactions],
+        )
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    @cached_property
+    def date_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted distinct dates and the per-row code into them."""
+        return np.unique(self.dates, return_inverse=True)
+
+    @cached_property
+    def account_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted distinct accounts and the per-row code into them."""
+        return np.unique(self.accounts, return_inverse=True)
+
+    @cached_property
+    def description_codes(self) -> np.ndarray:
+        """Per-row code of the description as it renders in a signature string."""
+        if not len(self):
+            return np.empty(0, dtype=np.intp)
+        return np.unique(self.descriptions.astype(str), return_inverse=True)[1]
+
+    @cached_property
+    def reference_numbers(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Row positions and values of references that parse as integers."""
+        return _parse_int_column(self.references)
+
+    def count_distinct(self, column: np.ndarray) -> int:
+        """Distinct non-empty values in an optional column."""
+        present = column[column.astype(bool)]
+        return len(np.unique(present.astype(str))) if len(present) else 0
+
+    def amount_bits(self) -> np.ndarray:
+        """Amounts reinterpreted as int64 so equal floats form equal signature keys."""
+        return self.amounts.view(np.int64)
+
+    def first_digits(self) -> np.ndarray:
+        """
+        Leading digit of every positive amount, 0 where the amount has none.
+
+        Matches taking the first character of str(amount): amounts in (1e-4, 1)
+        render as "0.x" and are skipped, smaller ones render in scientific
+        notation and keep their leading significant digit.
+        """
+        amounts = self.amounts
+        digits = np.zeros(len(amounts), dtype=np.int64)
+        mask = (amounts > 0) & np.isfinite(amounts) & ((amounts >= 1) | (amounts < 1e-4))
+        values = amounts[mask]
+        if len(values):
+            exponent = np.floor(np.log10(values))
+            mantissa = values / np.power(10.0, exponent)
+            # Correct for log10 rounding right at powers of ten
+            mantissa = np.where(mantissa >= 10, mantissa / 10, mantissa)
+            mantissa = np.where(mantissa < 1, mantissa * 10, mantissa)
+            digits[mask] = np.floor(mantissa).astype(np.int64)
+        return digits
+
+
+def signature_groups(*columns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Group rows on the combination of integer key columns.
+
+    Returns the per-row group code and the row position of each group's
+    first occurrence.
+    """
+    keys = np.column_stack([np.asarray(c, dtype=np.int64) for c in columns])
+    n = len(keys)
+    if not n:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    # Stable lexicographic sort keeps the earliest row first within each group
+    order = np.lexsort(keys.T[::-1])
+    sorted_keys = keys[order]
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = np.any(sorted_keys[1:] != sorted_keys[:-1], axis=1)
+
+    codes = np.empty(n, dtype=np.intp)
+    codes[order] = np.cumsum(starts) - 1
+    return codes, order[starts]
+
+
+def sequence_gaps(numbers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find missing runs in a sorted integer sequence.
+
+    Returns the positions i (into ``numbers``) where numbers[i + 1] - numbers[i] > 1,
+    and the size of each missing run.
+    """
+    if len(numbers) < 2:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64)
+    steps = np.diff(numbers)
+    positions = np.flatnonzero(steps > 1)
+    return positions, steps[positions] - 1
+
+
+def assign_strata(boundaries: Sequence[float], amounts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Count and sum amounts per stratum in one pass.
+
+    Strata are [boundaries[i], boundaries[i + 1]) with the last one closed.
+    """
+    stratum_count = len(boundaries) - 1
+    if stratum_count < 1:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    assignment = np.searchsorted(boundaries, amounts, side="right") - 1
+    assignment = np.clip(assignment, 0, stratum_count - 1)
+    counts = np.bincount(assignment, minlength=stratum_count)
+    sums = np.bincount(assignment, weights=amounts, minlength=stratum_count)
+    return counts, sums
+
+
+def _optional_column(values: Optional[Sequence], n: int) -> np.ndarray:
+    if values is None:
+        return np.full(n, None, dtype=object)
+    column = np.empty(n, dtype=object)
+    column[:] = list(values)
+    return column
+
+
+def _parse_int_column(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized int() over an object column; rows that do not parse are skipped."""
+    present = np.flatnonzero(values.astype(bool))
+    if not len(present):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64)
+
+    text = values[present].astype(str)
+    decimal = np.char.isdecimal(text)
+    positions, numbers = [], []
+
+    # Fast path: plain digit strings convert in one call
+    digits = text[decimal]
+    try:
+        parsed = digits.astype(np.int64)
+        positions.append(present[decimal])
+        numbers.append(parsed)
+    except (ValueError, OverflowError):
+        decimal[:] = False
+
+    # Signed, padded or non-ASCII numerals fall back to int()
+    rest = np.flatnonzero(~decimal)
+    fallback_pos, fallback_num = [], []
+    for k in rest:
+        try:
+            number = int(text[k])
+        except ValueError:
+            continue
+        if INT64_MIN <= number <= INT64_MAX:
+            fallback_pos.append(present[k])
+            fallback_num.append(number)
+    positions.append(np.asarray(fallback_pos, dtype=np.intp))
+    numbers.append(np.asarray(fallback_num, dtype=np.int64))
+
+    positions = np.concatenate(positions)
+    numbers = np.concatenate(numbers)
+    order = np.argsort(positions, kind="stable")
+    return positions[order], numbers[order]
@@ -10,19 +10,38 @@ This service analyzes 100% of transactions (not just samples) using:
 - Benford's Law at scale
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime, timedelta
 from enum import Enum
 import asyncio
 import logging
 import numpy as np
-from collections import defaultdict
 import json
 import hashlib
 from scipy import stats
 
+from .columnar import TransactionBatch, assign_strata, sequence_gaps, signature_groups
+from .streaming import (
+    MAX_ANOMALIES,
+    MAX_GAP_RESULTS,
+    ORIGINAL_LOOKUP_SIZE,
+    RESERVOIR_SIZE,
+    SKETCH_CAPACITY,
+    DuplicateSketch,
+    ExtremeBuffer,
+    ReservoirSample,
+    RunningMoments,
+    SequenceRuns,
+    StreamFormatError,
+    combine_hashes,
+    hash_strings,
+    iter_batches,
+    present_values,
+    stream_format,
+)
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -199,15 +218,39 @@ class FullPopulationEngine:
     ) -> FullPopulationAnalysisResult:
         """
         Perform comprehensive full-population analysis.
+
+        The request's transactions are converted once into a columnar
+        TransactionBatch; every analysis below is a vectorized pass over it.
         """
         start_time = datetime.utcnow()
         analysis_id = hashlib.md5(f"analysis_{len(request.transactions)}_{start_time}".encode()).hexdigest()[:12]
 
+        batch = TransactionBatch.from_transactions(request.transactions)
+        return await self.analyze_batch(
+            batch,
+            analysis_types=request.analysis_types,
+            thresholds=request.thresholds,
+            analysis_id=analysis_id,
+            start_time=start_time
+        )
+
+    async def analyze_batch(
+        self,
+        batch: TransactionBatch,
+        analysis_types: List[AnalysisType],
+        thresholds: Optional[Dict[str, float]] = None,
+        analysis_id: Optional[str] = None,
+        start_time: Optional[datetime] = None
+    ) -> FullPopulationAnalysisResult:
+        """Run the requested analyses over a prepared columnar batch."""
+        start_time = start_time or datetime.utcnow()
+        analysis_id = analysis_id or hashlib.md5(f"analysis_{len(batch)}_{start_time}".encode()).hexdigest()[:12]
+
         # Merge thresholds
-        thresholds = {**self.default_thresholds, **(request.thresholds or {})}
+        thresholds = {**self.default_thresholds, **(thresholds or {})}
 
         # Calculate population statistics
-        statistics = await self._calculate_statistics(request.transactions)
+        statistics = await self._calculate_statistics(batch)
 
         # Run requested analyses
         completeness = None
@@ -216,33 +259,58 @@ class FullPopulationEngine:
         patterns = None
         anomalies = []
 
-        if AnalysisType.COMPLETENESS in request.analysis_types:
-            completeness = await self._analyze_completeness(request.transactions)
+        if AnalysisType.COMPLETENESS in analysis_types:
+            completeness = await self._analyze_completeness(batch)
 
-        if AnalysisType.BENFORD_ANALYSIS in request.analysis_types:
-            benford = await self._analyze_benford(request.transactions)
+        if AnalysisType.BENFORD_ANALYSIS in analysis_types:
+            benford = await self._analyze_benford(batch)
 
-        if AnalysisType.ANOMALY_DETECTION in request.analysis_types:
+        if AnalysisType.ANOMALY_DETECTION in analysis_types:
             anomalies = await self._detect_anomalies(
-                request.transactions,
+                batch,
                 statistics,
                 thresholds
             )
 
-        if AnalysisType.STRATIFICATION in request.analysis_types:
-            stratification = await self._stratify_population(request.transactions)
+        if AnalysisType.STRATIFICATION in analysis_types:
+            stratification = await self._stratify_population(batch)
 
-        if AnalysisType.PATTERN_RECOGNITION in request.analysis_types:
-            patterns = await self._analyze_patterns(request.transactions)
+        if AnalysisType.PATTERN_RECOGNITION in analysis_types:
+            patterns = await self._analyze_patterns(batch)
 
-        if AnalysisType.DUPLICATE_DETECTION in request.analysis_types:
-            duplicates = await self._detect_duplicates(request.transactions, thresholds)
+        if AnalysisType.DUPLICATE_DETECTION in analysis_types:
+            duplicates = await self._detect_duplicates(batch, thresholds)
             anomalies.extend(duplicates)
 
-        if AnalysisType.GAP_ANALYSIS in request.analysis_types:
-            gaps = await self._analyze_gaps(request.transactions)
+        if AnalysisType.GAP_ANALYSIS in analysis_types:
+            gaps = await self._analyze_gaps(batch)
             anomalies.extend(gaps)
 
+        return await self.build_result(
+            analysis_id=analysis_id,
+            start_time=start_time,
+            statistics=statistics,
+            anomalies=anomalies,
+            transactions_analyzed=len(batch),
+            completeness=completeness,
+            benford=benford,
+            stratification=stratification,
+            patterns=patterns
+        )
+
+    async def build_result(
+        self,
+        analysis_id: str,
+        start_time: datetime,
+        statistics: PopulationStatistics,
+        anomalies: List[AnomalyResult],
+        transactions_analyzed: int,
+        completeness: Optional[CompletenessResult] = None,
+        benford: Optional[BenfordResult] = None,
+        stratification: Optional[StratificationResult] = None,
+        patterns: Optional[PatternResult] = None
+    ) -> FullPopulationAnalysisResult:
+        """Assemble the final result with risk summary and coverage metrics."""
         # Calculate risk summary
         risk_summary = await self._calculate_risk_summary(anomalies, statistics)
 
@@ -267,90 +335,119 @@ class FullPopulationEngine:
             risk_summary=risk_summary,
             coverage_metrics=coverage,
             processing_time_ms=processing_time,
-            transactions_analyzed=len(request.transactions)
+            transactions_analyzed=transactions_analyzed
         )
 
     async def _calculate_statistics(
         self,
-        transactions: List[Transaction]
+        batch: TransactionBatch
     ) -> PopulationStatistics:
         """Calculate comprehensive population statistics."""
-        amounts = [t.amount for t in transactions]
-        dates = [t.date for t in transactions]
+        amounts = batch.amounts
+        n = len(batch)
+        date_values, _ = batch.date_index
+
+        if n:
+            q1, q2, q3 = np.percentile(amounts, [25, 50, 75])
+        else:
+            q1 = q2 = q3 = 0
 
         return PopulationStatistics(
-            total_transactions=len(transactions),
-            total_amount=sum(amounts),
+            total_transactions=n,
+            total_amount=float(amounts.sum()),
             date_range={
-                "start": min(dates) if dates else "",
-                "end": max(dates) if dates else ""
+                "start": str(date_values[0]) if n else "",
+                "end": str(date_values[-1]) if n else ""
             },
-            unique_accounts=len(set(t.account for t in transactions)),
-            unique_vendors=len(set(t.vendor for t in transactions if t.vendor)),
-            unique_users=len(set(t.user for t in transactions if t.user)),
-            avg_transaction_amount=np.mean(amounts) if amounts else 0,
-            median_transaction_amount=np.median(amounts) if amounts else 0,
-            std_deviation=np.std(amounts) if amounts else 0,
+            unique_accounts=len(batch.account_index[0]),
+            unique_vendors=batch.count_distinct(batch.vendors),
+            unique_users=batch.count_distinct(batch.users),
+            avg_transaction_amount=float(amounts.mean()) if n else 0,
+            median_transaction_amount=float(q2),
+            std_deviation=float(amounts.std()) if n else 0,
             quartiles={
-                "q1": np.percentile(amounts, 25) if amounts else 0,
-                "q2": np.percentile(amounts, 50) if amounts else 0,
-                "q3": np.percentile(amounts, 75) if amounts else 0
+                "q1": float(q1),
+                "q2": float(q2),
+                "q3": float(q3)
             },
-            skewness=float(stats.skew(amounts)) if len(amounts) > 2 else 0,
-            kurtosis=float(stats.kurtosis(amounts)) if len(amounts) > 3 else 0
+            skewness=float(stats.skew(amounts)) if n > 2 else 0,
+            kurtosis=float(stats.kurtosis(amounts)) if n > 3 else 0
         )
 
     async def _analyze_completeness(
         self,
-        transactions: List[Transaction]
+        batch: TransactionBatch
     ) -> CompletenessResult:
         """Analyze completeness of transaction population."""
-        # Check for sequence gaps
-        refs = [t.reference for t in transactions if t.reference]
-        numeric_refs = []
-        for ref in refs:
-            try:
-                numeric_refs.append(int(ref))
-            except ValueError:
-                pass
-
-        gaps = []
-        if numeric_refs:
-            numeric_refs.sort()
-            for i in range(1, len(numeric_refs)):
-                if numeric_refs[i] - numeric_refs[i-1] > 1:
-                    for gap_num in range(numeric_refs[i-1] + 1, numeric_refs[i]):
-                        gaps.append({
-                            "type": "sequence_gap",
-                            "missing_reference": gap_num,
-                            "between": [numeric_refs[i-1], numeric_refs[i]]
-                        })
+        # Check for sequence gaps; each missing run is reported as one range
+        _, numbers = batch.reference_numbers
+        numbers = np.sort(numbers)
+        positions, sizes = sequence_gaps(numbers)
+        missing_count = int(sizes.sum())
+
+        gaps = [
+            self._gap_range(int(numbers[p]), int(numbers[p + 1]))
+            for p in positions[:100]  # Limit to first 100
+        ]
+
+        # Check for duplicates on date, amount, account and description
+        duplicates = 0
+        if len(batch):
+            _, first = signature_groups(
+                batch.date_index[1],
+                batch.amount_bits(),
+                batch.account_index[1],
+                batch.description_codes
+            )
+            duplicates = len(batch) - len(first)
+
+        return self._completeness_result(
+            gaps=gaps,
+            missing_count=missing_count,
+            gap_ranges=len(positions),
+            total_references=len(numbers),
+            min_reference=int(numbers[0]) if len(numbers) else None,
+            max_reference=int(numbers[-1]) if len(numbers) else None,
+            duplicates=duplicates
+        )
+
+    def _gap_range(self, previous: int, current: int) -> Dict[str, Any]:
+        """Describe one missing run of reference numbers."""
+        return {
+            "type": "sequence_gap",
+            "missing_from": previous + 1,
+            "missing_to": current - 1,
+            "missing_count": current - previous - 1,
+            "between": [previous, current]
+        }
 
+    def _completeness_result(
+        self,
+        gaps: List[Dict[str, Any]],
+        missing_count: int,
+        gap_ranges: int,
+        total_references: int,
+        min_reference: Optional[int],
+        max_reference: Optional[int],
+        duplicates: int
+    ) -> CompletenessResult:
+        """Build the completeness result from sequence and duplicate counts."""
         # Check for date gaps
-        dates = sorted(set(t.date for t in transactions))
         missing_periods = []
         # Simplified date gap detection
 
-        # Check for duplicates
-        seen = set()
-        duplicates = 0
-        for t in transactions:
-            key = f"{t.date}_{t.amount}_{t.account}_{t.description}"
-            if key in seen:
-                duplicates += 1
-            seen.add(key)
-
-        coverage = 100 - (len(gaps) * 0.1) - (duplicates * 0.05)
+        coverage = 100 - (missing_count * 0.1) - (duplicates * 0.05)
 
         return CompletenessResult(
-            is_complete=len(gaps) == 0 and duplicates == 0,
+            is_complete=missing_count == 0 and duplicates == 0,
             coverage_percentage=max(0, min(100, coverage)),
-            gaps_found=gaps[:100],  # Limit to first 100
+            gaps_found=gaps,
             sequence_analysis={
-                "total_references": len(numeric_refs),
-                "gaps_found": len(gaps),
-                "min_reference": min(numeric_refs) if numeric_refs else None,
-                "max_reference": max(numeric_refs) if numeric_refs else None
+                "total_references": total_references,
+                "gaps_found": missing_count,
+                "gap_ranges": gap_ranges,
+                "min_reference": min_reference,
+                "max_reference": max_reference
             },
             missing_periods=missing_periods,
             duplicate_count=duplicates
@@ -358,27 +455,19 @@ class FullPopulationEngine:
 
     async def _analyze_benford(
         self,
-        transactions: List[Transaction]
+        batch: TransactionBatch
     ) -> BenfordResult:
         """Perform Benford's Law analysis on transaction amounts."""
-        # Get first digits
-        first_digits = []
-        for t in transactions:
-            if t.amount > 0:
-                first_digit = str(abs(t.amount))[0]
-                if first_digit != '0' and first_digit != '.':
-                    first_digits.append(first_digit)
-
-        # Calculate actual distribution
-        digit_counts = defaultdict(int)
-        for d in first_digits:
-            digit_counts[d] += 1
-
-        total = len(first_digits)
-        actual_dist = {str(d): digit_counts.get(str(d), 0) / total if total > 0 else 0 for d in range(1, 10)}
+        # First-digit histogram in one pass (index 0 collects amounts with no digit)
+        digit_counts = np.bincount(batch.first_digits(), minlength=10)
+        return self._benford_result([int(c) for c in digit_counts[1:10]])
+
+    def _benford_result(self, observed: List[int]) -> BenfordResult:
+        """Test observed first-digit counts (digits 1-9) against Benford's Law."""
+        total = sum(observed)
+        actual_dist = {str(d): observed[d - 1] / total if total > 0 else 0 for d in range(1, 10)}
 
         # Chi-square test
-        observed = [digit_counts.get(str(d), 0) for d in range(1, 10)]
         expected = [self.benford_expected[str(d)] * total for d in range(1, 10)]
 
         if total > 0:
@@ -400,178 +489,251 @@ class FullPopulationEngine:
         return BenfordResult(
             digit_distribution={k: round(v, 4) for k, v in actual_dist.items()},
             expected_distribution=self.benford_expected,
-            chi_square_statistic=round(chi2, 4),
-            p_value=round(p_value, 6),
-            is_conforming=p_value > 0.05,
+            chi_square_statistic=round(float(chi2), 4),
+            p_value=round(float(p_value), 6),
+            is_conforming=bool(p_value > 0.05),
             suspicious_digits=suspicious_digits,
             deviation_scores=deviation_scores
         )
 
     async def _detect_anomalies(
         self,
-        transactions: List[Transaction],
+        batch: TransactionBatch,
         statistics: PopulationStatistics,
         thresholds: Dict[str, float]
     ) -> List[AnomalyResult]:
         """Detect anomalies using ensemble methods."""
         anomalies = []
+        limit = 500  # Limit results
 
-        # Z-score outlier detection
-        amounts = [t.amount for t in transactions]
+        amounts = batch.amounts
         mean = statistics.avg_transaction_amount
         std = statistics.std_deviation
 
-        for i, t in enumerate(transactions):
-            if std > 0:
-                z_score = abs(t.amount - mean) / std
-                if z_score > thresholds["z_score_outlier"]:
-                    anomalies.append(AnomalyResult(
-                        anomaly_id=hashlib.md5(f"outlier_{t.transaction_id}".encode()).hexdigest()[:12],
-                        transaction_id=t.transaction_id,
-                        anomaly_type=AnomalyType.STATISTICAL_OUTLIER,
-                        risk_level=RiskLevel.HIGH if z_score > 5 else RiskLevel.MEDIUM,
-                        confidence=min(0.99, 0.7 + (z_score - 3) * 0.05),
-                        description=f"Statistical outlier with z-score of {z_score:.2f}",
-                        expected_value=f"{mean:.2f} ± {std:.2f}",
-                        actual_value=t.amount,
-                        context={
-                            "z_score": round(z_score, 3),
-                            "account": t.account,
-                            "date": t.date
-                        },
-                        recommended_action="Review transaction for unusual activity"
-                    ))
-
-            # Round number detection
-            if t.amount > 0 and t.amount == round(t.amount, -3) and t.amount >= 10000:
-                anomalies.append(AnomalyResult(
-                    anomaly_id=hashlib.md5(f"round_{t.transaction_id}".encode()).hexdigest()[:12],
-                    transaction_id=t.transaction_id,
-                    anomaly_type=AnomalyType.ROUND_NUMBER,
-                    risk_level=RiskLevel.LOW,
-                    confidence=0.65,
-                    description=f"Round number amount: ${t.amount:,.0f}",
-                    expected_value="Natural variation",
-                    actual_value=t.amount,
-                    context={
-                        "rounded_to": "1000s",
-                        "account": t.account
-                    },
-                    recommended_action="Verify if round amount is appropriate for transaction type"
+        # Z-score outlier detection
+        if std > 0:
+            z_scores = np.abs(amounts - mean) / std
+            outliers = z_scores > thresholds["z_score_outlier"]
+        else:
+            z_scores = np.zeros(len(batch))
+            outliers = np.zeros(len(batch), dtype=bool)
+
+        # Round number detection
+        round_numbers = (amounts >= 10000) & (np.round(amounts, -3) == amounts)
+
+        # Only flagged rows are materialized, in population order
+        for i in np.flatnonzero(outliers | round_numbers):
+            if len(anomalies) >= limit:
+                break
+
+            transaction_id = batch.transaction_ids[i]
+            amount = float(amounts[i])
+            account = str(batch.accounts[i])
+
+            if outliers[i]:
+                anomalies.append(self._outlier_anomaly(
+                    transaction_id, amount, account, str(batch.dates[i]), float(z_scores[i]), mean, std
                 ))
 
-        return anomalies[:500]  # Limit results
+            if round_numbers[i]:
+                anomalies.append(self._round_number_anomaly(transaction_id, amount, account))
+
+        return anomalies[:limit]
+
+    def _outlier_anomaly(
+        self,
+        transaction_id: str,
+        amount: float,
+        account: str,
+        date: str,
+        z_score: float,
+        mean: float,
+        std: float
+    ) -> AnomalyResult:
+        return AnomalyResult(
+            anomaly_id=hashlib.md5(f"outlier_{transaction_id}".encode()).hexdigest()[:12],
+            transaction_id=transaction_id,
+            anomaly_type=AnomalyType.STATISTICAL_OUTLIER,
+            risk_level=RiskLevel.HIGH if z_score > 5 else RiskLevel.MEDIUM,
+            confidence=min(0.99, 0.7 + (z_score - 3) * 0.05),
+            description=f"Statistical outlier with z-score of {z_score:.2f}",
+            expected_value=f"{mean:.2f} ± {std:.2f}",
+            actual_value=amount,
+            context={
+                "z_score": round(z_score, 3),
+                "account": account,
+                "date": date
+            },
+            recommended_action="Review transaction for unusual activity"
+        )
+
+    def _round_number_anomaly(self, transaction_id: str, amount: float, account: str) -> AnomalyResult:
+        return AnomalyResult(
+            anomaly_id=hashlib.md5(f"round_{transaction_id}".encode()).hexdigest()[:12],
+            transaction_id=transaction_id,
+            anomaly_type=AnomalyType.ROUND_NUMBER,
+            risk_level=RiskLevel.LOW,
+            confidence=0.65,
+            description=f"Round number amount: ${amount:,.0f}",
+            expected_value="Natural variation",
+            actual_value=amount,
+            context={
+                "rounded_to": "1000s",
+                "account": account
+            },
+            recommended_action="Verify if round amount is appropriate for transaction type"
+        )
 
     async def _detect_duplicates(
         self,
-        transactions: List[Transaction],
+        batch: TransactionBatch,
         thresholds: Dict[str, float]
     ) -> List[AnomalyResult]:
         """Detect duplicate transactions."""
         anomalies = []
-        seen = {}
-
-        for t in transactions:
-            # Create signature for duplicate detection
-            signature = f"{t.date}_{t.amount}_{t.account}"
-
-            if signature in seen:
-                anomalies.append(AnomalyResult(
-                    anomaly_id=hashlib.md5(f"dup_{t.transaction_id}".encode()).hexdigest()[:12],
-                    transaction_id=t.transaction_id,
-                    anomaly_type=AnomalyType.DUPLICATE,
-                    risk_level=RiskLevel.HIGH,
-                    confidence=0.90,
-                    description=f"Potential duplicate of transaction {seen[signature]}",
-                    expected_value="Unique transaction",
-                    actual_value=signature,
-                    context={
-                        "original_transaction": seen[signature],
-                        "matching_fields": ["date", "amount", "account"]
-                    },
-                    recommended_action="Verify if duplicate entry or legitimate separate transaction"
-                ))
-            else:
-                seen[signature] = t.transaction_id
+        if not len(batch):
+            return anomalies
+
+        # Signature on date, amount and account; the first row of each group is the original
+        codes, first = signature_groups(
+            batch.date_index[1],
+            batch.amount_bits(),
+            batch.account_index[1]
+        )
+        originals = first[codes]
+
+        for i in np.flatnonzero(originals != np.arange(len(batch))):
+            transaction_id = batch.transaction_ids[i]
+            original = batch.transaction_ids[originals[i]]
+            signature = f"{batch.dates[i]}_{float(batch.amounts[i])}_{batch.accounts[i]}"
+
+            anomalies.append(self._duplicate_anomaly(transaction_id, original, signature))
 
         return anomalies
 
+    def _duplicate_anomaly(self, transaction_id: str, original: Optional[str], signature: str) -> AnomalyResult:
+        if original is None:
+            # Streaming sketch hit whose original is no longer known: the match
+            # is probabilistic (a Bloom-filter false positive is possible)
+            return AnomalyResult(
+                anomaly_id=hashlib.md5(f"dup_{transaction_id}".encode()).hexdigest()[:12],
+                transaction_id=transaction_id,
+                anomaly_type=AnomalyType.DUPLICATE,
+                risk_level=RiskLevel.MEDIUM,
+                confidence=0.60,
+                description="Probable duplicate of an earlier transaction (probabilistic signature match)",
+                expected_value="Unique transaction",
+                actual_value=signature,
+                context={
+                    "original_transaction": None,
+                    "match": "probabilistic",
+                    "matching_fields": ["date", "amount", "account"]
+                },
+                recommended_action="Search the population for the matching entry and verify both"
+            )
+
+        return AnomalyResult(
+            anomaly_id=hashlib.md5(f"dup_{transaction_id}".encode()).hexdigest()[:12],
+            transaction_id=transaction_id,
+            anomaly_type=AnomalyType.DUPLICATE,
+            risk_level=RiskLevel.HIGH,
+            confidence=0.90,
+            description=f"Potential duplicate of transaction {original}",
+            expected_value="Unique transaction",
+            actual_value=signature,
+            context={
+                "original_transaction": original,
+                "matching_fields": ["date", "amount", "account"]
+            },
+            recommended_action="Verify if duplicate entry or legitimate separate transaction"
+        )
+
     async def _analyze_gaps(
         self,
-        transactions: List[Transaction]
+        batch: TransactionBatch
     ) -> List[AnomalyResult]:
         """Analyze sequence gaps in references."""
         anomalies = []
-        refs = [(t.transaction_id, t.reference) for t in transactions if t.reference]
-
-        numeric_refs = []
-        for tid, ref in refs:
-            try:
-                numeric_refs.append((tid, int(ref)))
-            except ValueError:
-                pass
-
-        numeric_refs.sort(key=lambda x: x[1])
-
-        for i in range(1, len(numeric_refs)):
-            prev_tid, prev_ref = numeric_refs[i-1]
-            curr_tid, curr_ref = numeric_refs[i]
-
-            if curr_ref - prev_ref > 1:
-                anomalies.append(AnomalyResult(
-                    anomaly_id=hashlib.md5(f"gap_{curr_ref}".encode()).hexdigest()[:12],
-                    transaction_id=curr_tid,
-                    anomaly_type=AnomalyType.SEQUENCE_GAP,
-                    risk_level=RiskLevel.MEDIUM,
-                    confidence=0.95,
-                    description=f"Sequence gap: missing references {prev_ref + 1} to {curr_ref - 1}",
-                    expected_value=prev_ref + 1,
-                    actual_value=curr_ref,
-                    context={
-                        "gap_size": curr_ref - prev_ref - 1,
-                        "previous_reference": prev_ref,
-                        "missing_count": curr_ref - prev_ref - 1
-                    },
-                    recommended_action="Investigate missing sequence numbers for completeness"
-                ))
+        rows, numbers = batch.reference_numbers
+
+        order = np.argsort(numbers, kind="stable")
+        rows, numbers = rows[order], numbers[order]
+        positions, sizes = sequence_gaps(numbers)
+
+        for p in positions[:100]:
+            anomalies.append(self._gap_anomaly(
+                batch.transaction_ids[rows[p + 1]], int(numbers[p]), int(numbers[p + 1])
+            ))
+
+        return anomalies
 
-        return anomalies[:100]
+    def _gap_anomaly(self, transaction_id: str, prev_ref: int, curr_ref: int) -> AnomalyResult:
+        return AnomalyResult(
+            anomaly_id=hashlib.md5(f"gap_{curr_ref}".encode()).hexdigest()[:12],
+            transaction_id=transaction_id,
+            anomaly_type=AnomalyType.SEQUENCE_GAP,
+            risk_level=RiskLevel.MEDIUM,
+            confidence=0.95,
+            description=f"Sequence gap: missing references {prev_ref + 1} to {curr_ref - 1}",
+            expected_value=prev_ref + 1,
+            actual_value=curr_ref,
+            context={
+                "gap_size": curr_ref - prev_ref - 1,
+                "previous_reference": prev_ref,
+                "missing_count": curr_ref - prev_ref - 1
+            },
+            recommended_action="Investigate missing sequence numbers for completeness"
+        )
 
     async def _stratify_population(
         self,
-        transactions: List[Transaction]
+        batch: TransactionBatch
     ) -> StratificationResult:
         """Stratify population by various dimensions."""
-        amounts = [t.amount for t in transactions]
+        amounts = batch.amounts
+        n = len(batch)
 
         # Define strata boundaries
-        if amounts:
+        if n:
             percentiles = [0, 25, 50, 75, 90, 95, 99, 100]
-            boundaries = [np.percentile(amounts, p) for p in percentiles]
+            boundaries = [float(b) for b in np.percentile(amounts, percentiles)]
         else:
             boundaries = [0]
 
+        counts, sums = assign_strata(boundaries, amounts)
+
+        return self._stratification_result(
+            boundaries, counts, sums, n, float(amounts.sum()) if n else 1
+        )
+
+    def _stratification_result(
+        self,
+        boundaries: List[float],
+        counts: np.ndarray,
+        sums: np.ndarray,
+        n: int,
+        total_amount: float,
+        estimated: bool = False
+    ) -> StratificationResult:
+        """Build strata from boundaries and per-stratum counts and amounts."""
         strata = []
         for i in range(len(boundaries) - 1):
             lower = boundaries[i]
             upper = boundaries[i + 1]
-
-            stratum_transactions = [t for t in transactions if lower <= t.amount < upper]
-            if i == len(boundaries) - 2:  # Last stratum includes upper boundary
-                stratum_transactions = [t for t in transactions if lower <= t.amount <= upper]
-
-            stratum_amount = sum(t.amount for t in stratum_transactions)
-            total_amount = sum(amounts) if amounts else 1
+            count = int(counts[i])
+            stratum_amount = float(sums[i])
 
             strata.append({
                 "stratum_id": i + 1,
                 "range": f"${lower:,.0f} - ${upper:,.0f}",
-                "transaction_count": len(stratum_transactions),
+                "transaction_count": count,
                 "total_amount": stratum_amount,
-                "percentage_of_population": len(stratum_transactions) / len(transactions) * 100 if transactions else 0,
+                "percentage_of_population": count / n * 100 if n else 0,
                 "percentage_of_value": stratum_amount / total_amount * 100 if total_amount > 0 else 0,
                 "risk_level": "high" if i >= 5 else "medium" if i >= 3 else "low"
             })
+            if estimated:
+                strata[-1]["estimated"] = True
 
         high_risk_count = sum(1 for s in strata if s["risk_level"] == "high")
 
@@ -588,20 +750,18 @@ class FullPopulationEngine:
 
     async def _analyze_patterns(
         self,
-        transactions: List[Transaction]
+        batch: TransactionBatch
     ) -> PatternResult:
         """Analyze patterns in transaction data."""
-        # Group by date
-        by_date = defaultdict(list)
-        for t in transactions:
-            by_date[t.date].append(t)
-
-        # Detect cyclical patterns
-        daily_totals = [(date, sum(t.amount for t in txns)) for date, txns in sorted(by_date.items())]
+        # Daily totals over the sorted distinct dates
+        date_values, date_codes = batch.date_index
+        values = np.bincount(date_codes, weights=batch.amounts, minlength=len(date_values))
+        return self._patterns_result(values, len(batch))
 
+    def _patterns_result(self, values: np.ndarray, n: int) -> PatternResult:
+        """Build pattern results from daily totals in date order."""
         # Simple trend detection
-        if len(daily_totals) > 1:
-            values = [v for _, v in daily_totals]
+        if len(values) > 1:
             if values[-1] > values[0] * 1.1:
                 trend = "increasing"
             elif values[-1] < values[0] * 0.9:
@@ -615,7 +775,7 @@ class FullPopulationEngine:
             patterns_found=[
                 {
                     "pattern_type": "daily_volume",
-                    "description": f"Average {len(transactions) / max(1, len(by_date)):.1f} transactions per day",
+                    "description": f"Average {n / max(1, len(values)):.1f} transactions per day",
                     "significance": "normal"
                 }
             ],
@@ -672,6 +832,275 @@ class FullPopulationEngine:
         }
 
 
+class StreamingPopulationAnalyzer:
+    """
+    Folds TransactionBatch chunks into constant-size state and produces the
+    same FullPopulationAnalysisResult as FullPopulationEngine.analyze_batch.
+
+    Quartiles and strata come from a reservoir sample and duplicate checks
+    from Bloom filters, so they are exact only while the population fits the
+    reservoir / sketch budget. Outliers are judged against the final mean and
+    standard deviation using the most extreme amounts seen on each side, and
+    duplicate anomalies are capped like the other anomaly lists. A duplicate
+    whose original can no longer be named (evicted from the lookup window, or
+    a sketch false positive) is reported as a probabilistic match.
+    """
+
+    def __init__(
+        self,
+        engine: FullPopulationEngine,
+        analysis_types: List[AnalysisType],
+        thresholds: Optional[Dict[str, float]] = None,
+        reservoir_size: int = RESERVOIR_SIZE,
+        sketch_capacity: int = SKETCH_CAPACITY,
+        seed: int = 0
+    ):
+        self.engine = engine
+        self.analysis_types = set(analysis_types)
+        self.thresholds = {**engine.default_thresholds, **(thresholds or {})}
+        self.start_time = datetime.utcnow()
+
+        self.rows = 0
+        self.moments = RunningMoments()
+        self.reservoir = ReservoirSample(reservoir_size, seed=seed)
+        self.digit_counts = np.zeros(10, dtype=np.int64)
+        self.date_min: Optional[str] = None
+        self.date_max: Optional[str] = None
+        self.daily_totals: Dict[str, float] = {}
+        self.accounts: set = set()
+        self.vendors: set = set()
+        self.users: set = set()
+
+        self.high = ExtremeBuffer(MAX_ANOMALIES)
+        self.low = ExtremeBuffer(MAX_ANOMALIES)
+        self.round_numbers: List[Tuple] = []
+
+        self.signature_sketch = DuplicateSketch(sketch_capacity)
+        self.duplicates: List[Tuple] = []
+        self.recent_originals: Dict[int, str] = {}
+
+        self.completeness_sketch = DuplicateSketch(sketch_capacity)
+        self.completeness_duplicates = 0
+        self.sequence = SequenceRuns()
+
+    def update(self, batch: TransactionBatch):
+        """Fold one chunk into the running state."""
+        n = len(batch)
+        if not n:
+            return
+        offset = self.rows
+        amounts = batch.amounts
+
+        self.moments.update(amounts)
+        self.reservoir.update(amounts)
+        self.digit_counts += np.bincount(batch.first_digits(), minlength=10)
+
+        date_values, date_codes = batch.date_index
+        first_date, last_date = str(date_values[0]), str(date_values[-1])
+        self.date_min = first_date if self.date_min is None else min(self.date_min, first_date)
+        self.date_max = last_date if self.date_max is None else max(self.date_max, last_date)
+        daily = np.bincount(date_codes, weights=amounts, minlength=len(date_values))
+        for date, total in zip(date_values, daily):
+            self.daily_totals[str(date)] = self.daily_totals.get(str(date), 0.0) + float(total)
+
+        self.accounts.update(batch.account_index[0].tolist())
+        self.vendors.update(present_values(batch.vendors))
+        self.users.update(present_values(batch.users))
+
+        rows = offset + np.arange(n)
+        self._track_extremes(batch, rows)
+        self._track_round_numbers(batch, rows)
+
+        signature = None
+        if AnalysisType.DUPLICATE_DETECTION in self.analysis_types or AnalysisType.COMPLETENESS in self.analysis_types:
+            signature = combine_hashes(
+                hash_strings(batch.dates), amounts.view(np.uint64), hash_strings(batch.accounts)
+            )
+        if AnalysisType.DUPLICATE_DETECTION in self.analysis_types:
+            self._track_duplicates(batch, signature)
+        if AnalysisType.COMPLETENESS in self.analysis_types:
+            full_signature = combine_hashes(signature, hash_strings(batch.descriptions))
+            repeats, _ = self._flag_repeats(full_signature, self.completeness_sketch)
+            self.completeness_duplicates += int(repeats.sum())
+        if AnalysisType.COMPLETENESS in self.analysis_types or AnalysisType.GAP_ANALYSIS in self.analysis_types:
+            positions, numbers = batch.reference_numbers
+            self.sequence.update(numbers, batch.transaction_ids[positions])
+
+        self.rows += n
+
+    def _track_extremes(self, batch: TransactionBatch, rows: np.ndarray):
+        if AnalysisType.ANOMALY_DETECTION not in self.analysis_types:
+            return
+        amounts = batch.amounts
+        k = min(MAX_ANOMALIES, len(amounts))
+        for buffer, scores in ((self.high, amounts), (self.low, -amounts)):
+            top = np.lexsort((rows, -scores))[:k]
+            buffer.update(scores[top], rows[top], (
+                (int(rows[i]), batch.transaction_ids[i], float(amounts[i]), str(batch.accounts[i]), str(batch.dates[i]))
+                for i in top
+            ))
+
+    def _track_round_numbers(self, batch: TransactionBatch, rows: np.ndarray):
+        if AnalysisType.ANOMALY_DETECTION not in self.analysis_types or len(self.round_numbers) >= MAX_ANOMALIES:
+            return
+        amounts = batch.amounts
+        mask = (amounts >= 10000) & (np.round(amounts, -3) == amounts)
+        for i in np.flatnonzero(mask)[:MAX_ANOMALIES - len(self.round_numbers)]:
+            self.round_numbers.append((int(rows[i]), batch.transaction_ids[i], float(amounts[i]), str(batch.accounts[i])))
+
+    def _flag_repeats(self, signature: np.ndarray, sketch: DuplicateSketch) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Flag rows whose signature was seen earlier in this chunk or (probably)
+        in an earlier chunk; also return each row's first occurrence in the chunk.
+        """
+        codes, first = signature_groups(signature.view(np.int64))
+        repeats = np.ones(len(signature), dtype=bool)
+        repeats[first] = sketch.check_and_add(signature[first])
+        return repeats, first[codes]
+
+    def _track_duplicates(self, batch: TransactionBatch, signature: np.ndarray):
+        repeats, originals_in_chunk = self._flag_repeats(signature, self.signature_sketch)
+
+        for i in np.flatnonzero(repeats):
+            if len(self.duplicates) >= MAX_ANOMALIES:
+                break
+            key = int(signature[i])
+            if originals_in_chunk[i] != i:
+                original = batch.transaction_ids[originals_in_chunk[i]]
+            else:
+                original = self.recent_originals.get(key)
+            self.duplicates.append((
+                batch.transaction_ids[i], original,
+                f"{batch.dates[i]}_{float(batch.amounts[i])}_{batch.accounts[i]}"
+            ))
+
+        # Remember a bounded window of first occurrences to name originals across chunks
+        if len(self.duplicates) < MAX_ANOMALIES:
+            for i in np.flatnonzero(~repeats):
+                if len(self.recent_originals) >= ORIGINAL_LOOKUP_SIZE:
+                    self.recent_originals.pop(next(iter(self.recent_originals)))
+                self.recent_originals.setdefault(int(signature[i]), batch.transaction_ids[i])
+
+    async def finalize(self, analysis_id: Optional[str] = None) -> FullPopulationAnalysisResult:
+        """Produce the final FullPopulationAnalysisResult once the stream is complete."""
+        engine = self.engine
+        types = self.analysis_types
+        n = self.rows
+        analysis_id = analysis_id or hashlib.md5(f"analysis_{n}_{self.start_time}".encode()).hexdigest()[:12]
+
+        sample = self.reservoir.sample
+        if n:
+            q1, q2, q3 = np.percentile(sample, [25, 50, 75])
+        else:
+            q1 = q2 = q3 = 0
+
+        statistics = PopulationStatistics(
+            total_transactions=n,
+            total_amount=self.moments.total,
+            date_range={"start": self.date_min or "", "end": self.date_max or ""},
+            unique_accounts=len(self.accounts),
+            unique_vendors=len(self.vendors),
+            unique_users=len(self.users),
+            avg_transaction_amount=self.moments.mean if n else 0,
+            median_transaction_amount=float(q2),
+            std_deviation=self.moments.std,
+            quartiles={"q1": float(q1), "q2": float(q2), "q3": float(q3)},
+            skewness=self.moments.skewness,
+            kurtosis=self.moments.kurtosis
+        )
+
+        completeness = None
+        benford = None
+        stratification = None
+        patterns = None
+        anomalies = []
+
+        if AnalysisType.COMPLETENESS in types:
+            runs = self.sequence
+            gaps = [
+                engine._gap_range(int(runs.ends[i]), int(runs.starts[i + 1]))
+                for i in range(min(len(runs.starts) - 1, MAX_GAP_RESULTS))
+            ]
+            completeness = engine._completeness_result(
+                gaps=gaps,
+                missing_count=runs.missing_count,
+                gap_ranges=max(0, len(runs.starts) - 1),
+                total_references=runs.count,
+                min_reference=int(runs.starts[0]) if len(runs.starts) else None,
+                max_reference=int(runs.ends[-1]) if len(runs.ends) else None,
+                duplicates=self.completeness_duplicates
+            )
+
+        if AnalysisType.BENFORD_ANALYSIS in types:
+            benford = engine._benford_result([int(c) for c in self.digit_counts[1:10]])
+
+        if AnalysisType.ANOMALY_DETECTION in types:
+            anomalies = self._anomalies(statistics)
+
+        if AnalysisType.STRATIFICATION in types:
+            if n:
+                boundaries = [float(b) for b in np.percentile(sample, [0, 25, 50, 75, 90, 95, 99, 100])]
+                counts, sums = assign_strata(boundaries, sample)
+                scale = n / len(sample)
+                stratification = engine._stratification_result(
+                    boundaries, np.rint(counts * scale).astype(np.int64), sums * scale,
+                    n, self.moments.total, estimated=not self.reservoir.exact
+                )
+            else:
+                stratification = engine._stratification_result([0], np.zeros(0), np.zeros(0), 0, 1)
+
+        if AnalysisType.PATTERN_RECOGNITION in types:
+            values = np.array([self.daily_totals[d] for d in sorted(self.daily_totals)])
+            patterns = engine._patterns_result(values, n)
+
+        if AnalysisType.DUPLICATE_DETECTION in types:
+            anomalies.extend(engine._duplicate_anomaly(*d) for d in self.duplicates)
+
+        if AnalysisType.GAP_ANALYSIS in types:
+            runs = self.sequence
+            anomalies.extend(
+                engine._gap_anomaly(runs.start_ids[i + 1], int(runs.ends[i]), int(runs.starts[i + 1]))
+                for i in range(min(len(runs.starts) - 1, MAX_GAP_RESULTS))
+            )
+
+        return await engine.build_result(
+            analysis_id=analysis_id,
+            start_time=self.start_time,
+            statistics=statistics,
+            anomalies=anomalies,
+            transactions_analyzed=n,
+            completeness=completeness,
+            benford=benford,
+            stratification=stratification,
+            patterns=patterns
+        )
+
+    def _anomalies(self, statistics: PopulationStatistics) -> List[AnomalyResult]:
+        engine = self.engine
+        mean = statistics.avg_transaction_amount
+        std = statistics.std_deviation
+        flagged = []
+
+        if std > 0:
+            seen_rows = set()
+            for row in self.high.rows + self.low.rows:
+                if row[0] in seen_rows:
+                    continue
+                seen_rows.add(row[0])
+                z_score = abs(row[2] - mean) / std
+                if z_score > self.thresholds["z_score_outlier"]:
+                    flagged.append((row[0], 0, engine._outlier_anomaly(
+                        row[1], row[2], row[3], row[4], z_score, mean, std
+                    )))
+
+        for row, transaction_id, amount, account in self.round_numbers:
+            flagged.append((row, 1, engine._round_number_anomaly(transaction_id, amount, account)))
+
+        # Population order, outlier before round number for the same row
+        flagged.sort(key=lambda f: (f[0], f[1]))
+        return [f[2] for f in flagged[:MAX_ANOMALIES]]
+
+
 # Initialize engine
 engine = FullPopulationEngine()
 
@@ -704,6 +1133,64 @@ async def analyze_population(request: PopulationAnalysisRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/analyze/stream", response_model=FullPopulationAnalysisResult)
+async def analyze_population_stream(
+    request: Request,
+    analysis_types: List[AnalysisType] = Query(
+        default=[AnalysisType.COMPLETENESS, AnalysisType.ANOMALY_DETECTION]
+    ),
+    thresholds: Optional[str] = Query(
+        default=None,
+        description="JSON object of detection thresholds, as in the /analyze request"
+    )
+):
+    """
+    Perform full-population analysis on a streamed upload.
+
+    The body is NDJSON (application/x-ndjson), CSV (text/csv) or an Arrow IPC
+    stream (application/vnd.apache.arrow.stream) with the Transaction fields.
+    Rows are analyzed in fixed-size chunks as they arrive, so memory stays
+    flat regardless of population size; the result is returned once the
+    stream completes.
+    """
+    try:
+        fmt = stream_format(request.headers.get("content-type"))
+    except StreamFormatError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    try:
+        threshold_overrides = parse_thresholds(thresholds)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    analyzer = StreamingPopulationAnalyzer(engine, analysis_types, thresholds=threshold_overrides)
+    try:
+        async for batch in iter_batches(request.stream(), fmt):
+            analyzer.update(batch)
+        return await analyzer.finalize()
+    except StreamFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Streaming population analysis error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def parse_thresholds(raw: Optional[str]) -> Optional[Dict[str, float]]:
+    """Parse the JSON thresholds query parameter of /analyze/stream."""
+    if not raw:
+        return None
+    try:
+        parsed = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"thresholds is not valid JSON: {e.msg}")
+    if not isinstance(parsed, dict):
+        raise ValueError("thresholds must be a JSON object")
+    try:
+        return {str(name): float(value) for name, value in parsed.items()}
+    except (TypeError, ValueError):
+        raise ValueError("thresholds values must be numbers")
+
+
 @app.post("/completeness", response_model=CompletenessResult)
 async def check_completeness(transactions: List[Transaction]):
     """
@@ -712,7 +1199,7 @@ async def check_completeness(transactions: List[Transaction]):
     Identifies sequence gaps, missing periods, and duplicates.
     """
     try:
-        result = await engine._analyze_completeness(transactions)
+        result = await engine._analyze_completeness(TransactionBatch.from_transactions(transactions))
         return result
     except Exception as e:
         logger.error(f"Completeness check error: {str(e)}")
@@ -727,7 +1214,7 @@ async def analyze_benford(transactions: List[Transaction]):
     Tests first-digit distribution against expected Benford distribution.
     """
     try:
-        result = await engine._analyze_benford(transactions)
+        result = await engine._analyze_benford(TransactionBatch.from_transactions(transactions))
         return result
     except Exception as e:
         logger.error(f"Benford analysis error: {str(e)}")
@@ -742,7 +1229,7 @@ async def stratify_population(transactions: List[Transaction]):
     Groups transactions into risk-based strata for targeted testing.
     """
     try:
-        result = await engine._stratify_population(transactions)
+        result = await engine._stratify_population(TransactionBatch.from_transactions(transactions))
         return result
     except Exception as e:
         logger.error(f"Stratification error: {str(e)}")
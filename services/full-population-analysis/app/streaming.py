@@ -0,0 +1,505 @@
+"""
+Streaming ingest for the full-population engine.
+
+Transactions arrive as chunked NDJSON, CSV or Arrow IPC and are cut into
+fixed-size TransactionBatch chunks. The accumulators below let the engine's
+StreamingPopulationAnalyzer fold each chunk into constant-size state:
+
+- running moments (count, mean, M2, M3, M4) for the population statistics
+- a first-digit histogram for Benford's Law
+- a reservoir sample for quartiles and strata boundaries
+- Bloom-filter sketches for duplicate signatures
+- a run-length set of covered reference numbers for sequence gaps
+- bounded candidate buffers for outliers and round numbers
+
+so memory stays flat regardless of population size. Distinct-account,
+vendor, user and per-day tallies grow with the number of distinct values,
+not with the number of transactions.
+"""
+
+import codecs
+import csv
+import hashlib
+import io
+import json
+import tempfile
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .columnar import TransactionBatch
+
+try:
+    import pyarrow.ipc as pa_ipc
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+STREAM_CHUNK_ROWS = 50_000
+RESERVOIR_SIZE = 100_000
+ORIGINAL_LOOKUP_SIZE = 100_000
+SKETCH_CAPACITY = 10_000_000
+SKETCH_ERROR_RATE = 0.001
+MAX_ANOMALIES = 500
+MAX_GAP_RESULTS = 100
+
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-seq"}
+CSV_CONTENT_TYPES = {"text/csv", "application/csv"}
+ARROW_CONTENT_TYPES = {"application/vnd.apache.arrow.stream"}
+
+REQUIRED_FIELDS = ("transaction_id", "date", "amount", "account")
+OPTIONAL_FIELDS = ("description", "vendor", "user", "reference")
+
+
+class StreamFormatError(ValueError):
+    """Raised when an uploaded stream cannot be parsed into transactions."""
+
+
+def stream_format(content_type: Optional[str]) -> str:
+    """Map a Content-Type header to one of ndjson, csv or arrow."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in NDJSON_CONTENT_TYPES:
+        return "ndjson"
+    if media_type in CSV_CONTENT_TYPES:
+        return "csv"
+    if media_type in ARROW_CONTENT_TYPES:
+        if not ARROW_AVAILABLE:
+            raise StreamFormatError("Arrow uploads require pyarrow, which is not installed")
+        return "arrow"
+    raise StreamFormatError(f"Unsupported stream content type: {media_type or 'missing'}")
+
+
+# =============================================================================
+# Parsers: byte stream -> TransactionBatch chunks
+# =============================================================================
+
+async def iter_batches(
+    body: AsyncIterator[bytes],
+    fmt: str,
+    chunk_rows: int = STREAM_CHUNK_ROWS
+) -> AsyncIterator[TransactionBatch]:
+    """Parse an uploaded byte stream into TransactionBatch chunks."""
+    if fmt == "ndjson":
+        rows = _iter_ndjson_rows(body)
+    elif fmt == "csv":
+        rows = _iter_csv_rows(body)
+    elif fmt == "arrow":
+        async for batch in _iter_arrow_batches(body, chunk_rows):
+            yield batch
+        return
+    else:
+        raise StreamFormatError(f"Unsupported stream format: {fmt}")
+
+    chunk = _ColumnChunk()
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield chunk.to_batch()
+            chunk = _ColumnChunk()
+    if len(chunk):
+        yield chunk.to_batch()
+
+
+class _ColumnChunk:
+    """Accumulates parsed rows column by column until a chunk is full."""
+
+    def __init__(self):
+        self.columns: Dict[str, List[Any]] = {f: [] for f in REQUIRED_FIELDS + OPTIONAL_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.columns["transaction_id"])
+
+    def append(self, row: Dict[str, Any]):
+        missing = [f for f in REQUIRED_FIELDS if row.get(f) in (None, "")]
+        if missing:
+            raise StreamFormatError(f"Row {row.get('_line', '?')} is missing required fields: {', '.join(missing)}")
+        try:
+            amount = float(row["amount"])
+        except (TypeError, ValueError):
+            raise StreamFormatError(f"Row {row.get('_line', '?')} has a non-numeric amount: {row['amount']!r}")
+
+        self.columns["transaction_id"].append(str(row["transaction_id"]))
+        self.columns["date"].append(str(row["date"]))
+        self.columns["amount"].append(amount)
+        self.columns["account"].append(str(row["account"]))
+        for f in OPTIONAL_FIELDS:
+            value = row.get(f)
+            self.columns[f].append(None if value in (None, "") else str(value))
+
+    def to_batch(self) -> TransactionBatch:
+        c = self.columns
+        return TransactionBatch(
+            transaction_ids=c["transaction_id"],
+            dates=c["date"],
+            amounts=c["amount"],
+            accounts=c["account"],
+            descriptions=c["description"],
+            vendors=c["vendor"],
+            users=c["user"],
+            references=c["reference"],
+        )
+
+
+async def _iter_lines(body: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Yield complete text lines from a chunked UTF-8 byte stream."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for data in body:
+        pending += decoder.decode(data)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def _iter_ndjson_rows(body: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    line_number = 0
+    async for line in _iter_lines(body):
+        line_number += 1
+        line = line.strip().lstrip("\x1e")  # Tolerate application/json-seq record separators
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise StreamFormatError(f"Invalid JSON on line {line_number}: {e.msg}")
+        if not isinstance(row, dict):
+            raise StreamFormatError(f"Line {line_number} is not a JSON object")
+        row.setdefault("_line", line_number)
+        yield row
+
+
+async def _iter_csv_rows(body: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    """Parse CSV incrementally; records may span chunks and contain quoted newlines."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    header: Optional[List[str]] = None
+    record_number = 0
+
+    def split_complete(text: str) -> Tuple[str, str]:
+        # A newline ends a record only outside quotes (even number of quotes before it)
+        cut = -1
+        quotes = 0
+        start = 0
+        while True:
+            newline = text.find("\n", start)
+            if newline < 0:
+                break
+            quotes += text.count('"', start, newline)
+            if quotes % 2 == 0:
+                cut = newline
+            start = newline + 1
+        return text[:cut + 1], text[cut + 1:]
+
+    def parse(text: str) -> List[Dict[str, Any]]:
+        nonlocal header, record_number
+        rows = []
+        for record in csv.reader(io.StringIO(text)):
+            if not record:
+                continue
+            if header is None:
+                header = [h.strip() for h in record]
+                continue
+            record_number += 1
+            rows.append({**dict(zip(header, record)), "_line": record_number})
+        return rows
+
+    async for data in body:
+        ready, pending = split_complete(pending + decoder.decode(data))
+        for row in parse(ready):
+            yield row
+
+    for row in parse(pending + decoder.decode(b"", final=True)):
+        yield row
+
+
+async def _iter_arrow_batches(body: AsyncIterator[bytes], chunk_rows: int) -> AsyncIterator[TransactionBatch]:
+    """
+    Read an Arrow IPC stream record batch by record batch.
+
+    The Arrow reader needs a synchronous file, so the upload is spooled to a
+    temporary file (in memory only while small) and then read one record
+    batch at a time.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        async for data in body:
+            spool.write(data)
+        spool.seek(0)
+
+        try:
+            reader = pa_ipc.open_stream(spool)
+        except Exception as e:
+            raise StreamFormatError(f"Invalid Arrow IPC stream: {e}")
+
+        for record_batch in reader:
+            for offset in range(0, record_batch.num_rows, chunk_rows):
+                yield _arrow_to_batch(record_batch.slice(offset, chunk_rows))
+
+
+def _arrow_to_batch(record_batch) -> TransactionBatch:
+    names = set(record_batch.schema.names)
+    missing = [f for f in REQUIRED_FIELDS if f not in names]
+    if missing:
+        raise StreamFormatError(f"Arrow stream is missing required columns: {', '.join(missing)}")
+
+    def column(name: str, as_str: bool = True) -> Optional[np.ndarray]:
+        if name not in names:
+            return None
+        arrow_column = record_batch.column(name)
+        if arrow_column.null_count:
+            if name in REQUIRED_FIELDS:
+                raise StreamFormatError(
+                    f"Arrow column {name} has {arrow_column.null_count} null values; required fields cannot be null"
+                )
+            # Optional values: nulls become None, as in the NDJSON/CSV parsers
+            values = np.empty(len(arrow_column), dtype=object)
+            values[:] = [None if v is None else str(v) for v in arrow_column.to_pylist()]
+            return values
+        values = arrow_column.to_numpy(zero_copy_only=False)
+        if as_str and values.dtype != object:
+            values = values.astype(str)
+        return values
+
+    try:
+        amounts = column("amount", as_str=False).astype(np.float64)
+    except (TypeError, ValueError):
+        raise StreamFormatError("Arrow column amount must be numeric")
+
+    return TransactionBatch(
+        transaction_ids=column("transaction_id"),
+        dates=column("date"),
+        amounts=amounts,
+        accounts=column("account"),
+        descriptions=column("description"),
+        vendors=column("vendor"),
+        users=column("user"),
+        references=column("reference"),
+    )
+
+
+# =============================================================================
+# Constant-memory accumulators
+# =============================================================================
+
+class RunningMoments:
+    """Mergeable count/mean/central-moment accumulator (Pébay's pairwise update)."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+
+    def update(self, values: np.ndarray):
+        n_b = len(values)
+        if not n_b:
+            return
+        mean_b = float(values.mean())
+        centered = values - mean_b
+        sq = centered * centered
+        m2_b = float(sq.sum())
+        m3_b = float((sq * centered).sum())
+        m4_b = float((sq * sq).sum())
+
+        n_a = self.count
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        delta_n = delta / n
+
+        m4 = (self.m4 + m4_b
+              + delta * delta_n ** 3 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b)
+              + 6 * delta_n ** 2 * (n_a * n_a * m2_b + n_b * n_b * self.m2)
+              + 4 * delta_n * (n_a * m3_b - n_b * self.m3))
+        m3 = (self.m3 + m3_b
+              + delta * delta_n ** 2 * n_a * n_b * (n_a - n_b)
+              + 3 * delta_n * (n_a * m2_b - n_b * self.m2))
+        m2 = self.m2 + m2_b + delta * delta_n * n_a * n_b
+
+        self.count = n
+        self.total += float(values.sum())
+        self.mean += delta_n * n_b
+        self.m2, self.m3, self.m4 = m2, m3, m4
+
+    @property
+    def std(self) -> float:
+        return (self.m2 / self.count) ** 0.5 if self.count else 0.0
+
+    @property
+    def skewness(self) -> float:
+        # Biased sample skewness, as scipy.stats.skew
+        if self.count < 3 or self.m2 == 0:
+            return 0.0
+        return (self.m3 / self.count) / (self.m2 / self.count) ** 1.5
+
+    @property
+    def kurtosis(self) -> float:
+        # Biased Fisher kurtosis, as scipy.stats.kurtosis
+        if self.count < 4 or self.m2 == 0:
+            return 0.0
+        return (self.m4 / self.count) / (self.m2 / self.count) ** 2 - 3
+
+
+class ReservoirSample:
+    """Uniform fixed-size sample of a stream (vectorized Algorithm R)."""
+
+    def __init__(self, capacity: int = RESERVOIR_SIZE, seed: int = 0):
+        self.capacity = capacity
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray):
+        fill = min(self.capacity - self.size, len(values))
+        if fill:
+            self.values[self.size:self.size + fill] = values[:fill]
+            self.size += fill
+
+        rest = values[fill:]
+        if len(rest):
+            # Item t (0-based stream position) replaces slot j ~ U[0, t] when j < capacity
+            positions = self.seen + fill + np.arange(len(rest))
+            slots = (self.rng.random(len(rest)) * (positions + 1)).astype(np.int64)
+            keep = slots < self.capacity
+            self.values[slots[keep]] = rest[keep]
+        self.seen += len(values)
+
+    @property
+    def sample(self) -> np.ndarray:
+        return self.values[:self.size]
+
+    @property
+    def exact(self) -> bool:
+        return self.seen <= self.capacity
+
+
+class DuplicateSketch:
+    """Bloom filter over 64-bit signature hashes with a fixed memory budget."""
+
+    def __init__(self, capacity: int = SKETCH_CAPACITY, error_rate: float = SKETCH_ERROR_RATE):
+        bits = int(-capacity * np.log(error_rate) / (np.log(2) ** 2))
+        self.bit_count = max(64, bits)
+        self.hash_count = max(1, int(round(self.bit_count / capacity * np.log(2))))
+        self.bits = np.zeros((self.bit_count + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        # Kirsch-Mitzenmacher double hashing: h1 + i * h2
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        i = np.arange(self.hash_count, dtype=np.uint64)[:, None]
+        return ((h1[None, :] + i * h2[None, :]) % np.uint64(self.bit_count)).astype(np.int64)
+
+    def check_and_add(self, hashes: np.ndarray) -> np.ndarray:
+        """Return which hashes were (probably) already present, then add them all."""
+        if not len(hashes):
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(hashes)
+        present = ((self.bits[positions >> 3] >> (positions & 7).astype(np.uint8)) & 1).astype(bool)
+        seen = present.all(axis=0)
+        np.bitwise_or.at(self.bits, (positions >> 3).ravel(), (1 << (positions & 7)).astype(np.uint8).ravel())
+        return seen
+
+
+class SequenceRuns:
+    """Covered reference numbers stored as sorted, disjoint [start, end] runs."""
+
+    def __init__(self):
+        self.starts = np.empty(0, dtype=np.int64)
+        self.ends = np.empty(0, dtype=np.int64)
+        self.start_ids = np.empty(0, dtype=object)
+        self.count = 0
+
+    def update(self, numbers: np.ndarray, transaction_ids: np.ndarray):
+        if not len(numbers):
+            return
+        self.count += len(numbers)
+
+        # Compress the chunk to runs; the earliest row wins for repeated numbers
+        order = np.argsort(numbers, kind="stable")
+        numbers, transaction_ids = numbers[order], transaction_ids[order]
+        new_run = np.ones(len(numbers), dtype=bool)
+        new_run[1:] = np.diff(numbers) > 1
+        starts = numbers[new_run]
+        ends = np.append(numbers[np.flatnonzero(new_run)[1:] - 1], numbers[-1])
+        start_ids = transaction_ids[new_run]
+
+        # Merge with existing runs (existing runs first so they win ties)
+        all_starts = np.concatenate([self.starts, starts])
+        all_ends = np.concatenate([self.ends, ends])
+        all_ids = np.concatenate([self.start_ids, start_ids])
+        order = np.argsort(all_starts, kind="stable")
+        all_starts, all_ends, all_ids = all_starts[order], all_ends[order], all_ids[order]
+
+        reach = np.maximum.accumulate(all_ends)
+        merged = np.ones(len(all_starts), dtype=bool)
+        merged[1:] = all_starts[1:] > reach[:-1] + 1
+        first = np.flatnonzero(merged)
+        last = np.append(first[1:] - 1, len(all_starts) - 1)
+
+        self.starts = all_starts[first]
+        self.ends = reach[last]
+        self.start_ids = all_ids[first]
+
+    @property
+    def missing_count(self) -> int:
+        if len(self.starts) < 2:
+            return 0
+        return int((self.starts[1:] - self.ends[:-1] - 1).sum())
+
+
+def hash_strings(values: np.ndarray) -> np.ndarray:
+    """Stable 64-bit hash per value; only distinct values are hashed in Python."""
+    if not len(values):
+        return np.empty(0, dtype=np.uint64)
+    distinct, codes = np.unique(values.astype(str), return_inverse=True)
+    digests = np.array(
+        [int.from_bytes(hashlib.blake2b(v.encode(), digest_size=8).digest(), "little") for v in distinct],
+        dtype=np.uint64
+    )
+    return digests[codes.reshape(-1)]
+
+
+def combine_hashes(*columns: np.ndarray) -> np.ndarray:
+    """Order-dependent mix of uint64 hash columns (splitmix64 finalizer)."""
+    with np.errstate(over="ignore"):
+        h = np.full(len(columns[0]), 0x9E3779B97F4A7C15, dtype=np.uint64)
+        for column in columns:
+            h = (h ^ column.astype(np.uint64)) * np.uint64(0xBF58476D1CE4E5B9)
+            h ^= h >> np.uint64(31)
+            h = h * np.uint64(0x94D049BB133111EB)
+            h ^= h >> np.uint64(29)
+    return h
+
+
+class ExtremeBuffer:
+    """
+    Keeps the k highest-scoring rows across chunks with their payload; ties
+    go to the earliest row so the buffer matches a population-order scan.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.scores = np.empty(0, dtype=np.float64)
+        self.positions = np.empty(0, dtype=np.int64)
+        self.rows: List[Tuple] = []
+
+    def update(self, scores: np.ndarray, positions: np.ndarray, payload: Iterable[Tuple]):
+        all_scores = np.concatenate([self.scores, scores])
+        all_positions = np.concatenate([self.positions, positions])
+        all_rows = self.rows + list(payload)
+        if len(all_scores) > self.k:
+            keep = np.lexsort((all_positions, -all_scores))[:self.k]
+            all_scores, all_positions = all_scores[keep], all_positions[keep]
+            all_rows = [all_rows[i] for i in keep]
+        self.scores, self.positions, self.rows = all_scores, all_positions, all_rows
+
+
+def present_values(column: np.ndarray) -> List[str]:
+    """Distinct non-empty values of an optional column."""
+    present = column[column.astype(bool)]
+    return np.unique(present.astype(str)).tolist() if len(present) else []
@@ -0,0 +1,213 @@
+"""
+Tests for the columnar FullPopulationEngine
+
+The vectorized passes over a TransactionBatch must report the same
+statistics and anomalies as the per-transaction loops they replaced,
+which are kept below as reference implementations.
+"""
+
+import random
+
+import numpy as np
+import pytest
+from app.main import (
+    AnalysisType,
+    FullPopulationEngine,
+    PopulationAnalysisRequest,
+    Transaction,
+)
+from scipy import stats
+
+
+def make_population(n: int = 2000, seed: int = 7):
+    """Population with outliers, round amounts, duplicates and reference gaps."""
+    rng = random.Random(seed)
+    transactions = []
+    reference = 1000
+    for i in range(n):
+        reference += 1 if rng.random() > 0.02 else rng.randint(2, 6)
+        amount = round(rng.lognormvariate(7, 1.2), 2)
+        if i % 97 == 0:
+            amount = float(rng.choice([10000, 25000, 50000]))
+        if i % 331 == 0:
+            amount = round(amount * 400, 2)
+        transactions.append(Transaction(
+            transaction_id=f"T{i:05d}",
+            date=f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            amount=amount,
+            account=f"{rng.randint(1000, 1030)}",
+            description=rng.choice(["Invoice", "Payment", "Accrual", None]),
+            vendor=rng.choice(["Acme", "Globex", "Initech", None]),
+            user=rng.choice(["alice", "bob", "carol"]),
+            reference=str(reference) if i % 50 else "MANUAL",
+        ))
+    # Exact re-entries of earlier rows
+    for i in range(0, n, 149):
+        original = transactions[i]
+        transactions.append(original.model_copy(update={"transaction_id": f"D{i:05d}"}))
+    return transactions
+
+
+# ============================================================================
+# Reference implementations: the original per-transaction loops
+# ============================================================================
+
+def loop_statistics(transactions):
+    amounts = [t.amount for t in transactions]
+    return {
+        "total_amount": sum(amounts),
+        "unique_accounts": len(set(t.account for t in transactions)),
+        "unique_vendors": len(set(t.vendor for t in transactions if t.vendor)),
+        "unique_users": len(set(t.user for t in transactions if t.user)),
+        "mean": np.mean(amounts),
+        "median": np.median(amounts),
+        "std": np.std(amounts),
+        "skewness": float(stats.skew(amounts)),
+        "kurtosis": float(stats.kurtosis(amounts)),
+        "start": min(t.date for t in transactions),
+        "end": max(t.date for t in transactions),
+    }
+
+
+def loop_benford_counts(transactions):
+    counts = [0] * 9
+    for t in transactions:
+        if t.amount > 0:
+            first_digit = str(abs(t.amount))[0]
+            if first_digit not in ("0", "."):
+                counts[int(first_digit) - 1] += 1
+    return counts
+
+
+def loop_anomalies(transactions, mean, std, z_threshold=3.0):
+    flagged = []
+    for t in transactions:
+        if std > 0 and abs(t.amount - mean) / std > z_threshold:
+            flagged.append(("statistical_outlier", t.transaction_id))
+        if t.amount > 0 and t.amount == round(t.amount, -3) and t.amount >= 10000:
+            flagged.append(("round_number", t.transaction_id))
+    return flagged[:500]
+
+
+def loop_duplicates(transactions):
+    seen = {}
+    duplicates = []
+    for t in transactions:
+        signature = f"{t.date}_{t.amount}_{t.account}"
+        if signature in seen:
+            duplicates.append((t.transaction_id, seen[signature]))
+        else:
+            seen[signature] = t.transaction_id
+    return duplicates
+
+
+def loop_gaps(transactions):
+    numeric_refs = []
+    for t in transactions:
+        if t.reference:
+            try:
+                numeric_refs.append((t.transaction_id, int(t.reference)))
+            except ValueError:
+                pass
+    numeric_refs.sort(key=lambda x: x[1])
+    return [
+        (curr_tid, prev_ref, curr_ref)
+        for (_, prev_ref), (curr_tid, curr_ref) in zip(numeric_refs, numeric_refs[1:])
+        if curr_ref - prev_ref > 1
+    ]
+
+
+def loop_completeness_duplicates(transactions):
+    seen = set()
+    duplicates = 0
+    for t in transactions:
+        key = f"{t.date}_{t.amount}_{t.account}_{t.description}"
+        if key in seen:
+            duplicates += 1
+        seen.add(key)
+    return duplicates
+
+
+# ============================================================================
+# Equivalence tests
+# ============================================================================
+
+class TestColumnarEquivalence:
+    """Columnar analyses match the original row loops"""
+
+    @pytest.fixture
+    def transactions(self):
+        return make_population()
+
+    @pytest.fixture
+    async def result(self, transactions):
+        request = PopulationAnalysisRequest(
+            transactions=transactions,
+            analysis_types=[
+                AnalysisType.COMPLETENESS,
+                AnalysisType.ANOMALY_DETECTION,
+                AnalysisType.BENFORD_ANALYSIS,
+                AnalysisType.DUPLICATE_DETECTION,
+                AnalysisType.GAP_ANALYSIS,
+            ],
+        )
+        return await FullPopulationEngine().analyze_population(request)
+
+    @pytest.mark.asyncio
+    async def test_statistics(self, transactions, result):
+        expected = loop_statistics(transactions)
+        statistics = result.population_statistics
+
+        assert statistics.total_transactions == len(transactions)
+        assert statistics.total_amount == pytest.approx(expected["total_amount"])
+        assert statistics.unique_accounts == expected["unique_accounts"]
+        assert statistics.unique_vendors == expected["unique_vendors"]
+        assert statistics.unique_users == expected["unique_users"]
+        assert statistics.avg_transaction_amount == pytest.approx(expected["mean"])
+        assert statistics.median_transaction_amount == pytest.approx(expected["median"])
+        assert statistics.std_deviation == pytest.approx(expected["std"])
+        assert statistics.skewness == pytest.approx(expected["skewness"])
+        assert statistics.kurtosis == pytest.approx(expected["kurtosis"])
+        assert statistics.date_range == {"start": expected["start"], "end": expected["end"]}
+
+    @pytest.mark.asyncio
+    async def test_benford(self, transactions, result):
+        observed = loop_benford_counts(transactions)
+        total = sum(observed)
+        assert result.benford_analysis.digit_distribution == {
+            str(d): round(observed[d - 1] / total, 4) for d in range(1, 10)
+        }
+
+    @pytest.mark.asyncio
+    async def test_anomalies(self, transactions, result):
+        statistics = result.population_statistics
+        expected = loop_anomalies(
+            transactions, statistics.avg_transaction_amount, statistics.std_deviation
+        )
+        actual = [
+            (a.anomaly_type.value, a.transaction_id) for a in result.anomalies
+            if a.anomaly_type.value in ("statistical_outlier", "round_number")
+        ]
+        assert expected
+        assert actual == expected
+
+    @pytest.mark.asyncio
+    async def test_duplicates(self, transactions, result):
+        actual = [
+            (a.transaction_id, a.context["original_transaction"]) for a in result.anomalies
+            if a.anomaly_type.value == "duplicate"
+        ]
+        assert actual == loop_duplicates(transactions)
+        assert result.completeness.duplicate_count == loop_completeness_duplicates(transactions)
+
+    @pytest.mark.asyncio
+    async def test_sequence_gaps(self, transactions, result):
+        expected = loop_gaps(transactions)
+        actual = [
+            (a.transaction_id, a.context["previous_reference"], a.actual_value) for a in result.anomalies
+            if a.anomaly_type.value == "sequence_gap"
+        ]
+        assert actual == expected[:100]
+        assert result.completeness.sequence_analysis["gaps_found"] == sum(
+            curr - prev - 1 for _, prev, curr in expected
+        )
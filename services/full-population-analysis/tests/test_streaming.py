@@ -0,0 +1,165 @@
+"""
+Tests for streaming population analysis
+
+A population streamed as NDJSON in small chunks must produce the same
+result as the batch /analyze path while it fits the reservoir and sketch
+budgets.
+"""
+
+import json
+
+import numpy as np
+import pytest
+from app.columnar import TransactionBatch
+from app.main import (
+    AnalysisType,
+    FullPopulationEngine,
+    StreamingPopulationAnalyzer,
+    parse_thresholds,
+)
+from app.streaming import StreamFormatError, iter_batches
+
+from .test_columnar_engine import make_population
+
+ALL_TYPES = [
+    AnalysisType.COMPLETENESS,
+    AnalysisType.ANOMALY_DETECTION,
+    AnalysisType.BENFORD_ANALYSIS,
+    AnalysisType.STRATIFICATION,
+    AnalysisType.PATTERN_RECOGNITION,
+    AnalysisType.DUPLICATE_DETECTION,
+    AnalysisType.GAP_ANALYSIS,
+]
+
+
+def ndjson_body(transactions, piece_size: int = 4096):
+    """Async byte stream cut at arbitrary offsets, as an HTTP body arrives."""
+    payload = "".join(json.dumps(t.model_dump()) + "\n" for t in transactions).encode()
+
+    async def body():
+        for offset in range(0, len(payload), piece_size):
+            yield payload[offset:offset + piece_size]
+
+    return body()
+
+
+async def stream_analyze(engine, transactions, thresholds=None, chunk_rows: int = 300):
+    analyzer = StreamingPopulationAnalyzer(engine, ALL_TYPES, thresholds=thresholds)
+    async for batch in iter_batches(ndjson_body(transactions), "ndjson", chunk_rows=chunk_rows):
+        analyzer.update(batch)
+    return await analyzer.finalize()
+
+
+def anomaly_keys(result):
+    return [
+        (a.anomaly_type.value, a.transaction_id, a.context.get("original_transaction"))
+        for a in result.anomalies
+    ]
+
+
+class TestStreamingEquivalence:
+    """Streaming results match the batch path"""
+
+    @pytest.fixture
+    def transactions(self):
+        return make_population()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("thresholds", [None, {"z_score_outlier": 2.0}])
+    async def test_matches_batch(self, transactions, thresholds):
+        engine = FullPopulationEngine()
+        batch = await engine.analyze_batch(
+            TransactionBatch.from_transactions(transactions), ALL_TYPES, thresholds=thresholds
+        )
+        streamed = await stream_analyze(engine, transactions, thresholds=thresholds)
+
+        expected, actual = batch.population_statistics, streamed.population_statistics
+        assert actual.total_transactions == expected.total_transactions
+        assert actual.total_amount == pytest.approx(expected.total_amount)
+        assert actual.date_range == expected.date_range
+        assert actual.unique_accounts == expected.unique_accounts
+        assert actual.unique_vendors == expected.unique_vendors
+        assert actual.unique_users == expected.unique_users
+        assert actual.avg_transaction_amount == pytest.approx(expected.avg_transaction_amount)
+        assert actual.std_deviation == pytest.approx(expected.std_deviation)
+        assert actual.skewness == pytest.approx(expected.skewness)
+        assert actual.kurtosis == pytest.approx(expected.kurtosis)
+        assert actual.quartiles == pytest.approx(expected.quartiles)
+
+        assert streamed.benford_analysis == batch.benford_analysis
+        assert streamed.completeness == batch.completeness
+        assert streamed.patterns == batch.patterns
+        assert [s["transaction_count"] for s in streamed.stratification.strata] == [
+            s["transaction_count"] for s in batch.stratification.strata
+        ]
+        assert anomaly_keys(streamed) == anomaly_keys(batch)
+
+    @pytest.mark.asyncio
+    async def test_unresolved_duplicate_is_probabilistic(self):
+        engine = FullPopulationEngine()
+        analyzer = StreamingPopulationAnalyzer(engine, [AnalysisType.DUPLICATE_DETECTION])
+        analyzer.update(TransactionBatch(["A"], ["2024-01-01"], [125.0], ["4000"]))
+        analyzer.recent_originals.clear()  # as if the original had been evicted
+        analyzer.update(TransactionBatch(["B"], ["2024-01-01"], [125.0], ["4000"]))
+
+        result = await analyzer.finalize()
+
+        [duplicate] = result.anomalies
+        assert duplicate.transaction_id == "B"
+        assert duplicate.context["original_transaction"] is None
+        assert duplicate.context["match"] == "probabilistic"
+        assert "None" not in duplicate.description
+
+
+class TestStreamParsing:
+    """Upload parsing and validation"""
+
+    def test_parse_thresholds(self):
+        assert parse_thresholds(None) is None
+        assert parse_thresholds('{"z_score_outlier": 2.5}') == {"z_score_outlier": 2.5}
+        with pytest.raises(ValueError):
+            parse_thresholds("[1, 2]")
+        with pytest.raises(ValueError):
+            parse_thresholds('{"z_score_outlier": "high"}')
+
+    @pytest.mark.asyncio
+    async def test_arrow_null_amount_is_rejected(self):
+        pa = pytest.importorskip("pyarrow")
+        table = pa.table({
+            "transaction_id": ["T1", "T2"],
+            "date": ["2024-01-01", "2024-01-02"],
+            "amount": pa.array([10.0, None], type=pa.float64()),
+            "account": ["4000", "4000"],
+            "vendor": pa.array(["Acme", None]),
+        })
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+        async def body():
+            yield sink.getvalue().to_pybytes()
+
+        with pytest.raises(StreamFormatError, match="amount"):
+            async for _ in iter_batches(body(), "arrow"):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_arrow_null_optional_values_become_none(self):
+        pa = pytest.importorskip("pyarrow")
+        table = pa.table({
+            "transaction_id": ["T1", "T2"],
+            "date": ["2024-01-01", "2024-01-02"],
+            "amount": [10.0, 20.0],
+            "account": ["4000", "4000"],
+            "reference": pa.array([7, None], type=pa.int64()),
+        })
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+        async def body():
+            yield sink.getvalue().to_pybytes()
+
+        [batch] = [batch async for batch in iter_batches(body(), "arrow")]
+        assert batch.references.tolist() == ["7", None]
+        assert np.array_equal(batch.amounts, [10.0, 20.0])
@@ -10,10 +10,14 @@ Routes requests to appropriate microservices with:
 """
 
 import asyncio
+import bisect
+import hashlib
+import json
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Dict, Optional
-from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict, defaultdict
 
 import httpx
 from fastapi import FastAPI, Request, HTTPException, status
@@ -22,6 +26,18 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.background import BackgroundTask
 import uvicorn
 
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+try:
+    from jose import JWTError, jwt
+    JOSE_AVAILABLE = True
+except ImportError:
+    JOSE_AVAILABLE = False
+
 # Service registry with health check endpoints
 # Service names match Kubernetes service names (not api-* prefix)
 SERVICE_REGISTRY = {
@@ -140,10 +156,56 @@ ROUTE_MAP = {
     "/estimates": "estimates",
 }
 
+# Per-route upstream read/write timeouts in seconds (prefix -> timeout).
+# Routes not listed use DEFAULT_UPSTREAM_TIMEOUT.
+ROUTE_TIMEOUTS = {
+    "/ingestion": 300.0,  # PBC uploads
+    "/trials": 300.0,
+    "/reports": 120.0,  # Report generation and downloads
+    "/pdf": 120.0,
+    "/llm": 120.0,
+    "/chat": 120.0,
+    "/rd-ai": 300.0,
+}
+
+# Per-route rate limits in requests per minute (prefix -> limit), applied per
+# client on top of the global per-client limit
+ROUTE_RATE_LIMITS = {
+    "/auth": 30,  # Login/refresh brute-force protection
+    "/llm": 30,
+    "/chat": 30,
+    "/embeddings": 60,
+    "/edgar": 30,
+}
+
+DEFAULT_UPSTREAM_TIMEOUT = 30.0
+UPSTREAM_CONNECT_TIMEOUT = 5.0
+
+# Hop-by-hop headers are connection-specific and must not be forwarded
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close upstream connection pools on shutdown"""
+    yield
+    await upstream_pools.close()
+
+
 app = FastAPI(
     title="Aura Audit AI Gateway",
     description="API Gateway for routing requests to microservices",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -164,9 +226,6 @@ app.add_middleware(
     expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"]
 )
 
-# Rate limiting storage (in-memory, use Redis in production)
-rate_limit_storage: Dict[str, list] = defaultdict(list)
-
 # Circuit breaker state
 circuit_breaker_state: Dict[str, dict] = defaultdict(lambda: {
     "failures": 0,
@@ -175,31 +234,247 @@ circuit_breaker_state: Dict[str, dict] = defaultdict(lambda: {
 })
 
 
-class RateLimiter:
-    """Token bucket rate limiter"""
+class LocalRateLimitStore:
+    """
+    In-memory sliding-window counters
+
+    Each key keeps only the request counts of the current and previous
+    window, so a check is O(1). Keys idle for longer than idle_ttl are
+    evicted in least-recently-used order.
+    """
+
+    def __init__(self, window: int = 60, idle_ttl: Optional[float] = None):
+        self.window = window
+        self.idle_ttl = idle_ttl or 2 * window
+        # key -> [window_index, current_count, previous_count, last_seen]
+        self._counters: "OrderedDict[str, list]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    async def hit(self, quotas: List[Tuple[str, int]], now: float) -> List[Tuple[bool, float]]:
+        """
+        Check (key, limit) quotas and count the request against all of them
+        only if every one allows it; returns (allowed, estimated count) per quota
+        """
+        self._evict(now)
+        window_index = int(now // self.window)
+        previous_weight = 1 - (now % self.window) / self.window
+
+        counters = []
+        for key, limit in quotas:
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = [window_index, 0, 0, now]
+                self._counters[key] = counter
+            else:
+                self._counters.move_to_end(key)
+
+            if counter[0] != window_index:
+                counter[2] = counter[1] if counter[0] == window_index - 1 else 0
+                counter[1] = 0
+                counter[0] = window_index
+            counter[3] = now
+            counters.append(counter)
+
+        estimates = [counter[2] * previous_weight + counter[1] for counter in counters]
+        results = [(estimated < limit, estimated) for estimated, (_, limit) in zip(estimates, quotas)]
+        if not all(allowed for allowed, _ in results):
+            return results
+
+        for counter in counters:
+            counter[1] += 1
+        return [(True, estimated + 1) for estimated in estimates]
+
+    def _evict(self, now: float):
+        cutoff = now - self.idle_ttl
+        while self._counters:
+            counter = next(iter(self._counters.values()))
+            if counter[3] >= cutoff:
+                break
+            self._counters.popitem(last=False)
+
+
+class RedisRateLimitStore:
+    """
+    Redis-backed sliding-window counters shared by all gateway replicas
+
+    The check-and-increment of all of a request's quotas runs as one Lua
+    script, so concurrent replicas cannot both admit the last request of a
+    window and a request denied by one quota is not counted against the
+    others. Keys expire after two windows, so idle clients need no explicit
+    eviction.
+    """
+
+    SCRIPT = """
+    local weight = tonumber(ARGV[1])
+    local estimates = {}
+    local allowed = 1
+    for i = 1, #KEYS, 2 do
+        local current = tonumber(redis.call('GET', KEYS[i]) or '0')
+        local previous = tonumber(redis.call('GET', KEYS[i + 1]) or '0')
+        local estimated = previous * weight + current
+        if estimated >= tonumber(ARGV[2 + (i + 1) / 2]) then
+            allowed = 0
+        end
+        estimates[#estimates + 1] = estimated
+    end
+    local result = {allowed}
+    for i = 1, #KEYS, 2 do
+        local estimated = estimates[(i + 1) / 2]
+        if allowed == 1 then
+            redis.call('INCR', KEYS[i])
+            redis.call('EXPIRE', KEYS[i], ARGV[2])
+            estimated = estimated + 1
+        end
+        result[#result + 1] = tostring(estimated)
+    end
+    return result
+    """
+
+    def __init__(self, redis_url: str, window: int = 60):
+        self.window = window
+        self.client = aioredis.from_url(redis_url)
+        self._script = self.client.register_script(self.SCRIPT)
+
+    async def hit(self, quotas: List[Tuple[str, int]], now: float) -> List[Tuple[bool, float]]:
+        """
+        Check (key, limit) quotas and count the request against all of them
+        only if every one allows it; returns (allowed, estimated count) per quota
+        """
+        window_index = int(now // self.window)
+        previous_weight = 1 - (now % self.window) / self.window
+        keys = []
+        for key, _ in quotas:
+            # One hash tag puts every key in the same cluster slot, as a
+            # script may only touch keys of one slot
+            keys.extend([
+                f"ratelimit:{{gateway}}:{key}:{window_index}",
+                f"ratelimit:{{gateway}}:{key}:{window_index - 1}"
+            ])
+        all_allowed, *estimates = await self._script(
+            keys=keys,
+            args=[previous_weight, 2 * self.window, *[limit for _, limit in quotas]]
+        )
+        if int(all_allowed):
+            return [(True, float(estimated)) for estimated in estimates]
+        return [
+            (float(estimated) < limit, float(estimated))
+            for estimated, (_, limit) in zip(estimates, quotas)
+        ]
+
 
-    def __init__(self, requests_per_minute: int = 60):
+class RateLimiter:
+    """
+    Sliding-window-counter rate limiter
+
+    Every request is checked against the per-client limit, the per-client
+    limit of its route (ROUTE_RATE_LIMITS) and, when the request carries a
+    verified tenant, the tenant's shared quota. It is counted against its
+    quotas only when all of them admit it. State lives in Redis when a URL
+    is configured (falling back to memory while Redis is unreachable and
+    retrying it every redis_retry_seconds), otherwise in process memory.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 60,
+        route_limits: Optional[Dict[str, int]] = None,
+        tenant_requests_per_minute: Optional[int] = None,
+        tenant_limits: Optional[Dict[str, int]] = None,
+        redis_url: Optional[str] = None,
+        redis_retry_seconds: float = 30.0
+    ):
         self.requests_per_minute = requests_per_minute
         self.window = 60  # seconds
-
-    def check_rate_limit(self, client_id: str) -> bool:
-        """Check if request is within rate limit"""
+        self.route_limits = route_limits or {}
+        self.tenant_requests_per_minute = tenant_requests_per_minute
+        self.tenant_limits = tenant_limits or {}
+
+        self.local_store = LocalRateLimitStore(window=self.window)
+        self.redis_store = None
+        self.redis_retry_seconds = redis_retry_seconds
+        self._redis_retry_at = 0.0
+        self._redis_failing = False
+        if redis_url and REDIS_AVAILABLE:
+            self.redis_store = RedisRateLimitStore(redis_url, window=self.window)
+        elif redis_url:
+            print("Rate limiter: redis package not installed, using in-memory counters")
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self.redis_store else "memory"
+
+    def route_limit(self, path: str) -> Optional[Tuple[str, int]]:
+        """Most specific route quota for a path"""
+        matches = [prefix for prefix in self.route_limits if path.startswith(prefix)]
+        if not matches:
+            return None
+        prefix = max(matches, key=len)
+        return prefix, self.route_limits[prefix]
+
+    async def check_rate_limit(
+        self,
+        client_id: str,
+        path: str = "",
+        tenant_id: Optional[str] = None
+    ) -> dict:
+        """
+        Check a request against every applicable quota
+
+        Returns a dict with "allowed" and the limit/remaining/reset values of
+        the most constraining quota, for X-RateLimit-* headers.
+        """
         now = time.time()
-        window_start = now - self.window
-
-        # Clean old requests
-        rate_limit_storage[client_id] = [
-            req_time for req_time in rate_limit_storage[client_id]
-            if req_time > window_start
-        ]
-
-        # Check limit
-        if len(rate_limit_storage[client_id]) >= self.requests_per_minute:
-            return False
+        quotas = [("client", f"client:{client_id}", self.requests_per_minute)]
+
+        route = self.route_limit(path)
+        if route:
+            prefix, limit = route
+            quotas.append(("route", f"route:{prefix}:{client_id}", limit))
+
+        if tenant_id:
+            tenant_limit = self.tenant_limits.get(tenant_id, self.tenant_requests_per_minute)
+            if tenant_limit:
+                quotas.append(("tenant", f"tenant:{tenant_id}", tenant_limit))
+
+        results = await self._hit([(key, limit) for _, key, limit in quotas], now)
+
+        decision = None
+        for (scope, _, limit), (allowed, count) in zip(quotas, results):
+            remaining = max(0, int(limit - count))
+            if (
+                decision is None
+                or (decision["allowed"] and not allowed)
+                or (decision["allowed"] == allowed and remaining < decision["remaining"])
+            ):
+                decision = {
+                    "allowed": allowed,
+                    "scope": scope,
+                    "limit": limit,
+                    "remaining": remaining,
+                    "reset": int((now // self.window + 1) * self.window)
+                }
 
-        # Add current request
-        rate_limit_storage[client_id].append(now)
-        return True
+        return decision
+
+    async def _hit(self, quotas: List[Tuple[str, int]], now: float) -> List[Tuple[bool, float]]:
+        if self.redis_store and now >= self._redis_retry_at:
+            try:
+                results = await self.redis_store.hit(quotas, now)
+            except Exception as e:
+                # Back off instead of paying a failed round trip per request
+                if not self._redis_failing:
+                    print(f"Rate limiter: Redis unavailable ({e}), using in-memory counters "
+                          f"and retrying every {self.redis_retry_seconds:.0f}s")
+                self._redis_failing = True
+                self._redis_retry_at = now + self.redis_retry_seconds
+            else:
+                if self._redis_failing:
+                    print("Rate limiter: Redis reachable again")
+                self._redis_failing = False
+                return results
+        return await self.local_store.hit(quotas, now)
 
 
 class CircuitBreaker:
@@ -241,8 +516,131 @@ class CircuitBreaker:
         return True
 
 
-rate_limiter = RateLimiter(requests_per_minute=120)
+class UpstreamPools:
+    """
+    Long-lived connection pool per upstream service
+
+    Connections are kept alive across proxied requests. When an upstream's
+    pool is exhausted, requests wait up to pool_timeout for a free
+    connection (backpressure) before failing with 503.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        pool_timeout: float = 10.0
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.pool_timeout = pool_timeout
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def get(self, service: str) -> httpx.AsyncClient:
+        """Get (or create) the pooled client for a service"""
+        client = self._clients.get(service)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout(DEFAULT_UPSTREAM_TIMEOUT)
+            )
+            self._clients[service] = client
+        return client
+
+    def timeout(self, seconds: float) -> httpx.Timeout:
+        """Timeout for one proxied request"""
+        return httpx.Timeout(
+            seconds,
+            connect=UPSTREAM_CONNECT_TIMEOUT,
+            pool=self.pool_timeout
+        )
+
+    def open_connections(self, service: str) -> int:
+        """Connections currently held in a service's pool"""
+        client = self._clients.get(service)
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        return len(getattr(pool, "connections", None) or [])
+
+    async def close(self):
+        """Close all pooled clients"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (Prometheus-style cumulative buckets)"""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        """Record one latency sample"""
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket containing quantile q"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        """Histogram as JSON-friendly dict"""
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.BUCKETS, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets
+        }
+
+
+rate_limiter = RateLimiter(
+    requests_per_minute=int(os.getenv("GATEWAY_RATE_LIMIT_PER_MINUTE", "120")),
+    route_limits=ROUTE_RATE_LIMITS,
+    tenant_requests_per_minute=int(os.getenv("GATEWAY_TENANT_RATE_LIMIT_PER_MINUTE", "1200")),
+    tenant_limits=json.loads(os.getenv("GATEWAY_TENANT_RATE_LIMITS", "{}")),
+    redis_url=os.getenv("GATEWAY_RATE_LIMIT_REDIS_URL"),
+    redis_retry_seconds=float(os.getenv("GATEWAY_RATE_LIMIT_REDIS_RETRY_SECONDS", "30"))
+)
+
+# Tenant quotas only trust tokens signed with the platform JWT secret
+JWT_SECRET = os.getenv("JWT_SECRET")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 circuit_breaker = CircuitBreaker(failure_threshold=5, timeout=60)
+upstream_pools = UpstreamPools(
+    max_connections=int(os.getenv("GATEWAY_UPSTREAM_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("GATEWAY_UPSTREAM_MAX_KEEPALIVE", "20")),
+    pool_timeout=float(os.getenv("GATEWAY_UPSTREAM_POOL_TIMEOUT", "10"))
+)
+
+# Time to upstream response headers, per service
+upstream_latency: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
 
 
 def get_client_id(request: Request) -> str:
@@ -250,10 +648,38 @@ def get_client_id(request: Request) -> str:
     # Use authorization token if available, otherwise IP
     auth_header = request.headers.get("authorization")
     if auth_header:
-        return auth_header[:50]  # Use token prefix
+        # Hash the whole token: JWTs share a common header prefix
+        return hashlib.sha256(auth_header.encode()).hexdigest()[:32]
     return request.client.host if request.client else "unknown"
 
 
+def get_tenant_id(request: Request) -> Optional[str]:
+    """
+    Extract tenant for per-tenant quotas
+
+    Uses the organization/firm claim of the bearer token, only after its
+    signature and expiry verify against JWT_SECRET. Client-supplied tenant
+    headers are ignored, so a caller can neither spend another tenant's
+    quota nor escape its own. Without JWT_SECRET no tenant quota applies.
+    """
+    if not JWT_SECRET or not JOSE_AVAILABLE:
+        return None
+
+    auth_header = request.headers.get("authorization", "")
+    if not auth_header.startswith("Bearer "):
+        return None
+    try:
+        claims = jwt.decode(
+            auth_header.removeprefix("Bearer "),
+            JWT_SECRET,
+            algorithms=[JWT_ALGORITHM]
+        )
+    except JWTError:
+        return None
+    tenant_id = claims.get("organization_id") or claims.get("cpa_firm_id")
+    return str(tenant_id) if tenant_id else None
+
+
 def resolve_service(path: str) -> Optional[str]:
     """Resolve service name from request path"""
     for prefix, service in ROUTE_MAP.items():
@@ -262,13 +688,37 @@ def resolve_service(path: str) -> Optional[str]:
     return None
 
 
+def resolve_timeout(path: str) -> float:
+    """Resolve upstream timeout for a request path (longest matching prefix)"""
+    matches = [prefix for prefix in ROUTE_TIMEOUTS if path.startswith(prefix)]
+    if not matches:
+        return DEFAULT_UPSTREAM_TIMEOUT
+    return ROUTE_TIMEOUTS[max(matches, key=len)]
+
+
+def forwardable_headers(headers: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Header pairs to forward, keeping repeated headers and dropping hop-by-hop ones"""
+    return [
+        (name, value) for name, value in headers
+        if name.lower() not in HOP_BY_HOP_HEADERS
+    ]
+
+
 async def proxy_request(
     request: Request,
+    service_name: str,
     service_url: str,
     path: str,
-    method: str
+    method: str,
+    timeout: float = DEFAULT_UPSTREAM_TIMEOUT
 ) -> StreamingResponse:
-    """Proxy request to backend service"""
+    """
+    Proxy request to backend service
+
+    Request and response bodies are streamed end to end over the upstream's
+    pooled connection, so large uploads and downloads are never buffered in
+    the gateway; a slow reader on either side throttles the other.
+    """
 
     # Build target URL
     target_url = f"{service_url}{path}"
@@ -276,40 +726,58 @@ async def proxy_request(
         target_url = f"{target_url}?{request.url.query}"
 
     # Prepare headers (exclude host)
-    headers = dict(request.headers)
-    headers.pop("host", None)
-
-    # Read request body
-    body = await request.body()
+    headers = [
+        (name, value) for name, value in forwardable_headers(request.headers.items())
+        if name.lower() != "host"
+    ]
+
+    # Stream the request body only when the client sent one
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+    content = request.stream() if has_body else None
+
+    client = upstream_pools.get(service_name)
+    upstream_request = client.build_request(
+        method=method,
+        url=target_url,
+        headers=headers,
+        content=content,
+        timeout=upstream_pools.timeout(timeout)
+    )
+
+    start_time = time.perf_counter()
+    try:
+        response = await client.send(upstream_request, stream=True)
 
-    # Make request to backend service
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.request(
-                method=method,
-                url=target_url,
-                headers=headers,
-                content=body
-            )
+    except httpx.PoolTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service busy, no upstream connection available"
+        )
+    except httpx.TimeoutException:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Service request timed out"
+        )
+    except httpx.ConnectError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service unavailable"
+        )
 
-            # Return streaming response
-            return StreamingResponse(
-                content=response.aiter_bytes(),
-                status_code=response.status_code,
-                headers=dict(response.headers),
-                media_type=response.headers.get("content-type")
-            )
+    upstream_latency[service_name].observe(time.perf_counter() - start_time)
 
-        except httpx.TimeoutException:
-            raise HTTPException(
-                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-                detail="Service request timed out"
-            )
-        except httpx.ConnectError:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Service unavailable"
-            )
+    # Raw (still encoded) bytes are passed through, so upstream
+    # content-encoding and content-length stay valid
+    streaming_response = StreamingResponse(
+        content=response.aiter_raw(),
+        status_code=response.status_code,
+        background=BackgroundTask(response.aclose)
+    )
+    streaming_response.raw_headers = [
+        (name.encode("latin-1"), value.encode("latin-1"))
+        for name, value in forwardable_headers(response.headers.multi_items())
+    ]
+    return streaming_response
 
 
 @app.middleware("http")
@@ -322,10 +790,24 @@ async def gateway_middleware(request: Request, call_next):
 
     # Rate limiting
     client_id = get_client_id(request)
-    if not rate_limiter.check_rate_limit(client_id):
+    rate_limit = await rate_limiter.check_rate_limit(
+        client_id,
+        path=request.url.path,
+        tenant_id=get_tenant_id(request)
+    )
+    rate_limit_headers = {
+        "X-RateLimit-Limit": str(rate_limit["limit"]),
+        "X-RateLimit-Remaining": str(rate_limit["remaining"]),
+        "X-RateLimit-Reset": str(rate_limit["reset"]),
+    }
+    if not rate_limit["allowed"]:
         return JSONResponse(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            content={"detail": "Rate limit exceeded"}
+            content={"detail": f"Rate limit exceeded ({rate_limit['scope']} quota)"},
+            headers={
+                **rate_limit_headers,
+                "Retry-After": str(max(1, rate_limit["reset"] - int(time.time())))
+            }
         )
 
     # Request logging
@@ -334,6 +816,8 @@ async def gateway_middleware(request: Request, call_next):
     # Process request
     response = await call_next(request)
 
+    response.headers.update(rate_limit_headers)
+
     # Response logging
     duration = time.time() - start_time
     print(f"[{datetime.now().isoformat()}] {request.method} {request.url.path} "
@@ -342,61 +826,6 @@ async def gateway_middleware(request: Request, call_next):
     return response
 
 
-@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def gateway(request: Request, path: str):
-    """Main gateway routing endpoint"""
-
-    # Resolve target service
-    service_name = resolve_service(f"/{path}")
-
-    if not service_name:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No service found for path: /{path}"
-        )
-
-    # Get service configuration
-    service_config = SERVICE_REGISTRY.get(service_name)
-    if not service_config:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Service {service_name} not registered"
-        )
-
-    # Circuit breaker check
-    if not circuit_breaker.can_request(service_name):
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Service {service_name} is temporarily unavailable (circuit breaker open)"
-        )
-
-    # Proxy request to backend
-    try:
-        # Build the forwarded path, stripping prefix if configured
-        forward_path = f"/{path}"
-        strip_prefix = service_config.get("strip_prefix")
-        if strip_prefix and forward_path.startswith(strip_prefix):
-            forward_path = forward_path[len(strip_prefix):] or "/"
-
-        response = await proxy_request(
-            request=request,
-            service_url=service_config["url"],
-            path=forward_path,
-            method=request.method
-        )
-
-        # Record success
-        circuit_breaker.record_success(service_name)
-
-        return response
-
-    except HTTPException as e:
-        # Record failure for 5xx errors
-        if e.status_code >= 500:
-            circuit_breaker.record_failure(service_name)
-        raise
-
-
 @app.get("/health")
 async def health_check():
     """Gateway health check"""
@@ -416,12 +845,15 @@ async def check_all_services():
     async def check_service(name: str, config: dict):
         """Check individual service health"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{config['url']}{config['health']}")
-                results[name] = {
-                    "status": "healthy" if response.status_code == 200 else "unhealthy",
-                    "response_time": response.elapsed.total_seconds()
-                }
+            client = upstream_pools.get(name)
+            response = await client.get(
+                f"{config['url']}{config['health']}",
+                timeout=upstream_pools.timeout(5.0)
+            )
+            results[name] = {
+                "status": "healthy" if response.status_code == 200 else "unhealthy",
+                "response_time": response.elapsed.total_seconds()
+            }
         except Exception as e:
             results[name] = {
                 "status": "unreachable",
@@ -453,8 +885,8 @@ async def get_metrics():
 
     return {
         "rate_limits": {
-            "active_clients": len(rate_limit_storage),
-            "total_requests": sum(len(reqs) for reqs in rate_limit_storage.values())
+            "backend": rate_limiter.backend,
+            "tracked_keys": len(rate_limiter.local_store)
         },
         "circuit_breakers": {
             name: {
@@ -463,9 +895,74 @@ async def get_metrics():
             }
             for name, state in circuit_breaker_state.items()
         },
+        "upstreams": {
+            name: {
+                "open_connections": upstream_pools.open_connections(name),
+                "latency_seconds": histogram.snapshot()
+            }
+            for name, histogram in upstream_latency.items()
+        },
         "timestamp": datetime.now().isoformat()
     }
 
 
+# Catch-all proxy route, registered last so the gateway's own endpoints match first
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
+async def gateway(request: Request, path: str):
+    """Main gateway routing endpoint"""
+
+    # Resolve target service
+    service_name = resolve_service(f"/{path}")
+
+    if not service_name:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No service found for path: /{path}"
+        )
+
+    # Get service configuration
+    service_config = SERVICE_REGISTRY.get(service_name)
+    if not service_config:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Service {service_name} not registered"
+        )
+
+    # Circuit breaker check
+    if not circuit_breaker.can_request(service_name):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Service {service_name} is temporarily unavailable (circuit breaker open)"
+        )
+
+    # Proxy request to backend
+    try:
+        # Build the forwarded path, stripping prefix if configured
+        forward_path = f"/{path}"
+        strip_prefix = service_config.get("strip_prefix")
+        if strip_prefix and forward_path.startswith(strip_prefix):
+            forward_path = forward_path[len(strip_prefix):] or "/"
+
+        response = await proxy_request(
+            request=request,
+            service_name=service_name,
+            service_url=service_config["url"],
+            path=forward_path,
+            method=request.method,
+            timeout=resolve_timeout(f"/{path}")
+        )
+
+        # Record success
+        circuit_breaker.record_success(service_name)
+
+        return response
+
+    except HTTPException as e:
+        # Record failure for 5xx errors
+        if e.status_code >= 500:
+            circuit_breaker.record_failure(service_name)
+        raise
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
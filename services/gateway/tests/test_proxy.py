@@ -0,0 +1,171 @@
+"""
+Tests for streaming requests through the gateway to pooled upstreams
+"""
+
+import httpx
+import pytest
+from app import main
+
+
+@pytest.fixture(autouse=True)
+def fresh_gateway_state(monkeypatch):
+    """Every test starts with no pooled clients, open circuits or latency samples"""
+    monkeypatch.setattr(main, "rate_limiter", main.RateLimiter(requests_per_minute=1000))
+    main.upstream_pools._clients.clear()
+    main.circuit_breaker_state.clear()
+    main.upstream_latency.clear()
+    yield
+    main.upstream_pools._clients.clear()
+    main.circuit_breaker_state.clear()
+    main.upstream_latency.clear()
+
+
+def install_upstream(service_name, handler):
+    """Pool a client for service_name that answers with handler instead of the network"""
+    main.upstream_pools._clients[service_name] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def stream(*chunks):
+    """Upstream body as a byte stream, as a real connection delivers it"""
+    for chunk in chunks:
+        yield chunk
+
+
+def gateway_client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://gateway")
+
+
+class TestProxyRoundTrip:
+    """Request and response bodies pass through unchanged"""
+
+    @pytest.mark.asyncio
+    async def test_streamed_request_and_response(self):
+        seen = {}
+
+        async def handler(request):
+            seen["url"] = str(request.url)
+            seen["method"] = request.method
+            seen["body"] = await request.aread()
+            seen["headers"] = request.headers
+            return httpx.Response(
+                201,
+                headers=[("set-cookie", "a=1"), ("set-cookie", "b=2"), ("x-upstream", "ingestion")],
+                content=stream(b"first,", b"second,", b"third")
+            )
+
+        install_upstream("ingestion", handler)
+
+        async def upload():
+            yield b"col1,col2\n"
+            yield b"1,2\n"
+
+        async with gateway_client() as client:
+            response = await client.post(
+                "/ingestion/upload?engagement=42",
+                content=upload(),
+                headers=[("x-trace", "t1"), ("x-trace", "t2"), ("proxy-authorization", "secret")]
+            )
+
+        assert seen["url"] == "http://ingestion/ingestion/upload?engagement=42"
+        assert seen["method"] == "POST"
+        assert seen["body"] == b"col1,col2\n1,2\n"
+        assert seen["headers"].get_list("x-trace") == ["t1", "t2"]
+        assert "proxy-authorization" not in seen["headers"]
+
+        assert response.status_code == 201
+        assert response.content == b"first,second,third"
+        assert response.headers.get_list("set-cookie") == ["a=1", "b=2"]
+        assert response.headers["x-upstream"] == "ingestion"
+        # The upstream's chunked framing is not forwarded as-is
+        assert "transfer-encoding" not in response.headers
+        assert response.headers["x-ratelimit-limit"] == "1000"
+        assert main.upstream_latency["ingestion"].count == 1
+
+    @pytest.mark.asyncio
+    async def test_get_sends_no_body(self):
+        seen = {}
+
+        async def handler(request):
+            seen["body"] = await request.aread()
+            seen["headers"] = request.headers
+            return httpx.Response(200, headers={"content-type": "application/json"}, content=stream(b'{"ok": true}'))
+
+        install_upstream("engagement", handler)
+
+        async with gateway_client() as client:
+            response = await client.get("/engagements/1")
+
+        assert response.json() == {"ok": True}
+        assert seen["body"] == b""
+        assert "content-length" not in seen["headers"]
+        assert "transfer-encoding" not in seen["headers"]
+
+    @pytest.mark.asyncio
+    async def test_configured_prefix_is_stripped(self):
+        seen = []
+
+        async def handler(request):
+            seen.append(str(request.url))
+            return httpx.Response(204, content=stream())
+
+        install_upstream("rd-study-automation", handler)
+
+        async with gateway_client() as client:
+            response = await client.delete("/rd-study/studies/7")
+
+        assert response.status_code == 204
+        assert seen == ["http://rd-study-automation:8000/studies/7"]
+
+
+class TestProxyFailures:
+    """Upstream errors map to gateway status codes and trip the circuit breaker"""
+
+    @pytest.mark.asyncio
+    async def test_unreachable_upstream_is_503_and_recorded(self):
+        def handler(request):
+            raise httpx.ConnectError("connection refused", request=request)
+
+        install_upstream("analytics", handler)
+
+        async with gateway_client() as client:
+            response = await client.get("/analytics/summary")
+
+        assert response.status_code == 503
+        assert main.circuit_breaker_state["analytics"]["failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_upstream_timeout_is_504(self):
+        def handler(request):
+            raise httpx.ReadTimeout("no response", request=request)
+
+        install_upstream("llm", handler)
+
+        async with gateway_client() as client:
+            response = await client.get("/llm/models")
+
+        assert response.status_code == 504
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_rejects_without_calling_upstream(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(200)
+
+        install_upstream("qc", handler)
+        for _ in range(main.circuit_breaker.failure_threshold):
+            main.circuit_breaker.record_failure("qc")
+
+        async with gateway_client() as client:
+            response = await client.get("/qc/checks")
+
+        assert response.status_code == 503
+        assert calls == []
+
+    @pytest.mark.asyncio
+    async def test_unknown_route_is_404(self):
+        async with gateway_client() as client:
+            response = await client.get("/nowhere")
+
+        assert response.status_code == 404
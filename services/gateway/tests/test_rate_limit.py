@@ -0,0 +1,195 @@
+"""
+Tests for the gateway's sliding-window rate limiter
+"""
+
+import time
+
+import httpx
+import pytest
+from app import main
+from app.main import LocalRateLimitStore, RateLimiter
+from jose import jwt
+
+JWT_SECRET = "test-secret"
+
+
+def bearer(client, **claims):
+    """Authorization header with a token signed by the gateway's secret"""
+    token = jwt.encode({"sub": client, **claims}, JWT_SECRET, algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def gateway_client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://gateway")
+
+
+class FailingRedisStore:
+    """Redis store stand-in whose round trips fail until told otherwise"""
+
+    def __init__(self):
+        self.calls = 0
+        self.available = False
+
+    async def hit(self, quotas, now):
+        self.calls += 1
+        if not self.available:
+            raise ConnectionError("redis down")
+        return [(True, 1.0) for _ in quotas]
+
+
+class TestLocalRateLimitStore:
+    """In-memory sliding-window counters"""
+
+    @pytest.mark.asyncio
+    async def test_previous_window_is_weighted_by_overlap(self):
+        store = LocalRateLimitStore(window=60)
+        quota = [("client:a", 2)]
+
+        assert await store.hit(quota, 60.0) == [(True, 1)]
+        assert await store.hit(quota, 61.0) == [(True, 2)]
+        assert await store.hit(quota, 62.0) == [(False, 2)]
+
+        # Start of the next window: the previous one still counts in full
+        assert await store.hit(quota, 120.0) == [(False, 2.0)]
+        # Half way through it only counts for half
+        assert await store.hit(quota, 150.0) == [(True, 2.0)]
+
+    @pytest.mark.asyncio
+    async def test_counts_older_than_one_window_are_dropped(self):
+        store = LocalRateLimitStore(window=60, idle_ttl=1000)
+        quota = [("client:a", 1)]
+
+        await store.hit(quota, 60.0)
+
+        assert await store.hit(quota, 180.0) == [(True, 1)]
+
+    @pytest.mark.asyncio
+    async def test_idle_keys_are_evicted_least_recently_used_first(self):
+        store = LocalRateLimitStore(window=60, idle_ttl=100)
+
+        await store.hit([("a", 10)], 0.0)
+        await store.hit([("b", 10)], 50.0)
+        await store.hit([("a", 10)], 60.0)
+        assert len(store) == 2
+
+        # b was last seen at 50, a at 60
+        await store.hit([("c", 10)], 155.0)
+        assert list(store._counters) == ["a", "c"]
+
+        await store.hit([("c", 10)], 200.0)
+        assert list(store._counters) == ["c"]
+
+    @pytest.mark.asyncio
+    async def test_denied_request_is_not_counted_against_other_quotas(self):
+        store = LocalRateLimitStore(window=60)
+        quotas = [("client:a", 5), ("route:/llm:a", 1)]
+
+        assert await store.hit(quotas, 60.0) == [(True, 1), (True, 1)]
+        assert await store.hit(quotas, 61.0) == [(True, 1), (False, 1)]
+        assert await store.hit([("client:a", 5)], 62.0) == [(True, 2)]
+
+
+class TestRateLimiter:
+    """Quota selection and the Redis fallback"""
+
+    @pytest.mark.asyncio
+    async def test_route_limit_uses_longest_prefix(self):
+        limiter = RateLimiter(requests_per_minute=100, route_limits={"/llm": 10, "/llm/chat": 2})
+
+        decision = await limiter.check_rate_limit("c1", path="/llm/chat/stream")
+
+        assert decision["scope"] == "route"
+        assert decision["limit"] == 2
+        assert decision["remaining"] == 1
+
+    @pytest.mark.asyncio
+    async def test_tenant_override_replaces_default_quota(self):
+        limiter = RateLimiter(requests_per_minute=100, tenant_requests_per_minute=50, tenant_limits={"acme": 1})
+
+        assert (await limiter.check_rate_limit("c1", tenant_id="acme"))["allowed"]
+        # Another client of the same tenant shares its quota
+        decision = await limiter.check_rate_limit("c2", tenant_id="acme")
+        assert not decision["allowed"]
+        assert decision["scope"] == "tenant"
+
+        decision = await limiter.check_rate_limit("c3", tenant_id="globex")
+        assert decision["allowed"]
+        assert decision["limit"] == 50
+
+    @pytest.mark.asyncio
+    async def test_redis_errors_fall_back_to_memory_and_back_off(self):
+        limiter = RateLimiter(requests_per_minute=1, redis_retry_seconds=30)
+        redis_store = FailingRedisStore()
+        limiter.redis_store = redis_store
+
+        assert (await limiter.check_rate_limit("c1"))["allowed"]
+        assert not (await limiter.check_rate_limit("c1"))["allowed"]
+        # Only the first request paid for the failed round trip
+        assert redis_store.calls == 1
+        assert len(limiter.local_store) == 1
+
+        # Once the back-off has passed Redis is tried again and used
+        redis_store.available = True
+        limiter._redis_retry_at = time.time() - 1
+        assert (await limiter.check_rate_limit("c1"))["allowed"]
+        assert redis_store.calls == 2
+        assert not limiter._redis_failing
+
+
+class TestRateLimitMiddleware:
+    """429 responses and X-RateLimit-* headers"""
+
+    @pytest.fixture(autouse=True)
+    def limiter(self, monkeypatch):
+        limiter = RateLimiter(requests_per_minute=2, tenant_requests_per_minute=100, tenant_limits={"acme": 3})
+        monkeypatch.setattr(main, "rate_limiter", limiter)
+        monkeypatch.setattr(main, "JWT_SECRET", JWT_SECRET)
+        return limiter
+
+    @pytest.mark.asyncio
+    async def test_headers_and_retry_after(self):
+        async with gateway_client() as client:
+            responses = [await client.get("/metrics") for _ in range(3)]
+
+        assert [r.status_code for r in responses] == [200, 200, 429]
+        assert [r.headers["x-ratelimit-remaining"] for r in responses] == ["1", "0", "0"]
+        assert all(r.headers["x-ratelimit-limit"] == "2" for r in responses)
+
+        denied = responses[2]
+        assert denied.json() == {"detail": "Rate limit exceeded (client quota)"}
+        reset = int(denied.headers["x-ratelimit-reset"])
+        assert reset % 60 == 0
+        assert 1 <= int(denied.headers["retry-after"]) <= 60
+        assert "retry-after" not in responses[0].headers
+
+    @pytest.mark.asyncio
+    async def test_health_is_not_rate_limited(self):
+        async with gateway_client() as client:
+            responses = [await client.get("/health") for _ in range(5)]
+
+        assert all(r.status_code == 200 for r in responses)
+        assert "x-ratelimit-limit" not in responses[0].headers
+
+    @pytest.mark.asyncio
+    async def test_verified_tenant_shares_override_quota(self):
+        async with gateway_client() as client:
+            statuses = [
+                (await client.get("/metrics", headers=bearer(f"user-{n}", organization_id="acme"))).status_code
+                for n in range(4)
+            ]
+
+        assert statuses == [200, 200, 200, 429]
+
+    @pytest.mark.asyncio
+    async def test_unverified_tenant_claim_is_ignored(self):
+        forged = jwt.encode({"sub": "u", "organization_id": "acme"}, "wrong-secret", algorithm="HS256")
+
+        async with gateway_client() as client:
+            responses = [
+                await client.get("/metrics", headers={"Authorization": f"Bearer {forged}", "X-Tenant-ID": "acme"})
+                for _ in range(2)
+            ]
+
+        # Only the per-client quota applies
+        assert [r.headers["x-ratelimit-limit"] for r in responses] == ["2", "2"]
+        assert responses[1].status_code == 200
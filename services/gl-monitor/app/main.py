@@ -20,22 +20,38 @@ Key Features:
 """
 
 import logging
+import statistics
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Set
+from itertools import islice
+from typing import Any, Dict, List, Optional
 from uuid import UUID, uuid4
+from contextlib import asynccontextmanager
 from enum import Enum
 import asyncio
-from collections import defaultdict
+from collections import Counter, defaultdict, deque
 
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from loguru import logger
 
+from .pipeline import AlertFanout, GLPipeline
+from .rule_index import CompiledRule, CompiledRuleSet
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the ingestion pipeline; drain queued transactions before exit"""
+    await gl_pipeline.start()
+    yield
+    await gl_pipeline.stop()
+
+
 app = FastAPI(
     title="Continuous GL Monitoring Service",
     description="Real-time GL monitoring with AI-powered detection rules",
     version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -197,7 +213,6 @@ rules_db: Dict[str, DetectionRule] = {}
 alerts_db: Dict[str, Alert] = {}
 transactions_buffer: List[GLTransaction] = []
 monitoring_status = MonitoringStatus.ACTIVE
-connected_websockets: Set[WebSocket] = set()
 
 
 # ============================================================================
@@ -647,65 +662,75 @@ initialize_default_rules()
 class DetectionEngine:
     """Real-time transaction detection engine"""
 
+    HISTORY_SIZE = 1000  # Transactions kept per account / user
+    AMOUNT_WINDOW = 100  # Amounts kept per account for z-scores
+    DUPLICATE_WINDOW = 50  # Amounts checked for duplicates
+    SEQUENCE_WINDOW = 20  # Latest user transactions checked by sequence rules
+
     def __init__(self):
-        self.transaction_history: Dict[str, List[GLTransaction]] = defaultdict(list)
-        self.user_activity: Dict[str, List[GLTransaction]] = defaultdict(list)
-        self.recent_amounts: Dict[str, List[float]] = defaultdict(list)
+        self.transaction_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.HISTORY_SIZE))
+        self.user_activity: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.HISTORY_SIZE))
+        self.recent_amounts: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.AMOUNT_WINDOW))
+        self.duplicate_window: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.DUPLICATE_WINDOW))
+        self.duplicate_counts: Dict[str, Counter] = defaultdict(Counter)
         self.alert_cooldowns: Dict[str, datetime] = {}
-
-    async def process_transaction(self, txn: GLTransaction) -> List[Alert]:
-        """Process a transaction and check all active rules"""
-        alerts = []
-
-        # Update history
+        self._compiled_rules: Optional[CompiledRuleSet] = None
+
+    @property
+    def compiled_rules(self) -> CompiledRuleSet:
+        """Rule index over rules_db, compiled on first use after a rule change"""
+        if self._compiled_rules is None:
+            self._compiled_rules = CompiledRuleSet(rules_db.values())
+            logger.info(f"Compiled {len(self._compiled_rules)} evaluable rules of {len(rules_db)}")
+        return self._compiled_rules
+
+    def invalidate_rules(self):
+        """Recompile the rule index before the next transaction (call after editing rules_db)"""
+        self._compiled_rules = None
+
+    def _record(self, txn: GLTransaction, amount: float):
+        """Append a transaction to the bounded per-account and per-user windows"""
         self.transaction_history[txn.account_code].append(txn)
         self.user_activity[txn.posting_user].append(txn)
-        amount = max(txn.debit_amount, txn.credit_amount)
         self.recent_amounts[txn.account_code].append(amount)
 
-        # Keep history bounded
-        for key in list(self.transaction_history.keys()):
-            self.transaction_history[key] = self.transaction_history[key][-1000:]
-        for key in list(self.recent_amounts.keys()):
-            self.recent_amounts[key] = self.recent_amounts[key][-100:]
+        window = self.duplicate_window[txn.account_code]
+        counts = self.duplicate_counts[txn.account_code]
+        if len(window) == window.maxlen:
+            evicted = window[0]
+            counts[evicted] -= 1
+            if not counts[evicted]:
+                del counts[evicted]
+        window.append(amount)
+        counts[amount] += 1
 
-        # Check each active rule
-        for rule_id, rule in rules_db.items():
-            if not rule.is_active:
-                continue
+    async def process_transaction(self, txn: GLTransaction) -> List[Alert]:
+        """Process a transaction and check the active rules matching its account"""
+        alerts = []
+
+        amount = max(txn.debit_amount, txn.credit_amount)
+        self._record(txn, amount)
 
+        now = datetime.utcnow()
+        for compiled in self.compiled_rules.candidates(txn.account_code, txn.account_name):
             # Check cooldown
-            if rule_id in self.alert_cooldowns:
-                if datetime.utcnow() < self.alert_cooldowns[rule_id]:
-                    continue
+            cooldown_until = self.alert_cooldowns.get(compiled.rule_id)
+            if cooldown_until and now < cooldown_until:
+                continue
 
             # Run detection
-            alert = await self._check_rule(rule, txn)
+            alert = self._check_rule(compiled, txn, amount)
             if alert:
                 alerts.append(alert)
                 # Set cooldown
-                self.alert_cooldowns[rule_id] = datetime.utcnow() + timedelta(minutes=rule.cooldown_minutes)
+                self.alert_cooldowns[compiled.rule_id] = now + timedelta(minutes=compiled.rule.cooldown_minutes)
 
         return alerts
 
-    async def _check_rule(self, rule: DetectionRule, txn: GLTransaction) -> Optional[Alert]:
-        """Check if a transaction triggers a rule"""
-
-        amount = max(txn.debit_amount, txn.credit_amount)
-
-        # Check account patterns
-        if rule.account_patterns and rule.account_patterns != ["*"]:
-            matched = False
-            for pattern in rule.account_patterns:
-                if pattern.endswith("*"):
-                    if txn.account_code.startswith(pattern[:-1]):
-                        matched = True
-                        break
-                elif pattern.lower() in txn.account_code.lower() or pattern.lower() in txn.account_name.lower():
-                    matched = True
-                    break
-            if not matched:
-                return None
+    def _check_rule(self, compiled: CompiledRule, txn: GLTransaction, amount: float) -> Optional[Alert]:
+        """Check if a transaction triggers a compiled rule (account patterns already matched)"""
+        rule = compiled.rule
+        kind = compiled.kind
 
         triggered = False
         details = {}
@@ -713,113 +738,96 @@ class DetectionEngine:
         description = ""
 
         # Threshold rules
-        if rule.rule_type == RuleType.THRESHOLD:
-            if rule.threshold_amount and amount >= rule.threshold_amount:
+        if kind == "threshold":
+            if amount >= compiled.threshold_amount:
                 triggered = True
                 title = f"{rule.name}: ${amount:,.2f}"
-                description = f"Transaction amount ${amount:,.2f} exceeds threshold ${rule.threshold_amount:,.2f}"
-                details = {"amount": amount, "threshold": rule.threshold_amount}
+                description = f"Transaction amount ${amount:,.2f} exceeds threshold ${compiled.threshold_amount:,.2f}"
+                details = {"amount": amount, "threshold": compiled.threshold_amount}
 
         # Pattern rules
-        elif rule.rule_type == RuleType.PATTERN:
-            pattern = rule.conditions.get("pattern", "")
+        elif kind == "round_dollar":
+            if amount >= compiled.min_amount and amount % 100 == 0:
+                triggered = True
+                title = f"Round Dollar: ${amount:,.2f}"
+                description = f"Suspiciously round amount detected"
 
-            if pattern == "round_dollar":
-                min_amt = rule.conditions.get("min_amount", 1000)
-                if amount >= min_amt and amount % 100 == 0:
-                    triggered = True
-                    title = f"Round Dollar: ${amount:,.2f}"
-                    description = f"Suspiciously round amount detected"
+        elif kind == "weekend_posting":
+            if txn.timestamp.weekday() >= 5:
+                triggered = True
+                title = f"Weekend Posting: {txn.timestamp.strftime('%A')}"
+                description = f"Transaction posted on {txn.timestamp.strftime('%A')}"
 
-            elif pattern == "weekend_posting":
-                if txn.timestamp.weekday() >= 5:
-                    triggered = True
-                    title = f"Weekend Posting: {txn.timestamp.strftime('%A')}"
-                    description = f"Transaction posted on {txn.timestamp.strftime('%A')}"
-
-            elif pattern == "after_hours":
-                hour = txn.timestamp.hour
-                start = rule.conditions.get("start_hour", 19)
-                end = rule.conditions.get("end_hour", 7)
-                if hour >= start or hour < end:
-                    triggered = True
-                    title = f"After Hours: {txn.timestamp.strftime('%H:%M')}"
-                    description = f"Transaction posted at {txn.timestamp.strftime('%H:%M')}"
+        elif kind == "after_hours":
+            hour = txn.timestamp.hour
+            if hour >= compiled.start_hour or hour < compiled.end_hour:
+                triggered = True
+                title = f"After Hours: {txn.timestamp.strftime('%H:%M')}"
+                description = f"Transaction posted at {txn.timestamp.strftime('%H:%M')}"
 
-            elif pattern == "period_end":
-                day = txn.timestamp.day
-                days_from_end = rule.conditions.get("days_from_end", 3)
-                if day >= 28:  # Simplified period end check
-                    triggered = True
-                    title = f"Period End Entry"
-                    description = f"Transaction posted near period end (day {day})"
+        elif kind == "period_end":
+            day = txn.timestamp.day
+            if day >= 28:  # Simplified period end check
+                triggered = True
+                title = f"Period End Entry"
+                description = f"Transaction posted near period end (day {day})"
 
-            elif pattern == "duplicate_amount":
-                recent = self.recent_amounts.get(txn.account_code, [])[-50:]
-                if recent.count(amount) > 1:
-                    triggered = True
-                    title = f"Duplicate Amount: ${amount:,.2f}"
-                    description = f"Amount ${amount:,.2f} appears multiple times"
-
-            elif pattern == "keywords":
-                keywords = rule.conditions.get("keywords", [])
-                desc_lower = txn.description.lower()
-                found = [kw for kw in keywords if kw in desc_lower]
-                if found:
+        elif kind == "duplicate_amount":
+            if self.duplicate_counts[txn.account_code][amount] > 1:
+                triggered = True
+                title = f"Duplicate Amount: ${amount:,.2f}"
+                description = f"Amount ${amount:,.2f} appears multiple times"
+
+        elif kind == "keywords":
+            desc_lower = txn.description.lower()
+            found = [kw for kw in compiled.keywords if kw in desc_lower]
+            if found:
+                triggered = True
+                title = f"Suspicious Keywords: {', '.join(found)}"
+                description = f"Description contains suspicious keywords"
+                details = {"keywords_found": found}
+
+        elif kind == "below_threshold":
+            for t in compiled.thresholds:
+                if t * 0.9 <= amount < t:
                     triggered = True
-                    title = f"Suspicious Keywords: {', '.join(found)}"
-                    description = f"Description contains suspicious keywords"
-                    details = {"keywords_found": found}
-
-            elif pattern == "below_threshold":
-                thresholds = rule.conditions.get("thresholds", [5000, 10000, 25000, 50000, 100000])
-                for t in thresholds:
-                    if t * 0.9 <= amount < t:
-                        triggered = True
-                        title = f"Just Below Threshold: ${amount:,.2f}"
-                        description = f"Amount ${amount:,.2f} is just below ${t:,.2f} threshold"
-                        details = {"threshold": t}
-                        break
+                    title = f"Just Below Threshold: ${amount:,.2f}"
+                    description = f"Amount ${amount:,.2f} is just below ${t:,.2f} threshold"
+                    details = {"threshold": t}
+                    break
 
         # Anomaly rules
-        elif rule.rule_type == RuleType.ANOMALY:
-            method = rule.conditions.get("method", "zscore")
-
-            if method == "zscore":
-                recent = self.recent_amounts.get(txn.account_code, [])[-100:]
-                if len(recent) >= 10:
-                    import statistics
-                    mean = statistics.mean(recent)
-                    std = statistics.stdev(recent) or 1
-                    zscore = abs((amount - mean) / std)
-                    threshold = rule.conditions.get("threshold", 3.0)
-                    if zscore > threshold:
-                        triggered = True
-                        title = f"Statistical Outlier (Z={zscore:.1f})"
-                        description = f"Amount ${amount:,.2f} is {zscore:.1f} standard deviations from mean"
-                        details = {"zscore": zscore, "mean": mean, "std": std}
-
-            elif method == "benford":
-                if amount > 0:
-                    first_digit = int(str(int(amount))[0])
-                    if first_digit >= 7:  # Simplified Benford check
-                        triggered = True
-                        title = f"Benford's Law Violation"
-                        description = f"First digit {first_digit} is statistically unusual"
-                        details = {"first_digit": first_digit}
+        elif kind == "zscore":
+            recent = self.recent_amounts[txn.account_code]
+            if len(recent) >= 10:
+                mean = statistics.mean(recent)
+                std = statistics.stdev(recent) or 1
+                zscore = abs((amount - mean) / std)
+                if zscore > compiled.zscore_threshold:
+                    triggered = True
+                    title = f"Statistical Outlier (Z={zscore:.1f})"
+                    description = f"Amount ${amount:,.2f} is {zscore:.1f} standard deviations from mean"
+                    details = {"zscore": zscore, "mean": mean, "std": std}
+
+        elif kind == "benford":
+            if amount > 0:
+                first_digit = int(str(int(amount))[0])
+                if first_digit >= 7:  # Simplified Benford check
+                    triggered = True
+                    title = f"Benford's Law Violation"
+                    description = f"First digit {first_digit} is statistically unusual"
+                    details = {"first_digit": first_digit}
 
         # Sequence rules
-        elif rule.rule_type == RuleType.SEQUENCE:
-            user_txns = self.user_activity.get(txn.posting_user, [])[-20:]
-
-            if rule.threshold_count:
-                window_start = txn.timestamp - timedelta(minutes=rule.time_window_minutes)
-                recent_count = sum(1 for t in user_txns if t.timestamp >= window_start)
-                if recent_count >= rule.threshold_count:
-                    triggered = True
-                    title = f"Rapid Fire Posting: {recent_count} in {rule.time_window_minutes}min"
-                    description = f"User posted {recent_count} transactions in {rule.time_window_minutes} minutes"
-                    details = {"transaction_count": recent_count}
+        elif kind == "rapid_fire":
+            user_txns = islice(reversed(self.user_activity[txn.posting_user]), self.SEQUENCE_WINDOW)
+            window_start = txn.timestamp - timedelta(minutes=compiled.time_window_minutes)
+            recent_count = sum(1 for t in user_txns if t.timestamp >= window_start)
+            if recent_count >= compiled.threshold_count:
+                triggered = True
+                title = f"Rapid Fire Posting: {recent_count} in {compiled.time_window_minutes}min"
+                description = f"User posted {recent_count} transactions in {compiled.time_window_minutes} minutes"
+                details = {"transaction_count": recent_count}
 
         if triggered:
             alert = Alert(
@@ -868,6 +876,23 @@ class DetectionEngine:
 # Global detection engine
 detection_engine = DetectionEngine()
 
+# Alert delivery to dashboards, decoupled from detection
+alert_fanout = AlertFanout()
+
+
+def store_alerts(alerts: List[Alert]):
+    """Persist alerts and queue them for websocket delivery"""
+    for alert in alerts:
+        alerts_db[alert.alert_id] = alert
+        broadcast_alert(alert)
+
+
+# Batched ingestion: bounded queue -> one in-order detection worker
+gl_pipeline = GLPipeline(
+    process=detection_engine.process_transaction,
+    on_alerts=store_alerts
+)
+
 
 # ============================================================================
 # WebSocket for Real-time Updates
@@ -877,22 +902,20 @@ detection_engine = DetectionEngine()
 async def websocket_alerts(websocket: WebSocket):
     """WebSocket endpoint for real-time alert streaming"""
     await websocket.accept()
-    connected_websockets.add(websocket)
+    alert_fanout.register(websocket)
     try:
         while True:
             # Keep connection alive
             await websocket.receive_text()
     except WebSocketDisconnect:
-        connected_websockets.discard(websocket)
+        pass
+    finally:
+        alert_fanout.unregister(websocket)
 
 
-async def broadcast_alert(alert: Alert):
-    """Broadcast alert to all connected WebSocket clients"""
-    for ws in list(connected_websockets):
-        try:
-            await ws.send_json(alert.dict())
-        except:
-            connected_websockets.discard(ws)
+def broadcast_alert(alert: Alert):
+    """Queue alert for all connected WebSocket clients (never blocks on slow clients)"""
+    alert_fanout.publish(alert.model_dump(mode="json"), alert.severity.value)
 
 
 # ============================================================================
@@ -936,10 +959,7 @@ async def root():
 # -------------------- Transaction Processing --------------------
 
 @app.post("/transactions/process", response_model=List[Alert])
-async def process_transaction(
-    transaction: GLTransaction,
-    background_tasks: BackgroundTasks
-):
+async def process_transaction(transaction: GLTransaction):
     """
     Process a single GL transaction through all detection rules.
     Returns any alerts triggered.
@@ -954,45 +974,52 @@ async def process_transaction(
     if len(transactions_buffer) > 10000:
         transactions_buffer.pop(0)
 
-    # Process through detection engine
-    alerts = await detection_engine.process_transaction(transaction)
-
-    # Store and broadcast alerts
-    for alert in alerts:
-        alerts_db[alert.alert_id] = alert
-        background_tasks.add_task(broadcast_alert, alert)
+    # Process through the pipeline so it stays ordered with queued batch lines
+    batch = await gl_pipeline.submit([transaction])
+    await batch.done
 
-    return alerts
+    return batch.alerts
 
 
 @app.post("/transactions/batch", response_model=Dict[str, Any])
-async def process_batch(
-    transactions: List[GLTransaction],
-    background_tasks: BackgroundTasks
-):
-    """Process a batch of transactions"""
-    all_alerts = []
+async def process_batch(transactions: List[GLTransaction], wait: bool = True):
+    """
+    Process a batch of transactions.
 
-    for txn in transactions:
-        alerts = await detection_engine.process_transaction(txn)
-        all_alerts.extend(alerts)
+    Lines are queued to the ingestion pipeline (waiting while the queue is
+    full). With wait=false the call returns once the lines are queued.
+    """
+    batch = await gl_pipeline.submit(transactions)
 
-        for alert in alerts:
-            alerts_db[alert.alert_id] = alert
+    if not wait:
+        return {
+            "batch_id": batch.batch_id,
+            "transactions_queued": len(transactions),
+            "queued_lines": gl_pipeline.queued_lines
+        }
 
-    # Broadcast summary
-    if all_alerts:
-        for alert in all_alerts[:10]:  # Limit broadcasts
-            background_tasks.add_task(broadcast_alert, alert)
+    await batch.done
+    all_alerts = batch.alerts
 
     return {
-        "transactions_processed": len(transactions),
+        "batch_id": batch.batch_id,
+        "transactions_processed": batch.processed - batch.errors,
+        "transactions_failed": batch.errors,
         "alerts_generated": len(all_alerts),
         "critical_alerts": sum(1 for a in all_alerts if a.severity == AlertSeverity.CRITICAL),
         "high_alerts": sum(1 for a in all_alerts if a.severity == AlertSeverity.HIGH)
     }
 
 
+@app.get("/pipeline/stats")
+async def get_pipeline_stats():
+    """Ingestion queue depth, throughput, lag and alert delivery stats"""
+    return {
+        "pipeline": gl_pipeline.stats(),
+        "alert_delivery": alert_fanout.stats()
+    }
+
+
 # -------------------- Rules Management --------------------
 
 @app.get("/rules", response_model=List[DetectionRule])
@@ -1038,6 +1065,7 @@ async def create_rule(request: RuleCreateRequest):
     )
 
     rules_db[rule.rule_id] = rule
+    detection_engine.invalidate_rules()
     logger.info(f"Created rule {rule.rule_id}: {rule.name}")
 
     return rule
@@ -1050,6 +1078,7 @@ async def toggle_rule(rule_id: str):
         raise HTTPException(status_code=404, detail="Rule not found")
 
     rules_db[rule_id].is_active = not rules_db[rule_id].is_active
+    detection_engine.invalidate_rules()
     return {"rule_id": rule_id, "is_active": rules_db[rule_id].is_active}
 
 
@@ -1064,6 +1093,7 @@ async def delete_rule(rule_id: str):
         raise HTTPException(status_code=400, detail="Cannot delete system rules")
 
     del rules_db[rule_id]
+    detection_engine.invalidate_rules()
     return {"message": "Rule deleted", "rule_id": rule_id}
 
 
@@ -1203,7 +1233,8 @@ async def get_monitoring_status():
         "status": monitoring_status.value,
         "rules_active": sum(1 for r in rules_db.values() if r.is_active),
         "transactions_in_buffer": len(transactions_buffer),
-        "connected_clients": len(connected_websockets)
+        "queued_lines": gl_pipeline.queued_lines,
+        "connected_clients": alert_fanout.client_count
     }
 
 
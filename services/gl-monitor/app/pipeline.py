@@ -0,0 +1,289 @@
+"""
+Batched GL ingestion pipeline for the GL-monitor service
+
+    submit() -> bounded ingest queue -> detection worker
+                                              |
+                               AlertFanout (per-client outboxes)
+
+- The ingest queue is bounded, so producers wait (backpressure) instead of
+  growing memory when detection falls behind.
+- One worker runs detection over lines in arrival order. Detection is
+  CPU-bound on the event loop, so more workers would not run in parallel,
+  and it depends on global order: per-account windows, per-user rapid-fire
+  windows and per-rule cooldowns all assume lines are seen as submitted.
+- Alert delivery is decoupled from detection: every websocket client has its
+  own bounded outbox and sender task. A slow dashboard drops or coalesces its
+  own alerts and cannot stall ingestion.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from itertools import count
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+INGEST_QUEUE_LINES = int(os.getenv("GL_INGEST_QUEUE_LINES", "100000"))
+CHUNK_SIZE = int(os.getenv("GL_PIPELINE_CHUNK_SIZE", "500"))
+
+WS_OUTBOX_SIZE = int(os.getenv("GL_WS_OUTBOX_SIZE", "256"))
+WS_SEND_TIMEOUT = float(os.getenv("GL_WS_SEND_TIMEOUT", "2.0"))
+WS_COALESCE_MAX = 50  # Alerts per coalesced websocket message
+
+# Severities never dropped while lower-severity alerts are queued
+PROTECTED_SEVERITIES = {"critical", "high"}
+
+
+class PipelineBatch:
+    """Progress of one submitted batch; `done` resolves when every line is processed"""
+
+    def __init__(self, batch_id: int, total: int):
+        self.batch_id = batch_id
+        self.total = total
+        self.processed = 0
+        self.errors = 0
+        self.alerts: List[Any] = []
+        self.done: asyncio.Future = asyncio.get_running_loop().create_future()
+        if not total:
+            self.done.set_result(self)
+
+    def record(self, processed: int, alerts: List[Any], errors: int):
+        self.processed += processed
+        self.errors += errors
+        self.alerts.extend(alerts)
+        if self.processed >= self.total and not self.done.done():
+            self.done.set_result(self)
+
+
+class GLPipeline:
+    """Bounded ingest queue feeding a single in-order detection worker"""
+
+    def __init__(
+        self,
+        process: Callable[[Any], Awaitable[List[Any]]],
+        on_alerts: Callable[[List[Any]], None],
+        queue_lines: int = INGEST_QUEUE_LINES,
+        chunk_size: int = CHUNK_SIZE
+    ):
+        self.process = process
+        self.on_alerts = on_alerts
+        self.chunk_size = max(1, chunk_size)
+        self.queue_lines = queue_lines
+
+        self._ingest: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._batch_ids = count(1)
+
+        self.queued_lines = 0
+        self.processed_lines = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.avg_lag = 0.0
+        self._started_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self):
+        """Start the detection worker on the running loop"""
+        if self.running:
+            return
+        self._ingest = asyncio.Queue(maxsize=max(1, self.queue_lines // self.chunk_size))
+        self._task = asyncio.create_task(self._work())
+        self._started_at = time.monotonic()
+        logger.info("GL pipeline started")
+
+    async def stop(self):
+        """Drain queued lines, then stop the worker"""
+        if not self.running:
+            return
+        await self._ingest.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        logger.info("GL pipeline stopped")
+
+    async def submit(self, transactions: List[Any]) -> PipelineBatch:
+        """Queue transactions for detection; waits while the ingest queue is full"""
+        await self.start()
+        batch = PipelineBatch(next(self._batch_ids), len(transactions))
+        enqueued_at = time.monotonic()
+
+        for i in range(0, len(transactions), self.chunk_size):
+            chunk = transactions[i:i + self.chunk_size]
+            self.queued_lines += len(chunk)
+            await self._ingest.put((chunk, batch, enqueued_at))
+
+        return batch
+
+    async def _work(self):
+        """Run detection over queued chunks in arrival order"""
+        while True:
+            lines, batch, enqueued_at = await self._ingest.get()
+            alerts: List[Any] = []
+            errors = 0
+            try:
+                for txn in lines:
+                    try:
+                        alerts.extend(await self.process(txn))
+                    except Exception as e:
+                        errors += 1
+                        logger.error(f"Detection failed for {getattr(txn, 'transaction_id', '?')}: {e}")
+
+                if alerts:
+                    try:
+                        self.on_alerts(alerts)
+                    except Exception as e:
+                        logger.error(f"Alert delivery failed for {len(alerts)} alerts: {e}")
+            finally:
+                self._complete(lines, batch, alerts, errors, enqueued_at)
+                self._ingest.task_done()
+
+            # Let the fan-out and request handlers run between chunks
+            await asyncio.sleep(0)
+
+    def _complete(self, lines: List[Any], batch: PipelineBatch, alerts: List[Any], errors: int, enqueued_at: float):
+        lag = time.monotonic() - enqueued_at
+        self.queued_lines -= len(lines)
+        self.processed_lines += len(lines)
+        self.errors += errors
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.avg_lag = lag if not self.avg_lag else 0.9 * self.avg_lag + 0.1 * lag
+        batch.record(len(lines), alerts, errors)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput and lag"""
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "running": self.running,
+            "queued_lines": self.queued_lines,
+            "queue_capacity_lines": self.queue_lines,
+            "ingest_queue_chunks": self._ingest.qsize() if self._ingest else 0,
+            "processed_lines": self.processed_lines,
+            "errors": self.errors,
+            "lines_per_second": round(self.processed_lines / uptime, 1) if uptime else 0.0,
+            "lag_seconds": {
+                "last": round(self.last_lag, 4),
+                "average": round(self.avg_lag, 4),
+                "max": round(self.max_lag, 4)
+            }
+        }
+
+
+class _Subscriber:
+    """One websocket client with its own bounded outbox"""
+
+    def __init__(self, websocket, outbox_size: int):
+        self.websocket = websocket
+        self.outbox: deque = deque()
+        self.outbox_size = outbox_size
+        self.ready = asyncio.Event()
+        self.dropped = 0
+        self.pending_dropped = 0
+        self.sent = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def offer(self, payload: Dict[str, Any], severity: str):
+        """Queue an alert, dropping the oldest lower-severity alert when full"""
+        if len(self.outbox) >= self.outbox_size:
+            victim = next(
+                (item for item in self.outbox if item[1] not in PROTECTED_SEVERITIES),
+                self.outbox[0]
+            )
+            self.outbox.remove(victim)
+            self.dropped += 1
+            self.pending_dropped += 1
+        self.outbox.append((payload, severity))
+        self.ready.set()
+
+
+class AlertFanout:
+    """
+    Delivers alerts to websocket clients without blocking detection
+
+    publish() only appends to each client's outbox. Per-client sender tasks
+    send a single alert as-is, coalesce backlogs into one
+    {"type": "alert_batch"} message, report drops with
+    {"type": "alerts_dropped"}, and disconnect clients that do not accept a
+    message within the send timeout.
+    """
+
+    def __init__(self, outbox_size: int = WS_OUTBOX_SIZE, send_timeout: float = WS_SEND_TIMEOUT):
+        self.outbox_size = outbox_size
+        self.send_timeout = send_timeout
+        self._subscribers: Dict[int, _Subscriber] = {}
+        self.published = 0
+        self.coalesced_messages = 0
+        self.disconnected_slow = 0
+
+    @property
+    def client_count(self) -> int:
+        return len(self._subscribers)
+
+    def register(self, websocket):
+        """Start delivering alerts to a connected websocket"""
+        subscriber = _Subscriber(websocket, self.outbox_size)
+        subscriber.task = asyncio.create_task(self._deliver(subscriber))
+        self._subscribers[id(websocket)] = subscriber
+
+    def unregister(self, websocket):
+        """Stop delivering to a websocket"""
+        subscriber = self._subscribers.pop(id(websocket), None)
+        if subscriber and subscriber.task and subscriber.task is not asyncio.current_task():
+            subscriber.task.cancel()
+
+    def publish(self, payload: Dict[str, Any], severity: str):
+        """Queue an alert for every client (non-blocking)"""
+        self.published += 1
+        for subscriber in self._subscribers.values():
+            subscriber.offer(payload, severity)
+
+    async def _deliver(self, subscriber: _Subscriber):
+        websocket = subscriber.websocket
+        while True:
+            await subscriber.ready.wait()
+            subscriber.ready.clear()
+
+            while subscriber.outbox or subscriber.pending_dropped:
+                messages = []
+                if subscriber.pending_dropped:
+                    messages.append({"type": "alerts_dropped", "count": subscriber.pending_dropped})
+                    subscriber.pending_dropped = 0
+
+                take = min(len(subscriber.outbox), WS_COALESCE_MAX)
+                alerts = [subscriber.outbox.popleft()[0] for _ in range(take)]
+                if len(alerts) == 1:
+                    messages.append(alerts[0])
+                elif alerts:
+                    messages.append({"type": "alert_batch", "count": len(alerts), "alerts": alerts})
+                    self.coalesced_messages += 1
+
+                try:
+                    for message in messages:
+                        await asyncio.wait_for(websocket.send_json(message), timeout=self.send_timeout)
+                    subscriber.sent += len(alerts)
+                except Exception as e:
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.disconnected_slow += 1
+                    logger.warning(f"Dropping websocket client: {type(e).__name__}")
+                    self.unregister(websocket)
+                    try:
+                        await websocket.close()
+                    except Exception:
+                        pass
+                    return
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected_clients": self.client_count,
+            "alerts_published": self.published,
+            "coalesced_messages": self.coalesced_messages,
+            "disconnected_slow_clients": self.disconnected_slow,
+            "outbox_depth": sum(len(s.outbox) for s in self._subscribers.values()),
+            "alerts_dropped": sum(s.dropped for s in self._subscribers.values()),
+        }
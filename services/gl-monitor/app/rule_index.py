@@ -0,0 +1,158 @@
+"""
+Compiled detection rule set for the GL-monitor DetectionEngine
+
+Rules are compiled once (when the rule set changes) instead of being
+re-interpreted for every transaction:
+
+- Account patterns go into a prefix trie ("1200*") plus a short list of
+  substring patterns, so finding the rules for an account costs
+  O(len(account_code) + substring patterns) regardless of rule count.
+- Conditions are parsed up front (keywords lower-cased, thresholds read once).
+- Rules that can never fire (inactive, or a pattern/method the engine does
+  not implement) are dropped from the index entirely.
+
+Rules are duck-typed DetectionRule models; rule_type compares equal to its
+string value because RuleType is a str Enum.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Pattern / anomaly methods the engine evaluates; anything else never fires
+PATTERN_KINDS = {
+    "round_dollar",
+    "weekend_posting",
+    "after_hours",
+    "period_end",
+    "duplicate_amount",
+    "keywords",
+    "below_threshold",
+}
+ANOMALY_KINDS = {"zscore", "benford"}
+
+# Distinct (account_code, account_name) pairs whose matching rules are cached
+ACCOUNT_CACHE_SIZE = 50_000
+
+
+class CompiledRule:
+    """A detection rule with its conditions parsed into plain attributes"""
+
+    __slots__ = (
+        "rule", "rule_id", "position", "kind",
+        "threshold_amount", "min_amount", "start_hour", "end_hour",
+        "keywords", "thresholds", "zscore_threshold",
+        "threshold_count", "time_window_minutes",
+    )
+
+    def __init__(self, rule, position: int, kind: str):
+        conditions = rule.conditions or {}
+        self.rule = rule
+        self.rule_id = rule.rule_id
+        self.position = position
+        self.kind = kind
+
+        self.threshold_amount = rule.threshold_amount
+        self.min_amount = conditions.get("min_amount", 1000)
+        self.start_hour = conditions.get("start_hour", 19)
+        self.end_hour = conditions.get("end_hour", 7)
+        self.keywords = tuple(keyword.lower() for keyword in conditions.get("keywords", []))
+        self.thresholds = tuple(conditions.get("thresholds", [5000, 10000, 25000, 50000, 100000]))
+        self.zscore_threshold = conditions.get("threshold", 3.0)
+        self.threshold_count = rule.threshold_count
+        self.time_window_minutes = rule.time_window_minutes
+
+
+def rule_kind(rule) -> Optional[str]:
+    """The evaluation the engine runs for a rule, or None if it can never fire"""
+    conditions = rule.conditions or {}
+
+    if rule.rule_type == "threshold":
+        return "threshold" if rule.threshold_amount else None
+    if rule.rule_type == "pattern":
+        pattern = conditions.get("pattern", "")
+        return pattern if pattern in PATTERN_KINDS else None
+    if rule.rule_type == "anomaly":
+        method = conditions.get("method", "zscore")
+        return method if method in ANOMALY_KINDS else None
+    if rule.rule_type == "sequence":
+        return "rapid_fire" if rule.threshold_count else None
+    return None
+
+
+class AccountPatternTrie:
+    """Prefix trie over account codes; each node lists the rule positions ending there"""
+
+    def __init__(self):
+        self.root: Dict[str, Any] = {}
+
+    def insert(self, prefix: str, position: int):
+        node = self.root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append(position)
+
+    def match(self, account_code: str) -> List[int]:
+        """Positions of every rule with a prefix of account_code"""
+        node = self.root
+        matched = list(node.get(None, ()))
+        for char in account_code:
+            node = node.get(char)
+            if node is None:
+                break
+            matched.extend(node.get(None, ()))
+        return matched
+
+
+class CompiledRuleSet:
+    """Active rules indexed by account pattern"""
+
+    def __init__(self, rules: Iterable):
+        self.rules: List[CompiledRule] = []
+        self.unrestricted: List[int] = []
+        self.prefixes = AccountPatternTrie()
+        self.substrings: Dict[str, List[int]] = {}
+        self._account_cache: Dict[Tuple[str, str], List[CompiledRule]] = {}
+
+        for rule in rules:
+            if not rule.is_active:
+                continue
+            kind = rule_kind(rule)
+            if kind is None:
+                continue
+
+            position = len(self.rules)
+            self.rules.append(CompiledRule(rule, position, kind))
+
+            patterns = rule.account_patterns
+            if not patterns or patterns == ["*"]:
+                self.unrestricted.append(position)
+                continue
+            for pattern in set(patterns):
+                if pattern.endswith("*"):
+                    self.prefixes.insert(pattern[:-1], position)
+                else:
+                    self.substrings.setdefault(pattern.lower(), []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def candidates(self, account_code: str, account_name: str) -> List[CompiledRule]:
+        """Rules whose account patterns match, in rule registration order"""
+        key = (account_code, account_name)
+        cached = self._account_cache.get(key)
+        if cached is not None:
+            return cached
+
+        positions = set(self.unrestricted)
+        positions.update(self.prefixes.match(account_code))
+        if self.substrings:
+            code_lower = account_code.lower()
+            name_lower = account_name.lower()
+            for pattern, matched in self.substrings.items():
+                if pattern in code_lower or pattern in name_lower:
+                    positions.update(matched)
+
+        result = [self.rules[p] for p in sorted(positions)]
+        if len(self._account_cache) >= ACCOUNT_CACHE_SIZE:
+            self._account_cache.clear()
+        self._account_cache[key] = result
+        return result
@@ -0,0 +1,173 @@
+"""
+Tests for the GL ingestion pipeline and websocket alert fan-out
+"""
+
+import asyncio
+
+import pytest
+from app.pipeline import AlertFanout, GLPipeline
+
+
+class FakeWebSocket:
+    """Records sent messages; optionally takes `delay` seconds per send"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+
+    async def send_json(self, message):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(message)
+
+    async def close(self):
+        self.closed = True
+
+
+class TestGLPipeline:
+    """Bounded, ordered detection pipeline"""
+
+    @pytest.mark.asyncio
+    async def test_lines_processed_in_submission_order(self):
+        seen = []
+
+        async def process(txn):
+            seen.append(txn)
+            return [f"alert-{txn}"] if txn % 5 == 0 else []
+
+        published = []
+        pipeline = GLPipeline(process, published.extend, chunk_size=3)
+        first = await pipeline.submit(list(range(10)))
+        second = await pipeline.submit(list(range(10, 20)))
+        await asyncio.gather(first.done, second.done)
+        await pipeline.stop()
+
+        assert seen == list(range(20))
+        assert first.alerts == ["alert-0", "alert-5"]
+        assert second.alerts == ["alert-10", "alert-15"]
+        assert published == ["alert-0", "alert-5", "alert-10", "alert-15"]
+        assert pipeline.stats()["processed_lines"] == 20
+
+    @pytest.mark.asyncio
+    async def test_submit_waits_while_queue_is_full(self):
+        gate = asyncio.Event()
+
+        async def process(txn):
+            await gate.wait()
+            return []
+
+        # One chunk in the worker plus two queued; the fourth line must wait
+        pipeline = GLPipeline(process, lambda alerts: None, queue_lines=2, chunk_size=1)
+        submit = asyncio.create_task(pipeline.submit([1, 2, 3, 4]))
+        await asyncio.sleep(0.05)
+
+        assert not submit.done()
+        assert pipeline.stats()["ingest_queue_chunks"] == 2
+
+        gate.set()
+        batch = await asyncio.wait_for(submit, timeout=1)
+        await asyncio.wait_for(batch.done, timeout=1)
+        await pipeline.stop()
+
+        assert batch.processed == 4
+
+    @pytest.mark.asyncio
+    async def test_worker_survives_failing_detection_and_delivery(self):
+        async def process(txn):
+            if txn == "bad":
+                raise ValueError("unparseable line")
+            return [txn]
+
+        def on_alerts(alerts):
+            if "explode" in alerts:
+                raise RuntimeError("fan-out failed")
+
+        pipeline = GLPipeline(process, on_alerts, chunk_size=2)
+        failing = await pipeline.submit(["bad", "explode"])
+        await asyncio.wait_for(failing.done, timeout=1)
+
+        # The worker is still draining the queue
+        later = await pipeline.submit(["ok"])
+        await asyncio.wait_for(later.done, timeout=1)
+        await pipeline.stop()
+
+        assert failing.errors == 1
+        assert failing.alerts == ["explode"]
+        assert later.alerts == ["ok"]
+        assert pipeline.stats()["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_empty_batch_is_done_immediately(self):
+        async def process(txn):
+            return []
+
+        pipeline = GLPipeline(process, lambda alerts: None)
+        batch = await pipeline.submit([])
+        await pipeline.stop()
+
+        assert batch.done.done()
+        assert batch.processed == 0
+
+
+class TestAlertFanout:
+    """Per-client outboxes"""
+
+    @pytest.mark.asyncio
+    async def test_full_outbox_drops_oldest_low_severity_alert(self):
+        fanout = AlertFanout(outbox_size=3)
+        websocket = FakeWebSocket()
+        fanout.register(websocket)
+
+        # Published before the sender task runs, so the outbox overflows
+        for name, severity in [("l1", "low"), ("h1", "high"), ("l2", "low"), ("l3", "low"), ("c1", "critical")]:
+            fanout.publish({"id": name}, severity)
+        await asyncio.sleep(0.01)
+
+        assert websocket.sent == [
+            {"type": "alerts_dropped", "count": 2},
+            {"type": "alert_batch", "count": 3, "alerts": [{"id": "h1"}, {"id": "l3"}, {"id": "c1"}]},
+        ]
+        assert fanout.stats()["alerts_dropped"] == 2
+        fanout.unregister(websocket)
+
+    @pytest.mark.asyncio
+    async def test_full_outbox_of_protected_alerts_drops_oldest(self):
+        fanout = AlertFanout(outbox_size=2)
+        websocket = FakeWebSocket()
+        fanout.register(websocket)
+
+        for name in ("c1", "c2", "c3"):
+            fanout.publish({"id": name}, "critical")
+        await asyncio.sleep(0.01)
+
+        assert websocket.sent[-1]["alerts"] == [{"id": "c2"}, {"id": "c3"}]
+        fanout.unregister(websocket)
+
+    @pytest.mark.asyncio
+    async def test_single_alert_sent_as_is(self):
+        fanout = AlertFanout()
+        websocket = FakeWebSocket()
+        fanout.register(websocket)
+
+        fanout.publish({"id": "a1"}, "medium")
+        await asyncio.sleep(0.01)
+
+        assert websocket.sent == [{"id": "a1"}]
+        fanout.unregister(websocket)
+
+    @pytest.mark.asyncio
+    async def test_slow_client_is_disconnected_without_blocking_others(self):
+        fanout = AlertFanout(send_timeout=0.05)
+        slow, fast = FakeWebSocket(delay=1.0), FakeWebSocket()
+        fanout.register(slow)
+        fanout.register(fast)
+
+        fanout.publish({"id": "a1"}, "low")
+        await asyncio.sleep(0.2)
+
+        assert fast.sent == [{"id": "a1"}]
+        assert slow.closed
+        assert fanout.client_count == 1
+        assert fanout.stats()["disconnected_slow_clients"] == 1
+        fanout.unregister(fast)
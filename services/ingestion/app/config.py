@@ -25,6 +25,12 @@ class Settings(BaseSettings):
     # EDGAR API
     EDGAR_BASE_URL: str = "https://data.sec.gov"
     EDGAR_USER_AGENT: str = "Aura Audit AI contact@aura-audit.ai"
+    EDGAR_MAX_REQUESTS_PER_SECOND: float = 10.0  # SEC fair-access limit
+    EDGAR_CACHE_DIR: str = "/tmp/edgar-cache"  # ETag / Last-Modified response cache
+    EDGAR_TICKER_INDEX_PATH: str = "/tmp/edgar-cache/company_tickers_index.json"  # Shareable with azure-ai-ml
+    EDGAR_TICKER_INDEX_TTL_SECONDS: int = 86400
+    EDGAR_CRAWL_FETCH_WORKERS: int = 8
+    EDGAR_CRAWL_PARSE_WORKERS: int = 2
 
     # Security
     JWT_SECRET: str = "dev-secret-change-in-production"
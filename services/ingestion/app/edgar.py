@@ -6,32 +6,88 @@ Reference: https://www.sec.gov/edgar/sec-api-documentation
 """
 import asyncio
 import logging
-from datetime import date, datetime
-from typing import Optional, List, Dict, Any
-from decimal import Decimal
+from datetime import date
+from typing import Optional, List, Dict, Any, AsyncIterator, BinaryIO, Iterator, Tuple
 
 import httpx
 
+# Shared EDGAR crawl library (installed from lib/edgar_crawl in the image)
+try:
+    from edgar_crawl import (
+        DEFAULT_TTL_SECONDS,
+        SEC_MAX_REQUESTS_PER_SECOND,
+        CompanyTicker,
+        ConditionalCache,
+        FetchResult,
+        GovernedFetcher,
+        StreamedBody,
+        TickerIndex,
+        TokenBucket,
+    )
+except ImportError:
+    # Fallback for local development
+    import os
+    import sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'lib'))
+    from edgar_crawl import (
+        DEFAULT_TTL_SECONDS,
+        SEC_MAX_REQUESTS_PER_SECOND,
+        CompanyTicker,
+        ConditionalCache,
+        FetchResult,
+        GovernedFetcher,
+        StreamedBody,
+        TickerIndex,
+        TokenBucket,
+    )
+
+from .facts_stream import CompanyFactsParser, iter_company_facts, stream_facts
+
 logger = logging.getLogger(__name__)
 
 
 class EdgarClient:
     """Client for SEC EDGAR API"""
 
-    def __init__(self, base_url: str, user_agent: str):
+    def __init__(
+        self,
+        base_url: str,
+        user_agent: str,
+        max_requests_per_second: float = SEC_MAX_REQUESTS_PER_SECOND,
+        cache_dir: Optional[str] = None,
+        max_connections: int = 20,
+        ticker_index_path: Optional[str] = None,
+        ticker_index_ttl_seconds: float = DEFAULT_TTL_SECONDS
+    ):
         """
         Initialize EDGAR client
 
         Args:
             base_url: EDGAR API base URL (e.g., https://data.sec.gov)
             user_agent: User agent string (required by SEC)
+            max_requests_per_second: Request budget, shared by every EdgarClient in the process
+            cache_dir: Directory for the ETag / Last-Modified response cache (disabled if None)
+            max_connections: HTTP connection pool size for concurrent crawls
+            ticker_index_path: File for the persistent ticker / CIK index (memory only if None)
+            ticker_index_ttl_seconds: Age after which the ticker index is revalidated
         """
         self.base_url = base_url.rstrip("/")
         self.user_agent = user_agent
         self.client = httpx.AsyncClient(
             headers={"User-Agent": user_agent},
             timeout=30.0,
-            follow_redirects=True
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        self.fetcher = GovernedFetcher(
+            self.client,
+            TokenBucket.shared("edgar", max_requests_per_second),
+            cache=ConditionalCache(cache_dir) if cache_dir else None
+        )
+        self.ticker_index = TickerIndex.shared(
+            f"{self.base_url}/files/company_tickers.json",
+            ticker_index_path,
+            ticker_index_ttl_seconds
         )
 
     async def close(self):
@@ -51,16 +107,28 @@ class EdgarClient:
         Example:
             https://data.sec.gov/api/xbrl/companyfacts/CIK0000320193.json
         """
-        # Pad CIK to 10 digits
-        cik_padded = f"CIK{int(cik):010d}"
-        url = f"{self.base_url}/api/xbrl/companyfacts/{cik_padded}.json"
+        result = await self.fetch_company_facts(cik)
+        return result.json()
+
+    async def fetch_company_facts(self, cik: str) -> FetchResult:
+        """
+        Fetch the raw company facts payload through the request governor
+
+        Sends a conditional GET when the payload is cached; `not_modified` on
+        the result is True if EDGAR answered 304 and the cached body was used.
+
+        Args:
+            cik: Company CIK (Central Index Key)
+
+        Returns:
+            FetchResult with the JSON body
+        """
+        url = self.company_facts_url(cik)
 
         logger.info(f"Fetching company facts from EDGAR: {url}")
 
         try:
-            response = await self.client.get(url)
-            response.raise_for_status()
-            return response.json()
+            return await self.fetcher.get(url)
         except httpx.HTTPStatusError as e:
             logger.error(f"EDGAR API error: {e.response.status_code} - {e.response.text}")
             raise
@@ -68,41 +136,114 @@ class EdgarClient:
             logger.error(f"EDGAR request error: {e}")
             raise
 
+    def company_facts_url(self, cik: str) -> str:
+        # Pad CIK to 10 digits
+        return f"{self.base_url}/api/xbrl/companyfacts/CIK{int(cik):010d}.json"
+
+    def open_company_facts(self, cik: str):
+        """
+        Open the company facts payload as a chunked stream
+
+        Usage:
+            async with edgar.open_company_facts(cik) as body:
+                async for chunk in body.iter_bytes():
+                    ...
+        """
+        url = self.company_facts_url(cik)
+        logger.info(f"Streaming company facts from EDGAR: {url}")
+        return self.fetcher.open_stream(url)
+
+    async def stream_company_facts(
+        self,
+        body: StreamedBody,
+        concepts: Optional[List[str]] = None,
+        form: Optional[str] = None,
+        filing_date: Optional[date] = None,
+        tee: Optional[BinaryIO] = None,
+        parser: Optional[CompanyFactsParser] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield normalized facts while the company facts body downloads
+
+        Filters are applied during parsing, so the full payload is never
+        materialized. Output matches normalize_company_facts.
+
+        Args:
+            body: Stream from open_company_facts
+            concepts: Filter by specific XBRL concepts (e.g., ['us-gaap:Assets'])
+            form: Filter by form type (e.g., '10-K')
+            filing_date: Filter by specific filing date
+            tee: File object that receives the raw bytes unchanged
+            parser: Parser to use; pass one in to read cik / entity_name afterwards
+        """
+        parser = parser or CompanyFactsParser(concepts, form, filing_date)
+        async for fact in stream_facts(body.iter_bytes(), parser, tee=tee):
+            yield fact
+
     async def get_company_facts_by_ticker(self, ticker: str) -> Dict[str, Any]:
         """
         Fetch company facts by ticker symbol
 
-        Note: Requires a ticker->CIK mapping. For production, maintain a local
-        ticker-CIK lookup table or use SEC's ticker.txt file.
-
         Args:
             ticker: Stock ticker symbol
 
         Returns:
             Company facts JSON
         """
-        # For demonstration, we'll fetch the ticker-CIK mapping from SEC
-        # In production, cache this mapping locally
-        url = f"{self.base_url}/files/company_tickers.json"
+        cik = await self.lookup_cik(ticker)
+        return await self.get_company_facts(cik)
 
-        try:
-            response = await self.client.get(url)
-            response.raise_for_status()
-            tickers_data = response.json()
+    async def get_ticker_index(self) -> TickerIndex:
+        """
+        Ticker / CIK / name index, loaded once per process
 
-            # Find matching ticker
-            ticker_upper = ticker.upper()
-            for key, company in tickers_data.items():
-                if company.get("ticker") == ticker_upper:
-                    cik = str(company["cik_str"])
-                    return await self.get_company_facts(cik)
+        Revalidated against SEC's company_tickers.json with a conditional
+        GET once its TTL has passed.
+        """
+        await self.ticker_index.ensure_fresh(self._get_with_validators)
+        return self.ticker_index
 
-            raise ValueError(f"Ticker '{ticker}' not found in EDGAR database")
+    async def _get_with_validators(self, url: str, validators: Dict[str, str]) -> FetchResult:
+        return await self.fetcher.get(url, validators=validators)
+
+    async def lookup_cik(self, ticker: str) -> str:
+        """
+        Resolve a ticker symbol to its CIK
 
+        Args:
+            ticker: Stock ticker symbol (BRK.B, BRK/B and BRK-B are equivalent)
+
+        Returns:
+            CIK as an unpadded string
+
+        Raises:
+            ValueError: Ticker is not in SEC's ticker mapping
+        """
+        try:
+            index = await self.get_ticker_index()
         except httpx.HTTPError as e:
             logger.error(f"Error fetching ticker mapping: {e}")
             raise
 
+        company = index.get(ticker)
+        if company is None:
+            raise ValueError(f"Ticker '{ticker}' not found in EDGAR database")
+        return str(company.cik)
+
+    async def search_companies(self, name: str, limit: int = 10) -> List[Tuple[CompanyTicker, float]]:
+        """
+        Fuzzy search companies by name (or ticker)
+
+        Args:
+            name: Company name, e.g. "Microsft" or "berkshire hathaway"
+            limit: Maximum results
+
+        Returns:
+            (company, score) pairs, best match first
+        """
+        index = await self.get_ticker_index()
+        return index.search(name, limit=limit)
+
     def normalize_company_facts(
         self,
         company_data: Dict[str, Any],
@@ -122,96 +263,25 @@ class EdgarClient:
         Returns:
             List of normalized fact dictionaries
         """
-        normalized_facts = []
-
-        # company_data structure:
-        # {
-        #   "cik": 320193,
-        #   "entityName": "Apple Inc.",
-        #   "facts": {
-        #     "us-gaap": {
-        #       "AccountsPayableCurrent": {
-        #         "label": "Accounts Payable, Current",
-        #         "description": "...",
-        #         "units": {
-        #           "USD": [
-        #             {
-        #               "end": "2023-09-30",
-        #               "val": 62611000000,
-        #               "accn": "0000320193-23-000106",
-        #               "fy": 2023,
-        #               "fp": "FY",
-        #               "form": "10-K",
-        #               "filed": "2023-11-03",
-        #               ...
-        #             },
-        #             ...
-        #           ]
-        #         }
-        #       },
-        #       ...
-        #     }
-        #   }
-        # }
-
-        facts_data = company_data.get("facts", {})
-
-        for taxonomy, concepts_dict in facts_data.items():
-            for concept_name, concept_data in concepts_dict.items():
-                full_concept = f"{taxonomy}:{concept_name}"
-
-                # Filter by concept if specified
-                if concepts and full_concept not in concepts:
-                    continue
-
-                label = concept_data.get("label", concept_name)
-                description = concept_data.get("description", "")
-
-                # Process units (USD, shares, etc.)
-                units = concept_data.get("units", {})
-                for unit, values in units.items():
-                    for value_item in values:
-                        # Filter by form if specified
-                        if form and value_item.get("form") != form:
-                            continue
-
-                        # Filter by filing date if specified
-                        if filing_date:
-                            filed_date_str = value_item.get("filed")
-                            if filed_date_str:
-                                filed_date = datetime.strptime(filed_date_str, "%Y-%m-%d").date()
-                                if filed_date != filing_date:
-                                    continue
-
-                        # Extract date fields
-                        end_date = value_item.get("end")
-                        start_date = value_item.get("start")
-
-                        normalized_fact = {
-                            "concept": full_concept,
-                            "taxonomy": taxonomy,
-                            "label": label,
-                            "description": description,
-                            "value": Decimal(str(value_item.get("val"))) if value_item.get("val") is not None else None,
-                            "unit": unit,
-                            "start_date": datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None,
-                            "end_date": datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None,
-                            "instant_date": datetime.strptime(end_date, "%Y-%m-%d").date() if end_date and not start_date else None,
-                            "metadata": {
-                                "accession_number": value_item.get("accn"),
-                                "fiscal_year": value_item.get("fy"),
-                                "fiscal_period": value_item.get("fp"),
-                                "form": value_item.get("form"),
-                                "filed_date": value_item.get("filed"),
-                                "frame": value_item.get("frame"),
-                            }
-                        }
-
-                        normalized_facts.append(normalized_fact)
-
+        normalized_facts = list(self.iter_normalized_facts(company_data, concepts, form, filing_date))
         logger.info(f"Normalized {len(normalized_facts)} facts from EDGAR data")
         return normalized_facts
 
+    def iter_normalized_facts(
+        self,
+        company_data: Dict[str, Any],
+        concepts: Optional[List[str]] = None,
+        form: Optional[str] = None,
+        filing_date: Optional[date] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield normalized facts one at a time (see normalize_company_facts)
+
+        Lets bulk writers stream facts into the database without holding
+        the whole normalized list for large filers.
+        """
+        return iter_company_facts(company_data, concepts, form, filing_date)
+
     async def get_submission_history(self, cik: str) -> Dict[str, Any]:
         """
         Fetch submission history for a company
@@ -231,9 +301,7 @@ class EdgarClient:
         logger.info(f"Fetching submission history from EDGAR: {url}")
 
         try:
-            response = await self.client.get(url)
-            response.raise_for_status()
-            return response.json()
+            return (await self.fetcher.get(url)).json()
         except httpx.HTTPError as e:
             logger.error(f"Error fetching submission history: {e}")
             raise
@@ -259,9 +327,7 @@ class EdgarClient:
         logger.info(f"Fetching company concept from EDGAR: {url}")
 
         try:
-            response = await self.client.get(url)
-            response.raise_for_status()
-            return response.json()
+            return (await self.fetcher.get(url)).json()
         except httpx.HTTPError as e:
             logger.error(f"Error fetching company concept: {e}")
             raise
@@ -0,0 +1,243 @@
+"""
+Bulk XBRL fact persistence
+
+Large filers produce hundreds of thousands of facts per companyfacts payload.
+Adding one ORM Fact per row keeps every object in the session identity map
+and flushes them one INSERT at a time. FactWriter bypasses the ORM entirely:
+
+- Facts are consumed from any iterable or async iterable (e.g.
+  EdgarClient.stream_company_facts) in fixed-size chunks, so memory is
+  bounded by the chunk size.
+- On asyncpg, each chunk is COPYed into a temporary staging table and merged
+  into atlas.facts with one INSERT ... SELECT DISTINCT ON ... ON CONFLICT.
+- Other drivers fall back to batched INSERT ... ON CONFLICT.
+
+Facts are unique per (filing, concept, period, unit). When EDGAR reports the
+same value more than once (comparatives re-reported in later filings), the
+most recently filed value wins.
+"""
+import json
+import logging
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+from uuid import UUID, uuid4
+
+from sqlalchemy import func, literal_column, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Fact
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 10000
+INSERT_CHUNK_SIZE = 2000  # 11 bind parameters per row; asyncpg allows 32767 per statement
+
+FACT_COLUMNS = (
+    "filing_id", "concept", "taxonomy", "label", "value", "unit",
+    "start_date", "end_date", "instant_date", "metadata",
+)
+FACT_KEY = ("filing_id", "concept", "start_date", "end_date", "unit")
+
+# Column widths from 002_ingestion_and_mapping_tables.sql; COPY rejects a whole chunk on overflow
+LABEL_MAX_LENGTH = 255
+UNIT_MAX_LENGTH = 20
+
+_CREATE_STAGE_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS facts_stage
+    (LIKE atlas.facts INCLUDING DEFAULTS) ON COMMIT DROP
+"""
+
+_MERGE_STAGE_SQL = f"""
+WITH upserted AS (
+    INSERT INTO atlas.facts ({", ".join(FACT_COLUMNS)})
+    SELECT DISTINCT ON ({", ".join(FACT_KEY)}) {", ".join(FACT_COLUMNS)}
+    FROM facts_stage
+    ORDER BY {", ".join(FACT_KEY)}, metadata->>'filed_date' DESC NULLS LAST
+    ON CONFLICT ({", ".join(FACT_KEY)}) DO UPDATE SET
+        taxonomy = EXCLUDED.taxonomy,
+        label = EXCLUDED.label,
+        value = EXCLUDED.value,
+        instant_date = EXCLUDED.instant_date,
+        metadata = EXCLUDED.metadata
+    WHERE COALESCE(EXCLUDED.metadata->>'filed_date', '') > COALESCE(facts.metadata->>'filed_date', '')
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT count(*) FILTER (WHERE inserted) AS inserted, count(*) AS written FROM upserted
+"""
+
+
+@dataclass
+class FactWriteStats:
+    """Outcome of one FactWriter.write call"""
+    rows_in: int = 0
+    inserted: int = 0
+    updated: int = 0
+    chunks: int = 0
+    elapsed_seconds: float = 0.0
+    method: str = "copy"
+
+    @property
+    def rows_written(self) -> int:
+        return self.inserted + self.updated
+
+    @property
+    def duplicates(self) -> int:
+        """Rows dropped as duplicates or superseded by a later filing"""
+        return self.rows_in - self.rows_written
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_in / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def _filed(fact: Dict[str, Any]) -> str:
+    return (fact.get("metadata") or {}).get("filed_date") or ""
+
+
+class FactWriter:
+    """Streams normalized facts into atlas.facts without the ORM"""
+
+    def __init__(self, db: AsyncSession, chunk_size: Optional[int] = None, method: Optional[str] = None):
+        """
+        Args:
+            db: SQLAlchemy async session; the write joins its transaction
+            chunk_size: Facts per COPY / INSERT round trip
+            method: "copy" or "insert"; defaults to COPY when the driver is asyncpg
+        """
+        self.db = db
+        self.chunk_size = chunk_size
+        self.method = method
+
+    async def write(
+        self,
+        filing_id: UUID,
+        facts: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        commit: bool = True
+    ) -> FactWriteStats:
+        """
+        Upsert facts for a filing in chunks
+
+        Args:
+            filing_id: Filing UUID
+            facts: Normalized fact dictionaries (a generator or async generator is fine)
+            commit: Commit the session when done
+
+        Returns:
+            FactWriteStats with row counts and throughput
+        """
+        started = time.perf_counter()
+        connection = await self.db.connection()
+        method = self.method or ("copy" if connection.dialect.driver == "asyncpg" else "insert")
+        chunk_size = self.chunk_size or (COPY_CHUNK_SIZE if method == "copy" else INSERT_CHUNK_SIZE)
+        stats = FactWriteStats(method=method)
+
+        driver = None
+        if method == "copy":
+            # Executed through SQLAlchemy so the session's transaction is open
+            # before the raw asyncpg connection is used for COPY
+            await connection.execute(text(_CREATE_STAGE_SQL))
+            raw = await connection.get_raw_connection()
+            driver = raw.driver_connection
+
+        async for chunk in _chunked(facts, chunk_size):
+            stats.rows_in += len(chunk)
+            stats.chunks += 1
+
+            if method == "copy":
+                inserted, written = await self._copy_chunk(driver, filing_id, chunk)
+            else:
+                inserted, written = await self._insert_chunk(filing_id, chunk)
+            stats.inserted += inserted
+            stats.updated += written - inserted
+
+        if commit:
+            await self.db.commit()
+
+        stats.elapsed_seconds = time.perf_counter() - started
+        logger.info(
+            f"Stored {stats.rows_written} facts for filing {filing_id} "
+            f"({stats.inserted} new, {stats.updated} updated, {stats.duplicates} duplicates) "
+            f"via {method} at {stats.rows_per_second:,.0f} rows/s"
+        )
+        return stats
+
+    async def _copy_chunk(self, driver, filing_id: UUID, chunk: List[Dict[str, Any]]) -> Tuple[int, int]:
+        records = [_fact_record(filing_id, fact) for fact in chunk]
+        await driver.copy_records_to_table("facts_stage", records=records, columns=FACT_COLUMNS)
+        row = await driver.fetchrow(_MERGE_STAGE_SQL)
+        await driver.execute("TRUNCATE facts_stage")
+        return row["inserted"], row["written"]
+
+    async def _insert_chunk(self, filing_id: UUID, chunk: List[Dict[str, Any]]) -> Tuple[int, int]:
+        # ON CONFLICT DO UPDATE may not touch a row twice per statement: dedupe the chunk first
+        latest: Dict[Tuple, Dict[str, Any]] = {}
+        for fact in chunk:
+            row = dict(zip(FACT_COLUMNS, _fact_record(filing_id, fact, json_metadata=False)))
+            key = tuple(row[column] for column in FACT_KEY)
+            current = latest.get(key)
+            if current is None or _filed(row) > _filed(current):
+                latest[key] = row
+
+        rows = [dict(row, id=uuid4()) for row in latest.values()]
+        table = Fact.__table__
+        statement = pg_insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(FACT_KEY),
+            set_={
+                "taxonomy": statement.excluded.taxonomy,
+                "label": statement.excluded.label,
+                "value": statement.excluded.value,
+                "instant_date": statement.excluded.instant_date,
+                "metadata": statement.excluded.metadata,
+            },
+            where=(
+                func.coalesce(statement.excluded.metadata["filed_date"].astext, "")
+                > func.coalesce(table.c.metadata["filed_date"].astext, "")
+            )
+        ).returning(literal_column("xmax = 0").label("inserted"))
+
+        result = await self.db.execute(statement)
+        flags = [row.inserted for row in result]
+        return sum(1 for inserted in flags if inserted), len(flags)
+
+
+async def _chunked(facts, size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    if hasattr(facts, "__aiter__"):
+        chunk = []
+        async for fact in facts:
+            chunk.append(fact)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+        return
+
+    facts = iter(facts)
+    while True:
+        chunk = list(islice(facts, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _fact_record(filing_id: UUID, fact: Dict[str, Any], json_metadata: bool = True) -> Tuple:
+    """Row tuple in FACT_COLUMNS order"""
+    label = fact.get("label")
+    unit = fact.get("unit")
+    metadata = fact.get("metadata") or {}
+    return (
+        filing_id,
+        fact.get("concept"),
+        fact.get("taxonomy", "us-gaap"),
+        label[:LABEL_MAX_LENGTH] if label else label,
+        fact.get("value"),
+        unit[:UNIT_MAX_LENGTH] if unit else unit,
+        fact.get("start_date"),
+        fact.get("end_date"),
+        fact.get("instant_date"),
+        json.dumps(metadata, default=str) if json_metadata else metadata,
+    )
@@ -0,0 +1,435 @@
+"""
+Incremental parser for EDGAR companyfacts JSON
+
+companyfacts payloads reach 50-100 MB for large filers. Instead of
+materializing the whole document with json.loads and then walking it,
+CompanyFactsParser is fed raw bytes as they arrive and yields normalized
+facts as soon as each value object closes. Concept, form and filing-date
+filters are applied while parsing, so filtered-out concepts are never built.
+Peak memory is one fact plus the facts completed by the current chunk.
+
+Requires ijson (C backend recommended). Without it the parser falls back to
+buffering the payload and normalizing it at close().
+"""
+import asyncio
+import json
+import logging
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterable, AsyncIterator, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 256 * 1024
+
+# Container depth of each level in {"facts": {taxonomy: {concept: {"units": {unit: [ {fact} ]}}}}}
+_TAXONOMY_DEPTH = 2
+_CONCEPT_DEPTH = 3
+_UNIT_DEPTH = 5
+_FACT_DEPTH = 7
+
+_SCALAR_EVENTS = {"string", "number", "boolean", "null", "integer", "double"}
+
+
+def normalize_fact(
+    taxonomy: str,
+    concept_name: str,
+    label: str,
+    description: str,
+    unit: str,
+    value_item: Dict[str, Any],
+    form: Optional[str] = None,
+    filing_date: Optional[date] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Normalize one companyfacts value object
+
+    Returns:
+        Normalized fact dictionary, or None if filtered out by form / filing date
+    """
+    # Filter by form if specified
+    if form and value_item.get("form") != form:
+        return None
+
+    # Filter by filing date if specified
+    if filing_date:
+        filed_date_str = value_item.get("filed")
+        if filed_date_str:
+            filed_date = datetime.strptime(filed_date_str, "%Y-%m-%d").date()
+            if filed_date != filing_date:
+                return None
+
+    # Extract date fields
+    end_date = value_item.get("end")
+    start_date = value_item.get("start")
+
+    return {
+        "concept": f"{taxonomy}:{concept_name}",
+        "taxonomy": taxonomy,
+        "label": label,
+        "description": description,
+        "value": Decimal(str(value_item.get("val"))) if value_item.get("val") is not None else None,
+        "unit": unit,
+        "start_date": datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None,
+        "end_date": datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None,
+        "instant_date": datetime.strptime(end_date, "%Y-%m-%d").date() if end_date and not start_date else None,
+        "metadata": {
+            "accession_number": value_item.get("accn"),
+            "fiscal_year": value_item.get("fy"),
+            "fiscal_period": value_item.get("fp"),
+            "form": value_item.get("form"),
+            "filed_date": value_item.get("filed"),
+            "frame": value_item.get("frame"),
+        }
+    }
+
+
+def iter_company_facts(
+    company_data: Dict[str, Any],
+    concepts: Optional[Iterable[str]] = None,
+    form: Optional[str] = None,
+    filing_date: Optional[date] = None
+) -> Iterator[Dict[str, Any]]:
+    """Yield normalized facts from an already-decoded companyfacts document"""
+    # company_data structure:
+    # {
+    #   "cik": 320193,
+    #   "entityName": "Apple Inc.",
+    #   "facts": {
+    #     "us-gaap": {
+    #       "AccountsPayableCurrent": {
+    #         "label": "Accounts Payable, Current",
+    #         "description": "...",
+    #         "units": {
+    #           "USD": [
+    #             {
+    #               "end": "2023-09-30",
+    #               "val": 62611000000,
+    #               "accn": "0000320193-23-000106",
+    #               "fy": 2023,
+    #               "fp": "FY",
+    #               "form": "10-K",
+    #               "filed": "2023-11-03",
+    #               ...
+    #             },
+    #             ...
+    #           ]
+    #         }
+    #       },
+    #       ...
+    #     }
+    #   }
+    # }
+    for taxonomy, concepts_dict in company_data.get("facts", {}).items():
+        for concept_name, concept_data in concepts_dict.items():
+            # Filter by concept if specified
+            if concepts and f"{taxonomy}:{concept_name}" not in concepts:
+                continue
+
+            label = concept_data.get("label", concept_name)
+            description = concept_data.get("description", "")
+
+            # Process units (USD, shares, etc.)
+            for unit, values in concept_data.get("units", {}).items():
+                for value_item in values:
+                    fact = normalize_fact(taxonomy, concept_name, label, description, unit, value_item, form, filing_date)
+                    if fact is not None:
+                        yield fact
+
+
+class CompanyFactsParser:
+    """
+    Push parser: feed() raw companyfacts bytes, get normalized facts back
+
+    Output matches EdgarClient.normalize_company_facts for the same payload
+    and filters. A concept's label and description must precede its units,
+    which is how SEC serializes companyfacts.
+    """
+
+    def __init__(
+        self,
+        concepts: Optional[List[str]] = None,
+        form: Optional[str] = None,
+        filing_date: Optional[date] = None
+    ):
+        self.concepts = set(concepts) if concepts else None
+        self.form = form
+        self.filing_date = filing_date
+
+        self.cik: Optional[Any] = None
+        self.entity_name: Optional[str] = None
+        self.bytes_parsed = 0
+        self.facts_emitted = 0
+
+        self._pending: List[Dict[str, Any]] = []
+        self._closed = False
+        if IJSON_AVAILABLE:
+            self._events = ijson.sendable_list()
+            self._coro = ijson.basic_parse_coro(self._events)
+        else:
+            self._buffer = bytearray()
+
+        # Parse state
+        self._depth = 0
+        self._keys: List[Optional[str]] = [None] * 9
+        self._in_facts = False
+        self._skip_concept = False
+        self._concept = ""
+        self._label = ""
+        self._description = ""
+        self._fact: Optional[Dict[str, Any]] = None
+        self._fact_key: Optional[str] = None
+
+    @property
+    def header_ready(self) -> bool:
+        """True once the entity name and CIK have been parsed"""
+        return self.entity_name is not None and self.cik is not None
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        """Parse the next chunk; returns facts completed within it"""
+        self.bytes_parsed += len(chunk)
+        if not IJSON_AVAILABLE:
+            self._buffer += chunk
+            return []
+
+        self._coro.send(chunk)
+        self._handle_events()
+        return self._take()
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Finish parsing; returns any remaining facts"""
+        if self._closed:
+            return []
+        self._closed = True
+
+        if not IJSON_AVAILABLE:
+            company_data = json.loads(bytes(self._buffer))
+            self._buffer = bytearray()
+            self.cik = company_data.get("cik")
+            self.entity_name = company_data.get("entityName", "")
+            self._pending = list(iter_company_facts(company_data, self.concepts, self.form, self.filing_date))
+            return self._take()
+
+        self._coro.close()
+        self._handle_events()
+        return self._take()
+
+    def _take(self) -> List[Dict[str, Any]]:
+        facts, self._pending = self._pending, []
+        self.facts_emitted += len(facts)
+        return facts
+
+    def _handle_events(self):
+        keys = self._keys
+        fact = self._fact
+        key = self._fact_key
+        depth = self._depth
+        for event, value in self._events:
+            # Hot path: scalars and keys inside a value object
+            if fact is not None:
+                if event == "map_key":
+                    key = value
+                elif event == "end_map":
+                    normalized = normalize_fact(
+                        keys[_TAXONOMY_DEPTH], self._concept, self._label, self._description,
+                        keys[_UNIT_DEPTH], fact, self.form, self.filing_date
+                    )
+                    if normalized is not None:
+                        self._pending.append(normalized)
+                    fact = None
+                    depth -= 1
+                elif event == "start_map" or event == "start_array":
+                    # Nested containers do not occur in value objects; track depth only
+                    depth += 1
+                    fact = None
+                else:
+                    fact[key] = value
+                continue
+
+            if self._skip_concept and depth > _CONCEPT_DEPTH:
+                # Inside a filtered-out concept: only track nesting
+                if event == "start_map" or event == "start_array":
+                    depth += 1
+                elif event == "end_map" or event == "end_array":
+                    depth -= 1
+                continue
+
+            if event == "map_key":
+                keys[depth] = value
+                if depth == _CONCEPT_DEPTH and self._in_facts:
+                    self._begin_concept(keys[_TAXONOMY_DEPTH], value)
+            elif event in _SCALAR_EVENTS:
+                if depth == 1:
+                    if keys[1] == "cik":
+                        self.cik = value
+                    elif keys[1] == "entityName":
+                        self.entity_name = value
+                elif depth == _CONCEPT_DEPTH + 1 and self._in_facts:
+                    if keys[depth] == "label":
+                        self._label = value
+                    elif keys[depth] == "description":
+                        self._description = value
+            elif event == "start_map":
+                depth += 1
+                if depth == _FACT_DEPTH and self._in_facts and keys[_CONCEPT_DEPTH + 1] == "units":
+                    fact = {}
+                    key = None
+                elif depth == _TAXONOMY_DEPTH:
+                    self._in_facts = keys[1] == "facts"
+            elif event == "end_map":
+                if depth == _TAXONOMY_DEPTH:
+                    self._in_facts = False
+                depth -= 1
+            elif event == "start_array":
+                depth += 1
+            elif event == "end_array":
+                depth -= 1
+        del self._events[:]
+        self._fact = fact
+        self._fact_key = key
+        self._depth = depth
+
+    def _begin_concept(self, taxonomy: str, concept_name: str):
+        self._concept = concept_name
+        self._label = concept_name
+        self._description = ""
+        self._skip_concept = bool(self.concepts) and f"{taxonomy}:{concept_name}" not in self.concepts
+
+def iter_facts_from_file(
+    file_obj: BinaryIO,
+    parser: CompanyFactsParser,
+    chunk_size: int = READ_CHUNK_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """Yield normalized facts from a companyfacts file, reading it in chunks"""
+    while True:
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            break
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def read_header(file_obj: BinaryIO, chunk_size: int = 64 * 1024) -> Tuple[Optional[Any], Optional[str]]:
+    """
+    Read (cik, entityName) from the start of a companyfacts file
+
+    Only the leading chunks are parsed. The file is rewound afterwards.
+    """
+    parser = CompanyFactsParser(concepts=["-"])  # Skip every concept
+    try:
+        while not parser.header_ready:
+            chunk = file_obj.read(chunk_size)
+            if not chunk:
+                parser.close()
+                break
+            parser.feed(chunk)
+    finally:
+        file_obj.seek(0)
+    return parser.cik, parser.entity_name
+
+
+async def peek_first(facts: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Advance a fact stream to its first fact, so the parser has seen the
+    header (SEC serializes cik and entityName before facts)
+
+    Returns:
+        Iterator over all facts, including the one already read
+    """
+    first = await anext(facts, None)
+
+    async def chained():
+        if first is None:
+            return
+        yield first
+        async for fact in facts:
+            yield fact
+
+    return chained()
+
+
+async def stream_facts(
+    chunks: AsyncIterable[bytes],
+    parser: CompanyFactsParser,
+    tee: Optional[BinaryIO] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield normalized facts from an async byte stream (e.g. an HTTP body)
+
+    Args:
+        chunks: Raw companyfacts bytes
+        parser: Parser carrying the filters
+        tee: File object that receives every raw chunk unchanged (e.g. a
+            spool for the object-storage upload)
+    """
+    async for chunk in chunks:
+        if tee is not None:
+            tee.write(chunk)
+        for fact in parser.feed(chunk):
+            yield fact
+    for fact in parser.close():
+        yield fact
+
+
+async def iterate_in_thread(iterable: Iterable[Any], batch_size: int = 1000, max_batches: int = 4) -> AsyncIterator[Any]:
+    """
+    Consume a CPU-bound iterator on a worker thread
+
+    Items are handed over in batches through a bounded queue, so the event
+    loop stays free and the producer never runs more than `max_batches`
+    ahead of the consumer.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_batches)
+    done = object()
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        """Blocking put from the worker thread; False once the consumer has gone away"""
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        # Wait on the same put: cancelling and retrying after a timeout can race
+        # with a put that completes anyway and hand the batch over twice
+        while True:
+            try:
+                future.result(timeout=0.5)
+                return True
+            except TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    return False
+
+    def produce():
+        batch = []
+        try:
+            for item in iterable:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    if not put(batch):
+                        return
+                    batch = []
+            if batch and not put(batch):
+                return
+            put(done)
+        except BaseException as e:
+            put(e)
+
+    worker = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            batch = await queue.get()
+            if batch is done:
+                break
+            if isinstance(batch, BaseException):
+                raise batch
+            for item in batch:
+                yield item
+    finally:
+        stop.set()
+        await worker
@@ -5,11 +5,11 @@ EDGAR/XBRL fetching, PBC document uploads, and data ingestion orchestration
 import logging
 from contextlib import asynccontextmanager
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 import httpx
-from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, status
+from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, Query, status
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, ConfigDict
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -19,12 +19,20 @@ from .database import engine, get_db, init_db
 from .edgar import EdgarClient
 from .models import Filing, Fact
 from .schemas import (
+    CompanyMatch,
     FilingInfo,
     EdgarFactsResponse,
     FactItem,
     PBCUploadResponse,
+    TrialBalanceImportResponse,
     HealthResponse
 )
+from .tb_import import (
+    TrialBalanceFormatError,
+    TrialBalanceValidationError,
+    TrialBalanceWriter,
+    read_trial_balance
+)
 
 # Configure logging
 logging.basicConfig(
@@ -63,7 +71,10 @@ app.add_middleware(
 # Initialize EDGAR client
 edgar_client = EdgarClient(
     base_url=settings.EDGAR_BASE_URL,
-    user_agent=settings.EDGAR_USER_AGENT
+    user_agent=settings.EDGAR_USER_AGENT,
+    max_requests_per_second=settings.EDGAR_MAX_REQUESTS_PER_SECOND,
+    ticker_index_path=settings.EDGAR_TICKER_INDEX_PATH,
+    ticker_index_ttl_seconds=settings.EDGAR_TICKER_INDEX_TTL_SECONDS
 )
 
 
@@ -196,6 +207,29 @@ async def get_edgar_company_facts(
         )
 
 
+@app.get("/edgar/companies/search", response_model=List[CompanyMatch])
+async def search_edgar_companies(q: str, limit: int = Query(10, ge=0)):
+    """
+    Fuzzy search SEC registrants by company name or ticker
+
+    Served from the local ticker index; EDGAR is only contacted when the
+    index is past its TTL.
+    """
+    try:
+        matches = await edgar_client.search_companies(q, limit=min(limit, 100))
+    except httpx.HTTPError as e:
+        logger.error(f"EDGAR API error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Failed to fetch from EDGAR: {str(e)}"
+        )
+
+    return [
+        CompanyMatch(cik=company.cik_padded, ticker=company.ticker, name=company.name, score=round(score, 3))
+        for company, score in matches
+    ]
+
+
 @app.get("/edgar/filings/{accession_number}")
 async def get_filing_by_accession(
     accession_number: str,
@@ -288,60 +322,56 @@ async def upload_pbc_document(
 # Trial Balance Import
 # ========================================
 
-@app.post("/trial-balance/import")
+@app.post("/trial-balance/import", response_model=TrialBalanceImportResponse)
 async def import_trial_balance(
     engagement_id: UUID,
+    period_end_date: date,
     file: UploadFile = File(...),
-    period_end_date: date = None,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Import trial balance from Excel/CSV file
 
+    The upload is streamed in row chunks, validated as it is read and
+    bulk-loaded, so large consolidated trial balances import in constant
+    memory.
+
     Args:
         engagement_id: Target engagement UUID
-        file: Trial balance file (Excel or CSV)
         period_end_date: Period ending date
+        file: Trial balance file (CSV or .xlsx)
 
     Returns:
         Import summary with line counts and validation results
     """
-    try:
-        import pandas as pd
-        import io
-
-        content = await file.read()
-
-        # Parse file based on type
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(content))
-        elif file.filename.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(io.BytesIO(content))
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="File must be CSV or Excel format"
-            )
+    # Starlette spools large uploads to disk; the writer reads the spooled
+    # file in row chunks on a worker thread instead of using file.read()
+    chunks = read_trial_balance(file.file, file.filename or "")
+    writer = TrialBalanceWriter(db)
 
-        # Validate required columns
-        required_columns = ['account_code', 'account_name']
-        if not all(col in df.columns for col in required_columns):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Missing required columns: {required_columns}"
-            )
+    try:
+        stats = await writer.write(
+            engagement_id=engagement_id,
+            period_end_date=period_end_date,
+            chunks=chunks,
+            source="upload",
+            source_metadata={
+                "filename": file.filename,
+                "content_type": file.content_type,
+            }
+        )
 
-        # Process trial balance lines
-        # Implementation would create trial_balance record and lines
+    except TrialBalanceFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-        return {
-            "engagement_id": str(engagement_id),
-            "period_end_date": period_end_date,
-            "lines_imported": len(df),
-            "total_debits": float(df.get('debit_amount', pd.Series([0])).sum()),
-            "total_credits": float(df.get('credit_amount', pd.Series([0])).sum()),
-            "validation_errors": []
-        }
+    except TrialBalanceValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={
+                "message": f"Trial balance not imported: {e}",
+                "validation_errors": e.stats.validation_errors
+            }
+        )
 
     except Exception as e:
         logger.error(f"Error importing trial balance: {e}")
@@ -350,6 +380,17 @@ async def import_trial_balance(
             detail=f"Import failed: {str(e)}"
         )
 
+    return TrialBalanceImportResponse(
+        trial_balance_id=stats.trial_balance_id,
+        engagement_id=engagement_id,
+        period_end_date=period_end_date,
+        lines_imported=stats.lines,
+        total_debits=stats.total_debits,
+        total_credits=stats.total_credits,
+        balance_difference=stats.balance_difference,
+        validation_errors=stats.validation_errors
+    )
+
 
 if __name__ == "__main__":
     import uvicorn
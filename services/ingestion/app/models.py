@@ -4,6 +4,7 @@ from typing import Optional
 from uuid import UUID, uuid4
 
 from sqlalchemy import (
+    Boolean,
     Column,
     String,
     Date,
@@ -13,6 +14,7 @@ from sqlalchemy import (
     ForeignKey,
     Text,
     Enum as SQLEnum,
+    UniqueConstraint,
     func,
 )
 from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
@@ -39,8 +41,10 @@ class Filing(Base):
     source_uri = Column(String, nullable=False)
     fiscal_year = Column(Integer)
     fiscal_period = Column(String)
+    raw_data_s3_uri = Column(String)
     ingested_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     ingested_by = Column(PGUUID(as_uuid=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     facts = relationship("Fact", back_populates="filing", cascade="all, delete-orphan")
@@ -49,12 +53,21 @@ class Filing(Base):
 class Fact(Base):
     """XBRL fact (financial data point)"""
     __tablename__ = "facts"
-    __table_args__ = {"schema": "atlas"}
+    __table_args__ = (
+        # One value per filing, concept, period and unit (see 013_fact_bulk_load.sql)
+        UniqueConstraint(
+            "filing_id", "concept", "start_date", "end_date", "unit",
+            name="uq_facts_filing_concept_period_unit",
+            postgresql_nulls_not_distinct=True,
+        ),
+        {"schema": "atlas"},
+    )
 
     id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
     filing_id = Column(PGUUID(as_uuid=True), ForeignKey("atlas.filings.id", ondelete="CASCADE"), nullable=False)
     concept = Column(String, nullable=False, index=True)
     taxonomy = Column(String, nullable=False, default="us-gaap")
+    label = Column(String)
     value = Column(Numeric)
     unit = Column(String)
     start_date = Column(Date)
@@ -79,6 +92,11 @@ class TrialBalance(Base):
     period_end_date = Column(Date, nullable=False)
     source = Column(String, nullable=False)
     source_metadata = Column(JSONB)
+    total_debits = Column(Numeric(20, 2))
+    total_credits = Column(Numeric(20, 2))
+    balance_difference = Column(Numeric(20, 2))
+    is_balanced = Column(Boolean, default=False)
+    line_count = Column(Integer)
     imported_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     imported_by = Column(PGUUID(as_uuid=True))
 
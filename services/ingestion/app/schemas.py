@@ -51,6 +51,14 @@ class EdgarFactsResponse(BaseModel):
         self.total_facts = len(self.facts)
 
 
+class CompanyMatch(BaseModel):
+    """Company from SEC's ticker mapping, with name-match score"""
+    cik: str
+    ticker: str
+    name: str
+    score: float
+
+
 class PBCUploadResponse(BaseModel):
     """Response for PBC document upload"""
     engagement_id: UUID
@@ -2,15 +2,29 @@
 EDGAR Data Scraper & Ingestion Pipeline
 Complete workflow for fetching, normalizing, and storing SEC EDGAR data
 """
+import asyncio
 import logging
+import tempfile
 from datetime import date, datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterable, BinaryIO, Iterable, Tuple, Union
 from uuid import UUID
 
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+# Shared EDGAR crawl library (installed from lib/edgar_crawl in the image)
+try:
+    from edgar_crawl import CrawlCheckpoint, StagedCrawler
+except ImportError:
+    # Fallback for local development
+    import os
+    import sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'lib'))
+    from edgar_crawl import CrawlCheckpoint, StagedCrawler
+
 from .edgar import EdgarClient
+from .fact_writer import FactWriter
+from .facts_stream import CompanyFactsParser, iter_facts_from_file, iterate_in_thread, peek_first, read_header
 from .models import Filing, Fact, TrialBalance, TrialBalanceLine
 from .text_models import (
     FilingSection, FilingNote, FilingRiskFactor,
@@ -22,6 +36,9 @@ from .config import settings
 
 logger = logging.getLogger(__name__)
 
+# Raw companyfacts bodies stay in memory up to this size, then spill to disk
+RAW_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
 
 class EdgarScraper:
     """Complete EDGAR scraping and normalization pipeline"""
@@ -36,7 +53,11 @@ class EdgarScraper:
         self.db = db
         self.edgar_client = EdgarClient(
             base_url=settings.EDGAR_BASE_URL,
-            user_agent=settings.EDGAR_USER_AGENT
+            user_agent=settings.EDGAR_USER_AGENT,
+            max_requests_per_second=settings.EDGAR_MAX_REQUESTS_PER_SECOND,
+            cache_dir=settings.EDGAR_CACHE_DIR,
+            ticker_index_path=settings.EDGAR_TICKER_INDEX_PATH,
+            ticker_index_ttl_seconds=settings.EDGAR_TICKER_INDEX_TTL_SECONDS
         )
         self.filing_parser = FilingParser(user_agent=settings.EDGAR_USER_AGENT)
         self.storage = get_storage_client()
@@ -65,58 +86,14 @@ class EdgarScraper:
         logger.info(f"Starting EDGAR scrape for CIK {cik}")
 
         try:
-            # Step 1: Fetch company facts from EDGAR
-            company_data = await self.edgar_client.get_company_facts(cik)
-
-            # Extract company info
-            entity_name = company_data.get("entityName", "")
-            cik_value = company_data.get("cik", cik)
-
-            logger.info(f"Fetched data for {entity_name} (CIK: {cik_value})")
-
-            # Step 2: Upload raw data to S3 (optional)
-            raw_data_uri = None
-            if upload_raw:
-                s3_key = f"edgar/raw/{cik}/{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                raw_data_uri = self.storage.upload_json(
-                    company_data,
-                    s3_key,
-                    metadata={
-                        'cik': str(cik_value),
-                        'company_name': entity_name,
-                        'scraped_at': datetime.now().isoformat()
-                    }
-                )
-                logger.info(f"Uploaded raw data to {raw_data_uri}")
-
-            # Step 3: Normalize facts
-            normalized_facts = self.edgar_client.normalize_company_facts(
-                company_data,
+            return await self._scrape_company(
+                cik,
+                forms=forms,
                 concepts=concepts,
-                form=forms[0] if forms else None
-            )
-
-            logger.info(f"Normalized {len(normalized_facts)} facts")
-
-            # Step 4: Store filing and facts in database
-            filing = await self._store_filing(
-                cik=str(cik_value),
-                company_name=entity_name,
-                form=forms[0] if forms else "10-K",
-                raw_data_uri=raw_data_uri,
+                upload_raw=upload_raw,
                 user_id=user_id
             )
 
-            # Step 5: Store facts
-            facts_created = await self._store_facts(filing.id, normalized_facts)
-
-            logger.info(
-                f"Successfully scraped {entity_name}: "
-                f"Filing ID {filing.id}, {facts_created} facts stored"
-            )
-
-            return filing
-
         except Exception as e:
             logger.error(f"Error scraping CIK {cik}: {e}")
             raise
@@ -145,57 +122,18 @@ class EdgarScraper:
         logger.info(f"Starting EDGAR scrape for ticker {ticker}")
 
         try:
-            # Fetch company data by ticker
-            company_data = await self.edgar_client.get_company_facts_by_ticker(ticker)
-
-            # Extract CIK and company name
-            cik_value = company_data.get("cik", "")
-            entity_name = company_data.get("entityName", "")
-
-            logger.info(f"Resolved {ticker} to {entity_name} (CIK: {cik_value})")
-
-            # Upload raw data to S3
-            raw_data_uri = None
-            if upload_raw:
-                s3_key = f"edgar/raw/{ticker.upper()}/{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                raw_data_uri = self.storage.upload_json(
-                    company_data,
-                    s3_key,
-                    metadata={
-                        'ticker': ticker.upper(),
-                        'cik': str(cik_value),
-                        'company_name': entity_name,
-                        'scraped_at': datetime.now().isoformat()
-                    }
-                )
-                logger.info(f"Uploaded raw data to {raw_data_uri}")
+            cik = await self.edgar_client.lookup_cik(ticker)
+            logger.info(f"Resolved {ticker} to CIK {cik}")
 
-            # Normalize facts
-            normalized_facts = self.edgar_client.normalize_company_facts(
-                company_data,
+            return await self._scrape_company(
+                cik,
+                ticker=ticker,
+                forms=forms,
                 concepts=concepts,
-                form=forms[0] if forms else None
-            )
-
-            # Store filing and facts
-            filing = await self._store_filing(
-                cik=str(cik_value),
-                company_name=entity_name,
-                ticker=ticker.upper(),
-                form=forms[0] if forms else "10-K",
-                raw_data_uri=raw_data_uri,
+                upload_raw=upload_raw,
                 user_id=user_id
             )
 
-            facts_created = await self._store_facts(filing.id, normalized_facts)
-
-            logger.info(
-                f"Successfully scraped {ticker}: "
-                f"Filing ID {filing.id}, {facts_created} facts stored"
-            )
-
-            return filing
-
         except Exception as e:
             logger.error(f"Error scraping ticker {ticker}: {e}")
             raise
@@ -206,10 +144,22 @@ class EdgarScraper:
         forms: Optional[List[str]] = None,
         concepts: Optional[List[str]] = None,
         upload_raw: bool = True,
-        user_id: Optional[UUID] = None
+        user_id: Optional[UUID] = None,
+        checkpoint_path: Optional[str] = None,
+        skip_unchanged: bool = True,
+        fetch_workers: int = settings.EDGAR_CRAWL_FETCH_WORKERS,
+        parse_workers: int = settings.EDGAR_CRAWL_PARSE_WORKERS
     ) -> List[Filing]:
         """
-        Scrape multiple companies in batch
+        Scrape multiple companies concurrently
+
+        Companies flow through bounded fetch -> parse -> store worker pools.
+        All fetches share the process-wide EDGAR request governor, so the
+        crawl runs at (but never above) SEC's request limit. Storage uses a
+        single worker because the database session is not concurrency-safe.
+        Bodies are spooled to temporary files and parsed incrementally on a
+        worker thread while their facts are written, so memory stays bounded
+        per company.
 
         Args:
             identifiers: List of dicts with 'cik' or 'ticker' keys
@@ -217,9 +167,15 @@ class EdgarScraper:
             concepts: List of XBRL concepts to extract
             upload_raw: Whether to upload raw JSON to S3
             user_id: User ID performing the scrape
+            checkpoint_path: JSONL checkpoint file; companies recorded there
+                as done are not fetched again when an interrupted run resumes
+            skip_unchanged: Reuse the latest stored filing when EDGAR answers
+                304 Not Modified for a company's facts
+            fetch_workers: Concurrent EDGAR fetches
+            parse_workers: Concurrent payload header readers
 
         Returns:
-            List of Filing records
+            List of Filing records, in identifier order
 
         Example:
             identifiers = [
@@ -228,38 +184,221 @@ class EdgarScraper:
                 {'ticker': 'GOOGL'}     # Alphabet
             ]
         """
-        filings = []
-
+        form = forms[0] if forms else None
+        items = []
         for identifier in identifiers:
+            if 'cik' in identifier:
+                items.append((f"cik:{int(identifier['cik'])}", identifier))
+            elif 'ticker' in identifier:
+                items.append((f"ticker:{identifier['ticker'].upper()}", identifier))
+            else:
+                logger.warning(f"Invalid identifier: {identifier}")
+
+        async def fetch(identifier: Dict[str, str], _) -> Dict[str, Any]:
+            ticker = None if 'cik' in identifier else identifier['ticker']
+            cik = identifier['cik'] if ticker is None else await self.edgar_client.lookup_cik(ticker)
+            raw, not_modified = await self._download_company_facts(cik, skip_unchanged=skip_unchanged)
+            return {'cik': cik, 'ticker': ticker, 'raw': raw, 'not_modified': not_modified}
+
+        async def parse(identifier: Dict[str, str], fetched: Dict[str, Any]) -> Dict[str, Any]:
+            # Facts are parsed from the spooled body while they are written (see store);
+            # here only the entity header is read
+            if fetched['raw'] is not None:
+                fetched['cik_value'], fetched['entity_name'] = await asyncio.to_thread(read_header, fetched['raw'])
+            return fetched
+
+        async def store(identifier: Dict[str, str], parsed: Dict[str, Any]) -> Filing:
+            if skip_unchanged and parsed['not_modified']:
+                existing = await self.search_filings(cik=str(int(parsed['cik'])), form=form or "10-K", limit=1)
+                if existing:
+                    logger.info(f"EDGAR facts unchanged for CIK {parsed['cik']}, reusing filing {existing[0].id}")
+                    return existing[0]
+                # Nothing stored yet: read the cached body
+                parsed = await parse(identifier, {**parsed, 'raw': (await self._download_company_facts(parsed['cik']))[0]})
+
+            raw = parsed['raw']
             try:
-                if 'cik' in identifier:
-                    filing = await self.scrape_company_by_cik(
-                        identifier['cik'],
-                        forms=forms,
-                        concepts=concepts,
-                        upload_raw=upload_raw,
-                        user_id=user_id
-                    )
-                elif 'ticker' in identifier:
-                    filing = await self.scrape_company_by_ticker(
-                        identifier['ticker'],
-                        forms=forms,
-                        concepts=concepts,
-                        upload_raw=upload_raw,
-                        user_id=user_id
-                    )
-                else:
-                    logger.warning(f"Invalid identifier: {identifier}")
-                    continue
+                facts = iterate_in_thread(iter_facts_from_file(raw, CompanyFactsParser(concepts, form)))
+                return await self._persist_company(
+                    parsed['cik_value'] or parsed['cik'],
+                    parsed['entity_name'] or "",
+                    facts,
+                    raw_body=raw,
+                    cik=parsed['cik'],
+                    ticker=parsed['ticker'],
+                    forms=forms,
+                    upload_raw=upload_raw,
+                    user_id=user_id
+                )
+            finally:
+                raw.close()
+
+        async def resume(entry: Dict[str, Any]) -> Optional[Filing]:
+            return await self.get_filing_by_id(UUID(entry['filing_id']))
+
+        checkpoint = CrawlCheckpoint(checkpoint_path) if checkpoint_path else None
+        crawler = StagedCrawler(
+            fetch, parse, store,
+            fetch_workers=fetch_workers,
+            parse_workers=parse_workers,
+            store_workers=1,
+            queue_size=2,
+            checkpoint=checkpoint,
+            checkpoint_info=lambda filing: {'filing_id': str(filing.id)},
+            resume=resume
+        )
 
-                filings.append(filing)
+        try:
+            report = await crawler.run(items)
+        finally:
+            if checkpoint:
+                checkpoint.close()
+
+        filings = [filing for _, filing in report.results if filing is not None]
+        logger.info(
+            f"Batch scrape complete: {len(filings)} companies processed "
+            f"({len(report.failed)} failed, {len(report.resumed)} from checkpoint, "
+            f"{report.items_per_second:.2f} companies/s, fetcher {self.edgar_client.fetcher.stats()})"
+        )
+        return filings
 
-            except Exception as e:
-                logger.error(f"Failed to scrape {identifier}: {e}")
-                continue
+    async def _scrape_company(
+        self,
+        cik: str,
+        ticker: Optional[str] = None,
+        forms: Optional[List[str]] = None,
+        concepts: Optional[List[str]] = None,
+        upload_raw: bool = True,
+        user_id: Optional[UUID] = None
+    ) -> Filing:
+        """
+        Stream a company's facts from EDGAR straight into the database
 
-        logger.info(f"Batch scrape complete: {len(filings)} companies processed")
-        return filings
+        The companyfacts body is parsed incrementally as it downloads, with
+        concept / form filters applied during parsing, and facts are written
+        in chunks as they are produced. The raw bytes are tee'd into a spool
+        file and uploaded to S3 as-is once the body is complete.
+        """
+        form = forms[0] if forms else None
+        parser = CompanyFactsParser(concepts, form)
+
+        with tempfile.SpooledTemporaryFile(max_size=RAW_SPOOL_MAX_MEMORY) as raw:
+            async with self.edgar_client.open_company_facts(cik) as body:
+                facts = await peek_first(
+                    self.edgar_client.stream_company_facts(body, tee=raw if upload_raw else None, parser=parser)
+                )
+                logger.info(f"Streaming facts for {parser.entity_name or ''} (CIK: {parser.cik or cik})")
+
+                return await self._persist_company(
+                    parser.cik or cik,
+                    parser.entity_name or "",
+                    facts,
+                    raw_body=raw if upload_raw else None,
+                    cik=cik,
+                    ticker=ticker,
+                    forms=forms,
+                    upload_raw=upload_raw,
+                    user_id=user_id
+                )
+
+    async def _download_company_facts(
+        self,
+        cik: str,
+        skip_unchanged: bool = False
+    ) -> Tuple[Optional[BinaryIO], bool]:
+        """
+        Spool a company's raw facts payload to a temporary file
+
+        Returns:
+            (spool rewound to the start, not_modified). The spool is None when
+            skip_unchanged is set and EDGAR answered 304 Not Modified.
+        """
+        async with self.edgar_client.open_company_facts(cik) as body:
+            if skip_unchanged and body.not_modified:
+                return None, True
+            raw = tempfile.SpooledTemporaryFile(max_size=RAW_SPOOL_MAX_MEMORY)
+            try:
+                async for chunk in body.iter_bytes():
+                    raw.write(chunk)
+            except BaseException:
+                raw.close()
+                raise
+            raw.seek(0)
+            return raw, body.not_modified
+
+    async def _persist_company(
+        self,
+        cik_value: Any,
+        entity_name: str,
+        normalized_facts: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        raw_body: Optional[BinaryIO] = None,
+        cik: Optional[str] = None,
+        ticker: Optional[str] = None,
+        forms: Optional[List[str]] = None,
+        upload_raw: bool = True,
+        user_id: Optional[UUID] = None
+    ) -> Filing:
+        """
+        Store the filing and its facts, then upload the raw payload to S3
+
+        The filing and its facts are committed in one transaction, so a
+        download or parse error part-way through the facts stream leaves no
+        filing behind. The raw upload comes last because a streamed body is
+        only complete once every fact has been read from it.
+
+        Args:
+            cik_value: CIK reported by EDGAR
+            entity_name: Company name reported by EDGAR
+            normalized_facts: Normalized facts (iterable or async iterable)
+            raw_body: File object holding the raw companyfacts bytes
+            cik: CIK the company was requested by
+            ticker: Ticker the company was requested by, if any
+            forms: List of form types filtered on
+            upload_raw: Whether to upload raw JSON to S3
+            user_id: User ID performing the scrape
+
+        Returns:
+            Filing record
+        """
+        filing = await self._store_filing(
+            cik=str(cik_value),
+            company_name=entity_name,
+            ticker=ticker.upper() if ticker else None,
+            form=forms[0] if forms else "10-K",
+            user_id=user_id,
+            commit=False
+        )
+
+        try:
+            facts_created = await self._store_facts(filing.id, normalized_facts)
+        except BaseException:
+            await self.db.rollback()
+            raise
+
+        if upload_raw and raw_body is not None:
+            metadata = {
+                'cik': str(cik_value),
+                'company_name': entity_name,
+                'scraped_at': datetime.now().isoformat()
+            }
+            if ticker:
+                metadata = {'ticker': ticker.upper(), **metadata}
+            s3_key = f"edgar/raw/{ticker.upper() if ticker else cik or cik_value}/{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            raw_body.seek(0)
+            raw_data_uri = await asyncio.to_thread(
+                self.storage.upload_fileobj, raw_body, s3_key, 'application/json', metadata
+            )
+            logger.info(f"Uploaded raw data to {raw_data_uri}")
+
+            filing.raw_data_s3_uri = raw_data_uri
+            await self.db.commit()
+
+        logger.info(
+            f"Successfully scraped {ticker or entity_name}: "
+            f"Filing ID {filing.id}, {facts_created} facts stored"
+        )
+
+        return filing
 
     async def _store_filing(
         self,
@@ -268,7 +407,8 @@ class EdgarScraper:
         form: str,
         ticker: Optional[str] = None,
         raw_data_uri: Optional[str] = None,
-        user_id: Optional[UUID] = None
+        user_id: Optional[UUID] = None,
+        commit: bool = True
     ) -> Filing:
         """
         Store filing metadata in database
@@ -280,6 +420,8 @@ class EdgarScraper:
             ticker: Stock ticker (optional)
             raw_data_uri: S3 URI of raw data
             user_id: User ID
+            commit: Commit the session; otherwise only flush, so the filing
+                joins the caller's transaction
 
         Returns:
             Filing ORM object
@@ -304,8 +446,11 @@ class EdgarScraper:
             logger.info(f"Filing {accession_number} already exists, updating")
             existing_filing.raw_data_s3_uri = raw_data_uri
             existing_filing.updated_at = datetime.now()
-            await self.db.commit()
-            await self.db.refresh(existing_filing)
+            if commit:
+                await self.db.commit()
+                await self.db.refresh(existing_filing)
+            else:
+                await self.db.flush()
             return existing_filing
 
         # Create new filing
@@ -322,8 +467,11 @@ class EdgarScraper:
         )
 
         self.db.add(filing)
-        await self.db.commit()
-        await self.db.refresh(filing)
+        if commit:
+            await self.db.commit()
+            await self.db.refresh(filing)
+        else:
+            await self.db.flush()
 
         logger.info(f"Created filing: {filing.id}")
         return filing
@@ -331,41 +479,24 @@ class EdgarScraper:
     async def _store_facts(
         self,
         filing_id: UUID,
-        normalized_facts: List[Dict[str, Any]]
+        normalized_facts: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]
     ) -> int:
         """
         Store normalized facts in database
 
+        Facts are streamed through FactWriter (COPY + upsert in fixed-size
+        chunks) rather than added to the session as ORM objects. Duplicates
+        per (filing, concept, period, unit) keep the most recently filed value.
+
         Args:
             filing_id: Filing UUID
-            normalized_facts: List of normalized fact dictionaries
+            normalized_facts: Normalized fact dictionaries (a generator or async generator is fine)
 
         Returns:
-            Number of facts created
+            Number of facts written (inserted or updated)
         """
-        facts_created = 0
-
-        for fact_data in normalized_facts:
-            fact = Fact(
-                filing_id=filing_id,
-                concept=fact_data.get("concept"),
-                taxonomy=fact_data.get("taxonomy", "us-gaap"),
-                label=fact_data.get("label"),
-                value=fact_data.get("value"),
-                unit=fact_data.get("unit"),
-                start_date=fact_data.get("start_date"),
-                end_date=fact_data.get("end_date"),
-                instant_date=fact_data.get("instant_date"),
-                metadata=fact_data.get("metadata", {})
-            )
-
-            self.db.add(fact)
-            facts_created += 1
-
-        await self.db.commit()
-
-        logger.info(f"Stored {facts_created} facts for filing {filing_id}")
-        return facts_created
+        stats = await FactWriter(self.db).write(filing_id, normalized_facts)
+        return stats.rows_written
 
     async def get_filing_by_id(self, filing_id: UUID) -> Optional[Filing]:
         """
@@ -0,0 +1,500 @@
+"""
+Streaming trial balance import
+
+Consolidated trial balances with subsidiary sub-ledgers run to several
+hundred thousand lines. Rather than reading the whole upload and building a
+DataFrame, the import works one chunk of rows at a time:
+
+- read_trial_balance yields column-oriented chunks: pandas read_csv with
+  every column pinned to str (account codes keep their leading zeros and
+  amounts are parsed exactly as Decimal), or openpyxl in read-only mode
+  for Excel workbooks.
+- TrialBalanceValidator checks each chunk as it arrives: required fields,
+  amount formats and running debit/credit totals.
+- TrialBalanceWriter runs reading and validation on a worker thread, COPYs
+  the validated lines into atlas.trial_balance_lines on asyncpg (batched
+  INSERT on other drivers) while the next chunk is parsed, and records the
+  totals on the atlas.trial_balances row. Duplicate account codes are found
+  with one grouped query over the loaded lines rather than by holding every
+  code in memory.
+
+Memory is bounded by the chunk size. Rows that cannot be stored (blank
+account code, unparseable amount) reject the whole import; an unbalanced
+trial balance or a duplicate account code is imported and reported in the
+validation messages.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .facts_stream import iterate_in_thread
+from .models import TrialBalance, TrialBalanceLine
+
+logger = logging.getLogger(__name__)
+
+TB_CHUNK_SIZE = 20000
+MAX_REPORTED_ERRORS = 100
+
+REQUIRED_COLUMNS = ("account_code", "account_name")
+AMOUNT_COLUMNS = ("debit_amount", "credit_amount", "balance_amount")
+
+# Header spellings seen in client exports, after lower-casing and joining words with "_"
+COLUMN_ALIASES = {
+    "account": "account_code",
+    "account_no": "account_code",
+    "account_number": "account_code",
+    "acct": "account_code",
+    "gl_account": "account_code",
+    "account_description": "account_name",
+    "description": "account_name",
+    "name": "account_name",
+    "debit": "debit_amount",
+    "debits": "debit_amount",
+    "dr": "debit_amount",
+    "credit": "credit_amount",
+    "credits": "credit_amount",
+    "cr": "credit_amount",
+    "balance": "balance_amount",
+    "ending_balance": "balance_amount",
+    "net_balance": "balance_amount",
+}
+
+LINE_COLUMNS = (
+    "trial_balance_id", "line_number", "account_code", "account_name",
+    "debit_amount", "credit_amount", "balance_amount",
+)
+
+# Column widths from 002_ingestion_and_mapping_tables.sql; COPY rejects a whole chunk on overflow
+ACCOUNT_CODE_MAX_LENGTH = 100
+ACCOUNT_NAME_MAX_LENGTH = 255
+AMOUNT_LIMIT = Decimal("1e16")  # NUMERIC(18,2)
+
+_CENT = Decimal("0.01")
+_ZERO = Decimal("0.00")
+
+_DUPLICATE_ACCOUNTS_SQL = """
+SELECT account_code, min(line_number) AS first_line, count(*) AS occurrences,
+       count(*) OVER () AS duplicate_codes
+FROM atlas.trial_balance_lines
+WHERE trial_balance_id = :trial_balance_id
+GROUP BY account_code
+HAVING count(*) > 1
+ORDER BY first_line
+LIMIT :limit
+"""
+
+
+class TrialBalanceFormatError(ValueError):
+    """The file cannot be read as a trial balance (format, headers)"""
+
+
+class TrialBalanceValidationError(ValueError):
+    """Rows failed validation; nothing was imported"""
+
+    def __init__(self, stats: "TrialBalanceImportStats"):
+        super().__init__(f"{stats.error_count} invalid trial balance rows")
+        self.stats = stats
+
+
+@dataclass
+class TrialBalanceImportStats:
+    """Outcome of one trial balance import"""
+    trial_balance_id: Optional[UUID] = None
+    lines: int = 0
+    total_debits: Decimal = _ZERO
+    total_credits: Decimal = _ZERO
+    duplicate_accounts: int = 0
+    errors: List[str] = field(default_factory=list)
+    error_count: int = 0
+    warnings: List[str] = field(default_factory=list)
+    chunks: int = 0
+    elapsed_seconds: float = 0.0
+    method: str = "copy"
+
+    @property
+    def balance_difference(self) -> Decimal:
+        return self.total_debits - self.total_credits
+
+    @property
+    def is_balanced(self) -> bool:
+        return self.balance_difference == 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.lines / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def validation_errors(self) -> List[str]:
+        """Messages for the API response: row errors, then warnings"""
+        messages = list(self.errors)
+        if self.error_count > len(self.errors):
+            messages.append(f"... and {self.error_count - len(self.errors)} more row errors")
+        return messages + self.warnings
+
+
+def canonical_column(header: Any) -> str:
+    name = "_".join(str(header).strip().lower().replace("#", " no ").replace(".", " ").split())
+    return COLUMN_ALIASES.get(name, name)
+
+
+def parse_amount(value: Any) -> Optional[Decimal]:
+    """
+    Parse a trial balance amount to cents
+
+    Accepts numbers and text such as "1,234.50", "$ 1,234.50" and
+    "(1,234.50)" for negatives; blanks are None.
+
+    Raises:
+        ValueError: The value is not an amount or does not fit NUMERIC(18,2)
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        text = value.strip().replace(",", "").replace("$", "").replace(" ", "")
+        if not text or text == "-":
+            return None
+        if text.startswith("(") and text.endswith(")"):
+            text = "-" + text[1:-1]
+        try:
+            amount = Decimal(text)
+        except InvalidOperation:
+            raise ValueError(f"invalid amount {value!r}")
+    elif isinstance(value, bool):
+        raise ValueError(f"invalid amount {value!r}")
+    elif isinstance(value, float):
+        if value != value:  # NaN from an empty Excel cell
+            return None
+        amount = Decimal(repr(value))
+    else:
+        amount = Decimal(value)
+
+    if not amount.is_finite():
+        raise ValueError(f"invalid amount {value!r}")
+    amount = amount.quantize(_CENT, rounding=ROUND_HALF_UP)
+    if abs(amount) >= AMOUNT_LIMIT:
+        raise ValueError(f"amount {value!r} out of range")
+    return amount
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # Excel stores numeric account codes as floats
+    return str(value).strip()
+
+
+def _column_map(headers: List[Any]) -> Dict[str, int]:
+    """canonical column -> position; the first of repeated headers wins"""
+    positions: Dict[str, int] = {}
+    for position, header in enumerate(headers):
+        if header is None:
+            continue
+        positions.setdefault(canonical_column(header), position)
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in positions]
+    if missing:
+        raise TrialBalanceFormatError(f"Missing required columns: {', '.join(missing)}")
+    return {
+        column: positions[column]
+        for column in REQUIRED_COLUMNS + AMOUNT_COLUMNS
+        if column in positions
+    }
+
+
+def read_trial_balance(
+    file_obj: BinaryIO,
+    filename: str,
+    chunk_size: int = TB_CHUNK_SIZE
+) -> Iterator[Dict[str, List[Any]]]:
+    """
+    Read a CSV or Excel trial balance in column-oriented chunks
+
+    Args:
+        file_obj: Binary file positioned at the start of the upload
+        filename: Original filename; the extension selects the reader
+        chunk_size: Rows per chunk
+
+    Yields:
+        {column: values} with the canonical column names present in the file
+
+    Raises:
+        TrialBalanceFormatError: Unsupported file type or missing columns
+    """
+    extension = filename.lower().rsplit(".", 1)[-1] if "." in filename else ""
+    if extension == "csv":
+        yield from _read_csv(file_obj, chunk_size)
+    elif extension in ("xlsx", "xlsm"):
+        yield from _read_xlsx(file_obj, chunk_size)
+    elif extension == "xls":
+        raise TrialBalanceFormatError("Legacy .xls workbooks are not supported; save the file as .xlsx or .csv")
+    else:
+        raise TrialBalanceFormatError("File must be CSV or Excel format")
+
+
+def _read_csv(file_obj: BinaryIO, chunk_size: int) -> Iterator[Dict[str, List[Any]]]:
+    import pandas as pd
+
+    try:
+        reader = pd.read_csv(
+            file_obj,
+            dtype=str,
+            keep_default_na=False,
+            encoding="utf-8-sig",
+            chunksize=chunk_size,
+        )
+        with reader:
+            columns = None
+            for frame in reader:
+                if columns is None:
+                    columns = _column_map(list(frame.columns))
+                yield {column: frame.iloc[:, position].tolist() for column, position in columns.items()}
+    except pd.errors.EmptyDataError:
+        raise TrialBalanceFormatError("File is empty")
+    except (pd.errors.ParserError, UnicodeDecodeError) as e:
+        raise TrialBalanceFormatError(f"Could not parse CSV: {e}")
+
+
+def _read_xlsx(file_obj: BinaryIO, chunk_size: int) -> Iterator[Dict[str, List[Any]]]:
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(file_obj, read_only=True, data_only=True)
+    except Exception as e:
+        raise TrialBalanceFormatError(f"Could not open workbook: {e}")
+
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise TrialBalanceFormatError("File is empty")
+        columns = _column_map(list(header))
+
+        chunk = {column: [] for column in columns}
+        size = 0
+        for row in rows:
+            # Read-only sheets often report formatted but empty trailing rows
+            if not any(value is not None and value != "" for value in row):
+                continue
+            for column, position in columns.items():
+                chunk[column].append(row[position] if position < len(row) else None)
+            size += 1
+            if size >= chunk_size:
+                yield chunk
+                chunk = {column: [] for column in columns}
+                size = 0
+        if size:
+            yield chunk
+    finally:
+        workbook.close()
+
+
+class TrialBalanceValidator:
+    """Incremental row validation and control totals for one import"""
+
+    def __init__(self, trial_balance_id: UUID, stats: TrialBalanceImportStats, max_errors: int = MAX_REPORTED_ERRORS):
+        self.trial_balance_id = trial_balance_id
+        self.stats = stats
+        self.max_errors = max_errors
+        self.next_line = 1
+
+    def _error(self, line: int, message: str):
+        self.stats.error_count += 1
+        if len(self.stats.errors) < self.max_errors:
+            self.stats.errors.append(f"Line {line}: {message}")
+
+    def validate(self, chunk: Dict[str, List[Any]]) -> List[Tuple]:
+        """
+        Validate a chunk and update the running totals
+
+        Returns:
+            Record tuples in LINE_COLUMNS order for the valid rows
+        """
+        stats = self.stats
+        codes = chunk["account_code"]
+        names = chunk["account_name"]
+        size = len(codes)
+        none = [None] * size
+        debits = chunk.get("debit_amount", none)
+        credits = chunk.get("credit_amount", none)
+        balances = chunk.get("balance_amount", none)
+
+        records = []
+        total_debits, total_credits = stats.total_debits, stats.total_credits
+        line = self.next_line
+
+        for code, name, debit, credit, balance in zip(codes, names, debits, credits, balances):
+            code, name = _text(code), _text(name)
+            if not code:
+                self._error(line, "account code is blank")
+            elif len(code) > ACCOUNT_CODE_MAX_LENGTH:
+                self._error(line, f"account code longer than {ACCOUNT_CODE_MAX_LENGTH} characters")
+            elif not name:
+                self._error(line, f"account {code} has no name")
+            else:
+                try:
+                    debit, credit, balance = parse_amount(debit), parse_amount(credit), parse_amount(balance)
+                except ValueError as e:
+                    self._error(line, f"account {code}: {e}")
+                else:
+                    if debit is None and credit is None and balance is not None:
+                        # Single signed balance column: positive balances are debits
+                        if balance >= 0:
+                            total_debits += balance
+                        else:
+                            total_credits -= balance
+                    else:
+                        total_debits += debit or _ZERO
+                        total_credits += credit or _ZERO
+                        if balance is None:
+                            balance = (debit or _ZERO) - (credit or _ZERO)
+
+                    records.append((
+                        self.trial_balance_id, line, code, name[:ACCOUNT_NAME_MAX_LENGTH],
+                        debit, credit, balance,
+                    ))
+            line += 1
+
+        stats.total_debits, stats.total_credits = total_debits, total_credits
+        stats.lines += len(records)
+        stats.chunks += 1
+        self.next_line = line
+        return records
+
+    def finish(self):
+        """Add the whole-file checks once every chunk has been validated"""
+        stats = self.stats
+        if not stats.is_balanced:
+            stats.warnings.append(
+                f"Trial balance does not balance: debits {stats.total_debits:,.2f}, "
+                f"credits {stats.total_credits:,.2f}, difference {stats.balance_difference:,.2f}"
+            )
+        if not stats.lines and not stats.error_count:
+            stats.errors.append("File contains no trial balance lines")
+            stats.error_count += 1
+
+
+class TrialBalanceWriter:
+    """Validates streamed trial balance chunks and bulk-loads the lines"""
+
+    def __init__(self, db: AsyncSession, method: Optional[str] = None):
+        """
+        Args:
+            db: SQLAlchemy async session; the import runs in its transaction
+            method: "copy" or "insert"; defaults to COPY when the driver is asyncpg
+        """
+        self.db = db
+        self.method = method
+
+    async def write(
+        self,
+        engagement_id: UUID,
+        period_end_date: date,
+        chunks: Iterable[Dict[str, List[Any]]],
+        source: str = "upload",
+        source_metadata: Optional[Dict[str, Any]] = None,
+        imported_by: Optional[UUID] = None
+    ) -> TrialBalanceImportStats:
+        """
+        Create a trial balance and load its lines
+
+        Commits on success and rolls back if any row is invalid, so a
+        trial balance is either imported in full or not at all.
+
+        Args:
+            engagement_id: Target engagement UUID
+            period_end_date: Period ending date
+            chunks: Column-oriented chunks from read_trial_balance; read and
+                validated on a worker thread
+
+        Returns:
+            TrialBalanceImportStats with totals and validation messages
+
+        Raises:
+            TrialBalanceValidationError: Rows failed validation
+        """
+        started = time.perf_counter()
+        connection = await self.db.connection()
+        method = self.method or ("copy" if connection.dialect.driver == "asyncpg" else "insert")
+        stats = TrialBalanceImportStats(method=method)
+
+        trial_balance = TrialBalance(
+            id=uuid4(),
+            engagement_id=engagement_id,
+            period_end_date=period_end_date,
+            source=source,
+            source_metadata=source_metadata,
+            imported_by=imported_by,
+        )
+        self.db.add(trial_balance)
+        stats.trial_balance_id = trial_balance.id
+
+        try:
+            # Flush before taking the raw connection so the header row exists for the lines' foreign key
+            await self.db.flush()
+            driver = None
+            if method == "copy":
+                raw = await connection.get_raw_connection()
+                driver = raw.driver_connection
+
+            validator = TrialBalanceValidator(trial_balance.id, stats)
+            validated = iterate_in_thread(map(validator.validate, chunks), batch_size=1, max_batches=2)
+            async for records in validated:
+                if stats.error_count:
+                    continue  # Keep validating to report every bad row, but stop loading
+                if method == "copy":
+                    await driver.copy_records_to_table(
+                        "trial_balance_lines", schema_name="atlas", records=records, columns=LINE_COLUMNS
+                    )
+                elif records:
+                    await self.db.execute(
+                        insert(TrialBalanceLine.__table__),
+                        [dict(zip(LINE_COLUMNS, record), id=uuid4()) for record in records]
+                    )
+            validator.finish()
+
+            if stats.error_count:
+                raise TrialBalanceValidationError(stats)
+            await self._check_duplicates(stats)
+
+            trial_balance.total_debits = stats.total_debits
+            trial_balance.total_credits = stats.total_credits
+            trial_balance.balance_difference = stats.balance_difference
+            trial_balance.is_balanced = stats.is_balanced
+            trial_balance.line_count = stats.lines
+            await self.db.commit()
+        except BaseException:
+            await self.db.rollback()
+            raise
+
+        stats.elapsed_seconds = time.perf_counter() - started
+        logger.info(
+            f"Imported trial balance {trial_balance.id}: {stats.lines} lines via {method} "
+            f"at {stats.rows_per_second:,.0f} rows/s, difference {stats.balance_difference}"
+        )
+        return stats
+
+    async def _check_duplicates(self, stats: TrialBalanceImportStats):
+        """Report account codes that appear on more than one loaded line"""
+        result = await self.db.execute(
+            text(_DUPLICATE_ACCOUNTS_SQL),
+            {"trial_balance_id": stats.trial_balance_id, "limit": MAX_REPORTED_ERRORS}
+        )
+        rows = result.all()
+        if not rows:
+            return
+
+        stats.duplicate_accounts = rows[0].duplicate_codes
+        stats.warnings[:0] = [
+            f"Line {row.first_line}: account code {row.account_code} appears on {row.occurrences} lines"
+            for row in rows
+        ]
+        if stats.duplicate_accounts > len(rows):
+            stats.warnings.insert(len(rows), f"... and {stats.duplicate_accounts - len(rows)} more duplicate account codes")
@@ -96,7 +96,12 @@ async def scrape_by_ticker(ticker: str, forms: list[str] = None, concepts: list[
             await scraper.close()
 
 
-async def scrape_multiple_tickers(tickers: list[str], forms: list[str] = None, concepts: list[str] = None):
+async def scrape_multiple_tickers(
+    tickers: list[str],
+    forms: list[str] = None,
+    concepts: list[str] = None,
+    checkpoint: str = None
+):
     """Scrape multiple companies by ticker"""
     identifiers = [{'ticker': ticker} for ticker in tickers]
 
@@ -109,7 +114,8 @@ async def scrape_multiple_tickers(tickers: list[str], forms: list[str] = None, c
                 identifiers=identifiers,
                 forms=forms,
                 concepts=concepts,
-                upload_raw=True
+                upload_raw=True,
+                checkpoint_path=checkpoint
             )
 
             print(f"\n✓ Successfully scraped {len(filings)} / {len(tickers)} companies")
@@ -127,7 +133,12 @@ async def scrape_multiple_tickers(tickers: list[str], forms: list[str] = None, c
             await scraper.close()
 
 
-async def scrape_from_batch_file(filepath: str, forms: list[str] = None, concepts: list[str] = None):
+async def scrape_from_batch_file(
+    filepath: str,
+    forms: list[str] = None,
+    concepts: list[str] = None,
+    checkpoint: str = None
+):
     """Scrape from batch file"""
     try:
         with open(filepath, 'r') as f:
@@ -147,7 +158,8 @@ async def scrape_from_batch_file(filepath: str, forms: list[str] = None, concept
                     identifiers=identifiers,
                     forms=forms,
                     concepts=concepts,
-                    upload_raw=True
+                    upload_raw=True,
+                    checkpoint_path=checkpoint
                 )
 
                 print(f"\n✓ Successfully scraped {len(filings)} / {len(identifiers)} companies")
@@ -233,6 +245,9 @@ Examples:
   # Batch scrape from JSON file
   %(prog)s --batch companies.json
 
+  # Resumable batch scrape (re-run the same command after an interruption)
+  %(prog)s --batch companies.json --checkpoint crawl.jsonl
+
   # Search existing filings
   %(prog)s --search --ticker AAPL
         """
@@ -243,6 +258,7 @@ Examples:
     parser.add_argument('--ticker', help='Company ticker to scrape')
     parser.add_argument('--tickers', help='Comma-separated list of tickers')
     parser.add_argument('--batch', help='JSON file with companies to scrape')
+    parser.add_argument('--checkpoint', help='Checkpoint file for resuming an interrupted batch scrape')
 
     # Filtering options
     parser.add_argument('--forms', help='Comma-separated list of form types (e.g., 10-K,10-Q)')
@@ -276,9 +292,9 @@ Examples:
             asyncio.run(scrape_by_ticker(args.ticker, forms, concepts))
         elif args.tickers:
             tickers = [t.strip() for t in args.tickers.split(',')]
-            asyncio.run(scrape_multiple_tickers(tickers, forms, concepts))
+            asyncio.run(scrape_multiple_tickers(tickers, forms, concepts, args.checkpoint))
         elif args.batch:
-            asyncio.run(scrape_from_batch_file(args.batch, forms, concepts))
+            asyncio.run(scrape_from_batch_file(args.batch, forms, concepts, args.checkpoint))
         else:
             parser.print_help()
             sys.exit(1)
@@ -7,6 +7,8 @@ import sys
 import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'app'))
+# Shared EDGAR crawl library
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'lib'))
 
 
 @pytest.fixture
@@ -121,6 +121,122 @@ class TestEdgarClient:
         assert facts[0]["metadata"]["form"] == "10-K"
 
 
+    @pytest.mark.asyncio
+    async def test_streaming_parser_matches_normalize(self, client):
+        """Incremental parsing yields the same facts as json.loads + normalize"""
+        import io
+        import json
+        from app.facts_stream import CompanyFactsParser, iter_facts_from_file
+
+        company_data = {
+            "cik": 320193,
+            "entityName": "Apple Inc.",
+            "facts": {
+                "dei": {
+                    "EntityCommonStockSharesOutstanding": {
+                        "label": "Entity Common Stock, Shares Outstanding",
+                        "description": None,
+                        "units": {"shares": [{"end": "2023-10-20", "val": 15550061000, "form": "10-K", "filed": "2023-11-03"}]}
+                    }
+                },
+                "us-gaap": {
+                    "Assets": {
+                        "label": "Assets",
+                        "description": "Total Assets",
+                        "units": {
+                            "USD": [
+                                {"end": "2023-09-30", "val": 352755000000, "fy": 2023, "form": "10-K", "filed": "2023-11-03"},
+                                {"end": "2023-07-01", "val": 335038000000, "fy": 2023, "form": "10-Q", "filed": "2023-08-04"}
+                            ]
+                        }
+                    },
+                    "EarningsPerShareBasic": {
+                        "label": "EPS, Basic",
+                        "units": {
+                            "USD/shares": [
+                                {"start": "2022-09-25", "end": "2023-09-30", "val": 6.16, "form": "10-K", "frame": "CY2023"}
+                            ]
+                        }
+                    }
+                }
+            }
+        }
+        payload = json.dumps(company_data).encode()
+
+        for filters in [{}, {"concepts": ["us-gaap:Assets"]}, {"form": "10-K"}]:
+            parser = CompanyFactsParser(filters.get("concepts"), filters.get("form"))
+            # Tiny chunks split tokens and value objects across feed() calls
+            facts = list(iter_facts_from_file(io.BytesIO(payload), parser, chunk_size=7))
+
+            assert facts == client.normalize_company_facts(company_data, **filters)
+            assert parser.cik == 320193
+            assert parser.entity_name == "Apple Inc."
+
+
+    @pytest.mark.asyncio
+    async def test_ticker_index_persists_and_revalidates(self, tmp_path):
+        """Ticker lookups hit EDGAR once, reload from disk, and revalidate with a 304"""
+        import httpx
+        from edgar_crawl import TickerIndex
+
+        tickers = {
+            "0": {"cik_str": 320193, "ticker": "AAPL", "title": "Apple Inc."},
+            "1": {"cik_str": 1067983, "ticker": "BRK-B", "title": "BERKSHIRE HATHAWAY INC"},
+            "2": {"cik_str": 1418121, "ticker": "APLE", "title": "Apple Hospitality REIT, Inc."},
+        }
+        seen = []
+
+        def handler(request):
+            seen.append(request.headers.get("if-none-match"))
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, json=tickers, headers={"ETag": '"v1"'})
+
+        def make_client():
+            TickerIndex._instances.clear()
+            client = EdgarClient("https://data.sec.gov", "Test test@example.com", ticker_index_path=str(tmp_path / "tickers.json"))
+            client.client = client.fetcher.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            return client
+
+        client = make_client()
+        assert await client.lookup_cik("AAPL") == "320193"
+        assert await client.lookup_cik("brk.b") == "1067983"
+        with pytest.raises(ValueError):
+            await client.lookup_cik("ZZZZ")
+        assert seen == [None]
+
+        matches = await client.search_companies("apple")
+        assert [company.ticker for company, _ in matches] == ["AAPL", "APLE"]
+
+        # A new process loads the persisted index without contacting EDGAR
+        client = make_client()
+        assert await client.lookup_cik("APLE") == "1418121"
+        assert seen == [None]
+
+        # Past the TTL the index is revalidated with a conditional GET
+        client.ticker_index._next_refresh = 0
+        assert await client.lookup_cik("AAPL") == "320193"
+        assert seen == [None, '"v1"']
+        TickerIndex._instances.clear()
+
+    def test_ticker_index_search_ranks_names_containing_query(self):
+        """A one-word query finds long names containing it; negative limits are rejected"""
+        from edgar_crawl import TickerIndex
+
+        index = TickerIndex("https://data.sec.gov/files/company_tickers.json")
+        index._build([
+            (886982, "GS", "GOLDMAN SACHS GROUP INC"),
+            (1067983, "BRK-B", "BERKSHIRE HATHAWAY INC"),
+        ])
+
+        matches = index.search("Goldman")
+        assert [company.ticker for company, _ in matches] == ["GS"]
+        assert matches[0][1] >= 0.75
+        assert index.search("Goldman", limit=0) == []
+        with pytest.raises(ValueError):
+            index.search("Goldman", limit=-1)
+
+
 class TestEdgarScraper:
     """Test EDGAR scraper pipeline"""
 
@@ -132,7 +248,8 @@ class TestEdgarScraper:
         session.commit = AsyncMock()
         session.flush = AsyncMock()
         session.refresh = AsyncMock()
-        session.execute = AsyncMock()
+        # execute() is awaited; its result's accessors are plain calls
+        session.execute = AsyncMock(return_value=Mock(scalar_one_or_none=Mock(return_value=None)))
         return session
 
     @pytest.fixture
@@ -173,42 +290,296 @@ class TestEdgarScraper:
             }
         ]
 
+        connection = Mock()
+        connection.dialect.driver = "psycopg"
+        db_session.connection = AsyncMock(return_value=connection)
+        db_session.execute.return_value = [Mock(inserted=True)]
+
         count = await scraper._store_facts(filing_id, normalized_facts)
 
         assert count == 1
-        assert db_session.add.called
+        # Facts bypass the ORM session
+        assert not db_session.add.called
+        assert db_session.execute.called
         assert db_session.commit.called
 
     @pytest.mark.asyncio
-    @patch('app.scraper.EdgarClient')
-    async def test_scrape_company_by_ticker(self, mock_edgar_client, scraper, db_session):
-        """Test full scrape by ticker"""
-        # Mock EDGAR client responses
-        mock_client = AsyncMock()
-        mock_client.get_company_facts_by_ticker.return_value = {
+    async def test_fact_writer_dedupes_chunk(self, db_session):
+        """Duplicate (concept, period, unit) rows keep the most recently filed value"""
+        from uuid import uuid4
+        from app.fact_writer import FactWriter
+
+        connection = Mock()
+        connection.dialect.driver = "psycopg"
+        db_session.connection = AsyncMock(return_value=connection)
+        db_session.execute.return_value = [Mock(inserted=True), Mock(inserted=False)]
+
+        facts = [
+            {"concept": "us-gaap:Assets", "value": 1, "unit": "USD", "end_date": date(2022, 12, 31),
+             "metadata": {"filed_date": "2023-02-01"}},
+            {"concept": "us-gaap:Assets", "value": 2, "unit": "USD", "end_date": date(2022, 12, 31),
+             "metadata": {"filed_date": "2024-02-01"}},
+            {"concept": "us-gaap:Revenues", "value": 3, "unit": "USD", "end_date": date(2022, 12, 31),
+             "metadata": {"filed_date": "2023-02-01"}},
+        ]
+
+        stats = await FactWriter(db_session, method="insert").write(uuid4(), iter(facts))
+
+        statement = db_session.execute.call_args[0][0]
+        params = statement.compile().params
+        assert [v for k, v in params.items() if k.startswith("value")] == [2, 3]
+        assert stats.rows_in == 3
+        assert stats.inserted == 1
+        assert stats.updated == 1
+        assert stats.duplicates == 1
+
+    @pytest.mark.asyncio
+    async def test_scrape_company_by_ticker(self, scraper, db_session):
+        """Test full scrape by ticker: facts stream in, raw body is uploaded unchanged"""
+        import json
+        from contextlib import asynccontextmanager
+
+        payload = json.dumps({
             "cik": 320193,
             "entityName": "Apple Inc.",
-            "facts": {}
-        }
-        mock_client.normalize_company_facts.return_value = []
+            "facts": {
+                "us-gaap": {
+                    "Assets": {
+                        "label": "Assets",
+                        "units": {"USD": [{"end": "2023-09-30", "val": 352755000000, "form": "10-K"}]}
+                    }
+                }
+            }
+        }).encode()
+
+        @asynccontextmanager
+        async def open_company_facts(cik):
+            async def iter_bytes():
+                for i in range(0, len(payload), 16):
+                    yield payload[i:i + 16]
+            yield Mock(not_modified=False, iter_bytes=iter_bytes)
+
+        scraper.edgar_client.lookup_cik = AsyncMock(return_value="320193")
+        scraper.edgar_client.open_company_facts = open_company_facts
+
+        filing = Mock(id="filing-id")
+        scraper._store_filing = AsyncMock(return_value=filing)
+
+        stored = []
+
+        async def store_facts(filing_id, facts):
+            stored.extend([fact async for fact in facts])
+            return len(stored)
+
+        scraper._store_facts = store_facts
+
+        uploaded = {}
+        scraper.storage = Mock()
+        scraper.storage.upload_fileobj.side_effect = lambda f, key, content_type, metadata: (
+            uploaded.update(key=key, body=f.read()) or f"s3://bucket/{key}"
+        )
+
+        result = await scraper.scrape_company_by_ticker("AAPL")
+
+        scraper.edgar_client.lookup_cik.assert_called_once_with("AAPL")
+        assert scraper._store_filing.call_args.kwargs["company_name"] == "Apple Inc."
+        assert [fact["concept"] for fact in stored] == ["us-gaap:Assets"]
+        assert uploaded["body"] == payload
+        assert uploaded["key"].startswith("edgar/raw/AAPL/")
+        assert result.raw_data_s3_uri == f"s3://bucket/{uploaded['key']}"
+
+    @pytest.mark.asyncio
+    async def test_persist_rolls_back_filing_on_stream_error(self, scraper, db_session):
+        """A facts stream that fails part-way leaves no committed filing"""
+        db_session.rollback = AsyncMock()
+        scraper._store_facts = AsyncMock(side_effect=ConnectionError("stream reset"))
+
+        with pytest.raises(ConnectionError):
+            await scraper._persist_company(320193, "Apple Inc.", [], cik="320193", upload_raw=False)
+
+        assert db_session.add.called
+        assert db_session.flush.called
+        assert not db_session.commit.called
+        assert db_session.rollback.called
+
 
-        mock_edgar_client.return_value = mock_client
-        scraper.edgar_client = mock_client
+class TestCrawler:
+    """Test rate-governed crawl primitives"""
 
-        # Mock storage
-        with patch('app.scraper.get_storage_client') as mock_storage:
-            mock_storage.return_value.upload_json.return_value = "s3://bucket/key"
+    @pytest.mark.asyncio
+    async def test_token_bucket_spaces_concurrent_requests(self):
+        """Concurrent callers never exceed the configured rate"""
+        import asyncio
+        import time
+        from edgar_crawl import TokenBucket
+
+        bucket = TokenBucket(rate=50)
+        stamps = []
+
+        async def call():
+            await bucket.acquire()
+            stamps.append(time.monotonic())
+
+        start = time.monotonic()
+        await asyncio.gather(*(call() for _ in range(10)))
+
+        # The n-th caller never runs before its slot; a late wakeup can only
+        # shorten the gap to the next caller, not bring it forward
+        for n, stamp in enumerate(sorted(stamps)):
+            assert stamp - start >= n * 0.02 - 0.002
+
+    @pytest.mark.asyncio
+    async def test_conditional_get_uses_cache_on_304(self, tmp_path):
+        """Second fetch revalidates with If-None-Match and reuses the cached body"""
+        import httpx
+        from edgar_crawl import ConditionalCache, GovernedFetcher, TokenBucket
+
+        seen = []
+
+        def handler(request):
+            seen.append(request.headers.get("if-none-match"))
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, json={"cik": 1}, headers={"ETag": '"v1"'})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            fetcher = GovernedFetcher(client, TokenBucket(rate=1000), ConditionalCache(str(tmp_path)))
+            first = await fetcher.get("https://data.sec.gov/a.json")
+            second = await fetcher.get("https://data.sec.gov/a.json")
+
+        assert seen == [None, '"v1"']
+        assert not first.not_modified
+        assert second.not_modified
+        assert second.json() == {"cik": 1}
 
-            # Mock query result
-            mock_result = AsyncMock()
-            mock_result.scalar_one_or_none.return_value = None
-            db_session.execute.return_value = mock_result
+    @pytest.mark.asyncio
+    async def test_open_stream_writes_through_cache(self, tmp_path):
+        """A streamed 200 body is cached as read, and replayed from disk on 304"""
+        import httpx
+        from edgar_crawl import ConditionalCache, GovernedFetcher, TokenBucket
+
+        body = b'{"cik": 1, "facts": {}}' * 1000
+
+        def handler(request):
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, content=body, headers={"ETag": '"v1"'})
 
-            # Execute scrape
-            await scraper.scrape_company_by_ticker("AAPL")
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            fetcher = GovernedFetcher(client, TokenBucket(rate=1000), ConditionalCache(str(tmp_path)))
+            reads = []
+            for _ in range(2):
+                async with fetcher.open_stream("https://data.sec.gov/a.json") as stream:
+                    reads.append((stream.not_modified, b"".join([chunk async for chunk in stream.iter_bytes()])))
+
+        assert reads == [(False, body), (True, body)]
+        assert fetcher.not_modified == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_after_on_429(self):
+        """429 responses are retried after pausing the governor"""
+        import httpx
+        from edgar_crawl import GovernedFetcher, TokenBucket
 
-            # Verify EDGAR API was called
-            mock_client.get_company_facts_by_ticker.assert_called_once_with("AAPL")
+        responses = [httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(200, json={})]
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(lambda r: responses.pop(0))) as client:
+            bucket = TokenBucket(rate=1000)
+            fetcher = GovernedFetcher(client, bucket, backoff=0)
+            result = await fetcher.get("https://data.sec.gov/a.json")
+
+        assert result.status_code == 200
+        assert fetcher.retries == 1
+        assert bucket.pauses == 1
+
+    @pytest.mark.asyncio
+    async def test_staged_crawler_resumes_from_checkpoint(self, tmp_path):
+        """Completed items are skipped on resume; failures are retried"""
+        from edgar_crawl import CrawlCheckpoint, Finished, StagedCrawler
+
+        calls = []
+
+        async def fetch(item, _):
+            calls.append(item)
+            if item == "bad":
+                raise ValueError("boom")
+            if item == "same":
+                return Finished("unchanged")
+            return item.upper()
+
+        async def parse(item, value):
+            return value + "!"
+
+        async def store(item, value):
+            return value
+
+        path = str(tmp_path / "crawl.jsonl")
+        items = [(name, name) for name in ["a", "bad", "same", "b"]]
+
+        checkpoint = CrawlCheckpoint(path)
+        report = await StagedCrawler(fetch, parse, store, fetch_workers=3, checkpoint=checkpoint).run(items)
+        checkpoint.close()
+
+        assert report.results == [("a", "A!"), ("same", "unchanged"), ("b", "B!")]
+        assert list(report.failed) == ["bad"]
+        assert report.finished_early == 1
+
+        # Simulate a torn write from a crash
+        with open(path, "a") as f:
+            f.write('{"key": "b", "sta')
+
+        calls.clear()
+        checkpoint = CrawlCheckpoint(path)
+        report = await StagedCrawler(fetch, parse, store, checkpoint=checkpoint).run(items)
+        checkpoint.close()
+
+        assert calls == ["bad"]
+        assert sorted(report.resumed) == ["a", "b", "same"]
+
+
+class TestFilingParser:
+    """Test filing text extraction"""
+
+    def test_single_pass_extraction(self):
+        """One locate() pass finds sections, notes, policies and risk factors"""
+        from app.filing_parser import FilingParser
+
+        parser = FilingParser("Test test@example.com")
+        html = "\n".join([
+            "<html><head><style>p {margin:0}</style><script>var s = 'Item 2. Properties';</script></head><body>",
+            "<p>Item&nbsp;1. Business</p><p>We make  devices.</p><!-- Item 3. Legal Proceedings -->",
+            "<p>Item 1A. Risk Factors</p>",
+            "<p>Supply chain disruption could adversely affect our ability to manufacture products.</p>",
+            "<p>Item 1B. Unresolved Staff Comments</p>",
+            "<p>Item 2. Properties</p>",
+            "<p>Headquarters in Cupertino.</p>",
+            "<p>Item 8. Financial Statements</p>",
+            "<p>Notes to Consolidated Financial Statements</p>",
+            "<p>Note 1. Summary of Significant Accounting Policies</p>",
+            "<p>Revenue is recognized on transfer.</p>",
+            "<p>Note 2. Revenue</p>",
+            "<p>Net sales by category.</p>",
+            "</body></html>",
+        ])
+
+        text = parser.clean_html(html)
+        assert "var s" not in text and "Legal Proceedings" not in text
+        assert "We make\ndevices." in text
+
+        landmarks = parser.locate(text)
+        sections = parser.extract_sections(text, landmarks=landmarks)
+        assert list(sections) == ["business", "risk_factors", "properties", "financial_statements"]
+        assert sections["properties"] == "Item 2. Properties\nHeadquarters in Cupertino."
+
+        notes = parser.extract_notes_to_financial_statements(text, landmarks)
+        assert {(note["note_number"], note["title"]) for note in notes} == {
+            ("1", "Summary of Significant Accounting Policies"),
+            ("2", "Revenue"),
+        }
+        assert parser.extract_accounting_policies(text, landmarks).startswith("Note 1. Summary")
+        risks = parser.extract_risk_factors(text, landmarks)
+        assert len(risks) == 1
+        assert risks[0].endswith("Supply chain disruption could adversely affect our ability to manufacture products.")
 
 
 class TestStorageClient:
@@ -0,0 +1,96 @@
+"""
+Tests for streaming trial balance import
+"""
+import io
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from app.tb_import import (
+    TrialBalanceFormatError,
+    TrialBalanceImportStats,
+    TrialBalanceValidator,
+    parse_amount,
+    read_trial_balance,
+)
+
+
+def validate_all(chunks):
+    stats = TrialBalanceImportStats()
+    validator = TrialBalanceValidator(uuid4(), stats)
+    records = [record for chunk in chunks for record in validator.validate(chunk)]
+    validator.finish()
+    return stats, records
+
+
+class TestReadTrialBalance:
+    """Test chunked CSV/XLSX reading"""
+
+    def test_csv_chunks_keep_account_codes_as_text(self):
+        """Header aliases are mapped and codes keep their leading zeros"""
+        csv = b"Account #,Description,Debit,Credit,Memo\n0100,Cash,\"1,000.00\",,x\n0200,Revenue,,(250.50)\n0300,AP,,750\n"
+
+        chunks = list(read_trial_balance(io.BytesIO(csv), "tb.csv", chunk_size=2))
+
+        assert [len(chunk["account_code"]) for chunk in chunks] == [2, 1]
+        assert set(chunks[0]) == {"account_code", "account_name", "debit_amount", "credit_amount"}
+        assert chunks[0]["account_code"] == ["0100", "0200"]
+
+    def test_xlsx_read_only(self):
+        """Excel rows are streamed and blank trailing rows skipped"""
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["GL Account", "Account Description", "Balance"])
+        sheet.append([1000, "Cash", 500.25])
+        sheet.append([2000, "Equity", -500.25])
+        sheet.append([None, None, None])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+
+        stats, records = validate_all(read_trial_balance(buffer, "tb.xlsx"))
+
+        assert [(record[2], record[6]) for record in records] == [
+            ("1000", Decimal("500.25")),
+            ("2000", Decimal("-500.25")),
+        ]
+        assert stats.is_balanced
+        assert stats.total_debits == Decimal("500.25")
+
+    @pytest.mark.parametrize("content,filename,message", [
+        (b"code,label\n1,Cash\n", "tb.csv", "Missing required columns"),
+        (b"", "tb.csv", "empty"),
+        (b"x", "tb.xls", ".xls"),
+        (b"x", "tb.pdf", "CSV or Excel"),
+    ])
+    def test_format_errors(self, content, filename, message):
+        with pytest.raises(TrialBalanceFormatError, match=message):
+            list(read_trial_balance(io.BytesIO(content), filename))
+
+
+class TestTrialBalanceValidator:
+    """Test incremental validation"""
+
+    def test_totals_and_row_errors(self):
+        """Totals accumulate across chunks; bad rows are reported with line numbers"""
+        chunks = [
+            {"account_code": ["1000", ""], "account_name": ["Cash", "Blank"], "debit_amount": ["100.005", "1"], "credit_amount": ["", ""]},
+            {"account_code": ["2000", "3000"], "account_name": ["AP", "Bad"], "debit_amount": ["", "abc"], "credit_amount": ["$ 100.01", ""]},
+        ]
+
+        stats, records = validate_all(chunks)
+
+        assert [record[1] for record in records] == [1, 3]
+        assert records[0][4:] == (Decimal("100.01"), None, Decimal("100.01"))
+        assert stats.is_balanced
+        assert stats.error_count == 2
+        assert stats.errors == ["Line 2: account code is blank", "Line 4: account 3000: invalid amount 'abc'"]
+
+    def test_parse_amount(self):
+        assert parse_amount("(1,234.50)") == Decimal("-1234.50")
+        assert parse_amount(" - ") is None
+        assert parse_amount(0.1 + 0.2) == Decimal("0.30")
+        with pytest.raises(ValueError):
+            parse_amount("1e20")
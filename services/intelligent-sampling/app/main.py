@@ -21,6 +21,7 @@ from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Any
+from dataclasses import dataclass
 from datetime import datetime, time
 from enum import Enum
 import math
@@ -32,6 +33,7 @@ from sklearn.preprocessing import StandardScaler
 import xgboost as xgb
 from loguru import logger
 
+from .columnar import SamplingPopulation, weighted_sample_without_replacement
 from .config import settings
 
 
@@ -91,6 +93,7 @@ class SamplingRequest(BaseModel):
     sample_size: Optional[int] = None  # If None, will be calculated
     materiality: float
     performance_materiality: float
+    random_seed: Optional[int] = None  # Fix to reproduce a previous selection
 
 
 class TransactionRisk(BaseModel):
@@ -134,6 +137,16 @@ class SamplingResponse(BaseModel):
     # Metadata
     sampling_methodology: str
     risk_rationale: str
+    random_seed: int
+
+
+@dataclass
+class PopulationRisk:
+    """Risk assessment of a whole population, one entry per transaction"""
+    population: SamplingPopulation
+    risk_scores: np.ndarray
+    risk_levels: np.ndarray  # Index into IntelligentSampler.RISK_LEVELS
+    anomalies: np.ndarray
 
 
 class IntelligentSampler:
@@ -150,6 +163,10 @@ class IntelligentSampler:
     4. Ensure coverage of materiality threshold
     """
 
+    # Risk levels in ascending order, and the score each one starts at
+    RISK_LEVELS = [RiskLevel.VERY_LOW, RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.VERY_HIGH]
+    RISK_LEVEL_BINS = [0.15, 0.3, 0.5, 0.7]
+
     def __init__(self):
         # Load pre-trained risk model (XGBoost)
         # In production, load from model registry
@@ -162,8 +179,13 @@ class IntelligentSampler:
         )
 
     def calculate_risk_score(self, txn: Transaction) -> float:
+        """Calculate risk score for a single transaction (0-1)"""
+        materiality = getattr(self, 'materiality', None)
+        return float(self.calculate_risk_scores(SamplingPopulation([txn]), materiality)[0])
+
+    def calculate_risk_scores(self, population: SamplingPopulation, materiality: Optional[float] = None) -> np.ndarray:
         """
-        Calculate risk score for a transaction (0-1)
+        Calculate risk scores for a whole population (0-1)
 
         Factors considered:
         - Amount (larger = higher risk)
@@ -177,121 +199,45 @@ class IntelligentSampler:
         - Missing documentation
         """
 
-        risk_score = 0.0
+        risk_score = np.zeros(len(population))
 
         # Factor 1: Amount (relative to materiality)
         # Larger amounts = higher risk
-        if hasattr(self, 'materiality'):
-            amount_risk = min(abs(txn.amount) / self.materiality, 1.0) * 0.15
-            risk_score += amount_risk
+        if materiality is not None:
+            risk_score += np.minimum(population.abs_amounts / materiality, 1.0) * 0.15
 
         # Factor 2: Round dollar amount (fraud indicator)
-        if self._is_round_dollar(txn.amount):
-            risk_score += 0.12
+        risk_score += np.where(population.round_dollar, 0.12, 0.0)
 
         # Factor 3: Manual entry (higher risk than automated)
-        if not txn.is_automated:
-            risk_score += 0.15
+        risk_score += np.where(~population.is_automated, 0.15, 0.0)
 
         # Factor 4: Adjustment entry (higher scrutiny needed)
-        if txn.is_adjustment:
-            risk_score += 0.18
+        risk_score += np.where(population.is_adjustment, 0.18, 0.0)
 
         # Factor 5: Posting time (after hours = suspicious)
-        posting_hour = txn.date.hour
-        if posting_hour < 7 or posting_hour > 19:  # Before 7 AM or after 7 PM
-            risk_score += 0.10
+        risk_score += np.where(population.after_hours, 0.10, 0.0)
 
         # Factor 6: Weekend posting
-        if txn.date.weekday() >= 5:  # Saturday or Sunday
-            risk_score += 0.08
+        risk_score += np.where(population.weekend, 0.08, 0.0)
 
         # Factor 7: Benford's Law violation
-        if not self._follows_benfords_law(txn.amount):
-            risk_score += 0.10
+        risk_score += np.where(population.benford_violation, 0.10, 0.0)
 
         # Factor 8: Missing documentation
-        if not txn.has_supporting_docs:
-            risk_score += 0.20
+        risk_score += np.where(~population.has_supporting_docs, 0.20, 0.0)
 
         # Factor 9: High-risk user (would check from historical data)
         # Placeholder: assume 10% of users are high-risk
-        if hash(txn.posting_user) % 10 == 0:
-            risk_score += 0.15
+        risk_score += np.where(population.hashes(population.posting_users) % 10 == 0, 0.15, 0.0)
 
         # Factor 10: Unusual account for this user
         # (Would check historical patterns)
         # Placeholder
-        if hash(f"{txn.posting_user}:{txn.account}") % 15 == 0:
-            risk_score += 0.08
+        risk_score += np.where(population.hashes(population.posting_users, population.accounts) % 15 == 0, 0.08, 0.0)
 
         # Cap at 1.0
-        risk_score = min(risk_score, 1.0)
-
-        return risk_score
-
-    def _is_round_dollar(self, amount: float) -> bool:
-        """Check if amount is suspiciously round"""
-        abs_amount = abs(amount)
-
-        # Check for round thousands, ten thousands, etc.
-        if abs_amount >= 1000:
-            return abs_amount % 1000 == 0 or abs_amount % 10000 == 0
-
-        # Check for round hundreds
-        if abs_amount >= 100:
-            return abs_amount % 100 == 0
-
-        return False
-
-    def _follows_benfords_law(self, amount: float) -> bool:
-        """
-        Check if leading digit follows Benford's Law
-
-        Benford's Law: In naturally occurring datasets, leading digit distribution follows:
-        P(d) = log10(1 + 1/d)
-
-        Expected frequencies:
-        1: 30.1%
-        2: 17.6%
-        3: 12.5%
-        ...
-        9: 4.6%
-        """
-
-        # Get leading digit
-        abs_amount = abs(amount)
-        if abs_amount == 0:
-            return True
-
-        # Convert to string and get first digit
-        amount_str = str(int(abs_amount))
-        if not amount_str or amount_str[0] == '0':
-            return True
-
-        leading_digit = int(amount_str[0])
-
-        # Benford's Law expected frequencies
-        benford_frequencies = {
-            1: 0.301,
-            2: 0.176,
-            3: 0.125,
-            4: 0.097,
-            5: 0.079,
-            6: 0.067,
-            7: 0.058,
-            8: 0.051,
-            9: 0.046,
-        }
-
-        expected = benford_frequencies[leading_digit]
-
-        # In a true implementation, we'd compare to actual distribution
-        # For now, we'll flag unusual leading digits (6-9 are less common)
-        if leading_digit >= 6:
-            return False
-
-        return True
+        return np.minimum(risk_score, 1.0)
 
     def detect_anomalies(self, transactions: List[Transaction]) -> Dict[str, bool]:
         """
@@ -299,41 +245,59 @@ class IntelligentSampler:
 
         Returns dict of {transaction_id: is_anomaly}
         """
+        population = SamplingPopulation(transactions)
+        return dict(zip(population.transaction_ids, self._anomaly_flags(population).tolist()))
 
-        if len(transactions) < 10:
+    def _anomaly_flags(self, population: SamplingPopulation) -> np.ndarray:
+        """Isolation Forest anomaly flag per transaction"""
+
+        if len(population) < 10:
             # Too few transactions for anomaly detection
-            return {txn.transaction_id: False for txn in transactions}
+            return np.zeros(len(population), dtype=bool)
 
         # Create feature matrix
-        features = []
-        for txn in transactions:
-            features.append([
-                abs(txn.amount),
-                txn.date.hour,
-                txn.date.weekday(),
-                1 if not txn.is_automated else 0,
-                1 if txn.is_adjustment else 0,
-                1 if not txn.has_supporting_docs else 0,
-                hash(txn.posting_user) % 100,  # User encoding
-                hash(txn.account) % 100,  # Account encoding
-            ])
-
-        X = np.array(features)
+        X = np.column_stack([
+            population.abs_amounts,
+            population.hour,
+            population.weekday,
+            ~population.is_automated,
+            population.is_adjustment,
+            ~population.has_supporting_docs,
+            population.hashes(population.posting_users) % 100,  # User encoding
+            population.hashes(population.accounts) % 100,  # Account encoding
+        ]).astype(np.float64)
 
         # Standardize features
         scaler = StandardScaler()
         X_scaled = scaler.fit_transform(X)
 
-        # Fit and predict
-        predictions = self.anomaly_detector.fit_predict(X_scaled)
+        # Fit and predict (-1 = anomaly, 1 = normal)
+        return self.anomaly_detector.fit_predict(X_scaled) == -1
+
+    def assess_population(self, transactions: List[Transaction], materiality: float) -> PopulationRisk:
+        """
+        Assess risk for all transactions as columns
 
-        # -1 = anomaly, 1 = normal
-        anomalies = {
-            txn.transaction_id: (pred == -1)
-            for txn, pred in zip(transactions, predictions)
-        }
+        Scores, risk levels and anomaly flags are arrays aligned with
+        transactions; TransactionRisk models are only built on request.
+        """
 
-        return anomalies
+        self.materiality = materiality
+        population = SamplingPopulation(transactions)
+
+        # Detect anomalies first
+        anomalies = self._anomaly_flags(population)
+
+        # Boost score if anomaly detected
+        risk_scores = self.calculate_risk_scores(population, materiality)
+        risk_scores = np.where(anomalies, np.minimum(risk_scores + 0.15, 1.0), risk_scores)
+
+        return PopulationRisk(
+            population=population,
+            risk_scores=risk_scores,
+            risk_levels=np.digitize(risk_scores, self.RISK_LEVEL_BINS),
+            anomalies=anomalies,
+        )
 
     def assess_risks(
         self,
@@ -345,84 +309,60 @@ class IntelligentSampler:
 
         Returns list of risk assessments
         """
-
-        self.materiality = materiality
-
-        # Detect anomalies first
-        anomalies = self.detect_anomalies(transactions)
-
-        risk_assessments = []
-
-        for txn in transactions:
-            # Calculate risk score
-            risk_score = self.calculate_risk_score(txn)
-
-            # Boost score if anomaly detected
-            if anomalies.get(txn.transaction_id, False):
-                risk_score = min(risk_score + 0.15, 1.0)
-
-            # Determine risk level
-            if risk_score >= 0.7:
-                risk_level = RiskLevel.VERY_HIGH
-            elif risk_score >= 0.5:
-                risk_level = RiskLevel.HIGH
-            elif risk_score >= 0.3:
-                risk_level = RiskLevel.MEDIUM
-            elif risk_score >= 0.15:
-                risk_level = RiskLevel.LOW
-            else:
-                risk_level = RiskLevel.VERY_LOW
-
-            # Identify risk factors
-            risk_factors = []
-            if not txn.is_automated:
-                risk_factors.append("Manual entry")
-            if txn.is_adjustment:
-                risk_factors.append("Adjustment entry")
-            if self._is_round_dollar(txn.amount):
-                risk_factors.append("Round dollar amount")
-            if not txn.has_supporting_docs:
-                risk_factors.append("Missing supporting documentation")
-            if txn.date.hour < 7 or txn.date.hour > 19:
-                risk_factors.append("Posted outside business hours")
-            if txn.date.weekday() >= 5:
-                risk_factors.append("Weekend posting")
-
-            # Anomaly indicators
-            anomaly_indicators = []
-            if anomalies.get(txn.transaction_id, False):
-                anomaly_indicators.append("Statistical anomaly detected by ML model")
-            if not self._follows_benfords_law(txn.amount):
-                anomaly_indicators.append("Benford's Law violation")
-
-            # Recommendation
-            if risk_level in [RiskLevel.VERY_HIGH, RiskLevel.HIGH]:
-                recommendation = "Include in sample - high risk of misstatement"
-            elif risk_level == RiskLevel.MEDIUM:
-                recommendation = "Consider for sample based on coverage needs"
-            else:
-                recommendation = "Low risk - sample only for coverage"
-
-            risk_assessment = TransactionRisk(
-                transaction_id=txn.transaction_id,
-                risk_score=risk_score,
-                risk_level=risk_level,
-                risk_factors=risk_factors,
-                anomaly_indicators=anomaly_indicators,
-                recommendation=recommendation,
-            )
-
-            risk_assessments.append(risk_assessment)
-
-        return risk_assessments
+        risk = self.assess_population(transactions, materiality)
+        return [self.transaction_risk(risk, row) for row in range(len(transactions))]
+
+    def transaction_risk(self, risk: PopulationRisk, row: int) -> TransactionRisk:
+        """Full risk assessment of one transaction of an assessed population"""
+        population = risk.population
+        risk_level = self.RISK_LEVELS[risk.risk_levels[row]]
+
+        # Identify risk factors
+        risk_factors = []
+        if not population.is_automated[row]:
+            risk_factors.append("Manual entry")
+        if population.is_adjustment[row]:
+            risk_factors.append("Adjustment entry")
+        if population.round_dollar[row]:
+            risk_factors.append("Round dollar amount")
+        if not population.has_supporting_docs[row]:
+            risk_factors.append("Missing supporting documentation")
+        if population.after_hours[row]:
+            risk_factors.append("Posted outside business hours")
+        if population.weekend[row]:
+            risk_factors.append("Weekend posting")
+
+        # Anomaly indicators
+        anomaly_indicators = []
+        if risk.anomalies[row]:
+            anomaly_indicators.append("Statistical anomaly detected by ML model")
+        if population.benford_violation[row]:
+            anomaly_indicators.append("Benford's Law violation")
+
+        # Recommendation
+        if risk_level in [RiskLevel.VERY_HIGH, RiskLevel.HIGH]:
+            recommendation = "Include in sample - high risk of misstatement"
+        elif risk_level == RiskLevel.MEDIUM:
+            recommendation = "Consider for sample based on coverage needs"
+        else:
+            recommendation = "Low risk - sample only for coverage"
+
+        return TransactionRisk(
+            transaction_id=population.transaction_ids[row],
+            risk_score=float(risk.risk_scores[row]),
+            risk_level=risk_level,
+            risk_factors=risk_factors,
+            anomaly_indicators=anomaly_indicators,
+            recommendation=recommendation,
+        )
 
     def select_sample(
         self,
-        transactions: List[Transaction],
-        risk_assessments: List[TransactionRisk],
+        risk: PopulationRisk,
         sample_size: int,
-        performance_materiality: float
-    ) -> List[str]:
+        performance_materiality: float,
+        rng: np.random.Generator
+    ) -> np.ndarray:
         """
         Select sample using risk-based strategy
 
@@ -431,78 +371,51 @@ class IntelligentSampler:
         - 20% from medium risk
         - 10% from low risk
         - Always include items > performance materiality
-        """
-
-        # Stratify by risk level
-        very_high = [t for t, r in zip(transactions, risk_assessments) if r.risk_level == RiskLevel.VERY_HIGH]
-        high = [t for t, r in zip(transactions, risk_assessments) if r.risk_level == RiskLevel.HIGH]
-        medium = [t for t, r in zip(transactions, risk_assessments) if r.risk_level == RiskLevel.MEDIUM]
-        low = [t for t, r in zip(transactions, risk_assessments) if r.risk_level == RiskLevel.LOW]
-        very_low = [t for t, r in zip(transactions, risk_assessments) if r.risk_level == RiskLevel.VERY_LOW]
 
-        selected = []
+        Returns the selected rows in population order. Draws come only from
+        rng, so the same seed reproduces the same sample.
+        """
 
         # Step 1: Always include items over performance materiality
-        for txn in transactions:
-            if abs(txn.amount) > performance_materiality:
-                selected.append(txn.transaction_id)
+        above_materiality = risk.population.abs_amounts > performance_materiality
+        selected = [np.flatnonzero(above_materiality)]
 
-        remaining = sample_size - len(selected)
+        remaining = sample_size - len(selected[0])
 
         if remaining > 0:
+            # Stratify the rest by risk level
+            levels = np.where(above_materiality, -1, risk.risk_levels)
+            high_risk_pool = np.flatnonzero(levels >= self.RISK_LEVELS.index(RiskLevel.HIGH))
+            medium = np.flatnonzero(levels == self.RISK_LEVELS.index(RiskLevel.MEDIUM))
+            low_risk_pool = np.flatnonzero((levels >= 0) & (levels <= self.RISK_LEVELS.index(RiskLevel.LOW)))
+
             # Step 2: Sample from high-risk stratum (70% of remaining)
+            # with probability proportional to risk score
             high_risk_count = int(remaining * 0.7)
-            high_risk_pool = very_high + high
-
-            # Take all if pool is smaller than target
-            if len(high_risk_pool) <= high_risk_count:
-                selected.extend([t.transaction_id for t in high_risk_pool])
-            else:
-                # Sample with probability proportional to risk score
-                selected.extend(self._weighted_sample(high_risk_pool, risk_assessments, high_risk_count))
+            selected.append(self._weighted_sample(high_risk_pool, risk.risk_scores, high_risk_count, rng))
 
             # Step 3: Sample from medium-risk stratum (20% of remaining)
             medium_risk_count = int(remaining * 0.2)
-            if len(medium) <= medium_risk_count:
-                selected.extend([t.transaction_id for t in medium])
-            else:
-                selected.extend(self._weighted_sample(medium, risk_assessments, medium_risk_count))
+            selected.append(self._weighted_sample(medium, risk.risk_scores, medium_risk_count, rng))
 
-            # Step 4: Sample from low-risk stratum (10% of remaining)
+            # Step 4: Random sample from low-risk stratum (10% of remaining)
             low_risk_count = remaining - high_risk_count - medium_risk_count
-            low_risk_pool = low + very_low
             if len(low_risk_pool) <= low_risk_count:
-                selected.extend([t.transaction_id for t in low_risk_pool])
+                selected.append(low_risk_pool)
             else:
-                # Random sample from low risk
-                import random
-                selected.extend([t.transaction_id for t in random.sample(low_risk_pool, low_risk_count)])
+                selected.append(rng.choice(low_risk_pool, size=low_risk_count, replace=False))
 
-        return selected
+        return np.sort(np.concatenate(selected))
 
     def _weighted_sample(
         self,
-        transactions: List[Transaction],
-        risk_assessments: List[TransactionRisk],
-        count: int
-    ) -> List[str]:
-        """Sample with probability proportional to risk score"""
-
-        # Create risk score mapping
-        risk_map = {r.transaction_id: r.risk_score for r in risk_assessments}
-
-        # Get risk scores for this pool
-        risks = [risk_map.get(t.transaction_id, 0.5) for t in transactions]
-
-        # Sample with replacement = False
-        selected_indices = np.random.choice(
-            len(transactions),
-            size=min(count, len(transactions)),
-            replace=False,
-            p=np.array(risks) / sum(risks)  # Normalize to probabilities
-        )
-
-        return [transactions[i].transaction_id for i in selected_indices]
+        rows: np.ndarray,
+        risk_scores: np.ndarray,
+        count: int,
+        rng: np.random.Generator
+    ) -> np.ndarray:
+        """Sample rows without replacement, with probability proportional to risk score"""
+        return rows[weighted_sample_without_replacement(risk_scores[rows], count, rng)]
 
 
 # Global sampler instance
@@ -518,7 +431,7 @@ async def generate_sample(request: SamplingRequest):
     """
 
     # Assess risks
-    risk_assessments = sampler.assess_risks(
+    risk = sampler.assess_population(
         request.population,
         request.materiality
     )
@@ -533,55 +446,51 @@ async def generate_sample(request: SamplingRequest):
     else:
         sample_size = request.sample_size
 
+    # Seed recorded in the response so the selection can be reproduced
+    random_seed = request.random_seed
+    if random_seed is None:
+        random_seed = int(np.random.SeedSequence().entropy % 2**63)
+
     # Select sample
-    selected_ids = sampler.select_sample(
-        transactions=request.population,
-        risk_assessments=risk_assessments,
+    selected_rows = sampler.select_sample(
+        risk=risk,
         sample_size=sample_size,
-        performance_materiality=request.performance_materiality
+        performance_materiality=request.performance_materiality,
+        rng=np.random.default_rng(random_seed)
     )
 
     # Build response
     selected_items = []
-    high_risk_count = 0
-    medium_risk_count = 0
-    low_risk_count = 0
-
-    for txn in request.population:
-        if txn.transaction_id in selected_ids:
-            # Find risk assessment
-            risk = next((r for r in risk_assessments if r.transaction_id == txn.transaction_id), None)
-
-            if risk:
-                # Count by risk level
-                if risk.risk_level in [RiskLevel.VERY_HIGH, RiskLevel.HIGH]:
-                    high_risk_count += 1
-                elif risk.risk_level == RiskLevel.MEDIUM:
-                    medium_risk_count += 1
-                else:
-                    low_risk_count += 1
-
-                selection_reason = ", ".join(risk.risk_factors) if risk.risk_factors else "Random selection from low-risk stratum"
-
-                selected_items.append(SampleSelection(
-                    transaction_id=txn.transaction_id,
-                    amount=txn.amount,
-                    description=txn.description,
-                    risk_score=risk.risk_score,
-                    risk_level=risk.risk_level,
-                    selection_reason=selection_reason,
-                ))
+    for row in selected_rows.tolist():
+        txn = request.population[row]
+        transaction_risk = sampler.transaction_risk(risk, row)
+        selection_reason = ", ".join(transaction_risk.risk_factors) if transaction_risk.risk_factors else "Random selection from low-risk stratum"
+
+        selected_items.append(SampleSelection(
+            transaction_id=txn.transaction_id,
+            amount=txn.amount,
+            description=txn.description,
+            risk_score=transaction_risk.risk_score,
+            risk_level=transaction_risk.risk_level,
+            selection_reason=selection_reason,
+        ))
+
+    # Count by risk level
+    selected_levels = risk.risk_levels[selected_rows]
+    high_risk_count = int(np.count_nonzero(selected_levels >= sampler.RISK_LEVELS.index(RiskLevel.HIGH)))
+    medium_risk_count = int(np.count_nonzero(selected_levels == sampler.RISK_LEVELS.index(RiskLevel.MEDIUM)))
+    low_risk_count = len(selected_rows) - high_risk_count - medium_risk_count
 
     # Calculate totals
-    total_pop_amount = sum(abs(t.amount) for t in request.population)
-    total_sample_amount = sum(abs(t.amount) for t in request.population if t.transaction_id in selected_ids)
+    total_pop_amount = float(risk.population.abs_amounts.sum())
+    total_sample_amount = float(risk.population.abs_amounts[selected_rows].sum())
     coverage_pct = (total_sample_amount / total_pop_amount * 100) if total_pop_amount > 0 else 0
 
     return SamplingResponse(
         engagement_id=request.engagement_id,
         account_name=request.account_name,
         population_size=len(request.population),
-        sample_size=len(selected_ids),
+        sample_size=len(selected_rows),
         total_population_amount=total_pop_amount,
         total_sample_amount=total_sample_amount,
         sample_coverage_pct=coverage_pct,
@@ -590,7 +499,8 @@ async def generate_sample(request: SamplingRequest):
         low_risk_count=low_risk_count,
         selected_items=selected_items,
         sampling_methodology="AI-powered risk-based sampling with Benford's Law analysis and anomaly detection",
-        risk_rationale=f"Sample weighted toward high-risk items: {high_risk_count} high-risk ({high_risk_count/len(selected_ids)*100:.0f}%), {medium_risk_count} medium-risk ({medium_risk_count/len(selected_ids)*100:.0f}%), {low_risk_count} low-risk ({low_risk_count/len(selected_ids)*100:.0f}%).",
+        risk_rationale=f"Sample weighted toward high-risk items: {high_risk_count} high-risk ({high_risk_count/len(selected_rows)*100:.0f}%), {medium_risk_count} medium-risk ({medium_risk_count/len(selected_rows)*100:.0f}%), {low_risk_count} low-risk ({low_risk_count/len(selected_rows)*100:.0f}%).",
+        random_seed=random_seed,
     )
 
 
@@ -30,6 +30,8 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     EMBEDDING_DIMENSION: int = 384  # all-MiniLM-L6-v2 produces 384-dim vectors
     EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_LRU_SIZE: int = 10000  # Hot embeddings kept in process memory
+    EMBEDDING_ACCESS_FLUSH_INTERVAL: int = 30  # Seconds between cache access-count flushes
 
     # RAG Configuration
     RAG_TOP_K: int = 5  # Number of documents to retrieve
@@ -1,13 +1,17 @@
 """Embedding generation service using sentence-transformers"""
+import asyncio
 import hashlib
 import logging
 import time
-from typing import List, Tuple, Optional
+from collections import Counter, OrderedDict
+from typing import Dict, List, Tuple, Optional
+from uuid import uuid4
 import numpy as np
 
 from sentence_transformers import SentenceTransformer
-from sqlalchemy import select, func
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Integer, String, any_, bindparam, select, text as sql_text
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from .config import settings
 from .models import EmbeddingCache
@@ -15,6 +19,12 @@ from .models import EmbeddingCache
 logger = logging.getLogger(__name__)
 
 
+# Rows per multi-row INSERT (5 bind params each, asyncpg allows 32767)
+CACHE_INSERT_CHUNK = 1000
+# Hashes per cache lookup query
+CACHE_LOOKUP_CHUNK = 10000
+
+
 class EmbeddingService:
     """Service for generating text embeddings"""
 
@@ -23,6 +33,13 @@ class EmbeddingService:
         self.model: Optional[SentenceTransformer] = None
         self.dimension = settings.EMBEDDING_DIMENSION
 
+        # Hot embeddings served without touching Postgres (hash -> float32 vector)
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.lru_size = settings.EMBEDDING_LRU_SIZE
+
+        # Cache hits not yet written to access_count (hash -> hits)
+        self._pending_access: Counter = Counter()
+
     def load_model(self):
         """Load the embedding model (lazy loading)"""
         if self.model is None:
@@ -34,6 +51,101 @@ class EmbeddingService:
         """Compute SHA256 hash of text for caching"""
         return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
+    def _lru_get(self, text_hash: str) -> Optional[np.ndarray]:
+        embedding = self._lru.get(text_hash)
+        if embedding is not None:
+            self._lru.move_to_end(text_hash)
+        return embedding
+
+    def _lru_put(self, text_hash: str, embedding) -> None:
+        if self.lru_size <= 0:
+            return
+        self._lru[text_hash] = np.asarray(embedding, dtype=np.float32)
+        self._lru.move_to_end(text_hash)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    async def _get_cached_embeddings(
+        self,
+        db: Optional[AsyncSession],
+        text_hashes: List[str]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Look up cached embeddings for many hashes
+
+        Serves what it can from the in-process LRU, then fetches the rest
+        with one `text_hash = ANY(:hashes)` query per CACHE_LOOKUP_CHUNK.
+        Hits are counted for the next access-count flush.
+        """
+        found: Dict[str, np.ndarray] = {}
+        missing = []
+        for text_hash in text_hashes:
+            embedding = self._lru_get(text_hash)
+            if embedding is not None:
+                found[text_hash] = embedding
+            else:
+                missing.append(text_hash)
+
+        if db is not None and missing:
+            for i in range(0, len(missing), CACHE_LOOKUP_CHUNK):
+                chunk = missing[i:i + CACHE_LOOKUP_CHUNK]
+                query = select(EmbeddingCache.text_hash, EmbeddingCache.embedding).where(
+                    EmbeddingCache.text_hash == any_(
+                        bindparam("text_hashes", chunk, type_=ARRAY(String(64)))
+                    ),
+                    EmbeddingCache.model_name == self.model_name
+                )
+                result = await db.execute(query)
+                for text_hash, embedding in result.all():
+                    found[text_hash] = embedding
+                    self._lru_put(text_hash, embedding)
+
+        self._pending_access.update(found.keys())
+        if found:
+            logger.debug(f"Cache hits for {len(found)} of {len(text_hashes)} text hashes")
+        return found
+
+    async def _cache_embeddings(
+        self,
+        db: AsyncSession,
+        entries: List[Tuple[str, str, List[float]]]
+    ):
+        """
+        Cache many embeddings with one INSERT ... ON CONFLICT DO NOTHING
+        per CACHE_INSERT_CHUNK rows, and a single commit
+
+        Args:
+            entries: (text_hash, text, embedding) tuples
+        """
+        for text_hash, _, embedding in entries:
+            self._lru_put(text_hash, embedding)
+
+        if not entries:
+            return
+
+        try:
+            for i in range(0, len(entries), CACHE_INSERT_CHUNK):
+                rows = [
+                    {
+                        "id": uuid4(),
+                        "text_hash": text_hash,
+                        "text": text,
+                        "embedding": embedding,
+                        "model_name": self.model_name,
+                        "access_count": 1,
+                    }
+                    for text_hash, text, embedding in entries[i:i + CACHE_INSERT_CHUNK]
+                ]
+                statement = pg_insert(EmbeddingCache).values(rows).on_conflict_do_nothing(
+                    index_elements=[EmbeddingCache.text_hash]
+                )
+                await db.execute(statement)
+            await db.commit()
+            logger.debug(f"Cached {len(entries)} embeddings")
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Failed to cache embeddings: {e}")
+
     async def _get_cached_embedding(
         self,
         db: AsyncSession,
@@ -41,23 +153,9 @@ class EmbeddingService:
     ) -> Optional[List[float]]:
         """Retrieve cached embedding if exists"""
         text_hash = self._compute_text_hash(text)
-
-        query = select(EmbeddingCache).where(
-            EmbeddingCache.text_hash == text_hash,
-            EmbeddingCache.model_name == self.model_name
-        )
-        result = await db.execute(query)
-        cache_entry = result.scalar_one_or_none()
-
-        if cache_entry:
-            # Update access statistics
-            cache_entry.access_count += 1
-            cache_entry.last_accessed = func.now()
-            await db.commit()
-
-            logger.debug(f"Cache hit for text hash: {text_hash}")
-            return cache_entry.embedding.tolist()
-
+        cached = await self._get_cached_embeddings(db, [text_hash])
+        if text_hash in cached:
+            return cached[text_hash].tolist()
         return None
 
     async def _cache_embedding(
@@ -67,22 +165,55 @@ class EmbeddingService:
         embedding: List[float]
     ):
         """Cache embedding for future use"""
-        text_hash = self._compute_text_hash(text)
+        await self._cache_embeddings(db, [(self._compute_text_hash(text), text, embedding)])
 
-        cache_entry = EmbeddingCache(
-            text_hash=text_hash,
-            text=text,
-            embedding=embedding,
-            model_name=self.model_name
-        )
+    async def flush_access_counts(self, db: AsyncSession) -> int:
+        """
+        Write deferred cache-hit counts with a single UPDATE
 
-        db.add(cache_entry)
+        Returns:
+            Number of cache entries updated
+        """
+        if not self._pending_access:
+            return 0
+
+        pending, self._pending_access = self._pending_access, Counter()
+        hashes = list(pending.keys())
         try:
+            await db.execute(
+                sql_text(
+                    f"UPDATE {EmbeddingCache.__table__.fullname} AS cache "
+                    "SET access_count = cache.access_count + hits.n, last_accessed = now() "
+                    "FROM unnest(CAST(:hashes AS varchar[]), CAST(:counts AS integer[])) AS hits(text_hash, n) "
+                    "WHERE cache.text_hash = hits.text_hash AND cache.model_name = :model_name"
+                ).bindparams(
+                    bindparam("hashes", type_=ARRAY(String(64))),
+                    bindparam("counts", type_=ARRAY(Integer)),
+                ),
+                {"hashes": hashes, "counts": [pending[h] for h in hashes], "model_name": self.model_name}
+            )
             await db.commit()
-            logger.debug(f"Cached embedding for text hash: {text_hash}")
         except Exception as e:
             await db.rollback()
-            logger.warning(f"Failed to cache embedding: {e}")
+            # Keep the counts for the next flush
+            self._pending_access.update(pending)
+            logger.warning(f"Failed to flush embedding cache access counts: {e}")
+            return 0
+
+        logger.debug(f"Flushed access counts for {len(hashes)} cached embeddings")
+        return len(hashes)
+
+    async def run_access_flush(
+        self,
+        session_factory: async_sessionmaker,
+        interval: Optional[float] = None
+    ):
+        """Periodically flush deferred access counts (run as a background task)"""
+        interval = interval or settings.EMBEDDING_ACCESS_FLUSH_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            async with session_factory() as db:
+                await self.flush_access_counts(db)
 
     async def generate_embeddings(
         self,
@@ -93,6 +224,9 @@ class EmbeddingService:
         """
         Generate embeddings for a list of texts
 
+        Cache lookups and writes are done in bulk: one lookup query for all
+        texts, one encode pass over the distinct misses, one upsert.
+
         Args:
             texts: List of text strings to embed
             db: Database session for caching
@@ -103,26 +237,29 @@ class EmbeddingService:
         """
         self.load_model()
 
-        embeddings = []
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
         cache_hits = 0
-        texts_to_embed = []
-        text_indices = []
+
+        # Group positions by text hash so repeated texts are looked up and encoded once
+        positions: Dict[str, List[int]] = {}
+        first_text: Dict[str, str] = {}
+        for i, text in enumerate(texts):
+            text_hash = self._compute_text_hash(text)
+            positions.setdefault(text_hash, []).append(i)
+            first_text.setdefault(text_hash, text)
 
         # Check cache for existing embeddings
-        if cache_enabled and db:
-            for i, text in enumerate(texts):
-                cached = await self._get_cached_embedding(db, text)
-                if cached:
-                    embeddings.append(cached)
+        cached: Dict[str, np.ndarray] = {}
+        if cache_enabled:
+            cached = await self._get_cached_embeddings(db, list(positions.keys()))
+            for text_hash, embedding in cached.items():
+                vector = embedding.tolist()
+                for i in positions[text_hash]:
+                    embeddings[i] = vector
                     cache_hits += 1
-                else:
-                    texts_to_embed.append(text)
-                    text_indices.append(i)
-                    embeddings.append(None)  # Placeholder
-        else:
-            texts_to_embed = texts
-            text_indices = list(range(len(texts)))
-            embeddings = [None] * len(texts)
+
+        hashes_to_embed = [h for h in positions if h not in cached]
+        texts_to_embed = [first_text[h] for h in hashes_to_embed]
 
         # Generate embeddings for uncached texts
         if texts_to_embed:
@@ -142,13 +279,18 @@ class EmbeddingService:
                 new_embeddings.extend(batch_embeddings.tolist())
 
             # Place new embeddings in correct positions
-            for idx, embedding in zip(text_indices, new_embeddings):
-                embeddings[idx] = embedding
+            for text_hash, embedding in zip(hashes_to_embed, new_embeddings):
+                for i in positions[text_hash]:
+                    embeddings[i] = embedding
 
             # Cache new embeddings
-            if cache_enabled and db:
-                for text, embedding in zip(texts_to_embed, new_embeddings):
-                    await self._cache_embedding(db, text, embedding)
+            if cache_enabled:
+                entries = list(zip(hashes_to_embed, texts_to_embed, new_embeddings))
+                if db is not None:
+                    await self._cache_embeddings(db, entries)
+                else:
+                    for text_hash, _, embedding in entries:
+                        self._lru_put(text_hash, embedding)
 
         logger.info(
             f"Generated {len(texts)} embeddings "
@@ -32,7 +32,7 @@ from jose import JWTError, jwt
 from pydantic import BaseModel, Field
 
 from .config import settings
-from .database import init_db, close_db, get_db
+from .database import init_db, close_db, get_db, AsyncSessionLocal
 from .models import (
     KnowledgeDocument,
     DocumentChunk,
@@ -780,12 +780,18 @@ async def lifespan(app: FastAPI):
     logger.info(f"Starting {settings.SERVICE_NAME} service v{settings.VERSION}")
     await init_db()
     embedding_service.load_model()
+    access_flush_task = asyncio.create_task(
+        embedding_service.run_access_flush(AsyncSessionLocal)
+    )
     logger.info("LLM service ready")
 
     yield
 
     # Shutdown
     logger.info("Shutting down LLM service")
+    access_flush_task.cancel()
+    async with AsyncSessionLocal() as db:
+        await embedding_service.flush_access_counts(db)
     await close_db()
 
 
@@ -2,6 +2,7 @@
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
 import numpy as np
+from sqlalchemy import select
 
 from app.embedding_service import EmbeddingService, embedding_service
 from app.models import EmbeddingCache
@@ -156,3 +157,53 @@ class TestEmbeddingService:
         embedding = await service.generate_single_embedding(text, cache_enabled=False)
 
         assert len(embedding) == len(sample_embedding)
+
+    @pytest.mark.asyncio
+    async def test_generate_embeddings_lru_and_dedupe(self):
+        """Test repeated texts are encoded once and hot texts are served from the LRU"""
+        mock_model = Mock()
+        mock_model.encode = Mock(
+            side_effect=lambda batch, **kwargs: np.random.rand(len(batch), 384).astype(np.float32)
+        )
+
+        service = EmbeddingService()
+        service.model = mock_model
+
+        embeddings, cache_hits = await service.generate_embeddings(["alpha", "beta", "alpha"])
+        assert cache_hits == 0
+        assert embeddings[0] == embeddings[2]
+        assert mock_model.encode.call_args[0][0] == ["alpha", "beta"]
+
+        mock_model.encode.reset_mock()
+        embeddings_again, cache_hits = await service.generate_embeddings(["beta", "alpha"])
+        assert cache_hits == 2
+        assert embeddings_again == [embeddings[1], embeddings[0]]
+        mock_model.encode.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_bulk_cache_and_access_flush(self, test_db):
+        """Test bulk cache writes, bulk lookups and deferred access counts"""
+        mock_model = Mock()
+        mock_model.encode = Mock(
+            side_effect=lambda batch, **kwargs: np.random.rand(len(batch), 384).astype(np.float32)
+        )
+
+        service = EmbeddingService()
+        service.model = mock_model
+        texts = [f"chunk {i}" for i in range(50)]
+
+        await service.generate_embeddings(texts, db=test_db)
+
+        # Fresh service: no LRU, so hits come from one bulk query
+        service = EmbeddingService()
+        service.model = mock_model
+        mock_model.encode.reset_mock()
+
+        embeddings, cache_hits = await service.generate_embeddings(texts, db=test_db)
+        assert cache_hits == 50
+        assert len(embeddings[0]) == 384
+        mock_model.encode.assert_not_called()
+
+        assert await service.flush_access_counts(test_db) == 50
+        result = await test_db.execute(select(EmbeddingCache.access_count))
+        assert set(result.scalars().all()) == {2}
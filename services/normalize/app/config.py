@@ -27,7 +27,10 @@ class Settings(BaseSettings):
     ]
 
     # ML Model Settings
-    ML_MODEL_PATH: str = "/app/models/account_mapper.pkl"
+    ML_MODEL_PATH: str = "/app/models/account_mapper.joblib"  # Used when no MLModel is active
+    ML_LEGACY_MODEL_PATH: str = "/app/models/account_mapper.pkl"  # Read instead while ML_MODEL_PATH does not exist
+    ML_MODEL_MMAP: bool = True  # Memory-map artifact arrays, shared read-only across workers
+    ML_MODEL_CHECK_INTERVAL_SECONDS: int = 30  # Active MLModel version check / failed load retry
     ML_CONFIDENCE_THRESHOLD: float = 0.75  # Minimum confidence for auto-mapping
     SIMILARITY_THRESHOLD: float = 0.6  # String similarity threshold
 
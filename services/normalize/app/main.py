@@ -4,13 +4,14 @@ Normalize Service - Trial Balance Account Mapping
 FastAPI application providing ML-powered account mapping suggestions.
 """
 import logging
+import os
 import time
 from typing import List, Optional
 from uuid import UUID
 
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text, select
+from sqlalchemy import insert, text, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .config import settings
@@ -18,6 +19,8 @@ from .database import get_db
 from .models import MappingSuggestion, MappingRule, MLModel, MappingHistory, MappingStatus, MappingConfidence
 from .schemas import (
     HealthResponse,
+    ModelStatusResponse,
+    WorkerStatusResponse,
     MappingRuleCreate,
     MappingRuleResponse,
     MLModelResponse,
@@ -29,7 +32,8 @@ from .schemas import (
     AccountSimilarityRequest,
     AccountSimilarityResponse,
 )
-from .mapping_engine import HybridMapper
+from .mapping_engine import HybridMapper, SimilarityMapper
+from .model_store import worker_memory
 
 # Configure logging
 logging.basicConfig(
@@ -64,11 +68,13 @@ mapper = HybridMapper()
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint, with this worker's model load and memory"""
     return HealthResponse(
         status="healthy",
         service=settings.SERVICE_NAME,
-        version=settings.VERSION
+        version=settings.VERSION,
+        worker=WorkerStatusResponse(pid=os.getpid(), **worker_memory()),
+        ml_model=ModelStatusResponse(**mapper.ml_mapper.status())
     )
 
 
@@ -153,8 +159,6 @@ async def find_similar_accounts(
     db: AsyncSession = Depends(get_db)
 ):
     """Find similar accounts using string similarity"""
-    from .mapping_engine import SimilarityMapper
-
     similar_accounts = await SimilarityMapper.find_similar_accounts(
         request.account_name,
         db,
@@ -183,8 +187,8 @@ async def generate_mapping_suggestions(
 
     Process:
     1. Fetch all trial balance lines for engagement
-    2. For each unmapped line, generate suggestion using hybrid approach
-    3. Store suggestions in database
+    2. Generate suggestions for all unmapped lines in one hybrid batch
+    3. Bulk insert suggestions in database
     4. Return summary with counts and suggestions
     """
     start_time = time.time()
@@ -211,52 +215,50 @@ async def generate_mapping_suggestions(
     suggestions_created = []
     high_confidence_count = 0
 
-    for line in lines:
-        tb_id, line_id, account_code, account_name, balance, mapped_account_id = line
-
-        # Skip if already mapped
-        if mapped_account_id:
-            continue
+    # Rules, ML and similarity each run once over every unmapped line
+    unmapped_lines = [line for line in lines if not line[5]]
+    suggestion_results = await mapper.suggest_mapping_many(
+        [line[3] for line in unmapped_lines],
+        [line[2] for line in unmapped_lines],
+        db,
+        use_ml=request.use_ml_model,
+        use_rules=request.use_mapping_rules
+    )
 
-        # Generate mapping suggestion
-        suggestion_result = await mapper.suggest_mapping(
-            account_name,
-            account_code,
-            db,
-            use_ml=request.use_ml_model,
-            use_rules=request.use_mapping_rules
-        )
+    suggestion_rows = []
+    for line, suggestion_result in zip(unmapped_lines, suggestion_results):
+        tb_id, line_id, account_code, account_name, balance, mapped_account_id = line
 
         # Skip if confidence below threshold
         if suggestion_result["confidence"] < request.confidence_threshold:
             continue
 
-        # Create suggestion record
-        suggestion = MappingSuggestion(
-            engagement_id=engagement_id,
-            trial_balance_line_id=line_id,
-            source_account_code=account_code,
-            source_account_name=account_name,
-            suggested_account_code=suggestion_result["suggested_account_code"],
-            suggested_account_name=suggestion_result["suggested_account_name"],
-            confidence_score=suggestion_result["confidence"],
-            confidence_level=suggestion_result["confidence_level"],
-            alternatives=suggestion_result.get("alternatives", []),
-            status=MappingStatus.SUGGESTED,
-            model_version=None  # Set if ML model used
-        )
-
-        db.add(suggestion)
-        suggestions_created.append(suggestion)
-
-        if suggestion.confidence_level in [MappingConfidence.HIGH, MappingConfidence.VERY_HIGH]:
+        suggestion_rows.append({
+            "engagement_id": engagement_id,
+            "trial_balance_line_id": line_id,
+            "source_account_code": account_code,
+            "source_account_name": account_name,
+            "suggested_account_code": suggestion_result["suggested_account_code"],
+            "suggested_account_name": suggestion_result["suggested_account_name"],
+            "confidence_score": suggestion_result["confidence"],
+            "confidence_level": suggestion_result["confidence_level"],
+            "alternatives": suggestion_result.get("alternatives", []),
+            "status": MappingStatus.SUGGESTED,
+            "model_version": None  # Set if ML model used
+        })
+
+        if suggestion_result["confidence_level"] in [MappingConfidence.HIGH, MappingConfidence.VERY_HIGH]:
             high_confidence_count += 1
 
-    await db.commit()
+    # Bulk insert; RETURNING hands back IDs and timestamps without a refresh per row
+    if suggestion_rows:
+        result = await db.execute(
+            insert(MappingSuggestion).returning(MappingSuggestion),
+            suggestion_rows
+        )
+        suggestions_created = result.scalars().all()
 
-    # Refresh all suggestions to get IDs
-    for suggestion in suggestions_created:
-        await db.refresh(suggestion)
+    await db.commit()
 
     processing_time = time.time() - start_time
 
@@ -268,9 +270,9 @@ async def generate_mapping_suggestions(
     return BatchMappingSummary(
         engagement_id=engagement_id,
         total_lines=total_lines,
-        mapped_count=total_lines - len([l for l in lines if not l[5]]),  # Has mapped_account_id
+        mapped_count=total_lines - len(unmapped_lines),  # Has mapped_account_id
         suggested_count=len(suggestions_created),
-        unmapped_count=len([l for l in lines if not l[5]]) - len(suggestions_created),
+        unmapped_count=len(unmapped_lines) - len(suggestions_created),
         high_confidence_count=high_confidence_count,
         processing_time_seconds=round(processing_time, 2),
         suggestions=[
@@ -7,20 +7,25 @@ Implements:
 3. Machine learning classification
 4. Hybrid approach with confidence scoring
 """
+import asyncio
 import logging
+import os
 import re
-import pickle
+import time
 from typing import List, Dict, Any, Tuple, Optional
 from uuid import UUID
 from difflib import SequenceMatcher
 
 import numpy as np
+from scipy import sparse
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .config import settings
 from .models import MappingConfidence, MappingStatus
+from .model_store import ModelArtifact, load_artifact
 from .schemas import SimilarAccountResponse
+from .similarity_index import get_similarity_index
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +42,35 @@ class RuleBasedMapper:
     keywords, patterns, and regular expressions.
     """
 
+    RULES_QUERY = text("""
+        SELECT
+            rule_name,
+            target_account_code,
+            confidence_boost,
+            priority,
+            is_regex
+        FROM atlas.mapping_rules
+        WHERE is_active = true
+        ORDER BY priority DESC, confidence_boost DESC
+    """)
+
+    @staticmethod
+    def rule_suggestion(rule_name: str, target_code: str, confidence_boost: float, is_regex: bool) -> Dict[str, Any]:
+        """Suggestion produced by a matching rule"""
+        if is_regex:
+            return {
+                "suggested_account_code": target_code,
+                "confidence": min(0.85 + confidence_boost, 0.99),
+                "method": "rule_regex",
+                "rule_name": rule_name
+            }
+        return {
+            "suggested_account_code": target_code,
+            "confidence": min(0.80 + confidence_boost, 0.99),
+            "method": "rule_keyword",
+            "rule_name": rule_name
+        }
+
     @staticmethod
     async def apply_rules(
         account_name: str,
@@ -50,19 +84,7 @@ class RuleBasedMapper:
             Dict with suggested_account_code, confidence, rule_name
             or None if no rule matches
         """
-        query = text("""
-            SELECT
-                rule_name,
-                target_account_code,
-                confidence_boost,
-                priority,
-                is_regex
-            FROM atlas.mapping_rules
-            WHERE is_active = true
-            ORDER BY priority DESC, confidence_boost DESC
-        """)
-
-        result = await db.execute(query)
+        result = await db.execute(RuleBasedMapper.RULES_QUERY)
         rules = result.fetchall()
 
         for rule in rules:
@@ -72,24 +94,63 @@ class RuleBasedMapper:
             if is_regex:
                 # Use regex matching
                 if re.search(rule_name, account_name, re.IGNORECASE):
-                    return {
-                        "suggested_account_code": target_code,
-                        "confidence": min(0.85 + confidence_boost, 0.99),
-                        "method": "rule_regex",
-                        "rule_name": rule_name
-                    }
+                    return RuleBasedMapper.rule_suggestion(rule_name, target_code, confidence_boost, is_regex)
             else:
                 # Simple keyword matching
                 if rule_name.lower() in account_name.lower():
-                    return {
-                        "suggested_account_code": target_code,
-                        "confidence": min(0.80 + confidence_boost, 0.99),
-                        "method": "rule_keyword",
-                        "rule_name": rule_name
-                    }
+                    return RuleBasedMapper.rule_suggestion(rule_name, target_code, confidence_boost, is_regex)
 
         return None
 
+    @staticmethod
+    async def apply_rules_many(
+        account_names: List[str],
+        db: AsyncSession
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Apply mapping rules to a whole trial balance at once
+
+        Rules are fetched once and evaluated in priority order, each against
+        only the names no earlier rule matched, so every name still gets the
+        same rule apply_rules would pick. Keyword rules are a vectorized
+        substring test over the remaining names.
+
+        Returns:
+            One rule suggestion (or None) per account name
+        """
+        matches: List[Optional[Dict[str, Any]]] = [None] * len(account_names)
+        if not account_names:
+            return matches
+
+        result = await db.execute(RuleBasedMapper.RULES_QUERY)
+        rules = result.fetchall()
+
+        names = np.array(account_names, dtype=str)
+        lowered = np.char.lower(names)
+        pending = np.arange(len(names))
+
+        for rule_name, target_code, confidence_boost, priority, is_regex in rules:
+            if is_regex:
+                pattern = re.compile(rule_name, re.IGNORECASE)
+                hits = np.fromiter(
+                    (pattern.search(name) is not None for name in names[pending]),
+                    dtype=bool,
+                    count=len(pending)
+                )
+            else:
+                hits = np.char.find(lowered[pending], rule_name.lower()) >= 0
+
+            for position in pending[hits]:
+                matches[position] = RuleBasedMapper.rule_suggestion(
+                    rule_name, target_code, confidence_boost, is_regex
+                )
+
+            pending = pending[~hits]
+            if not len(pending):
+                break
+
+        return matches
+
 
 # ========================================
 # Similarity-Based Mapper
@@ -100,7 +161,8 @@ class SimilarityMapper:
     String similarity-based account mapping
 
     Uses TF-IDF vectorization and Levenshtein distance
-    to find similar account names in chart of accounts.
+    to find similar account names in chart of accounts,
+    through an index built once per chart of accounts version.
     """
 
     @staticmethod
@@ -123,9 +185,10 @@ class SimilarityMapper:
         Find similar accounts using string similarity
 
         Method:
-        1. Fetch all chart of accounts entries
-        2. Calculate Levenshtein distance to each
-        3. Return top-k most similar
+        1. Get the chart of accounts similarity index (rebuilt only when
+           the chart of accounts changes)
+        2. Shortlist candidates by character n-gram TF-IDF similarity
+        3. Return the top-k by Levenshtein similarity
 
         Args:
             account_name: Account name to match
@@ -135,52 +198,49 @@ class SimilarityMapper:
         Returns:
             List of similar accounts with scores
         """
-        query = text("""
-            SELECT
-                account_code,
-                account_name,
-                account_type
-            FROM atlas.chart_of_accounts
-            WHERE is_active = true
-        """)
-
-        result = await db.execute(query)
-        accounts = result.fetchall()
-
-        # Calculate similarity scores
-        similarities = []
-        for account_code, name, account_type in accounts:
-            score = SimilarityMapper.levenshtein_similarity(account_name, name)
-            if score >= settings.SIMILARITY_THRESHOLD:
-                similarities.append({
-                    "account_code": account_code,
-                    "account_name": name,
-                    "account_type": account_type,
-                    "similarity_score": round(score, 3)
-                })
-
-        # Sort by similarity (descending) and return top-k
-        similarities.sort(key=lambda x: x["similarity_score"], reverse=True)
-        return [
-            SimilarAccountResponse(**sim)
-            for sim in similarities[:top_k]
-        ]
+        index = await get_similarity_index(db)
+        return index.search(account_name, top_k=top_k)
+
+    @staticmethod
+    async def find_similar_accounts_many(
+        account_names: List[str],
+        db: AsyncSession,
+        top_k: int = 5
+    ) -> List[List[SimilarAccountResponse]]:
+        """
+        Find similar accounts for a whole trial balance at once
+
+        Returns:
+            One list of similar accounts per account name
+        """
+        index = await get_similarity_index(db)
+        return index.search_many(account_names, top_k=top_k)
 
     @staticmethod
     async def suggest_mapping(
         account_name: str,
         account_code: str,
-        db: AsyncSession
+        db: AsyncSession,
+        similar_accounts: Optional[List[SimilarAccountResponse]] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Suggest account mapping using similarity
 
         Returns best match if similarity exceeds threshold
+
+        Args:
+            similar_accounts: Precomputed matches (find_similar_accounts_many)
         """
-        similar_accounts = await SimilarityMapper.find_similar_accounts(
-            account_name, db, top_k=1
-        )
+        if similar_accounts is None:
+            similar_accounts = await SimilarityMapper.find_similar_accounts(
+                account_name, db, top_k=1
+            )
+
+        return SimilarityMapper.suggestion_from_matches(similar_accounts)
 
+    @staticmethod
+    def suggestion_from_matches(similar_accounts: List[SimilarAccountResponse]) -> Optional[Dict[str, Any]]:
+        """Similarity suggestion from an account's ranked matches"""
         if similar_accounts and len(similar_accounts) > 0:
             best_match = similar_accounts[0]
 
@@ -219,6 +279,25 @@ class MLMapper:
     Supports Random Forest, Gradient Boosting, and Neural Networks.
     """
 
+    # Engineered features appended to the TF-IDF vector, in training order
+    NUMERIC_FEATURES = (
+        "name_length",
+        "has_cash",
+        "has_receivable",
+        "has_payable",
+        "has_inventory",
+        "has_revenue",
+        "has_expense",
+    )
+
+    ACTIVE_MODEL_QUERY = text("""
+        SELECT model_version, model_path
+        FROM atlas.ml_models
+        WHERE is_active = true
+        ORDER BY trained_at DESC
+        LIMIT 1
+    """)
+
     def __init__(self):
         """Initialize ML mapper"""
         self.model = None
@@ -226,35 +305,122 @@ class MLMapper:
         self.label_encoder = None
         self.model_loaded = False
 
-    def load_model(self, model_path: str = None):
+        self.artifact: Optional[ModelArtifact] = None
+        self.last_error: Optional[str] = None
+        self._failed_at: Optional[float] = None  # Failed loads are retried after the check interval
+        self._checked_at: Optional[float] = None  # Last active MLModel version check
+
+    def load_model(self, model_path: str = None, model_version: str = None):
         """
         Load trained ML model from disk
 
         Args:
-            model_path: Path to pickled model file
+            model_path: Path to model artifact (joblib, or legacy pickle)
+            model_version: Expected model version, for registered models
         """
-        try:
-            path = model_path or settings.ML_MODEL_PATH
-
-            with open(path, 'rb') as f:
-                model_data = pickle.load(f)
-
-            self.model = model_data['model']
-            self.vectorizer = model_data.get('vectorizer')
-            self.label_encoder = model_data.get('label_encoder')
-            self.model_loaded = True
+        artifact = self._read_artifact(model_path or self.default_model_path(), model_version)
+        if artifact is None:
+            return False
 
-            logger.info(f"ML model loaded from {path}")
-            return True
+        self.use_artifact(artifact)
+        return True
 
+    @staticmethod
+    def default_model_path() -> str:
+        """ML_MODEL_PATH, or the legacy pickle while only that is deployed"""
+        if not os.path.exists(settings.ML_MODEL_PATH) and os.path.exists(settings.ML_LEGACY_MODEL_PATH):
+            return settings.ML_LEGACY_MODEL_PATH
+        return settings.ML_MODEL_PATH
+
+    def _read_artifact(self, path: str, model_version: Optional[str] = None) -> Optional[ModelArtifact]:
+        """Load an artifact, recording the failure instead of raising"""
+        try:
+            artifact = load_artifact(path, model_version)
         except FileNotFoundError:
             logger.warning(f"ML model not found at {path}")
-            self.model_loaded = False
-            return False
+            self.last_error = f"ML model not found at {path}"
+            self._failed_at = time.monotonic()
+            return None
         except Exception as e:
             logger.error(f"Error loading ML model: {e}")
-            self.model_loaded = False
-            return False
+            self.last_error = str(e)
+            self._failed_at = time.monotonic()
+            return None
+
+        logger.info(
+            f"ML model {artifact.model_version or ''} loaded from {path} in "
+            f"{artifact.load_time_seconds:.2f}s (memory mapped: {artifact.memory_mapped})"
+        )
+        return artifact
+
+    def use_artifact(self, artifact: ModelArtifact):
+        """Swap in a loaded model; batches already scoring keep the previous one"""
+        self.model = artifact.model
+        self.vectorizer = artifact.vectorizer
+        self.label_encoder = artifact.label_encoder
+        self.artifact = artifact
+        self.model_loaded = True
+        self.last_error = None
+        self._failed_at = None
+
+    def load_due(self) -> bool:
+        """Whether a model load may be attempted (failed loads back off)"""
+        return (
+            self._failed_at is None
+            or time.monotonic() - self._failed_at >= settings.ML_MODEL_CHECK_INTERVAL_SECONDS
+        )
+
+    async def refresh_model(self, db: AsyncSession) -> bool:
+        """
+        Hot swap to the active MLModel version
+
+        Checks atlas.ml_models at most once per ML_MODEL_CHECK_INTERVAL_SECONDS.
+        A newly activated version is loaded off the event loop and swapped
+        in whole; if it fails to load the current model keeps serving.
+        Without an active MLModel, ML_MODEL_PATH is loaded lazily on first
+        prediction.
+
+        Returns:
+            Whether a model is loaded
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < settings.ML_MODEL_CHECK_INTERVAL_SECONDS:
+            return self.model_loaded
+        self._checked_at = now
+
+        try:
+            result = await db.execute(self.ACTIVE_MODEL_QUERY)
+            active = result.fetchone()
+        except Exception as e:
+            logger.error(f"Error checking active ML model: {e}")
+            return self.model_loaded
+
+        if active is None:
+            return self.model_loaded
+
+        model_version, model_path = active
+        path = model_path or self.default_model_path()
+        if self.artifact is not None and (self.artifact.model_version, self.artifact.model_path) == (model_version, path):
+            return True
+
+        artifact = await asyncio.to_thread(self._read_artifact, path, model_version)
+        if artifact is not None:
+            self.use_artifact(artifact)
+
+        return self.model_loaded
+
+    def status(self) -> Dict[str, Any]:
+        """Loaded model details for the health check"""
+        artifact = self.artifact
+        return {
+            "loaded": self.model_loaded,
+            "model_version": artifact.model_version if artifact else None,
+            "model_path": artifact.model_path if artifact else None,
+            "memory_mapped": artifact.memory_mapped if artifact else False,
+            "load_time_seconds": round(artifact.load_time_seconds, 3) if artifact else None,
+            "loaded_at": artifact.loaded_at if artifact else None,
+            "last_error": self.last_error,
+        }
 
     def extract_features(self, account_name: str, account_code: str) -> Dict[str, Any]:
         """
@@ -282,6 +448,37 @@ class MLMapper:
 
         return features
 
+    def build_feature_matrix(self, account_names: List[str], account_codes: List[str]):
+        """
+        Feature matrix for a batch of accounts
+
+        With a vectorizer the TF-IDF block stays sparse and the numeric
+        features are appended as sparse columns, so a whole trial balance
+        never needs a dense (lines x vocabulary) array.
+
+        Returns:
+            (feature matrix, per-account feature dicts)
+        """
+        features = [
+            self.extract_features(account_name, account_code)
+            for account_name, account_code in zip(account_names, account_codes)
+        ]
+
+        # If using vectorizer (TF-IDF), transform text
+        if self.vectorizer:
+            text_features = self.vectorizer.transform(account_names)
+            # Combine with numeric features
+            numeric_features = np.array(
+                [[account[name] for name in self.NUMERIC_FEATURES] for account in features],
+                dtype=np.float64
+            )
+            features_matrix = sparse.hstack([text_features, sparse.csr_matrix(numeric_features)], format="csr")
+        else:
+            # Use only engineered features
+            features_matrix = np.array([list(account.values()) for account in features])
+
+        return features_matrix, features
+
     async def predict_mapping(
         self,
         account_name: str,
@@ -295,88 +492,105 @@ class MLMapper:
             Dict with suggested_account_code, confidence, alternatives
             or None if model not loaded or prediction fails
         """
+        predictions = await self.predict_many([account_name], [account_code], db)
+        return predictions[0]
+
+    async def predict_many(
+        self,
+        account_names: List[str],
+        account_codes: List[str],
+        db: AsyncSession
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Predict account mappings for a batch of accounts
+
+        All accounts are vectorized together and scored with a single
+        predict_proba call; suggested account names are fetched with one
+        query.
+
+        Returns:
+            One prediction (or None) per account, as predict_mapping
+        """
+        if not account_names:
+            return []
+
         if not self.model_loaded:
+            if not self.load_due():
+                return [None] * len(account_names)
             logger.warning("ML model not loaded, attempting to load...")
-            if not self.load_model():
-                return None
+            if not await asyncio.to_thread(self.load_model):
+                return [None] * len(account_names)
 
         try:
-            # Extract features
-            features = self.extract_features(account_name, account_code)
-
-            # If using vectorizer (TF-IDF), transform text
-            if self.vectorizer:
-                text_features = self.vectorizer.transform([account_name])
-                # Combine with numeric features
-                numeric_features = np.array([[
-                    features["name_length"],
-                    features["has_cash"],
-                    features["has_receivable"],
-                    features["has_payable"],
-                    features["has_inventory"],
-                    features["has_revenue"],
-                    features["has_expense"],
-                ]])
-                X = np.hstack([text_features.toarray(), numeric_features])
-            else:
-                # Use only engineered features
-                X = np.array([[v for v in features.values()]])
+            features_matrix, features = self.build_feature_matrix(account_names, account_codes)
 
             # Predict with probability
             if hasattr(self.model, 'predict_proba'):
-                probas = self.model.predict_proba(X)[0]
-                predicted_class_idx = np.argmax(probas)
-                confidence = float(probas[predicted_class_idx])
+                probas = self.model.predict_proba(features_matrix)
+                predicted_class_idx = np.argmax(probas, axis=1)
+                confidences = probas[np.arange(len(probas)), predicted_class_idx]
 
                 # Get top 3 predictions
-                top_indices = np.argsort(probas)[::-1][:3]
+                top_indices = np.argsort(probas, axis=1)[:, ::-1][:, :3]
+                alternative_indices = top_indices[:, 1:]  # Skip first (main prediction)
 
                 if self.label_encoder:
-                    predicted_account = self.label_encoder.inverse_transform([predicted_class_idx])[0]
-                    alternatives = [
-                        {
-                            "account_code": self.label_encoder.inverse_transform([idx])[0],
-                            "confidence": float(probas[idx])
-                        }
-                        for idx in top_indices[1:]  # Skip first (main prediction)
-                    ]
+                    predicted_accounts = self.label_encoder.inverse_transform(predicted_class_idx).tolist()
+                    alternative_accounts = self.label_encoder.inverse_transform(
+                        alternative_indices.ravel()
+                    ).reshape(alternative_indices.shape).tolist()
                 else:
                     # Fallback if no label encoder
-                    predicted_account = str(predicted_class_idx)
-                    alternatives = []
+                    predicted_accounts = [str(idx) for idx in predicted_class_idx]
+                    alternative_accounts = None
 
-                # Fetch account name from database
+                # Fetch account names from database
                 query = text("""
-                    SELECT account_name
+                    SELECT DISTINCT ON (account_code)
+                        account_code,
+                        account_name
                     FROM atlas.chart_of_accounts
-                    WHERE account_code = :account_code
-                    LIMIT 1
+                    WHERE account_code = ANY(:account_codes)
                 """)
-                result = await db.execute(query, {"account_code": predicted_account})
-                row = result.fetchone()
-
-                return {
-                    "suggested_account_code": predicted_account,
-                    "suggested_account_name": row[0] if row else "Unknown",
-                    "confidence": confidence,
-                    "method": "ml_classification",
-                    "alternatives": alternatives,
-                    "features": features
-                }
+                result = await db.execute(
+                    query, {"account_codes": sorted({str(code) for code in predicted_accounts})}
+                )
+                account_names_by_code = dict(result.fetchall())
+
+                predictions = []
+                for row, predicted_account in enumerate(predicted_accounts):
+                    alternatives = [
+                        {
+                            "account_code": alternative_account,
+                            "confidence": float(probas[row, idx])
+                        }
+                        for alternative_account, idx in zip(alternative_accounts[row], alternative_indices[row])
+                    ] if alternative_accounts is not None else []
+
+                    predictions.append({
+                        "suggested_account_code": predicted_account,
+                        "suggested_account_name": account_names_by_code.get(str(predicted_account), "Unknown"),
+                        "confidence": float(confidences[row]),
+                        "method": "ml_classification",
+                        "alternatives": alternatives,
+                        "features": features[row]
+                    })
+                return predictions
             else:
                 # Model doesn't support probability prediction
-                prediction = self.model.predict(X)[0]
-
-                return {
-                    "suggested_account_code": str(prediction),
-                    "confidence": 0.75,  # Default confidence
-                    "method": "ml_classification",
-                    "alternatives": []
-                }
+                return [
+                    {
+                        "suggested_account_code": str(prediction),
+                        "confidence": 0.75,  # Default confidence
+                        "method": "ml_classification",
+                        "alternatives": []
+                    }
+                    for prediction in self.model.predict(features_matrix)
+                ]
 
         except Exception as e:
             logger.error(f"ML prediction error: {e}")
-            return None
+            return [None] * len(account_names)
 
 
 # ========================================
@@ -398,22 +612,25 @@ class HybridMapper:
         """Initialize hybrid mapper"""
         self.rule_mapper = RuleBasedMapper()
         self.similarity_mapper = SimilarityMapper()
+        # The ML model is loaded on first use (and swapped when a new
+        # MLModel version is activated), not at import time in every worker
         self.ml_mapper = MLMapper()
 
-        # Attempt to load ML model
-        self.ml_mapper.load_model()
-
     async def suggest_mapping(
         self,
         account_name: str,
         account_code: str,
         db: AsyncSession,
         use_ml: bool = True,
-        use_rules: bool = True
+        use_rules: bool = True,
+        similar_accounts: Optional[List[SimilarAccountResponse]] = None
     ) -> Dict[str, Any]:
         """
         Generate mapping suggestion using hybrid approach
 
+        Args:
+            similar_accounts: Precomputed similarity matches for this account
+
         Returns:
             Complete mapping suggestion with confidence score
         """
@@ -427,15 +644,71 @@ class HybridMapper:
 
         # 2. Try ML prediction
         if use_ml:
+            await self.ml_mapper.refresh_model(db)
             ml_result = await self.ml_mapper.predict_mapping(account_name, account_code, db)
             if ml_result:
                 suggestions.append(ml_result)
 
         # 3. Try similarity mapping
-        similarity_result = await self.similarity_mapper.suggest_mapping(account_name, account_code, db)
+        similarity_result = await self.similarity_mapper.suggest_mapping(
+            account_name, account_code, db, similar_accounts=similar_accounts
+        )
         if similarity_result:
             suggestions.append(similarity_result)
 
+        return self.select_suggestion(suggestions)
+
+    async def suggest_mapping_many(
+        self,
+        account_names: List[str],
+        account_codes: List[str],
+        db: AsyncSession,
+        use_ml: bool = True,
+        use_rules: bool = True,
+        similar_accounts: Optional[List[List[SimilarAccountResponse]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate mapping suggestions for a whole trial balance
+
+        Each method runs once over the batch (one rules query, one model
+        call, one similarity index search) and the results are combined per
+        account exactly as suggest_mapping does.
+
+        Args:
+            similar_accounts: Precomputed similarity matches, one list per account
+
+        Returns:
+            One mapping suggestion per account
+        """
+        no_results = [None] * len(account_names)
+
+        rule_results = await self.rule_mapper.apply_rules_many(account_names, db) if use_rules else no_results
+        if use_ml:
+            await self.ml_mapper.refresh_model(db)
+            ml_results = await self.ml_mapper.predict_many(account_names, account_codes, db)
+        else:
+            ml_results = no_results
+        if similar_accounts is None:
+            similar_accounts = await self.similarity_mapper.find_similar_accounts_many(
+                account_names, db, top_k=1
+            )
+
+        return [
+            self.select_suggestion([
+                suggestion
+                for suggestion in (
+                    rule_result,
+                    ml_result,
+                    self.similarity_mapper.suggestion_from_matches(line_similar_accounts),
+                )
+                if suggestion
+            ])
+            for rule_result, ml_result, line_similar_accounts in zip(rule_results, ml_results, similar_accounts)
+        ]
+
+    @staticmethod
+    def select_suggestion(suggestions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Select the most confident suggestion and grade its confidence"""
         # Select best suggestion based on confidence
         if not suggestions:
             return {
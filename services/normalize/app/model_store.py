@@ -0,0 +1,161 @@
+"""
+Account mapping model artifacts
+
+An artifact is one joblib file per model version holding the model,
+vectorizer and label encoder. Files are written uncompressed so numpy
+arrays inside them (coefficients, layer weights, idf vectors) can be
+loaded with mmap_mode="r": every uvicorn worker maps the same read-only
+pages from the OS page cache instead of holding a private copy, and
+pages are only read in when a prediction touches them.
+
+Artifacts are written to a temporary file and renamed into place, so a
+worker never maps a half-written file and workers still mapping the old
+file keep a valid mapping. Legacy pickle files (.pkl) are still loaded,
+without memory mapping.
+"""
+import logging
+import os
+import pickle
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import joblib
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT_VERSION = 1
+
+
+class ModelArtifactError(Exception):
+    """Raised when a model artifact cannot be used"""
+    pass
+
+
+@dataclass
+class ModelArtifact:
+    """A loaded model version"""
+    model: Any
+    vectorizer: Any
+    label_encoder: Any
+    model_version: Optional[str]
+    model_path: str
+    memory_mapped: bool
+    load_time_seconds: float
+    loaded_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def save_artifact(
+    path: str,
+    model: Any,
+    vectorizer: Any = None,
+    label_encoder: Any = None,
+    model_version: Optional[str] = None
+) -> str:
+    """
+    Write a model artifact for memory-mapped loading
+
+    Args:
+        path: Destination, conventionally one file per model version
+        model_version: Recorded in the file and checked against the
+            MLModel row when the artifact is activated
+
+    Returns:
+        The artifact path
+    """
+    data = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "model_version": model_version,
+        "model": model,
+        "vectorizer": vectorizer,
+        "label_encoder": label_encoder,
+    }
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        # compress=0: compressed arrays cannot be memory mapped
+        joblib.dump(data, temp_path, compress=0)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return path
+
+
+def load_artifact(path: str, model_version: Optional[str] = None) -> ModelArtifact:
+    """
+    Load a model artifact
+
+    Args:
+        path: Artifact file (.joblib, or a legacy .pkl)
+        model_version: Expected version, when loading a registered MLModel
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ModelArtifactError: If the file is not a usable artifact for model_version
+    """
+    started = time.perf_counter()
+
+    if path.endswith(".pkl"):
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        memory_mapped = False
+    else:
+        data = joblib.load(path, mmap_mode="r" if settings.ML_MODEL_MMAP else None)
+        memory_mapped = settings.ML_MODEL_MMAP
+
+    if not isinstance(data, dict) or "model" not in data:
+        raise ModelArtifactError(f"{path} is not a model artifact")
+
+    format_version = data.get("format_version", ARTIFACT_FORMAT_VERSION)
+    if format_version > ARTIFACT_FORMAT_VERSION:
+        raise ModelArtifactError(
+            f"{path} has artifact format {format_version}, "
+            f"this service reads up to {ARTIFACT_FORMAT_VERSION}"
+        )
+
+    artifact_version = data.get("model_version")
+    if model_version and artifact_version and artifact_version != model_version:
+        raise ModelArtifactError(
+            f"{path} contains model version {artifact_version}, expected {model_version}"
+        )
+
+    return ModelArtifact(
+        model=data["model"],
+        vectorizer=data.get("vectorizer"),
+        label_encoder=data.get("label_encoder"),
+        model_version=model_version or artifact_version,
+        model_path=path,
+        memory_mapped=memory_mapped,
+        load_time_seconds=time.perf_counter() - started,
+    )
+
+
+def worker_memory() -> Dict[str, Optional[float]]:
+    """
+    Resident memory of this worker process, in MiB
+
+    rss_file_mb is the file-backed part of the resident set, which is where
+    memory-mapped model pages shared with other workers are counted.
+    """
+    memory: Dict[str, Optional[float]] = {"rss_mb": None, "rss_anon_mb": None, "rss_file_mb": None}
+
+    try:
+        with open("/proc/self/status") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        # Not Linux: peak RSS is the best available figure
+        import resource
+
+        memory["rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        return memory
+
+    for key, field_name in (("rss_mb", "VmRSS"), ("rss_anon_mb", "RssAnon"), ("rss_file_mb", "RssFile")):
+        if field_name in status:
+            memory[key] = round(int(status[field_name].split()[0]) / 1024, 1)
+
+    return memory
@@ -12,11 +12,34 @@ from .models import MappingConfidence, MappingStatus
 # Health & Status
 # ========================================
 
+class ModelStatusResponse(BaseModel):
+    """Account mapping model loaded in this worker"""
+    loaded: bool
+    model_version: Optional[str] = None
+    model_path: Optional[str] = None
+    memory_mapped: bool = False
+    load_time_seconds: Optional[float] = None
+    loaded_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+    model_config = ConfigDict(protected_namespaces=())
+
+
+class WorkerStatusResponse(BaseModel):
+    """Memory of the worker process that served the health check"""
+    pid: int
+    rss_mb: Optional[float] = None
+    rss_anon_mb: Optional[float] = None
+    rss_file_mb: Optional[float] = None  # Includes memory-mapped model pages shared across workers
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str
     service: str
     version: str
+    worker: Optional[WorkerStatusResponse] = None
+    ml_model: Optional[ModelStatusResponse] = None
 
 
 # ========================================
@@ -0,0 +1,212 @@
+"""
+In-memory chart of accounts similarity index
+
+Mapping a trial balance used to fetch the whole chart of accounts and run a
+SequenceMatcher against every account, once per trial balance line. The
+index instead:
+
+1. Loads the active chart of accounts once per version. The version is an
+   md5 of the active accounts computed in the database, so any insert,
+   rename or deactivation invalidates the index on the next request.
+2. Vectorizes account names as character n-gram TF-IDF (L2-normalized),
+   once.
+3. Shortlists candidates for a whole batch of trial balance names with one
+   sparse matrix product (cosine similarity), in blocks of queries.
+4. Rescores each shortlist with the same SequenceMatcher ratio as before, so
+   scores, thresholds and confidences keep their meaning.
+
+Without scikit-learn the index falls back to scoring every account, still
+without a database round trip per line.
+"""
+import logging
+import time
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .schemas import SimilarAccountResponse
+
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+CANDIDATES_PER_MATCH = 20  # TF-IDF shortlist rescored with SequenceMatcher, per requested match
+MIN_CANDIDATES = 100
+QUERY_BLOCK_SIZE = 2048  # Queries per sparse product; bounds the dense block to 2048 x accounts
+
+_COA_VERSION_SQL = text("""
+    SELECT md5(string_agg(
+        account_code || E'\\t' || account_name || E'\\t' || account_type::text,
+        E'\\n' ORDER BY account_code
+    ))
+    FROM atlas.chart_of_accounts
+    WHERE is_active = true
+""")
+
+_COA_ACCOUNTS_SQL = text("""
+    SELECT
+        account_code,
+        account_name,
+        account_type
+    FROM atlas.chart_of_accounts
+    WHERE is_active = true
+""")
+
+
+class AccountSimilarityIndex:
+    """Top-k similar chart of accounts entries for many account names at once"""
+
+    def __init__(self, accounts: Sequence[Sequence[Any]], version: Optional[str] = None):
+        """
+        Args:
+            accounts: (account_code, account_name, account_type) rows
+            version: Chart of accounts version the rows were loaded at
+        """
+        self.version = version
+        self.accounts = [
+            (str(code), str(name), str(getattr(account_type, "value", account_type)))
+            for code, name, account_type in accounts
+        ]
+        self._names = [name.lower() for _, name, _ in self.accounts]
+
+        self.vectorizer = None
+        self.matrix_t = None
+        if SKLEARN_AVAILABLE and self.accounts:
+            self.vectorizer = TfidfVectorizer(
+                analyzer="char_wb",
+                ngram_range=(settings.NGRAM_RANGE_MIN, settings.NGRAM_RANGE_MAX),
+                sublinear_tf=True,
+                dtype=np.float32,
+            )
+            # Transposed once so each block is (queries x ngrams) @ (ngrams x accounts)
+            self.matrix_t = self.vectorizer.fit_transform(self._names).T.tocsr()
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def search(self, account_name: str, top_k: int = 5, threshold: Optional[float] = None) -> List[SimilarAccountResponse]:
+        return self.search_many([account_name], top_k, threshold)[0]
+
+    def search_many(
+        self,
+        account_names: Sequence[str],
+        top_k: int = 5,
+        threshold: Optional[float] = None
+    ) -> List[List[SimilarAccountResponse]]:
+        """
+        Find similar accounts for every name in one pass
+
+        Args:
+            account_names: Trial balance account names
+            top_k: Matches per name
+            threshold: Minimum similarity (default settings.SIMILARITY_THRESHOLD)
+
+        Returns:
+            One list of matches per input name, most similar first
+        """
+        threshold = settings.SIMILARITY_THRESHOLD if threshold is None else threshold
+
+        # Trial balances repeat names across entities and periods; score each once
+        positions: Dict[str, int] = {}
+        queries: List[str] = []
+        slots = []
+        for name in account_names:
+            query = (name or "").lower()
+            if query not in positions:
+                positions[query] = len(queries)
+                queries.append(query)
+            slots.append(positions[query])
+
+        shortlist = max(MIN_CANDIDATES, CANDIDATES_PER_MATCH * top_k)
+        results = [self._rescore(query, candidates, top_k, threshold)
+                   for query, candidates in zip(queries, self._candidates(queries, shortlist))]
+        return [results[slot] for slot in slots]
+
+    def _candidates(self, queries: List[str], shortlist: int):
+        """Candidate account positions per query, from the TF-IDF shortlist"""
+        if self.matrix_t is None:
+            everything = range(len(self.accounts))
+            for _ in queries:
+                yield everything
+            return
+
+        for start in range(0, len(queries), QUERY_BLOCK_SIZE):
+            block = self.vectorizer.transform(queries[start:start + QUERY_BLOCK_SIZE])
+            scores = (block @ self.matrix_t).toarray()
+            if shortlist < scores.shape[1]:
+                top = np.argpartition(-scores, shortlist - 1, axis=1)[:, :shortlist]
+            else:
+                top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+            for row, candidates in enumerate(top):
+                candidates = candidates[scores[row, candidates] > 0]
+                # Best first, so the top-k bound in _rescore tightens early
+                yield candidates[np.argsort(-scores[row, candidates], kind="stable")]
+
+    def _rescore(self, query: str, candidates, top_k: int, threshold: float) -> List[SimilarAccountResponse]:
+        scored = []
+        matcher = SequenceMatcher(None, query)
+        floor = threshold
+        for position in candidates:
+            matcher.set_seq2(self._names[position])
+            # real_quick_ratio and quick_ratio are upper bounds of ratio
+            if matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor:
+                continue
+            score = matcher.ratio()
+            if score >= floor:
+                scored.append((round(score, 3), int(position)))
+                if len(scored) >= top_k:
+                    # Anything below the current k-th best cannot make the cut,
+                    # short of tying it after rounding
+                    scored.sort(key=lambda match: (-match[0], match[1]))
+                    del scored[top_k:]
+                    floor = max(threshold, scored[-1][0] - 0.0005)
+
+        # Ties keep chart of accounts order, as the full scan did
+        scored.sort(key=lambda match: (-match[0], match[1]))
+        return [
+            SimilarAccountResponse(
+                account_code=self.accounts[position][0],
+                account_name=self.accounts[position][1],
+                account_type=self.accounts[position][2],
+                similarity_score=score
+            )
+            for score, position in scored[:top_k]
+        ]
+
+
+_shared_index: Optional[AccountSimilarityIndex] = None
+
+
+async def get_similarity_index(db: AsyncSession) -> AccountSimilarityIndex:
+    """
+    Process-wide similarity index for the current chart of accounts
+
+    Costs one aggregate query per call; the chart of accounts is only
+    re-read and re-vectorized when its version changes.
+    """
+    global _shared_index
+
+    result = await db.execute(_COA_VERSION_SQL)
+    version = result.scalar()
+
+    index = _shared_index
+    if index is not None and index.version == version:
+        return index
+
+    started = time.perf_counter()
+    result = await db.execute(_COA_ACCOUNTS_SQL)
+    index = AccountSimilarityIndex(result.fetchall(), version)
+    _shared_index = index
+    logger.info(
+        f"Built chart of accounts similarity index: {len(index)} accounts "
+        f"in {time.perf_counter() - started:.2f}s (version {version})"
+    )
+    return index
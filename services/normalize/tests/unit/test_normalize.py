@@ -1,4 +1,5 @@
 """Unit tests for Normalize Service"""
+import asyncio
 import pytest
 from datetime import datetime
 from uuid import uuid4, UUID
@@ -280,6 +281,28 @@ class TestRuleBasedMapper:
 
         assert result is None
 
+    @pytest.mark.asyncio
+    async def test_apply_rules_many_keeps_rule_priority(self):
+        """Batch rule matching picks the same rule as apply_rules for every name"""
+        from app.mapping_engine import RuleBasedMapper
+
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = [
+            ("^accounts? pay", "2000", 0.1, 20, True),
+            ("payable", "2100", 0.0, 10, False),
+            ("cash", "1000", 0.1, 5, False),
+        ]
+
+        db = AsyncMock()
+        db.execute = AsyncMock(return_value=mock_result)
+
+        names = ["Accounts Payable", "Notes payable", "Petty Cash", "Inventory"]
+        results = await RuleBasedMapper.apply_rules_many(names, db)
+
+        assert db.execute.await_count == 1
+        assert results == [await RuleBasedMapper.apply_rules(name, "", db) for name in names]
+        assert [r and r["suggested_account_code"] for r in results] == ["2000", "2100", "1000", None]
+
 
 class TestSimilarityMapper:
     """Test similarity-based mapper"""
@@ -322,6 +345,61 @@ class TestSimilarityMapper:
         # Should find cash-related accounts
         assert any("Cash" in acc.account_name for acc in similar)
 
+    def test_similarity_index_matches_full_scan(self):
+        """Batch index search returns the same matches as scoring every account"""
+        from app.config import settings
+        from app.mapping_engine import SimilarityMapper
+        from app.similarity_index import AccountSimilarityIndex
+
+        accounts = [
+            (str(1000 + i), f"{prefix} {name}".strip(), "asset")
+            for i, (prefix, name) in enumerate(
+                (prefix, name)
+                for prefix in ("", "Domestic", "Foreign", "Other")
+                for name in ("Cash", "Cash in Bank", "Petty Cash", "Accounts Receivable",
+                             "Accounts Payable", "Accrued Payroll", "Prepaid Insurance", "Inventory")
+            )
+        ]
+        queries = ["Cash on Hand", "ACCOUNTS RECEIVABLE", "Foreign Acounts Payable", "Zzz", "Cash on Hand"]
+
+        results = AccountSimilarityIndex(accounts, "v1").search_many(queries, top_k=3)
+
+        assert len(results) == len(queries)
+        for query, matches in zip(queries, results):
+            expected = sorted(
+                (
+                    (round(SimilarityMapper.levenshtein_similarity(query, name), 3), code)
+                    for code, name, _ in accounts
+                ),
+                key=lambda match: match[0],
+                reverse=True
+            )
+            expected = [match for match in expected if match[0] >= settings.SIMILARITY_THRESHOLD][:3]
+            assert [(acc.similarity_score, acc.account_code) for acc in matches] == expected
+
+    @pytest.mark.asyncio
+    async def test_similarity_index_rebuilds_on_version_change(self):
+        """The chart of accounts is only re-read when its version changes"""
+        from app import similarity_index
+
+        def db_returning(version, accounts):
+            version_result = MagicMock()
+            version_result.scalar.return_value = version
+            accounts_result = MagicMock()
+            accounts_result.fetchall.return_value = accounts
+            db = AsyncMock()
+            db.execute = AsyncMock(side_effect=[version_result, accounts_result])
+            return db
+
+        similarity_index._shared_index = None
+        first = await similarity_index.get_similarity_index(db_returning("v1", [("1000", "Cash", "asset")]))
+        same = await similarity_index.get_similarity_index(db_returning("v1", []))
+        changed = await similarity_index.get_similarity_index(db_returning("v2", [("1010", "Cash in Bank", "asset")]))
+
+        assert same is first
+        assert changed is not first
+        assert changed.search("cash in bank")[0].account_code == "1010"
+
 
 class TestMLMapper:
     """Test ML-based mapper"""
@@ -358,6 +436,114 @@ class TestMLMapper:
         assert features["has_expense"] == 1
         assert features["has_revenue"] == 0
 
+    @pytest.mark.asyncio
+    async def test_predict_many_single_model_call(self):
+        """A batch is scored with one sparse predict_proba call"""
+        import numpy as np
+        from scipy import sparse
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.preprocessing import LabelEncoder
+        from app.mapping_engine import MLMapper
+
+        names = ["Cash in Bank", "Accounts Payable", "Sales Revenue"]
+        ml_mapper = MLMapper()
+        ml_mapper.vectorizer = TfidfVectorizer().fit(names)
+        ml_mapper.label_encoder = LabelEncoder().fit(["1000", "2000", "4000"])
+        ml_mapper.model = MagicMock()
+        ml_mapper.model.predict_proba.return_value = np.array([
+            [0.7, 0.2, 0.1],
+            [0.1, 0.8, 0.1],
+            [0.2, 0.1, 0.7],
+        ])
+        ml_mapper.model_loaded = True
+
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = [("1000", "Cash"), ("2000", "Accounts Payable")]
+        db = AsyncMock()
+        db.execute = AsyncMock(return_value=mock_result)
+
+        predictions = await ml_mapper.predict_many(names, ["101", "201", "401"], db)
+
+        ml_mapper.model.predict_proba.assert_called_once()
+        X = ml_mapper.model.predict_proba.call_args[0][0]
+        assert sparse.issparse(X)
+        assert X.shape == (3, len(ml_mapper.vectorizer.vocabulary_) + len(MLMapper.NUMERIC_FEATURES))
+        assert db.execute.await_count == 1
+        assert [p["suggested_account_code"] for p in predictions] == ["1000", "2000", "4000"]
+        assert predictions[0]["suggested_account_name"] == "Cash"
+        assert predictions[2]["suggested_account_name"] == "Unknown"
+        assert predictions[0]["alternatives"][0] == {"account_code": "2000", "confidence": 0.2}
+
+    def test_model_artifact_memory_mapped(self, tmp_path):
+        """Artifacts load with memory-mapped arrays and check their version"""
+        import numpy as np
+        from sklearn.linear_model import LogisticRegression
+        from app.model_store import ModelArtifactError, load_artifact, save_artifact
+
+        model = LogisticRegression().fit(np.array([[0.0], [1.0], [2.0], [3.0]]), [0, 0, 1, 1])
+        path = save_artifact(str(tmp_path / "account_mapper-v2.joblib"), model, model_version="v2")
+
+        artifact = load_artifact(path, "v2")
+
+        assert artifact.memory_mapped
+        assert isinstance(artifact.model.coef_, np.memmap)
+        assert artifact.model.predict(np.array([[3.0]]))[0] == 1
+        with pytest.raises(ModelArtifactError):
+            load_artifact(path, "v3")
+
+    @pytest.mark.asyncio
+    async def test_legacy_pickle_loaded_when_joblib_missing(self, tmp_path):
+        """Deployments that only ship account_mapper.pkl keep their model"""
+        import pickle
+        from app.mapping_engine import MLMapper
+
+        legacy_path = tmp_path / "account_mapper.pkl"
+        legacy_path.write_bytes(pickle.dumps({"model": {"name": "legacy"}}))
+
+        ml_mapper = MLMapper()
+        with patch("app.mapping_engine.settings.ML_MODEL_PATH", str(tmp_path / "account_mapper.joblib")), \
+                patch("app.mapping_engine.settings.ML_LEGACY_MODEL_PATH", str(legacy_path)):
+            assert MLMapper.default_model_path() == str(legacy_path)
+            # The lazy load in predict_many runs off the event loop
+            with patch("app.mapping_engine.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+                await ml_mapper.predict_many(["Cash"], ["101"], AsyncMock())
+            to_thread.assert_any_call(ml_mapper.load_model)
+
+        assert ml_mapper.model == {"name": "legacy"}
+        assert ml_mapper.status()["model_path"] == str(legacy_path)
+
+    @pytest.mark.asyncio
+    async def test_refresh_model_hot_swaps_active_version(self, tmp_path):
+        """A newly activated MLModel version replaces the loaded model"""
+        from app.mapping_engine import MLMapper
+        from app.model_store import save_artifact
+
+        paths = {
+            version: save_artifact(str(tmp_path / f"account_mapper-{version}.joblib"), {"name": version}, model_version=version)
+            for version in ("v1", "v2")
+        }
+
+        def db_with_active(version):
+            mock_result = MagicMock()
+            mock_result.fetchone.return_value = (version, paths.get(version, str(tmp_path / "missing.joblib")))
+            db = AsyncMock()
+            db.execute = AsyncMock(return_value=mock_result)
+            return db
+
+        ml_mapper = MLMapper()
+        with patch("app.mapping_engine.settings.ML_MODEL_CHECK_INTERVAL_SECONDS", 0):
+            assert await ml_mapper.refresh_model(db_with_active("v1"))
+            assert ml_mapper.model == {"name": "v1"}
+
+            assert await ml_mapper.refresh_model(db_with_active("v2"))
+            assert ml_mapper.model == {"name": "v2"}
+            assert ml_mapper.status()["model_version"] == "v2"
+
+            # A version that fails to load leaves the current model serving
+            assert await ml_mapper.refresh_model(db_with_active("v3"))
+            assert ml_mapper.model == {"name": "v2"}
+            assert ml_mapper.status()["last_error"]
+
 
 # ========================================
 # Configuration Tests
@@ -207,28 +207,44 @@ async def calculate_mus_sample_size(
 async def select_mus_sample(
     population_items: List[Dict],
     sampling_interval: Decimal,
+    selection_method: str = "systematic",
+    extract_top_stratum: bool = True,
+    seed: Optional[int] = None,
     current_user_id: UUID = Depends(get_current_user_id)
 ):
     """
-    Select sample items using MUS systematic selection.
+    Select sample items using MUS systematic or cell selection.
 
     Each monetary unit has equal probability of selection,
     automatically giving larger items higher selection probability.
+    Items at or above the sampling interval are returned as a top
+    stratum for 100% examination.
     """
     try:
-        selected = MonetaryUnitSampling.select_sample(
+        result = MonetaryUnitSampling.select_sample_stratified(
             population=population_items,
-            sampling_interval=sampling_interval
+            sampling_interval=sampling_interval,
+            selection_method=selection_method,
+            extract_top_stratum=extract_top_stratum,
+            seed=seed
         )
 
-        logger.info(f"Selected {len(selected)} items using MUS")
+        selected_items = result["top_stratum_items"] + result["sample_items"]
+        logger.info(
+            f"Selected {selected_items} items using MUS "
+            f"({result['top_stratum_items']} top stratum)"
+        )
 
         return {
-            "method": "mus",
-            "selected_items": len(selected),
-            "sample": selected
+            **result,
+            "selected_items": selected_items
         }
 
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Error selecting MUS sample: {e}")
         raise HTTPException(
@@ -129,51 +129,176 @@ class MonetaryUnitSampling:
         population: List[Dict],  # List of {"id": ..., "amount": ...}
         sample_size: int,
         sampling_interval: Decimal,
+        random_start: Optional[Decimal] = None,
     ) -> List[Dict]:
         """
         Select sample items using systematic selection with random start.
 
+        The cumulative amount column is built once (int64 cents) and every
+        selection point is located with one vectorized searchsorted, so
+        selection is O(N log N) for the sort plus O(n log N) for the hits.
+
         Args:
             population: List of population items with 'id' and 'amount'
             sample_size: Number of items to select
             sampling_interval: Monetary interval between selections
+            random_start: Optional fixed start (defaults to a random point in the first interval)
 
         Returns:
             List of selected sample items
         """
-        # Sort population by ID for systematic selection
-        sorted_pop = sorted(population, key=lambda x: x["id"])
+        if not population:
+            return []
 
-        # Calculate cumulative amounts
-        cumulative_amounts = []
-        cumulative = Decimal("0")
-        for item in sorted_pop:
-            cumulative += Decimal(str(item["amount"]))
-            cumulative_amounts.append(cumulative)
+        # Sort population by ID for systematic selection
+        order = cls._sort_by_id(population)
+        cumulative = np.cumsum(cls._amounts_in_cents(population)[order])
 
         # Random start between 0 and sampling interval
-        random_start = Decimal(str(random.uniform(0, float(sampling_interval))))
+        if random_start is None:
+            random_start = Decimal(str(random.uniform(0, float(sampling_interval))))
+
+        interval_cents = float(sampling_interval) * 100
+        points = float(random_start) * 100 + interval_cents * np.arange(sample_size)
+        # Stop once a selection point passes the population total
+        points = points[points <= cumulative[-1]]
 
-        # Select sample items
-        selected_items = []
-        current_selection_point = random_start
+        hits = cls._locate_selections(cumulative, points)
+        return [population[i] for i in order[hits]]
 
-        for _ in range(sample_size):
-            # Find item containing this selection point
-            for i, cum_amount in enumerate(cumulative_amounts):
-                if cum_amount >= current_selection_point:
-                    if sorted_pop[i] not in selected_items:
-                        selected_items.append(sorted_pop[i])
-                    break
+    @classmethod
+    def select_sample_stratified(
+        cls,
+        population: List[Dict],  # List of {"id": ..., "amount": ...}
+        sampling_interval: Decimal,
+        selection_method: str = "systematic",  # "systematic" or "cell"
+        extract_top_stratum: bool = True,
+        strata_boundaries: Optional[List[Decimal]] = None,
+        stratum_intervals: Optional[List[Decimal]] = None,
+        seed: Optional[int] = None,
+    ) -> Dict:
+        """
+        Select an MUS sample with top-stratum extraction, cell selection and
+        optional amount strata.
 
-            # Move to next selection point
-            current_selection_point += sampling_interval
+        - Top stratum: items at or above the sampling interval are certain to be
+          hit, so they are extracted and examined 100% before sampling.
+        - Systematic selection: one random start, then every interval.
+        - Cell selection: one random point inside every interval-sized cell,
+          which avoids patterns in the population order lining up with the interval.
+        - Strata: items are split on amount boundaries and each stratum is
+          sampled separately with its own interval (defaults to sampling_interval).
 
-            # Stop if we've exceeded population
-            if current_selection_point > cumulative_amounts[-1]:
-                break
+        Args:
+            population: List of population items with 'id' and 'amount'
+            sampling_interval: Monetary interval between selections
+            selection_method: "systematic" or "cell"
+            extract_top_stratum: Examine items >= sampling interval 100%
+            strata_boundaries: Ascending amount boundaries separating strata
+            stratum_intervals: Sampling interval per stratum (len(boundaries) + 1)
+            seed: Seed for reproducible selection
 
-        return selected_items
+        Returns:
+            Dictionary with the top stratum, selected sample and per-stratum details
+        """
+        if selection_method not in ("systematic", "cell"):
+            raise ValueError(f"Unsupported selection method: {selection_method}")
+
+        boundaries = [Decimal(str(b)) for b in (strata_boundaries or [])]
+        intervals = [Decimal(str(i)) for i in (stratum_intervals or [sampling_interval] * (len(boundaries) + 1))]
+        if len(intervals) != len(boundaries) + 1:
+            raise ValueError("stratum_intervals must have one entry per stratum (len(strata_boundaries) + 1)")
+
+        rng = np.random.default_rng(seed)
+        order = cls._sort_by_id(population)
+        amounts = cls._amounts_in_cents(population)[order]
+
+        # Top stratum: individually significant items
+        top = np.zeros(len(amounts), dtype=bool)
+        if extract_top_stratum:
+            top = amounts >= int(Decimal(str(sampling_interval)) * 100)
+        top_items = [population[i] for i in order[top]]
+
+        # Assign the remaining items to amount strata in one pass
+        boundary_cents = np.array([int(b * 100) for b in boundaries], dtype=np.int64)
+        stratum_of = np.searchsorted(boundary_cents, amounts, side="right")
+
+        sample: List[Dict] = []
+        strata = []
+        for s, interval in enumerate(intervals):
+            members = np.flatnonzero(~top & (stratum_of == s))
+            cumulative = np.cumsum(amounts[members])
+            total_cents = int(cumulative[-1]) if len(cumulative) else 0
+            interval_cents = float(interval) * 100
+
+            points = np.empty(0)
+            if total_cents > 0 and interval_cents > 0:
+                cells = int(math.ceil(total_cents / interval_cents))
+                offsets = rng.random(cells) if selection_method == "cell" else np.full(cells, rng.random())
+                points = (np.arange(cells) + offsets) * interval_cents
+                points = points[points <= total_cents]
+
+            hits = members[cls._locate_selections(cumulative, points)]
+            selected = [population[i] for i in order[hits]]
+            sample.extend(selected)
+            strata.append({
+                "stratum": s + 1,
+                "lower_bound": float(boundaries[s - 1]) if s > 0 else None,
+                "upper_bound": float(boundaries[s]) if s < len(boundaries) else None,
+                "sampling_interval": float(interval),
+                "population_items": int(len(members)),
+                "population_value": total_cents / 100,
+                "selection_points": int(len(points)),
+                "selected_items": len(selected),
+            })
+
+        top_value = int(amounts[top].sum()) / 100
+        return {
+            "method": "mus",
+            "selection_method": selection_method,
+            "sampling_interval": float(sampling_interval),
+            "population_items": len(population),
+            "population_value": int(amounts.sum()) / 100,
+            "top_stratum": top_items,
+            "top_stratum_items": len(top_items),
+            "top_stratum_value": top_value,
+            "sample": sample,
+            "sample_items": len(sample),
+            "strata": strata,
+            "seed": seed,
+        }
+
+    @staticmethod
+    def _sort_by_id(population: List[Dict]) -> np.ndarray:
+        """Stable order of population positions by item id."""
+        ids = [item["id"] for item in population]
+        try:
+            id_array = np.asarray(ids)
+            if id_array.dtype != object and id_array.ndim == 1:
+                return np.argsort(id_array, kind="stable")
+        except (TypeError, ValueError):
+            pass
+        return np.asarray(sorted(range(len(ids)), key=ids.__getitem__), dtype=np.intp)
+
+    @staticmethod
+    def _amounts_in_cents(population: List[Dict]) -> np.ndarray:
+        """Item amounts as int64 cents, parsed once."""
+        amounts = np.fromiter((float(item["amount"]) for item in population), dtype=np.float64, count=len(population))
+        return np.rint(amounts * 100).astype(np.int64)
+
+    @staticmethod
+    def _locate_selections(cumulative: np.ndarray, points: np.ndarray) -> np.ndarray:
+        """
+        Index of the item containing each selection point, de-duplicated.
+
+        The item containing a point is the first whose cumulative amount
+        reaches it; a running maximum keeps the search valid when negative
+        items make the cumulative column non-monotonic.
+        """
+        if not len(cumulative) or not len(points):
+            return np.empty(0, dtype=np.intp)
+        hits = np.searchsorted(np.maximum.accumulate(cumulative), points, side="left")
+        return np.unique(hits[hits < len(cumulative)])
 
     @classmethod
     def evaluate_sample(
@@ -4,6 +4,8 @@ Comprehensive Test Suite for Statistical Sampling Service
 Tests MUS, Classical Variables, and Attribute sampling methods.
 """
 
+import time
+
 import pytest
 from decimal import Decimal
 from typing import List, Dict
@@ -143,6 +145,126 @@ class TestMonetaryUnitSampling:
         for item in sample:
             assert item in population
 
+    def test_select_sample_fixed_start_hits(self):
+        """Test each selection point hits the item whose cumulative amount reaches it"""
+        population = [
+            {"id": 3, "amount": 3000},
+            {"id": 1, "amount": 1000},
+            {"id": 2, "amount": 2000},
+            {"id": 4, "amount": 500},
+        ]
+
+        # Sorted cumulative: 1000, 3000, 6000, 6500; points 500, 2500, 4500, 6500
+        sample = MonetaryUnitSampling.select_sample(
+            population=population,
+            sample_size=10,
+            sampling_interval=Decimal("2000"),
+            random_start=Decimal("500"),
+        )
+
+        assert [item["id"] for item in sample] == [1, 2, 3, 4]
+
+    def test_select_sample_deduplicates_large_items(self):
+        """Test an item spanning several selection points is selected once"""
+        population = [
+            {"id": 1, "amount": 100},
+            {"id": 2, "amount": 50000},
+            {"id": 3, "amount": 100},
+        ]
+
+        sample = MonetaryUnitSampling.select_sample(
+            population=population,
+            sample_size=10,
+            sampling_interval=Decimal("10000"),
+            random_start=Decimal("5000"),
+        )
+
+        assert [item["id"] for item in sample] == [2]
+
+    def test_select_sample_stratified_extracts_top_stratum(self):
+        """Test items at or above the interval are examined 100% and not resampled"""
+        population = [{"id": i, "amount": 100} for i in range(200)]
+        population += [{"id": 1000, "amount": 25000}, {"id": 1001, "amount": 5000}]
+
+        result = MonetaryUnitSampling.select_sample_stratified(
+            population=population,
+            sampling_interval=Decimal("5000"),
+            seed=42,
+        )
+
+        assert [item["id"] for item in result["top_stratum"]] == [1000, 1001]
+        assert result["top_stratum_value"] == 30000.0
+        assert all(item["id"] < 1000 for item in result["sample"])
+        # Remaining 20000 spread over 4 intervals
+        assert result["sample_items"] == 4
+
+    def test_select_sample_stratified_cell_selection(self):
+        """Test cell selection draws one item per interval cell, reproducibly"""
+        population = [{"id": i, "amount": 100} for i in range(1000)]
+
+        first = MonetaryUnitSampling.select_sample_stratified(
+            population=population,
+            sampling_interval=Decimal("1000"),
+            selection_method="cell",
+            seed=7,
+        )
+        second = MonetaryUnitSampling.select_sample_stratified(
+            population=population,
+            sampling_interval=Decimal("1000"),
+            selection_method="cell",
+            seed=7,
+        )
+
+        assert first["sample"] == second["sample"]
+        ids = [item["id"] for item in first["sample"]]
+        assert len(ids) == 100
+        assert [i // 10 for i in ids] == list(range(100))
+
+    def test_select_sample_stratified_amount_strata(self):
+        """Test each amount stratum is sampled with its own interval"""
+        population = [{"id": i, "amount": 10} for i in range(500)]
+        population += [{"id": 1000 + i, "amount": 900} for i in range(100)]
+
+        result = MonetaryUnitSampling.select_sample_stratified(
+            population=population,
+            sampling_interval=Decimal("1000"),
+            strata_boundaries=[Decimal("500")],
+            stratum_intervals=[Decimal("1000"), Decimal("9000")],
+            seed=1,
+        )
+
+        low, high = result["strata"]
+        assert low["population_items"] == 500
+        assert low["selected_items"] == 5
+        assert high["population_items"] == 100
+        assert high["selected_items"] == 10
+        assert result["sample_items"] == 15
+
+    def test_select_sample_stratified_invalid_method(self):
+        """Test unsupported selection methods are rejected"""
+        with pytest.raises(ValueError):
+            MonetaryUnitSampling.select_sample_stratified(
+                population=[{"id": 1, "amount": 100}],
+                sampling_interval=Decimal("50"),
+                selection_method="haphazard",
+            )
+
+    def test_select_sample_large_population(self):
+        """Test selection over a 2M-item population stays vectorized"""
+        population = [{"id": i, "amount": 100 + i % 900} for i in range(2_000_000)]
+
+        start = time.perf_counter()
+        sample = MonetaryUnitSampling.select_sample(
+            population=population,
+            sample_size=500,
+            sampling_interval=Decimal("2000000"),
+            random_start=Decimal("1000"),
+        )
+        elapsed = time.perf_counter() - start
+
+        assert len(sample) == 500
+        assert elapsed < 5
+
     def test_evaluate_sample_no_errors(self):
         """Test sample evaluation with no errors found"""
         sample_results = [
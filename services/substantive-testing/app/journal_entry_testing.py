@@ -14,13 +14,16 @@ especially focusing on entries that:
 """
 
 import logging
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from uuid import UUID
 
 import re
-from collections import Counter
+
+import numpy as np
+
+from .columnar import JETestExceptions, JETestingResults, JournalEntryFrame, factorize, time_of_day_microseconds
 
 logger = logging.getLogger(__name__)
 
@@ -62,6 +65,17 @@ class JournalEntryTestingService:
         "Cost of Goods Sold",
     ]
 
+    # Result keys of perform_comprehensive_je_testing and the test_failed value of each
+    TEST_NAMES = {
+        "round_dollar": "round_dollar",
+        "after_hours": "after_hours_posting",
+        "unusual_combinations": "unusual_account_combination",
+        "high_risk_accounts": "high_risk_account",
+        "period_end": "period_end_entry",
+        "manual_to_automated": "manual_entry_to_automated_account",
+        "authorization_bypass": "authorization_bypass",
+    }
+
     def __init__(self):
         """Initialize journal entry testing service."""
         self.business_hours_start = time(8, 0)  # 8:00 AM
@@ -364,6 +378,10 @@ class JournalEntryTestingService:
         """
         Perform all journal entry tests and return comprehensive results.
 
+        Runs the columnar tests (perform_columnar_je_testing) and expands the
+        flagged rows into the per-test entry dicts of the individual test_*
+        methods.
+
         Args:
             journal_entries: List of all journal entries to test
             period_end_date: Period end date for timing tests
@@ -372,45 +390,275 @@ class JournalEntryTestingService:
         Returns:
             Dictionary with test results by category and overall risk assessment
         """
-        results = {
-            "round_dollar": self.test_round_dollar_amounts(journal_entries),
-            "after_hours": self.test_after_hours_posting(journal_entries),
-            "unusual_combinations": self.test_unusual_account_combinations(
-                journal_entries, historical_combinations
-            ),
-            "high_risk_accounts": self.test_high_risk_accounts(journal_entries),
-            "period_end": self.test_period_end_entries(journal_entries, period_end_date),
-            "manual_to_automated": self.test_manual_entries_to_automated_accounts(journal_entries),
-            "authorization_bypass": self.test_authorization_bypass(journal_entries),
-        }
+        columnar_results = self.perform_columnar_je_testing(
+            journal_entries, period_end_date, historical_combinations
+        )
+        return self.columnar_results_to_dicts(columnar_results)
 
-        # Calculate overall statistics
-        total_entries = len(journal_entries)
-        total_exceptions = sum(len(exceptions) for exceptions in results.values())
-        exception_rate = total_exceptions / total_entries if total_entries > 0 else 0
+    def perform_columnar_je_testing(
+        self,
+        journal_entries: Union[List[Dict], JournalEntryFrame],
+        period_end_date: datetime,
+        historical_combinations: Optional[List[Tuple[str, str]]] = None,
+        round_dollar_threshold: Decimal = Decimal("10000"),
+        approval_required_threshold: Decimal = Decimal("50000"),
+        days_before_end: int = 3,
+    ) -> JETestingResults:
+        """
+        Perform all journal entry tests as vectorized masks over a columnar frame.
 
-        # Identify high-risk entries (appearing in multiple tests)
-        entry_id_counter = Counter()
-        for test_results in results.values():
-            for entry in test_results:
-                entry_id = entry.get("id")
-                if entry_id:
-                    entry_id_counter[entry_id] += 1
+        Entries are converted to a JournalEntryFrame once; each of the seven
+        tests is a boolean mask over it, and multi-test hits are counted per
+        entry id with a single bincount. Exceptions are row positions into the
+        frame, so nothing is copied per flagged entry.
 
-        high_risk_entry_ids = [
-            entry_id for entry_id, count in entry_id_counter.items() if count >= 2
-        ]
+        Args:
+            journal_entries: Journal entry dicts, or a frame already built from them
+            period_end_date: Period end date for timing tests
+            historical_combinations: Historical account combinations for comparison
 
-        results["summary"] = {
+        Returns:
+            JETestingResults; columnar_results_to_dicts gives the dict output
+        """
+        frame = journal_entries if isinstance(journal_entries, JournalEntryFrame) else JournalEntryFrame(journal_entries)
+        masks, risk_scores = self._columnar_test_masks(
+            frame,
+            period_end_date,
+            historical_combinations or [],
+            float(round_dollar_threshold),
+            float(approval_required_threshold),
+            days_before_end,
+        )
+
+        exceptions = {}
+        for test_key, mask in masks.items():
+            rows = np.flatnonzero(mask)
+            exceptions[test_key] = JETestExceptions(
+                test_name=self.TEST_NAMES[test_key],
+                rows=rows,
+                risk_scores=risk_scores[test_key][rows],
+            )
+
+        hit_counts = np.sum(list(masks.values()), axis=0, dtype=np.int64) if len(frame) else np.zeros(0, dtype=np.int64)
+
+        total_entries = len(frame)
+        total_exceptions = int(hit_counts.sum())
+        exception_rate = total_exceptions / total_entries if total_entries > 0 else 0
+        high_risk_entry_ids = self._multi_test_entry_ids(frame, masks, hit_counts)
+
+        summary = {
             "total_entries_tested": total_entries,
             "total_exceptions": total_exceptions,
             "exception_rate": round(exception_rate, 4),
             "high_risk_entries": len(high_risk_entry_ids),
             "high_risk_entry_ids": high_risk_entry_ids,
-            "tests_performed": list(results.keys()),
+            "tests_performed": list(masks.keys()),
         }
 
-        return results
+        return JETestingResults(
+            frame=frame,
+            exceptions=exceptions,
+            hit_counts=hit_counts,
+            summary=summary,
+            parameters={
+                "period_end_date": period_end_date,
+                "approval_required_threshold": approval_required_threshold,
+            },
+        )
+
+    def columnar_results_to_dicts(self, results: JETestingResults) -> Dict[str, List[Dict]]:
+        """
+        Expand columnar results into the dict output of the test_* methods.
+
+        Only flagged rows are materialized, each as a copy of its source entry
+        with the fields the corresponding test_* method adds.
+        """
+        frame = results.frame
+        output: Dict[str, List[Dict]] = {}
+
+        for test_key, exceptions in results.exceptions.items():
+            rows = exceptions.rows.tolist()
+            details = self._exception_details(test_key, frame, exceptions.rows, results.parameters)
+            output[test_key] = [
+                {
+                    **frame.entry(row),
+                    "test_failed": exceptions.test_name,
+                    "risk_score": risk_score,
+                    **row_details,
+                }
+                for row, risk_score, row_details in zip(rows, exceptions.risk_scores.tolist(), details)
+            ]
+
+        output["summary"] = results.summary
+        return output
+
+    # Columnar helpers
+
+    def _columnar_test_masks(
+        self,
+        frame: JournalEntryFrame,
+        period_end_date: datetime,
+        historical_combinations: List[Tuple[str, str]],
+        round_dollar_threshold: float,
+        approval_required_threshold: float,
+        days_before_end: int,
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """Boolean mask and per-row risk score of each test."""
+        n = len(frame)
+        abs_amounts = frame.abs_amounts
+        is_manual = frame.entry_type_is("manual")
+        high_risk_match = frame.first_account_match(self.HIGH_RISK_ACCOUNTS) < len(self.HIGH_RISK_ACCOUNTS)
+
+        # Round dollar: whole-dollar part ends in 00 with at least five digits
+        whole_dollars = np.trunc(abs_amounts)
+        round_dollar = (
+            (abs_amounts >= round_dollar_threshold)
+            & (whole_dollars >= 10000)
+            & (np.fmod(whole_dollars, 100) == 0)
+        )
+        round_dollar_risk = 0.3 + np.where(is_manual, 0.2, 0.0)
+        round_dollar_risk = round_dollar_risk + np.where(abs_amounts > 100000, 0.2, 0.0)
+        round_dollar_risk = np.minimum(round_dollar_risk + np.where(high_risk_match, 0.2, 0.0), 1.0)
+
+        # After hours: weekends, or outside [business_hours_start, business_hours_end]
+        has_posted = frame.has_posted
+        time_of_day = frame.time_of_day
+        is_weekend = has_posted & (frame.weekday >= 5)
+        is_after_hours = has_posted & (
+            (time_of_day < time_of_day_microseconds(self.business_hours_start))
+            | (time_of_day > time_of_day_microseconds(self.business_hours_end))
+        )
+
+        # Period end: posted within days_before_end of period_end_date
+        period_end = np.datetime64(period_end_date.replace(tzinfo=None), "us")
+        cutoff = np.datetime64(
+            (period_end_date - timedelta(days=days_before_end)).replace(tzinfo=None), "us"
+        )
+        period_end_mask = has_posted & (frame.posted >= cutoff) & (frame.posted <= period_end)
+
+        masks = {
+            "round_dollar": round_dollar,
+            "after_hours": is_weekend | is_after_hours,
+            "unusual_combinations": ~frame.account_pairs_in(historical_combinations),
+            "high_risk_accounts": high_risk_match,
+            "period_end": period_end_mask,
+            "manual_to_automated": (
+                frame.entry_type_is("manual", "adjusting")
+                & (frame.first_account_match(self.AUTOMATED_ACCOUNTS) < len(self.AUTOMATED_ACCOUNTS))
+            ),
+            "authorization_bypass": (abs_amounts >= approval_required_threshold) & ~frame.approved,
+        }
+        risk_scores = {
+            "round_dollar": round_dollar_risk,
+            "after_hours": np.where(is_weekend, 0.6, 0.4),
+            "unusual_combinations": np.full(n, 0.5),
+            "high_risk_accounts": np.full(n, 0.4),
+            "period_end": np.where(is_manual, 0.6, 0.4),
+            "manual_to_automated": np.full(n, 0.7),
+            "authorization_bypass": np.full(n, 0.8),
+        }
+        return masks, risk_scores
+
+    def _multi_test_entry_ids(
+        self,
+        frame: JournalEntryFrame,
+        masks: Dict[str, np.ndarray],
+        hit_counts: np.ndarray,
+    ) -> List:
+        """
+        Entry ids failing two or more tests, in order of first exception.
+
+        Hits are summed per id (lines of one journal entry share an id) with a
+        single bincount over the flagged rows. Rows without an id are skipped.
+        """
+        flagged = np.flatnonzero(hit_counts)
+        if not len(flagged):
+            return []
+
+        entries = frame.entries
+        unique_ids, (codes,) = factorize([entries[row].get("id") for row in flagged.tolist()])
+        id_hits = np.bincount(codes, weights=hit_counts[flagged], minlength=len(unique_ids))
+
+        # Exceptions are listed test by test, rows in order within a test
+        first_test = np.argmax(np.stack([mask[flagged] for mask in masks.values()]), axis=0)
+        first_seen = np.full(len(unique_ids), np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(first_seen, codes, first_test.astype(np.int64) * len(frame) + flagged)
+
+        return [
+            unique_ids[code]
+            for code in np.argsort(first_seen, kind="stable").tolist()
+            if id_hits[code] >= 2 and unique_ids[code]
+        ]
+
+    def _exception_details(
+        self,
+        test_key: str,
+        frame: JournalEntryFrame,
+        rows: np.ndarray,
+        parameters: Dict,
+    ) -> List[Dict]:
+        """Fields the test_* method of test_key adds to each flagged row."""
+        entries = [frame.entry(row) for row in rows.tolist()]
+
+        if test_key == "round_dollar":
+            is_manual = frame.entry_type_is("manual")[rows].tolist()
+            is_large = (frame.abs_amounts[rows] > 100000).tolist()
+            high_risk = frame.first_account_match(self.HIGH_RISK_ACCOUNTS)[rows].tolist()
+            return [
+                {"risk_factors": self._round_number_factors(manual, large, risk_index)}
+                for manual, large, risk_index in zip(is_manual, is_large, high_risk)
+            ]
+
+        if test_key in ("after_hours", "period_end"):
+            posted = [entry.get("posted_datetime") for entry in entries]
+            posted = [datetime.fromisoformat(posted_dt) if isinstance(posted_dt, str) else posted_dt for posted_dt in posted]
+
+            if test_key == "period_end":
+                period_end_date = parameters["period_end_date"]
+                return [{"days_before_period_end": (period_end_date - posted_dt).days} for posted_dt in posted]
+
+            is_weekend = (frame.weekday[rows] >= 5).tolist()
+            time_of_day = frame.time_of_day[rows]
+            is_after_hours = (
+                (time_of_day < time_of_day_microseconds(self.business_hours_start))
+                | (time_of_day > time_of_day_microseconds(self.business_hours_end))
+            ).tolist()
+            return [
+                {"is_weekend": weekend, "is_after_hours": after_hours, "posted_datetime": posted_dt.isoformat()}
+                for weekend, after_hours, posted_dt in zip(is_weekend, is_after_hours, posted)
+            ]
+
+        if test_key == "unusual_combinations":
+            reason = "Account combination not seen in historical data"
+            return [
+                {
+                    "debit_account": entry.get("debit_account", ""),
+                    "credit_account": entry.get("credit_account", ""),
+                    "reason": reason,
+                }
+                for entry in entries
+            ]
+
+        if test_key == "authorization_bypass":
+            required_approval_amount = float(parameters["approval_required_threshold"])
+            return [{"required_approval_amount": required_approval_amount} for _ in entries]
+
+        return [{} for _ in entries]
+
+    def _round_number_factors(self, is_manual: bool, is_large: bool, high_risk_index: int) -> List[str]:
+        """_get_round_number_factors from precomputed flags."""
+        factors = ["Round dollar amount"]
+
+        if is_manual:
+            factors.append("Manual entry")
+
+        if is_large:
+            factors.append("Large amount (>$100,000)")
+
+        if high_risk_index < len(self.HIGH_RISK_ACCOUNTS):
+            factors.append(f"Affects high-risk account ({self.HIGH_RISK_ACCOUNTS[high_risk_index]})")
+
+        return factors
 
     # Helper methods
 
@@ -470,5 +718,3 @@ class JournalEntryTestingService:
 
         return factors
 
-
-from datetime import timedelta  # Add this import at top
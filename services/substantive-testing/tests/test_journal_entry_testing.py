@@ -96,6 +96,48 @@ class TestJournalEntryTesting:
         assert results["summary"]["total_exceptions"] > 0
         assert len(results["summary"]["tests_performed"]) == 7
 
+    def test_columnar_testing_matches_individual_tests(self, je_service, sample_entries):
+        """Columnar run flags the same rows as each test_* method"""
+        period_end = datetime(2025, 12, 31)
+
+        results = je_service.perform_columnar_je_testing(sample_entries, period_end, historical_combinations=[])
+
+        individual = {
+            "round_dollar": je_service.test_round_dollar_amounts(sample_entries),
+            "after_hours": je_service.test_after_hours_posting(sample_entries),
+            "unusual_combinations": je_service.test_unusual_account_combinations(sample_entries, []),
+            "high_risk_accounts": je_service.test_high_risk_accounts(sample_entries),
+            "period_end": je_service.test_period_end_entries(sample_entries, period_end),
+            "manual_to_automated": je_service.test_manual_entries_to_automated_accounts(sample_entries),
+            "authorization_bypass": je_service.test_authorization_bypass(sample_entries),
+        }
+        for test_key, expected in individual.items():
+            exceptions = results.exceptions[test_key]
+            assert [sample_entries[row]["id"] for row in exceptions.rows] == [e["id"] for e in expected]
+            assert exceptions.risk_scores.tolist() == [e["risk_score"] for e in expected]
+
+        assert je_service.columnar_results_to_dicts(results) == {**individual, "summary": results.summary}
+        assert results.hit_counts.tolist() == [5, 2, 7]
+        assert results.summary["high_risk_entry_ids"] == ["JE001", "JE003", "JE002"]
+
+    def test_multi_test_hits_counted_per_entry_id(self, je_service):
+        """Lines sharing a journal entry id add up towards the multi-test threshold"""
+        lines = [
+            {"id": "JE100", "amount": 75123.45, "debit_account": "Prepaid Rent", "credit_account": "Cash",
+             "posted_datetime": "2025-06-02T10:00:00", "entry_type": "automated", "approved_by": None},
+            {"id": "JE100", "amount": 1250.5, "debit_account": "Prepaid Rent", "credit_account": "Cash",
+             "posted_datetime": "2025-06-07T10:00:00", "entry_type": "automated", "approved_by": "cfo"},
+            {"id": "JE200", "amount": 1250.5, "debit_account": "Prepaid Rent", "credit_account": "Cash",
+             "posted_datetime": "2025-06-03T10:00:00", "entry_type": "automated", "approved_by": "cfo"},
+        ]
+
+        results = je_service.perform_columnar_je_testing(
+            lines, datetime(2025, 6, 30), historical_combinations=[("Prepaid Rent", "Cash")]
+        )
+
+        assert results.hit_counts.tolist() == [1, 1, 0]
+        assert results.summary["high_risk_entry_ids"] == ["JE100"]
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,204 @@
+"""
+Unit tests for pooled service clients, request coalescing and batch calls
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from lib.service_client.client import ServiceClient
+from lib.service_client.pool import ConnectionPoolRegistry, SingleFlight, _PooledClient
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    """Every test starts without pooled clients"""
+    ConnectionPoolRegistry._clients.clear()
+    yield
+    ConnectionPoolRegistry._clients.clear()
+
+
+def install_upstream(service_name, handler):
+    """Pool a client for service_name that answers with handler instead of the network"""
+    limits = httpx.Limits(max_connections=10, max_keepalive_connections=5)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    pooled = _PooledClient(client, limits, False, asyncio.get_running_loop())
+    ConnectionPoolRegistry._clients[service_name] = pooled
+    return pooled
+
+
+class TestSingleFlight:
+    """Coalescing of concurrent identical calls"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", fn) for _ in range(5)))
+
+        assert calls == 1
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+        assert {result for result, _ in results} == {"result"}
+
+    @pytest.mark.asyncio
+    async def test_leader_failure_reaches_followers_and_is_not_cached(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def fail():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+        assert calls == 1
+        assert all(isinstance(result, ValueError) for result in results)
+
+        async def succeed():
+            return "recovered"
+
+        assert await flight.do("key", succeed) == ("recovered", False)
+
+    @pytest.mark.asyncio
+    async def test_leader_cancellation_does_not_cancel_followers(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return calls
+
+        leader = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flight.do("key", fn)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        # One follower re-ran fn; the others shared its result
+        assert calls == 2
+        assert sorted(results) == [(2, False), (2, True), (2, True)]
+
+    @pytest.mark.asyncio
+    async def test_follower_cancellation_leaves_leader_running(self):
+        flight = SingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.02)
+            return "result"
+
+        leader = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0)
+
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        assert await leader == ("result", False)
+
+
+class TestConnectionPoolRegistry:
+    """One pooled client per service and event loop"""
+
+    def test_client_reused_on_one_loop_and_replaced_on_another(self):
+        async def get_twice():
+            first = ConnectionPoolRegistry.get("identity")
+            second = ConnectionPoolRegistry.get("identity")
+            return first, second
+
+        first, second = asyncio.run(get_twice())
+        assert first is second
+
+        # A new loop (e.g. a worker's asyncio.run) cannot use the old loop's client
+        third, _ = asyncio.run(get_twice())
+        assert third is not first
+        assert third.loop is not first.loop
+
+    @pytest.mark.asyncio
+    async def test_closed_client_is_replaced(self):
+        first = ConnectionPoolRegistry.get("identity")
+        await first.client.aclose()
+
+        assert ConnectionPoolRegistry.get("identity") is not first
+
+    @pytest.mark.asyncio
+    async def test_aclose_closes_clients_of_running_loop(self):
+        pooled = ConnectionPoolRegistry.get("identity")
+
+        await ConnectionPoolRegistry.aclose()
+
+        assert pooled.client.is_closed
+        assert ConnectionPoolRegistry.stats() == {}
+
+
+class TestServiceClient:
+    """Coalesced GETs and batch calls through a pooled client"""
+
+    @pytest.mark.asyncio
+    async def test_identical_gets_are_coalesced(self):
+        seen = []
+
+        async def handler(request):
+            seen.append(request.url.path)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"id": 1})
+
+        pooled = install_upstream("identity", handler)
+        client = ServiceClient("identity")
+
+        results = await asyncio.gather(*(client.get("/users/1") for _ in range(4)))
+
+        assert seen == ["/users/1"]
+        assert results == [{"id": 1}] * 4
+        assert pooled.stats.coalesced == 3
+        assert client.pool_stats()["requests"] == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_keeps_order_and_bounds_concurrency(self):
+        in_flight = peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if request.url.path == "/missing":
+                return httpx.Response(404)
+            return httpx.Response(200, json={"path": request.url.path, "method": request.method})
+
+        install_upstream("identity", handler)
+        client = ServiceClient("identity")
+        calls = [{"endpoint": f"/items/{n}"} for n in range(6)]
+        calls += [{"method": "post", "endpoint": "/items", "json": {"n": 1}}, {"endpoint": "/missing"}]
+
+        results = await client.batch(calls, concurrency=2)
+
+        assert peak == 2
+        assert results[:6] == [{"path": f"/items/{n}", "method": "GET"} for n in range(6)]
+        assert results[6] == {"path": "/items", "method": "POST"}
+        assert isinstance(results[7], Exception)
+
+    @pytest.mark.asyncio
+    async def test_batch_rejects_unknown_method(self):
+        client = ServiceClient("identity")
+
+        [result] = await client.batch([{"method": "PATCH", "endpoint": "/items/1"}])
+
+        assert isinstance(result, ValueError)